@@ -7,6 +7,7 @@ const API_BASE_URL =
     ? "http://localhost:3001"
     : "";
 let eventSource = null;
+let lastEventId = null; // id do último evento SSE recebido (replay na reconexão)
 let results = [];
 let stats = {
   total: 0,
@@ -247,7 +248,9 @@ document.addEventListener("DOMContentLoaded", async () => {
   await initializeApp();
 });
 
-async function initializeApp() {
+// Histórico recente (carga inicial ou quando o replay SSE não cobre o intervalo perdido).
+// Placar, sequências, cooldown e conexão chegam pelo evento SSE `state`.
+async function loadSnapshot() {
   try {
     const resp = await fetch(`${API_BASE_URL}/api/results?limit=50`);
     const data = await resp.json();
@@ -257,39 +260,23 @@ async function initializeApp() {
       } catch (e) {}
     }
   } catch (e) {}
-  try {
-    const sresp = await fetch(`${API_BASE_URL}/api/signal_stats`);
-    const sdata = await sresp.json();
-    if (sdata && sdata.ok) {
-      try {
-        winCount = parseInt(sdata.wins || 0);
-        lossCount = parseInt(sdata.losses || 0);
-        lastWinTimestamp = sdata.lastWinTime || null;
-        lastLossTimestamp = sdata.lastLossTime || null;
-        try {
-          if (lastWinTimestamp) setLastTimeDom("win", lastWinTimestamp);
-          if (lastLossTimestamp) setLastTimeDom("loss", lastLossTimestamp);
-        } catch (e) {}
-      } catch (e) {}
-    }
-  } catch (e) {}
-  
-  // Buscar estatísticas de sequências de wins
-  try {
-    await fetchWinStreaks();
-  } catch (e) {}
+}
+
+async function resyncFromSnapshot() {
+  await loadSnapshot();
+  updateStats();
+  renderResults();
+}
+
+async function initializeApp() {
+  await loadSnapshot();
   
   // Buscar dicas de padrões (melhor e pior)
   try {
     await loadPatternTips();
   } catch (e) {}
   
-  // Iniciar verificação de cooldown
-  try {
-    checkCooldownStatus();
-    setInterval(checkCooldownStatus, 5000); // Verificar a cada 5 segundos
-  } catch (e) {}
-  
+  // Cooldown, placar e sequências: snapshot inicial e mudanças via SSE (`state`)
   connectSSE();
   updateStats();
   // Mostrar estado inicial de busca
@@ -609,72 +596,99 @@ async function logout() {
   window.location.href = "/auth";
 }
 
-// Verificar status do cooldown e atualizar banner
-async function checkCooldownStatus() {
-  try {
-    const resp = await fetch(`${API_BASE_URL}/api/cooldown_status?platform=playnabet`);
-    const data = await resp.json();
-    
-    const banner = document.getElementById("cooldownBanner");
-    const timer = document.getElementById("cooldownTimer");
-    
-    if (!banner || !timer) return;
-    
-    if (data.ok && data.active) {
-      // Cooldown ativo - mostrar banner
-      banner.style.display = "block";
-      
-      const remainingSecs = data.remaining_secs;
-      const mins = Math.floor(remainingSecs / 60);
-      const secs = remainingSecs % 60;
-      timer.textContent = `${mins}:${secs.toString().padStart(2, '0')}`;
-      
-      // Atualizar a cada segundo enquanto ativo
-      if (!window.cooldownInterval) {
-        window.cooldownInterval = setInterval(() => {
-          const currentText = timer.textContent;
-          const parts = currentText.split(':');
-          if (parts.length === 2) {
-            let m = parseInt(parts[0]) || 0;
-            let s = parseInt(parts[1]) || 0;
-            
-            if (s > 0) {
-              s--;
-            } else if (m > 0) {
-              m--;
-              s = 59;
-            } else {
-              // Tempo acabou
-              clearInterval(window.cooldownInterval);
-              window.cooldownInterval = null;
-              banner.style.display = "none";
-              return;
-            }
-            
-            timer.textContent = `${m}:${s.toString().padStart(2, '0')}`;
+// Atualizar banner de cooldown a partir dos segundos restantes (0 = inativo)
+function renderCooldown(remainingSecs) {
+  const banner = document.getElementById("cooldownBanner");
+  const timer = document.getElementById("cooldownTimer");
+
+  if (!banner || !timer) return;
+
+  if (remainingSecs > 0) {
+    // Cooldown ativo - mostrar banner
+    banner.style.display = "block";
+
+    const mins = Math.floor(remainingSecs / 60);
+    const secs = remainingSecs % 60;
+    timer.textContent = `${mins}:${secs.toString().padStart(2, '0')}`;
+
+    // Atualizar a cada segundo enquanto ativo
+    if (!window.cooldownInterval) {
+      window.cooldownInterval = setInterval(() => {
+        const currentText = timer.textContent;
+        const parts = currentText.split(':');
+        if (parts.length === 2) {
+          let m = parseInt(parts[0]) || 0;
+          let s = parseInt(parts[1]) || 0;
+
+          if (s > 0) {
+            s--;
+          } else if (m > 0) {
+            m--;
+            s = 59;
+          } else {
+            // Tempo acabou
+            clearInterval(window.cooldownInterval);
+            window.cooldownInterval = null;
+            banner.style.display = "none";
+            return;
           }
-        }, 1000);
-      }
-    } else {
-      // Cooldown não ativo - esconder banner
-      banner.style.display = "none";
-      if (window.cooldownInterval) {
-        clearInterval(window.cooldownInterval);
-        window.cooldownInterval = null;
-      }
+
+          timer.textContent = `${m}:${s.toString().padStart(2, '0')}`;
+        }
+      }, 1000);
+    }
+  } else {
+    // Cooldown não ativo - esconder banner
+    banner.style.display = "none";
+    if (window.cooldownInterval) {
+      clearInterval(window.cooldownInterval);
+      window.cooldownInterval = null;
     }
-  } catch (e) {
-    console.error("Erro ao verificar cooldown:", e);
   }
 }
 
+// Aplicar o estado empurrado pelo servidor (evento SSE `state`)
+function applyServerState(payload) {
+  const st = payload.data || {};
+  // Tempo restante calculado pelo servidor no envio; a contagem segue localmente
+  const remainingMs = Math.max(0, payload.cooldownRemainingMs || 0);
+  renderCooldown(Math.floor(remainingMs / 1000));
+
+  updateConnectionStatus(!!st.connected);
+  modo_stop = !!st.modoStop;
+  stop_counter = st.stopCounter || 0;
+
+  winCount = parseInt(st.wins || 0);
+  lossCount = parseInt(st.losses || 0);
+  lastWinTimestamp = st.lastWinTime || null;
+  lastLossTimestamp = st.lastLossTime || null;
+  try {
+    if (lastWinTimestamp) setLastTimeDom("win", lastWinTimestamp);
+    if (lastLossTimestamp) setLastTimeDom("loss", lastLossTimestamp);
+  } catch (e) {}
+  const winsEl = document.getElementById("statWins");
+  const lossesEl = document.getElementById("statLosses");
+  const winsPctEl = document.getElementById("statWinsPct");
+  if (winsEl) winsEl.textContent = String(winCount);
+  if (lossesEl) lossesEl.textContent = String(lossCount);
+  if (winsPctEl) {
+    const total = (winCount || 0) + (lossCount || 0);
+    const pct = total > 0 ? Math.round((winCount / total) * 100) : 0;
+    winsPctEl.textContent = `${pct}%`;
+  }
+
+  renderWinStreaks(st);
+}
+
 // Conexão SSE
 function connectSSE() {
   if (eventSource) {
     eventSource.close();
   }
 
-  eventSource = new EventSource(`${API_BASE_URL}/events`);
+  // Reconexão manual: o servidor reenvia os eventos perdidos desde lastEventId
+  const query = lastEventId ? `?lastEventId=${encodeURIComponent(lastEventId)}` : "";
+  eventSource = new EventSource(`${API_BASE_URL}/events${query}`);
 
   eventSource.addEventListener("status", (event) => {
     const data = JSON.parse(event.data);
@@ -682,6 +696,7 @@ function connectSSE() {
   });
 
   eventSource.addEventListener("double_result", (event) => {
+    if (event.lastEventId) lastEventId = event.lastEventId;
     const payload = JSON.parse(event.data);
     if (payload.type === "double_result" && payload.data) {
       handleNewResult(payload.data);
@@ -689,18 +704,32 @@ function connectSSE() {
   });
 
   eventSource.addEventListener("signal", (event) => {
+    if (event.lastEventId) lastEventId = event.lastEventId;
     const payload = JSON.parse(event.data);
     if (payload.type === "signal" && payload.data) {
       handleBackendSignal(payload.data);
     }
   });
   eventSource.addEventListener("bet_result", (event) => {
+    if (event.lastEventId) lastEventId = event.lastEventId;
     const payload = JSON.parse(event.data);
     if (payload.type === "bet_result" && payload.data) {
       handleBetResult(payload.data);
     }
   });
 
+  eventSource.addEventListener("state", (event) => {
+    const payload = JSON.parse(event.data);
+    if (payload.type === "state") {
+      applyServerState(payload);
+    }
+  });
+
+  // Eventos perdidos já saíram do buffer do servidor: recarregar o snapshot
+  eventSource.addEventListener("resync", () => {
+    resyncFromSnapshot();
+  });
+
   eventSource.addEventListener("ping", (event) => {
     // Heartbeat - manter conexão viva
     console.log("Ping recebido");
@@ -1063,55 +1092,47 @@ function getConsecutiveSignalLosses() {
   return { count, lastSequenceTs };
 }
 
-// Fetch and update win streak statistics
-async function fetchWinStreaks() {
-  try {
-    const resp = await fetch(`${API_BASE_URL}/api/win_streaks`);
-    const data = await resp.json();
-    if (data && data.ok) {
-      // Update DOM elements
-      const currentStreakEl = document.getElementById("currentWinStreak");
-      const maxStreakEl = document.getElementById("maxWinStreak");
-      const avgWinsEl = document.getElementById("avgWinsBetweenLosses");
-      const lastWinStreakEl = document.getElementById("lastWinStreak");
-      const lastWinStreakHistoryEl = document.getElementById("lastWinStreakHistory");
-      
-      if (currentStreakEl) currentStreakEl.textContent = String(data.currentStreak || 0);
-      if (maxStreakEl) maxStreakEl.textContent = String(data.maxStreak || 0);
-      
-      if (avgWinsEl) {
-          if (data.totalStreaks === 0) {
-              avgWinsEl.textContent = "-";
-          } else {
-              avgWinsEl.textContent = String(data.averageWinsBetweenLosses || "0.00");
-          }
-      }
-      
-      // Mostrar última sequência de wins (última sequência finalizada)
-      const streakHistory = data.streakHistory || [];
-      if (lastWinStreakEl) {
-        if (streakHistory.length > 0) {
-          const lastStreak = streakHistory[streakHistory.length - 1];
-          lastWinStreakEl.textContent = `${lastStreak} wins`;
-        } else {
-          lastWinStreakEl.textContent = "-";
-        }
-      }
-      
-      // Mostrar mini-histórico das últimas 5 sequências
-      if (lastWinStreakHistoryEl) {
-        if (streakHistory.length > 0) {
-          // Pegar até as últimas 5 sequências
-          const recentStreaks = streakHistory.slice(-5);
-          const historyStr = recentStreaks.join(" → ");
-          lastWinStreakHistoryEl.textContent = `Últimas: ${historyStr}`;
-        } else {
-          lastWinStreakHistoryEl.textContent = "Histórico: -";
-        }
+// Atualizar estatísticas de sequências de wins (dados do evento SSE `state`)
+function renderWinStreaks(data) {
+  // Update DOM elements
+  const currentStreakEl = document.getElementById("currentWinStreak");
+  const maxStreakEl = document.getElementById("maxWinStreak");
+  const avgWinsEl = document.getElementById("avgWinsBetweenLosses");
+  const lastWinStreakEl = document.getElementById("lastWinStreak");
+  const lastWinStreakHistoryEl = document.getElementById("lastWinStreakHistory");
+  
+  if (currentStreakEl) currentStreakEl.textContent = String(data.currentStreak || 0);
+  if (maxStreakEl) maxStreakEl.textContent = String(data.maxStreak || 0);
+  
+  if (avgWinsEl) {
+      if (data.totalStreaks === 0) {
+          avgWinsEl.textContent = "-";
+      } else {
+          avgWinsEl.textContent = String(data.averageWinsBetweenLosses || "0.00");
       }
+  }
+  
+  // Mostrar última sequência de wins (última sequência finalizada)
+  const streakHistory = data.streakHistory || [];
+  if (lastWinStreakEl) {
+    if (streakHistory.length > 0) {
+      const lastStreak = streakHistory[streakHistory.length - 1];
+      lastWinStreakEl.textContent = `${lastStreak} wins`;
+    } else {
+      lastWinStreakEl.textContent = "-";
+    }
+  }
+  
+  // Mostrar mini-histórico das últimas 5 sequências
+  if (lastWinStreakHistoryEl) {
+    if (streakHistory.length > 0) {
+      // Pegar até as últimas 5 sequências
+      const recentStreaks = streakHistory.slice(-5);
+      const historyStr = recentStreaks.join(" → ");
+      lastWinStreakHistoryEl.textContent = `Últimas: ${historyStr}`;
+    } else {
+      lastWinStreakHistoryEl.textContent = "Histórico: -";
     }
-  } catch (e) {
-    console.error("Error fetching win streaks:", e);
   }
 }
 
@@ -1246,10 +1267,7 @@ function updateWinLossCounts(outcome, signalId, resolvedAt = null) {
     winsPctEl.textContent = `${pct}%`;
   }
 
-  // Atualizar estatísticas de sequências de wins
-  try {
-    fetchWinStreaks();
-  } catch (e) {}
+  // Sequências de wins chegam no evento SSE `state` publicado após a resolução
 
   // Atualizar perdas consecutivas
   try {
@@ -2000,19 +2018,6 @@ function getNumbersForColor(color) {
   return [];
 }
 
-// Verificar status do servidor periodicamente
-setInterval(async () => {
-  try {
-    const response = await fetch(`${API_BASE_URL}/api/status`);
-    const data = await response.json();
-    if (data.ok) {
-      updateConnectionStatus(data.wsConnected);
-    }
-  } catch (error) {
-    console.error("Erro ao verificar status:", error);
-    updateConnectionStatus(false);
-  }
-}, 5000);
 
 // Configurações de Alertas
 const _btnSettings = document.getElementById("btnSettings");
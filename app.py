@@ -2,7 +2,7 @@
 DBcolor - Servidor principal
 Aplicação FastAPI para análise de padrões do Double
 """
-from fastapi import FastAPI, Request, Depends
+from fastapi import FastAPI, Request, Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse, FileResponse, HTMLResponse
 import asyncio
@@ -11,18 +11,26 @@ import time
 import os
 from dotenv import load_dotenv
 load_dotenv()
-import traceback
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from services.ws_client import WSClient
 from services.parser import parse_double_payload
-from services.double import detect_best_double_signal
-from services.double import numbers_for_color
-from services.adaptive_calibration import update_pattern_stat, online_update_platt
+from services.sse_broadcaster import SSEBroadcaster, format_sse
+from services.serialization import FastJSONResponse
+from services.response_cache import ResponseCache
+from services.write_behind import WriteBehind
+from services.bulk_writer import BufferedInserter
+from services.static_assets import StaticAssets
+from services.table_pipeline import TablePipeline, TableRegistry
+from services.playnabet_pipeline import PlayNaBetPipeline
+from services.shared_ring import SharedFeed
+from services.leader import LeaderElection
+from services import stats_queries, stats_rollups
+from services.adaptive_calibration import start_store, close_store, reset_store
 from config import CONFIG
 from db import init_db
 import db as db_module
-from routes.auth import router as auth_router, get_current_user, get_admin_user
+from routes.auth import router as auth_router, get_current_user, get_admin_user, activity_log_writer, user_cache
 # Import do motor de padrões simples (opcional)
 try:
     from services.pattern_signals import SignalEngine
@@ -32,7 +40,7 @@ except Exception:
     USE_PATTERN_ENGINE = False
     pattern_engine = None
 
-app = FastAPI(title="DBcolor API", version="1.0.0")
+app = FastAPI(title="DBcolor API", version="1.0.0", default_response_class=FastJSONResponse)
 
 # Print de confirmação ao carregar o módulo
 print("=" * 60)
@@ -63,197 +71,132 @@ try:
 except Exception as e:
     print("⚠️ Could not initialize MongoDB:", e)
 
-# Estado global
-results_history: List[Dict] = []
-ws_connection: WSClient = None
-ws_connected = False
-event_clients: List[asyncio.Queue] = []
-# Martingale: bets pending (signals still being verified for win/loss)
-pending_bets: List[Dict] = []
-sinais_perdidos_por_pausa = 0
-compensation_remaining = 0
-
-# Cooldown (server-side)
-COOLDOWN_BASIC = 4
-COOLDOWN_AFTER_LOSS = 8
-# Anti-tilt: pausa após perdas fortes consecutivas
-ANTI_TILT_LOSS_STREAK = 2
-STOP_DURATION_ROUNDS = 12
-MIN_COOLDOWN_AFTER_WIN = 3
-GLOBAL_WINDOW_ROUNDS = 30
-GLOBAL_MAX_ALERTS = 4
-
 # Cooldown baseado em tempo após loss (em minutos)
 LOSS_COOLDOWN_MINUTES = 5
-loss_cooldown_until = 0  # Timestamp (ms) até quando o cooldown está ativo
-
-cooldown_contador = 0
-perdas_consecutivas = 0
-modo_stop = False
-stop_counter = 0
-modo_conservador = False
-historico_alertas: List[Dict] = []
-round_index = 0
-signal_stats = {
-    "alta": {"total": 0, "acertos": 0, "taxa": 0.0},
-    "media": {"total": 0, "acertos": 0, "taxa": 0.0},
-    "baixa": {"total": 0, "acertos": 0, "taxa": 0.0},
-    "geral": {"total": 0, "acertos": 0, "taxa": 0.0}
-}
-sinais_perdidos_por_pausa = 0
-compensation_remaining = 0
-sinais_emitidos_hoje = 0
-meta_sinais_dia = 100
-last_win_ts = None
-last_loss_ts = None
-# Rastreamento de sequências de wins entre losses
-win_streak_history = []  # Lista de sequências de wins entre losses
-current_win_streak = 0
-max_win_streak = 0
-signal_outcome_history = []  # Lista de outcomes {'outcome': 'win'|'loss', 'ts': timestamp}
-
-def decrementar_cooldown():
-    global modo_stop, stop_counter, cooldown_contador, perdas_consecutivas
-    if modo_stop:
-        stop_counter = max(0, stop_counter - 1)
-        if stop_counter == 0:
-            modo_stop = False
-            perdas_consecutivas = 0
-            try:
-                global compensation_remaining, sinais_perdidos_por_pausa
-                compensation_remaining = sinais_perdidos_por_pausa
-                sinais_perdidos_por_pausa = 0
-            except Exception:
-                pass
+
+# Mesa PlayNaBet: histórico, features, governador de alertas, pendentes e stats
+playnabet_table = PlayNaBetPipeline(
+    "playnabet",
+    lambda handler: WSClient(CONFIG.WS_URL, handler, queue_size=CONFIG.WS_QUEUE_SIZE, overflow=CONFIG.WS_OVERFLOW_POLICY),
+    pattern_engine,
+    history_size=CONFIG.RESULTS_HISTORY_SIZE,
+    source="playnabets",
+    loss_cooldown_ms=LOSS_COOLDOWN_MINUTES * 60 * 1000,
+    martingale=CONFIG.MARTINGALE_ENABLED,
+    max_attempts=CONFIG.MARTINGALE_MAX_ATTEMPTS,
+    block_while_pending=CONFIG.BLOCK_SIGNALS_WHILE_PENDING,
+    on_resolved=lambda bet, result: save_signal_to_history(bet, result, bet.get("attemptsUsed", 0), "playnabet"),
+    broadcaster=SSEBroadcaster(
+        "playnabet",
+        replay_size=CONFIG.SSE_REPLAY_SIZE,
+        max_queue=CONFIG.SSE_MAX_QUEUE,
+        max_lag_seconds=CONFIG.SSE_MAX_LAG_SECONDS,
+    ),
+)
+# Nomes usados pelos scripts (mesmos objetos da mesa)
+results_history = playnabet_table.history
+pending_bets = playnabet_table.pending_bets
+event_broadcaster = playnabet_table.broadcaster
+double_features = playnabet_table.features
+pattern_stream = playnabet_table.stream
+playnabet_state = playnabet_table.state
+on_message = playnabet_table.on_message
+# Mesas do processo: as duas legadas + pipelines de CONFIG.TABLES
+table_registry = TableRegistry()
+table_registry.add(playnabet_table, autostart=False)
+# Replicação de eventos SSE e histórico entre workers (CONFIG.WORKER_ROLE)
+shared_feed = SharedFeed(CONFIG.SHM_NAME, CONFIG.SHM_EVENT_SLOTS, CONFIG.SHM_SLOT_SIZE,
+                         result_slots=max(1024, CONFIG.RESULTS_HISTORY_SIZE * 8))
+shared_feed.add_channel("playnabet", event_broadcaster, results_history)
+
+# WORKER_ROLE=auto: o líder (trava de arquivo) é o produtor, os demais consomem
+leader = LeaderElection(CONFIG.LEADER_LOCK_PATH)
+
+
+def last_event_id(request: Request) -> Optional[str]:
+    """Header do EventSource ou `?lastEventId=` (reconexão manual no front)"""
+    return request.headers.get("last-event-id") or request.query_params.get("lastEventId")
+
+
+def is_ingestor() -> bool:
+    """Este processo conecta nas fontes, detecta sinais e persiste?"""
+    if CONFIG.WORKER_ROLE == "auto":
+        return leader.is_leader
+    return CONFIG.WORKER_ROLE != "consumer"
+# Cache das respostas de /api/stats/* (invalidado por versão de plataforma)
+stats_cache = ResponseCache(CONFIG.STATS_CACHE_SIZE, CONFIG.STATS_CACHE_TTL_SECONDS)
+
+
+def invalidate_stats(platform: str):
+    """Invalidar /api/stats/* da plataforma neste worker e nos demais"""
+    stats_cache.bump(platform)
+    shared_feed.publish_control({"op": "stats_bump", "platform": platform})
+
+
+def apply_control(msg: Dict):
+    """Mensagens de controle de outro worker (via anel compartilhado)"""
+    op = msg.get("op")
+    if op == "stats_bump":
+        stats_cache.bump(msg.get("platform"))
+    elif op == "stats_clear":
+        stats_cache.clear()
+    elif op == "user_invalidate":
+        user_cache.invalidate(msg.get("email"), propagate=False)
+    elif not is_ingestor():
         return
-    if cooldown_contador > 0:
-        cooldown_contador = max(0, cooldown_contador - 1)
-
-def ativar_cooldown(tipo: str):
-    global cooldown_contador, modo_conservador, modo_stop, stop_counter
-    if tipo == "basico":
-        cooldown_contador = COOLDOWN_BASIC
-    elif tipo == "perda":
-        cooldown_contador = COOLDOWN_AFTER_LOSS
-        modo_conservador = True
-    elif tipo == "stop":
-        modo_stop = True
-        stop_counter = STOP_DURATION_ROUNDS
-        cooldown_contador = 0
-
-def verificar_cooldown() -> bool:
-    return (not modo_stop) and cooldown_contador == 0
-
-def registrar_alerta():
-    global historico_alertas
-    historico_alertas.append({"ts": int(time.time() * 1000), "round": round_index})
-    if len(historico_alertas) > 200:
-        historico_alertas = historico_alertas[-200:]
-
-def contar_alertas_na_janela() -> int:
-    min_round = max(0, round_index - GLOBAL_WINDOW_ROUNDS + 1)
-    return len([a for a in historico_alertas if a.get("round", 0) >= min_round])
-
-def pode_emitir_alerta() -> bool:
-    if modo_stop:
-        return False
-    if cooldown_contador > 0:
-        return False
-    if contar_alertas_na_janela() >= GLOBAL_MAX_ALERTS:
-        return False
-    return True
-
-def registrar_resultado(acertou: bool):
-    global cooldown_contador, perdas_consecutivas, modo_conservador
-    if acertou:
-        cooldown_contador = max(MIN_COOLDOWN_AFTER_WIN, cooldown_contador // 2)
-        perdas_consecutivas = 0
-        modo_conservador = False
-    else:
-        perdas_consecutivas += 1
-        ativar_cooldown("perda")
-        if perdas_consecutivas >= ANTI_TILT_LOSS_STREAK:
-            ativar_cooldown("stop")
-
-def registrar_resultado_sinal(confianca: str, acertou: bool):
-    global current_win_streak, max_win_streak, win_streak_history, signal_outcome_history
-    try:
-        lbl = confianca if confianca in ("alta", "media", "baixa") else "media"
-        signal_stats[lbl]["total"] = signal_stats[lbl].get("total", 0) + 1
-        signal_stats["geral"]["total"] = signal_stats["geral"].get("total", 0) + 1
-        if acertou:
-            signal_stats[lbl]["acertos"] = signal_stats[lbl].get("acertos", 0) + 1
-            signal_stats["geral"]["acertos"] = signal_stats["geral"].get("acertos", 0) + 1
-            # Rastrear sequências de wins
-            current_win_streak += 1
-            if current_win_streak > max_win_streak:
-                max_win_streak = current_win_streak
-        else:
-            # Quando perde, salvar a sequência atual (se houver) e resetar
-            if current_win_streak > 0:
-                win_streak_history.append(current_win_streak)
-                # Manter apenas últimas 100 sequências
-                if len(win_streak_history) > 100:
-                    win_streak_history = win_streak_history[-100:]
-            current_win_streak = 0
-        
-        # Adicionar ao histórico de outcomes
-        signal_outcome_history.append({
-            'outcome': 'win' if acertou else 'loss',
-            'ts': int(time.time() * 1000)
-        })
-        # Manter apenas últimos 100 outcomes
-        if len(signal_outcome_history) > 100:
-            signal_outcome_history = signal_outcome_history[-100:]
-        
-        calcular_taxas()
-        
-        # Salvar no banco de dados de forma assíncrona
-        try:
-            asyncio.create_task(save_stats_to_db())
-        except Exception:
-            pass
-    except Exception:
-        pass
+    elif op == "admin_reset":
+        return reset_state()
+    elif op == "state_sync":
+        # Consumidor recém-anexado: republicar o estado de todas as mesas
+        for table in table_registry.tables.values():
+            table.state.refresh(force=True)
 
-def calcular_taxas():
-    try:
-        for k in ("alta", "media", "baixa", "geral"):
-            tot = signal_stats[k].get("total", 0)
-            ac = signal_stats[k].get("acertos", 0)
-            signal_stats[k]["taxa"] = round((ac / tot) * 100, 2) if tot > 0 else 0.0
-    except Exception:
-        pass
 
-def obter_estatisticas() -> Dict:
-    return signal_stats
+shared_feed.on_control = apply_control
+user_cache.listener = lambda email: shared_feed.publish_control({"op": "user_invalidate", "email": email})
+
+
+def table_state(table: TablePipeline) -> Dict:
+    """Estado da mesa: o replicado do líder num consumidor, o local no líder"""
+    replicated = shared_feed.last_payload(table.name, "state")
+    if replicated is not None:
+        return replicated["data"]
+    return table.state_snapshot()
+
+
+def state_bootstrap(table: TablePipeline) -> bytes:
+    """Frame `state` inicial montado agora (no consumidor, a partir do estado replicado)"""
+    return table.state.bootstrap(table_state(table))
+
+
+def table_stats_persister(table: TablePipeline, doc_id: str) -> WriteBehind:
+    """Escrita coalescida do documento de stats da mesa (no máximo uma em andamento)"""
+    async def save():
+        # Erros sobem para o WriteBehind repetir
+        if db_module.db is None:
+            return
+        doc = table.to_doc()
+        doc["_id"] = doc_id
+        await db_module.db.stats.update_one({"_id": doc_id}, {"$set": doc}, upsert=True)
 
-async def save_stats_to_db():
-    """Salva estatísticas no MongoDB para persistência"""
+    table.persister = WriteBehind(doc_id, save, CONFIG.STATS_WRITE_WINDOW_SECONDS)
+    return table.persister
+
+
+async def load_table_stats(table: TablePipeline, doc_id: str):
+    """Carrega estatísticas e últimos resultados da mesa do MongoDB na inicialização"""
     try:
         if db_module.db is None:
             return
-        
-        stats_doc = {
-            "_id": "global_stats",
-            "signal_stats": signal_stats,
-            "last_win_ts": last_win_ts,
-            "last_loss_ts": last_loss_ts,
-            "current_win_streak": current_win_streak,
-            "max_win_streak": max_win_streak,
-            "win_streak_history": win_streak_history[-100:],  # últimas 100
-            "signal_outcome_history": signal_outcome_history[-100:],  # últimas 100
-            "results_history": results_history[-50:],  # Persistir últimos 50 resultados
-            "updated_at": int(time.time() * 1000)
-        }
-        
-        await db_module.db.stats.update_one(
-            {"_id": "global_stats"},
-            {"$set": stats_doc},
-            upsert=True
-        )
+        doc = await db_module.db.stats.find_one({"_id": doc_id})
+        if doc:
+            table.load_doc(doc)
+            print(f"✅ [{table.name}] Estatísticas carregadas do DB: {len(table.win_streak_history)} streaks, max: {table.max_win_streak}, results: {len(table.history)}")
     except Exception as e:
-        print(f"Erro ao salvar stats no DB: {e}")
+        print(f"[{table.name}] Erro ao carregar stats do DB: {e}")
+
+
+stats_persister = table_stats_persister(playnabet_table, "global_stats")
 
 async def save_signal_to_history(signal_data: Dict, result: str, attempts_used: int, platform: str = "playnabet"):
     """
@@ -295,44 +238,32 @@ async def save_signal_to_history(signal_data: Dict, result: str, attempts_used:
             "confLabel": signal_data.get('confLabel', 'media')
         }
         
-        await db_module.db.signal_history.insert_one(history_doc)
-        print(f"[Stats] Sinal salvo no histórico: {platform} {result} ({signal_data.get('patternKey')}) - {dt_brazil.strftime('%H:%M')}")
+        # Gravado em lote (insert_many) pelo signal_history_writer
+        signal_history_writer.add(history_doc)
+        print(f"[Stats] Sinal enviado ao histórico: {platform} {result} ({signal_data.get('patternKey')}) - {dt_brazil.strftime('%H:%M')}")
     except Exception as e:
         print(f"Erro ao salvar sinal no histórico: {e}")
 
+async def after_signal_history_flush(docs: List[Dict]):
+    """Após cada lote gravado: rollups e invalidação do cache de stats"""
+    try:
+        # Contadores pré-agregados usados pelos endpoints /api/stats/*
+        await stats_rollups.record_many(db_module.db, docs)
+    finally:
+        # Dados novos: invalidar respostas em cache das plataformas do lote
+        for platform in {d.get("platform") for d in docs}:
+            invalidate_stats(platform)
+
+signal_history_writer = BufferedInserter(
+    "signal_history",
+    lambda: db_module.db.signal_history if db_module.db is not None else None,
+    max_batch=CONFIG.BULK_INSERT_BATCH,
+    max_delay_seconds=CONFIG.BULK_INSERT_DELAY_SECONDS,
+    max_buffer=CONFIG.BULK_INSERT_MAX_BUFFER,
+    on_flush=after_signal_history_flush,
+)
 
 
-async def load_stats_from_db():
-    """Carrega estatísticas do MongoDB na inicialização"""
-    global signal_stats, last_win_ts, last_loss_ts, current_win_streak, max_win_streak, win_streak_history, signal_outcome_history, results_history
-    try:
-        if db_module.db is None:
-            return
-        
-        stats_doc = await db_module.db.stats.find_one({"_id": "global_stats"})
-        if stats_doc:
-            signal_stats.update(stats_doc.get("signal_stats", {}))
-            last_win_ts = stats_doc.get("last_win_ts")
-            last_loss_ts = stats_doc.get("last_loss_ts")
-            current_win_streak = stats_doc.get("current_win_streak", 0)
-            max_win_streak = stats_doc.get("max_win_streak", 0)
-            win_streak_history = stats_doc.get("win_streak_history", [])
-            signal_outcome_history = stats_doc.get("signal_outcome_history", [])
-            # Carregar histórico de resultados se existir
-            loaded_results = stats_doc.get("results_history", [])
-            if loaded_results:
-                results_history = loaded_results
-            
-            # Verificação de consistência: Total de Wins não pode ser menor que Sequência Atual
-            total_wins = signal_stats["geral"].get("acertos", 0)
-            if current_win_streak > total_wins:
-                print(f"⚠️ Inconsistência detectada: Streak ({current_win_streak}) > Total Wins ({total_wins}). Corrigindo Total Wins.")
-                signal_stats["geral"]["acertos"] = current_win_streak
-                signal_stats["geral"]["total"] = max(signal_stats["geral"].get("total", 0), current_win_streak)
-                
-            print(f"✅ Estatísticas carregadas do DB: {len(win_streak_history)} streaks, max: {max_win_streak}, results: {len(results_history)}")
-    except Exception as e:
-        print(f"Erro ao carregar stats do DB: {e}")
 
 @app.get("/", response_class=HTMLResponse)
 async def root(request: Request):
@@ -345,19 +276,14 @@ async def root(request: Request):
         return HTMLResponse(content="", status_code=302, headers={"Location": "/auth"})
 
     # Usuário autenticado, servir VeraBet HTML (página principal)
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    html_path = os.path.join(base_dir, "verabet.html")
-    
-    print(f"🌐 Requisição para / - Servindo VeraBet de: {html_path}")
+    html_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "verabet.html")
     
-    if os.path.exists(html_path):
-        try:
-            with open(html_path, "r", encoding="utf-8") as f:
-                html_content = f.read()
-            print("✅ VeraBet HTML servido com sucesso!")
-            return HTMLResponse(content=html_content)
-        except Exception as e:
-            print(f"❌ Erro ao ler HTML: {e}")
+    try:
+        response = static_assets.response(request, "verabet.html")
+        if response is not None:
+            return response
+    except Exception as e:
+        print(f"❌ Erro ao ler HTML: {e}")
     
     # Fallback: retornar HTML de erro se arquivo não existir
     error_html = f"""
@@ -385,7 +311,7 @@ async def api_info():
             "status": {"method": "GET", "path": "/api/status", "description": "Status da conexão"},
         },
         "status": {
-            "ws_connected": ws_connected,
+            "ws_connected": table_state(playnabet_table)["connected"],
             "results_count": len(results_history),
             "timestamp": int(time.time() * 1000),
         }
@@ -394,11 +320,27 @@ async def api_info():
 # Servir arquivos estáticos
 base_dir = os.path.dirname(__file__)
 
+# Páginas e assets lidos uma vez, com variantes gzip/brotli, ETag e URLs com hash
+# (DEV=1 recarrega quando os arquivos mudam)
+static_assets = StaticAssets(os.path.dirname(os.path.abspath(__file__)), dev_reload=CONFIG.STATIC_DEV_RELOAD)
+for _name, _media_type in (
+    ("verabet.html", "text/html; charset=utf-8"),
+    ("index.html", "text/html; charset=utf-8"),
+    ("auth.html", "text/html; charset=utf-8"),
+    ("admin.html", "text/html; charset=utf-8"),
+    ("stats.html", "text/html; charset=utf-8"),
+    ("app.js", "application/javascript"),
+    ("verabet_app.js", "application/javascript"),
+    ("stats.js", "application/javascript"),
+    ("styles.css", "text/css"),
+):
+    static_assets.register(_name, _name, _media_type)
+
 @app.get("/styles.css")
-async def styles():
-    css_path = os.path.join(base_dir, "styles.css")
-    if os.path.exists(css_path):
-        return FileResponse(css_path, media_type="text/css")
+async def styles(request: Request):
+    response = static_assets.response(request, "styles.css")
+    if response is not None:
+        return response
     return {"error": "File not found"}, 404
 
 @app.get("/favicon.ico")
@@ -410,26 +352,24 @@ async def favicon():
 
 
 @app.get("/auth", response_class=HTMLResponse)
-async def auth_page():
-    html_path = os.path.join(base_dir, "auth.html")
-    if os.path.exists(html_path):
-        with open(html_path, "r", encoding="utf-8") as f:
-            return HTMLResponse(content=f.read())
+async def auth_page(request: Request):
+    response = static_assets.response(request, "auth.html")
+    if response is not None:
+        return response
     return HTMLResponse("<h1>Auth page not found</h1>", status_code=404)
 
 @app.get("/admin", response_class=HTMLResponse)
-async def admin_page():
-    html_path = os.path.join(base_dir, "admin.html")
-    if os.path.exists(html_path):
-        with open(html_path, "r", encoding="utf-8") as f:
-            return HTMLResponse(content=f.read())
+async def admin_page(request: Request):
+    response = static_assets.response(request, "admin.html")
+    if response is not None:
+        return response
     return HTMLResponse("<h1>Admin page not found</h1>", status_code=404)
 
 @app.get("/app.js")
-async def app_js():
-    js_path = os.path.join(base_dir, "app.js")
-    if os.path.exists(js_path):
-        return FileResponse(js_path, media_type="application/javascript")
+async def app_js(request: Request):
+    response = static_assets.response(request, "app.js")
+    if response is not None:
+        return response
     return {"error": "File not found"}, 404
 
 @app.get("/stats", response_class=HTMLResponse)
@@ -440,26 +380,35 @@ async def stats_page(request: Request):
     except Exception:
         return HTMLResponse(content="", status_code=302, headers={"Location": "/auth"})
     
-    html_path = os.path.join(base_dir, "stats.html")
-    if os.path.exists(html_path):
-        with open(html_path, "r", encoding="utf-8") as f:
-            return HTMLResponse(content=f.read())
+    response = static_assets.response(request, "stats.html")
+    if response is not None:
+        return response
     return HTMLResponse("<h1>Stats page not found</h1>", status_code=404)
 
 @app.get("/stats.js")
-async def stats_js():
-    js_path = os.path.join(base_dir, "stats.js")
-    if os.path.exists(js_path):
-        return FileResponse(js_path, media_type="application/javascript")
+async def stats_js(request: Request):
+    response = static_assets.response(request, "stats.js")
+    if response is not None:
+        return response
     return {"error": "File not found"}, 404
 
 @app.get("/api/status")
 async def status():
     """Status da conexão WebSocket"""
+    client = playnabet_table.client
     return {
         "ok": True,
-        "wsConnected": ws_connected,
+        "wsConnected": table_state(playnabet_table)["connected"],
         "hasToken": False,
+        "pipeline": client.stats() if client is not None else None,
+        "sse": event_broadcaster.stats(),
+        "statsCache": stats_cache.stats(),
+        "statsWrites": stats_persister.stats(),
+        "sharedFeed": shared_feed.stats(),
+        "statePushes": playnabet_state.stats(),
+        "leader": leader.stats() if CONFIG.WORKER_ROLE == "auto" else None,
+        "bulkWrites": {"signal_history": signal_history_writer.stats(), "activity_logs": activity_log_writer.stats()},
+        "userCache": user_cache.stats(),
         "timestamp": int(time.time() * 1000)
     }
 
@@ -469,7 +418,7 @@ async def api_get_results(limit: int = 20):
     """Retorna os últimos resultados processados (úteis para troubleshooting)."""
     return {
         "ok": True,
-        "wsConnected": ws_connected,
+        "wsConnected": table_state(playnabet_table)["connected"],
         "results_count": len(results_history),
         "results": results_history[:limit],
     }
@@ -477,16 +426,13 @@ async def api_get_results(limit: int = 20):
 @app.get("/api/signal_stats")
 async def api_signal_stats():
     try:
-        geral = signal_stats.get("geral", {})
-        total = int(geral.get("total", 0))
-        acertos = int(geral.get("acertos", 0))
-        perdas = max(0, total - acertos)
+        state = table_state(playnabet_table)
         return {
             "ok": True,
-            "wins": acertos,
-            "losses": perdas,
-            "lastWinTime": last_win_ts,
-            "lastLossTime": last_loss_ts,
+            "wins": state["wins"],
+            "losses": state["losses"],
+            "lastWinTime": state["lastWinTime"],
+            "lastLossTime": state["lastLossTime"],
         }
     except Exception as e:
         return {"ok": False, "error": str(e)}
@@ -496,11 +442,8 @@ async def api_cooldown_status(platform: str = "playnabet"):
     """Retorna o status do cooldown após loss"""
     try:
         current_ts = int(time.time() * 1000)
-        
-        if platform == "verabet":
-            cooldown_until = verabet_loss_cooldown_until
-        else:
-            cooldown_until = loss_cooldown_until
+        table = verabet_table if platform == "verabet" else playnabet_table
+        cooldown_until = table_state(table)["lossCooldownUntil"]
         
         is_active = cooldown_until > 0 and current_ts < cooldown_until
         remaining_ms = max(0, cooldown_until - current_ts) if is_active else 0
@@ -521,18 +464,14 @@ async def api_cooldown_status(platform: str = "playnabet"):
 async def api_win_streaks():
     """Retorna estatísticas de sequências de wins entre losses"""
     try:
-        # Calcular média de wins entre losses
-        avg_wins = 0.0
-        if len(win_streak_history) > 0:
-            avg_wins = sum(win_streak_history) / len(win_streak_history)
-        
+        state = table_state(playnabet_table)
         return {
             "ok": True,
-            "currentStreak": current_win_streak,
-            "maxStreak": max_win_streak,
-            "averageWinsBetweenLosses": round(avg_wins, 2),
-            "streakHistory": win_streak_history[-10:] if len(win_streak_history) > 0 else [],
-            "totalStreaks": len(win_streak_history)
+            "currentStreak": state["currentStreak"],
+            "maxStreak": state["maxStreak"],
+            "averageWinsBetweenLosses": state["averageWinsBetweenLosses"],
+            "streakHistory": state["streakHistory"],
+            "totalStreaks": state["totalStreaks"]
         }
     except Exception as e:
         return {"ok": False, "error": str(e)}
@@ -579,323 +518,169 @@ async def api_signal_resolve(request: Request):
 # ============================================================
 
 @app.get("/api/stats/overview")
-async def api_stats_overview(platform: str = "all", days: int = 30, maxAttempts: int = 3):
+async def api_stats_overview(request: Request, platform: str = "all", days: int = 30, maxAttempts: int = 3):
     """Retorna estatísticas gerais para o dashboard"""
-    try:
-        if db_module.db is None:
-            return {"ok": False, "error": "Database not connected"}
-        
-        # Filtrar por período
-        from datetime import datetime, timedelta
-        cutoff = datetime.now() - timedelta(days=days)
-        cutoff_ts = int(cutoff.timestamp() * 1000)
-        
-        query = {"createdAt": {"$gte": cutoff_ts}}
-        if platform != "all":
-            query["platform"] = platform
-        
-        signals = await db_module.db.signal_history.find(query).to_list(length=10000)
-        
-        total = len(signals)
-        # Recalcular wins considerando maxAttempts
-        # Se um win foi obtido com mais tentativas do que maxAttempts, ele vira loss
-        wins = 0
-        for s in signals:
-            if s.get("result") == "win":
-                attempts_used = s.get("attemptsUsed", 1)
-                if attempts_used <= maxAttempts:
-                    wins += 1
-        
-        losses = total - wins
-        rate = round((wins / total * 100), 2) if total > 0 else 0
+    async def compute():
+        try:
+            if db_module.db is None:
+                return {"ok": False, "error": "Database not connected"}
         
-        # ROI simulado (aposta R$10, retorno 2x no win)
-        # ROI = ((wins * 20) - (total * 10)) / (total * 10) * 100
-        roi = round(((wins * 20) - (total * 10)) / (total * 10) * 100, 2) if total > 0 else 0
+            # Win obtido com mais tentativas do que maxAttempts conta como loss (ajuste feito na agregação)
+            source = await stats_rollups.source(db_module.db)
+            overview = await stats_queries.overview(source, platform, days, maxAttempts)
         
-        return {
-            "ok": True,
-            "total": total,
-            "wins": wins,
-            "losses": losses,
-            "rate": rate,
-            "roi": roi,
-            "platform": platform,
-            "days": days,
-            "maxAttempts": maxAttempts
-        }
-    except Exception as e:
-        return {"ok": False, "error": str(e)}
+            return {
+                "ok": True,
+                **overview,
+                "platform": platform,
+                "days": days,
+                "maxAttempts": maxAttempts
+            }
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+
+    return await stats_cache.respond(request, platform, {"days": days, "maxAttempts": maxAttempts}, compute)
 
 @app.get("/api/stats/by-hour")
-async def api_stats_by_hour(platform: str = "all", days: int = 30, maxAttempts: int = 3):
+async def api_stats_by_hour(request: Request, platform: str = "all", days: int = 30, maxAttempts: int = 3):
     """Retorna taxa de acerto por hora do dia"""
-    try:
-        if db_module.db is None:
-            return {"ok": False, "error": "Database not connected"}
-        
-        from datetime import datetime, timedelta
-        cutoff = datetime.now() - timedelta(days=days)
-        cutoff_ts = int(cutoff.timestamp() * 1000)
-        
-        query = {"createdAt": {"$gte": cutoff_ts}}
-        if platform != "all":
-            query["platform"] = platform
-        
-        signals = await db_module.db.signal_history.find(query).to_list(length=10000)
-        
-        # Agrupar por hora
-        by_hour = {}
-        for h in range(24):
-            by_hour[h] = {"total": 0, "wins": 0}
-        
-        for s in signals:
-            hour = s.get("hour", 0)
-            by_hour[hour]["total"] += 1
-            # Considerar win apenas se attemptsUsed <= maxAttempts
-            if s.get("result") == "win":
-                attempts_used = s.get("attemptsUsed", 1)
-                if attempts_used <= maxAttempts:
-                    by_hour[hour]["wins"] += 1
+    async def compute():
+        try:
+            if db_module.db is None:
+                return {"ok": False, "error": "Database not connected"}
         
-        # Calcular taxas
-        result = []
-        for hour in range(24):
-            data = by_hour[hour]
-            rate = round((data["wins"] / data["total"] * 100), 2) if data["total"] > 0 else 0
-            result.append({
-                "hour": hour,
-                "total": data["total"],
-                "wins": data["wins"],
-                "rate": rate
-            })
+            source = await stats_rollups.source(db_module.db)
+            result = await stats_queries.by_hour(source, platform, days, maxAttempts)
         
-        return {"ok": True, "data": result}
-    except Exception as e:
-        return {"ok": False, "error": str(e)}
+            return {"ok": True, "data": result}
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+
+    return await stats_cache.respond(request, platform, {"days": days, "maxAttempts": maxAttempts}, compute)
 
 @app.get("/api/stats/by-pattern")
-async def api_stats_by_pattern(platform: str = "all", days: int = 30, maxAttempts: int = 3):
+async def api_stats_by_pattern(request: Request, platform: str = "all", days: int = 30, maxAttempts: int = 3):
     """Retorna taxa de acerto por padrão detectado"""
-    try:
-        if db_module.db is None:
-            return {"ok": False, "error": "Database not connected"}
-        
-        from datetime import datetime, timedelta
-        cutoff = datetime.now() - timedelta(days=days)
-        cutoff_ts = int(cutoff.timestamp() * 1000)
-        
-        query = {"createdAt": {"$gte": cutoff_ts}}
-        if platform != "all":
-            query["platform"] = platform
-        
-        signals = await db_module.db.signal_history.find(query).to_list(length=10000)
-        
-        # Agrupar por padrão
-        by_pattern = {}
-        for s in signals:
-            pattern = s.get("patternKey", "unknown")
-            if pattern not in by_pattern:
-                by_pattern[pattern] = {"total": 0, "wins": 0}
-            by_pattern[pattern]["total"] += 1
-            # Considerar win apenas se attemptsUsed <= maxAttempts
-            if s.get("result") == "win":
-                attempts_used = s.get("attemptsUsed", 1)
-                if attempts_used <= maxAttempts:
-                    by_pattern[pattern]["wins"] += 1
-        
-        # Calcular taxas e ordenar por total
-        result = []
-        for pattern, data in by_pattern.items():
-            rate = round((data["wins"] / data["total"] * 100), 2) if data["total"] > 0 else 0
-            result.append({
-                "pattern": pattern,
-                "total": data["total"],
-                "wins": data["wins"],
-                "rate": rate
-            })
+    async def compute():
+        try:
+            if db_module.db is None:
+                return {"ok": False, "error": "Database not connected"}
         
-        result.sort(key=lambda x: x["total"], reverse=True)
+            source = await stats_rollups.source(db_module.db)
+            result = await stats_queries.by_pattern(source, platform, days, maxAttempts)
         
-        return {"ok": True, "data": result}
-    except Exception as e:
-        return {"ok": False, "error": str(e)}
+            return {"ok": True, "data": result}
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+
+    return await stats_cache.respond(request, platform, {"days": days, "maxAttempts": maxAttempts}, compute)
 
 @app.get("/api/stats/pattern-tips")
-async def api_stats_pattern_tips(platform: str = "all", days: int = 7, min_signals: int = 5):
+async def api_stats_pattern_tips(request: Request, platform: str = "all", days: int = 7, min_signals: int = 5):
     """Retorna dicas de padrões: o melhor e o pior (com mínimo de sinais)"""
-    try:
-        if db_module.db is None:
-            return {"ok": False, "error": "Database not connected"}
-        
-        from datetime import datetime, timedelta
-        cutoff = datetime.now() - timedelta(days=days)
-        cutoff_ts = int(cutoff.timestamp() * 1000)
+    async def compute():
+        try:
+            if db_module.db is None:
+                return {"ok": False, "error": "Database not connected"}
         
-        query = {"createdAt": {"$gte": cutoff_ts}}
-        if platform != "all":
-            query["platform"] = platform
+            # Sem ajuste por maxAttempts; apenas padrões com mínimo de sinais
+            source = await stats_rollups.source(db_module.db)
+            by_pattern = await stats_queries.by_pattern(source, platform, days, None)
+            patterns_with_rate = [p for p in by_pattern if p["total"] >= min_signals]
         
-        signals = await db_module.db.signal_history.find(query).to_list(length=10000)
+            if not patterns_with_rate:
+                return {
+                    "ok": True,
+                    "best": None,
+                    "worst": None,
+                    "message": f"Poucos dados (mínimo {min_signals} sinais por padrão)"
+                }
         
-        # Agrupar por padrão
-        by_pattern = {}
-        for s in signals:
-            pattern = s.get("patternKey", "unknown")
-            if pattern not in by_pattern:
-                by_pattern[pattern] = {"total": 0, "wins": 0}
-            by_pattern[pattern]["total"] += 1
-            if s.get("result") == "win":
-                by_pattern[pattern]["wins"] += 1
+            # Ordenar por taxa
+            patterns_with_rate.sort(key=lambda x: x["rate"], reverse=True)
         
-        # Calcular taxas (apenas padrões com mínimo de sinais)
-        patterns_with_rate = []
-        for pattern, data in by_pattern.items():
-            if data["total"] >= min_signals:
-                rate = round((data["wins"] / data["total"] * 100), 2)
-                patterns_with_rate.append({
-                    "pattern": pattern,
-                    "total": data["total"],
-                    "wins": data["wins"],
-                    "rate": rate
-                })
+            best = patterns_with_rate[0]
+            worst = patterns_with_rate[-1]
         
-        if not patterns_with_rate:
             return {
                 "ok": True,
-                "best": None,
-                "worst": None,
-                "message": f"Poucos dados (mínimo {min_signals} sinais por padrão)"
+                "best": {
+                    "pattern": best["pattern"],
+                    "rate": best["rate"],
+                    "total": best["total"],
+                    "wins": best["wins"]
+                },
+                "worst": {
+                    "pattern": worst["pattern"],
+                    "rate": worst["rate"],
+                    "total": worst["total"],
+                    "wins": worst["wins"]
+                },
+                "days": days,
+                "platform": platform
             }
-        
-        # Ordenar por taxa
-        patterns_with_rate.sort(key=lambda x: x["rate"], reverse=True)
-        
-        best = patterns_with_rate[0]
-        worst = patterns_with_rate[-1]
-        
-        return {
-            "ok": True,
-            "best": {
-                "pattern": best["pattern"],
-                "rate": best["rate"],
-                "total": best["total"],
-                "wins": best["wins"]
-            },
-            "worst": {
-                "pattern": worst["pattern"],
-                "rate": worst["rate"],
-                "total": worst["total"],
-                "wins": worst["wins"]
-            },
-            "days": days,
-            "platform": platform
-        }
-    except Exception as e:
-        return {"ok": False, "error": str(e)}
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+
+    return await stats_cache.respond(request, platform, {"days": days, "min_signals": min_signals}, compute)
 
 @app.get("/api/stats/by-attempt")
-async def api_stats_by_attempt(platform: str = "all", days: int = 30, maxAttempts: int = 3):
+async def api_stats_by_attempt(request: Request, platform: str = "all", days: int = 30, maxAttempts: int = 3):
     """Retorna estatísticas de win/loss por número de tentativa (1ª, 2ª, 3ª)"""
-    try:
-        if db_module.db is None:
-            return {"ok": False, "error": "Database not connected"}
-        
-        from datetime import datetime, timedelta
-        cutoff = datetime.now() - timedelta(days=days)
-        cutoff_ts = int(cutoff.timestamp() * 1000)
-        
-        query = {"createdAt": {"$gte": cutoff_ts}, "result": "win"}
-        if platform != "all":
-            query["platform"] = platform
-        
-        # Buscar apenas wins (losses são sempre na última tentativa)
-        wins = await db_module.db.signal_history.find(query).to_list(length=10000)
-        
-        # Contar por tentativa (apenas até maxAttempts)
-        attempts = {1: 0, 2: 0, 3: 0}
-        for w in wins:
-            att = w.get("attemptsUsed", 1)
-            if att in attempts and att <= maxAttempts:
-                attempts[att] += 1
+    async def compute():
+        try:
+            if db_module.db is None:
+                return {"ok": False, "error": "Database not connected"}
         
-        total_wins = sum(attempts[i] for i in range(1, maxAttempts + 1))
+            # Wins por tentativa (apenas até maxAttempts) e total de sinais numa só agregação
+            source = await stats_rollups.source(db_module.db)
+            counts = await stats_queries.by_attempt(source, platform, days, maxAttempts)
+            first, second, third = counts["first"], counts["second"], counts["third"]
         
-        # Total de sinais (incluindo losses)
-        total_query = {"createdAt": {"$gte": cutoff_ts}}
-        if platform != "all":
-            total_query["platform"] = platform
-        total_signals = await db_module.db.signal_history.count_documents(total_query)
-        total_losses = total_signals - total_wins
+            total_wins = first + second + third
+            total_signals = counts["total"]
+            total_losses = total_signals - total_wins
         
-        return {
-            "ok": True,
-            "data": {
-                "first_attempt": attempts[1],
-                "second_attempt": attempts[2] if maxAttempts >= 2 else 0,
-                "third_attempt": attempts[3] if maxAttempts >= 3 else 0,
-                "total_wins": total_wins,
-                "total_losses": total_losses,
-                "total_signals": total_signals
-            },
-            "percentages": {
-                "first": round((attempts[1] / total_wins * 100), 1) if total_wins > 0 else 0,
-                "second": round((attempts[2] / total_wins * 100), 1) if total_wins > 0 and maxAttempts >= 2 else 0,
-                "third": round((attempts[3] / total_wins * 100), 1) if total_wins > 0 and maxAttempts >= 3 else 0
-            },
-            "platform": platform,
-            "days": days,
-            "maxAttempts": maxAttempts
-        }
-    except Exception as e:
-        return {"ok": False, "error": str(e)}
+            return {
+                "ok": True,
+                "data": {
+                    "first_attempt": first,
+                    "second_attempt": second,
+                    "third_attempt": third,
+                    "total_wins": total_wins,
+                    "total_losses": total_losses,
+                    "total_signals": total_signals
+                },
+                "percentages": {
+                    "first": round((first / total_wins * 100), 1) if total_wins > 0 else 0,
+                    "second": round((second / total_wins * 100), 1) if total_wins > 0 and maxAttempts >= 2 else 0,
+                    "third": round((third / total_wins * 100), 1) if total_wins > 0 and maxAttempts >= 3 else 0
+                },
+                "platform": platform,
+                "days": days,
+                "maxAttempts": maxAttempts
+            }
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+
+    return await stats_cache.respond(request, platform, {"days": days, "maxAttempts": maxAttempts}, compute)
 
 @app.get("/api/stats/by-day")
-async def api_stats_by_day(platform: str = "all", days: int = 30, maxAttempts: int = 3):
+async def api_stats_by_day(request: Request, platform: str = "all", days: int = 30, maxAttempts: int = 3):
     """Retorna taxa de acerto por dia (para gráfico de linha)"""
-    try:
-        if db_module.db is None:
-            return {"ok": False, "error": "Database not connected"}
-        
-        from datetime import datetime, timedelta
-        cutoff = datetime.now() - timedelta(days=days)
-        cutoff_ts = int(cutoff.timestamp() * 1000)
-        
-        query = {"createdAt": {"$gte": cutoff_ts}}
-        if platform != "all":
-            query["platform"] = platform
-        
-        signals = await db_module.db.signal_history.find(query).to_list(length=10000)
-        
-        # Agrupar por data
-        by_date = {}
-        for s in signals:
-            date = s.get("date", "unknown")
-            if date not in by_date:
-                by_date[date] = {"total": 0, "wins": 0}
-            by_date[date]["total"] += 1
-            # Considerar win apenas se attemptsUsed <= maxAttempts
-            if s.get("result") == "win":
-                attempts_used = s.get("attemptsUsed", 1)
-                if attempts_used <= maxAttempts:
-                    by_date[date]["wins"] += 1
-        
-        # Calcular taxas e ordenar por data
-        result = []
-        for date, data in by_date.items():
-            rate = round((data["wins"] / data["total"] * 100), 2) if data["total"] > 0 else 0
-            result.append({
-                "date": date,
-                "total": data["total"],
-                "wins": data["wins"],
-                "rate": rate
-            })
+    async def compute():
+        try:
+            if db_module.db is None:
+                return {"ok": False, "error": "Database not connected"}
         
-        result.sort(key=lambda x: x["date"])
+            source = await stats_rollups.source(db_module.db)
+            result = await stats_queries.by_day(source, platform, days, maxAttempts)
         
-        return {"ok": True, "data": result}
-    except Exception as e:
-        return {"ok": False, "error": str(e)}
+            return {"ok": True, "data": result}
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+
+    return await stats_cache.respond(request, platform, {"days": days, "maxAttempts": maxAttempts}, compute)
 
 @app.get("/api/stats/signals-history")
 async def api_stats_signals_history(platform: str = "all", days: int = 30, page: int = 1, limit: int = 50, maxAttempts: int = 3):
@@ -954,75 +739,36 @@ async def api_stats_signals_history(platform: str = "all", days: int = 30, page:
     except Exception as e:
         return {"ok": False, "error": str(e)}
 
+async def reset_state():
+    """Zerar mesas, stats no MongoDB e calibração (no worker que ingere)"""
+    for table in table_registry.tables.values():
+        table.reset()
+    
+    # Limpar coleção de stats e signal_history no MongoDB
+    try:
+        if db_module.db is not None:
+            await db_module.db.stats.delete_many({})
+            await db_module.db.signal_history.delete_many({})  # Limpar histórico de sinais
+            await stats_rollups.rebuild(db_module.db)  # Rollups vazios (histórico limpo)
+            print("✅ Coleções de stats e signal_history limpas no MongoDB")
+    except Exception as e:
+        print(f"Erro ao limpar dados no DB: {e}")
+    stats_cache.clear()
+    shared_feed.publish_control({"op": "stats_clear"})
+    for table in table_registry.tables.values():
+        table.state.refresh()
+    # Calibração vive em memória: limpar o store (senão o próximo flush regrava o estado antigo)
+    await reset_store()
+
 @app.post("/api/admin/reset")
 async def admin_reset_state(admin_user: dict = Depends(get_admin_user)):
+    # O estado vive no líder: num consumidor o pedido segue pelo anel compartilhado
+    if not is_ingestor():
+        if shared_feed.publish_control({"op": "admin_reset"}):
+            return {"ok": True, "forwarded": True}
+        raise HTTPException(status_code=409, detail="Reset só pode ser feito no worker líder")
     try:
-        global results_history, pending_bets, cooldown_contador, perdas_consecutivas, modo_stop, stop_counter, modo_conservador, historico_alertas, round_index, signal_stats, sinais_perdidos_por_pausa, compensation_remaining
-        global win_streak_history, current_win_streak, max_win_streak, signal_outcome_history
-        global signal_outcomes_history
-        global verabet_results_history, verabet_pending_bets, verabet_round_index
-        global verabet_signal_stats, verabet_win_streak_history, verabet_current_win_streak, verabet_max_win_streak
-        global verabet_last_win_ts, verabet_last_loss_ts, verabet_signal_outcome_history
-        results_history = []
-        pending_bets = []
-        cooldown_contador = 0
-        perdas_consecutivas = 0
-        modo_stop = False
-        stop_counter = 0
-        modo_conservador = False
-        historico_alertas = []
-        round_index = 0
-        sinais_perdidos_por_pausa = 0
-        compensation_remaining = 0
-        # Reset win streak tracking
-        win_streak_history = []
-        current_win_streak = 0
-        max_win_streak = 0
-        signal_outcome_history = []
-        signal_outcomes_history = []
-        signal_stats = {
-            "alta": {"total": 0, "acertos": 0, "taxa": 0.0},
-            "media": {"total": 0, "acertos": 0, "taxa": 0.0},
-            "baixa": {"total": 0, "acertos": 0, "taxa": 0.0},
-            "geral": {"total": 0, "acertos": 0, "taxa": 0.0},
-        }
-        verabet_results_history = []
-        verabet_pending_bets = []
-        verabet_round_index = 0
-        verabet_signal_stats = {
-            "alta": {"total": 0, "acertos": 0, "taxa": 0.0},
-            "media": {"total": 0, "acertos": 0, "taxa": 0.0},
-            "baixa": {"total": 0, "acertos": 0, "taxa": 0.0},
-            "geral": {"total": 0, "acertos": 0, "taxa": 0.0},
-        }
-        verabet_win_streak_history = []
-        verabet_current_win_streak = 0
-        verabet_max_win_streak = 0
-        verabet_last_win_ts = None
-        verabet_last_loss_ts = None
-        verabet_signal_outcome_history = []
-        
-        # Limpar coleção de stats e signal_history no MongoDB
-        try:
-            if db_module.db is not None:
-                await db_module.db.stats.delete_many({})
-                await db_module.db.signal_history.delete_many({})  # Limpar histórico de sinais
-                try:
-                    await db_module.db.stats.delete_one({"_id": "verabet_stats"})
-                except Exception:
-                    pass
-                print("✅ Coleções de stats e signal_history limpas no MongoDB")
-        except Exception as e:
-            print(f"Erro ao limpar dados no DB: {e}")
-            
-        try:
-            base = os.path.dirname(os.path.abspath(__file__))
-            for fname in ("platt_params.json", "pattern_stats.json"):
-                fpath = os.path.join(base, fname)
-                if os.path.exists(fpath):
-                    os.remove(fpath)
-        except Exception:
-            pass
+        await reset_state()
         return {"ok": True}
     except Exception as e:
         return {"ok": False, "error": str(e)}
@@ -1072,11 +818,9 @@ async def _admin_users(admin_user: dict = Depends(get_admin_user)):
 @app.post("/api/connect")
 async def connect():
     """Conectar ao WebSocket"""
-    global ws_connection, ws_connected
     try:
-        if ws_connection is None:
-            ws_connection = WSClient(CONFIG.WS_URL, on_message)
-            await ws_connection.start()
+        if is_ingestor():
+            await playnabet_table.start()
         return {"ok": True, "message": "Conectado"}
     except Exception as e:
         return {"ok": False, "error": str(e)}
@@ -1084,48 +828,19 @@ async def connect():
 @app.get("/events")
 async def events(request: Request):
     """Server-Sent Events para resultados em tempo real"""
-    async def event_generator():
-        global ws_connected, ws_connection
-        
-        # Criar fila para este cliente
-        queue = asyncio.Queue()
-        event_clients.append(queue)
-        
-        try:
-            # Enviar status inicial
-            yield f"event: status\ndata: {json.dumps({'type': 'status', 'connected': ws_connected, 'ts': int(time.time() * 1000)})}\n\n"
-            
-            # Conectar WebSocket se não estiver conectado
-            if ws_connection is None:
-                ws_connection = WSClient(CONFIG.WS_URL, on_message)
-                await ws_connection.start()
-            
-            # Heartbeat
-            last_heartbeat = time.time()
-            while True:
-                if await request.is_disconnected():
-                    break
-                
-                # Verificar se há mensagens na fila
-                try:
-                    message = await asyncio.wait_for(queue.get(), timeout=0.1)
-                    yield message
-                except asyncio.TimeoutError:
-                    pass
-                
-                # Enviar heartbeat a cada 10 segundos
-                if time.time() - last_heartbeat >= 10:
-                    yield f"event: ping\ndata: {json.dumps({'type': 'ping', 'ts': int(time.time() * 1000)})}\n\n"
-                    last_heartbeat = time.time()
-                
-                await asyncio.sleep(0.1)
-        finally:
-            # Remover cliente da lista
-            if queue in event_clients:
-                event_clients.remove(queue)
+    # Conectar WebSocket se não estiver conectado
+    if is_ingestor():
+        await playnabet_table.start()
+
+    # Assinante acordado só quando há eventos; o heartbeat vem do timer compartilhado
+    sub = event_broadcaster.subscribe()
+    initial = shared_feed.last_frame("playnabet", "status") or format_sse("status", {'type': 'status', 'connected': playnabet_table.connected, 'ts': int(time.time() * 1000)})
+    initial += state_bootstrap(playnabet_table)
+    # Reconexão: reenviar da memória os eventos perdidos desde o Last-Event-ID
+    initial += event_broadcaster.resume(last_event_id(request))
     
     return StreamingResponse(
-        event_generator(),
+        event_broadcaster.stream(sub, initial),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
@@ -1135,380 +850,85 @@ async def events(request: Request):
     )
 
 
+@app.on_event("startup")
+async def startup_shared_feed():
+    """Anel compartilhado entre workers (antes dos clientes, para espelhar desde o início)"""
+    try:
+        if CONFIG.WORKER_ROLE == "producer":
+            shared_feed.start_producer()
+        elif CONFIG.WORKER_ROLE == "consumer":
+            await shared_feed.start_consumer()
+            shared_feed.publish_control({"op": "state_sync"})
+        elif CONFIG.WORKER_ROLE == "auto":
+            if leader.try_acquire():
+                print(f"[startup] PID {os.getpid()} é o líder (ingestão)")
+                shared_feed.start_producer()
+            else:
+                await follow_leader()
+                leader.start(promote_to_leader, follow_leader)
+    except Exception as e:
+        print(f"[startup] Falha ao iniciar anel compartilhado ({CONFIG.WORKER_ROLE}): {e}")
+
+
+async def follow_leader():
+    """Seguidor: anexar ao anel do líder assim que ele existir"""
+    if shared_feed.role != "consumer":
+        try:
+            await shared_feed.start_consumer(attach_timeout=0)
+        except FileNotFoundError:
+            return  # líder ainda não criou o anel; próxima tentativa
+        # Estado atual das mesas (o último frame `state` pode já ter saído do anel)
+        shared_feed.publish_control({"op": "state_sync"})
+
+
+async def promote_to_leader():
+    """Failover: o seguidor que pegou a trava passa a ingerir e produzir"""
+    await shared_feed.stop()
+    shared_feed.start_producer()
+    await startup_ws_client()
+    await startup_verabet_client()
+    await startup_tables()
+
+
 @app.on_event("startup")
 async def startup_ws_client():
     """Tentativa de iniciar a conexão WebSocket automaticamente na inicialização do app.
     Isso faz o backend começar a receber resultados mesmo sem cliente SSE conectado.
     """
-    global ws_connection
+    if not is_ingestor():
+        print("[startup] Worker consumidor: resultados e eventos vêm do anel compartilhado")
+        return
     
     # Carregar estatísticas do banco de dados
-    try:
-        await load_stats_from_db()
-    except Exception as e:
-        print(f"[startup] Falha ao carregar stats do DB: {e}")
+    await load_table_stats(playnabet_table, "global_stats")
+
+    # Calibração em memória com flush periódico em disco
+    start_store()
     
     try:
-        if ws_connection is None:
-            ws_connection = WSClient(CONFIG.WS_URL, on_message)
-            await ws_connection.start()
+        if playnabet_table.client is None:
+            await playnabet_table.start()
             print(f"[startup] WSClient iniciado para {CONFIG.WS_URL}")
     except Exception as e:
         print(f"[startup] Falha ao iniciar WSClient: {e}")
 
 @app.on_event("shutdown")
 async def shutdown_ws_client():
-    global ws_connection
-    try:
-        if ws_connection is not None:
-            await ws_connection.stop()
-            print("[shutdown] WSClient finalizado")
-    except Exception as e:
-        print(f"[shutdown] Erro ao finalizar WSClient: {e}")
-
-def on_message(data: Dict):
-    """Callback para mensagens do WebSocket"""
-    global results_history, ws_connected
-    
-    if data.get("type") == "status":
-        ws_connected = data.get("connected", False)
-        # Notificar clientes SSE
-        message = f"event: status\ndata: {json.dumps(data)}\n\n"
-        for queue in event_clients:
-            try:
-                queue.put_nowait(message)
-            except:
-                pass
-        return
-    
-    # Processar resultado do Double
-    parsed = parse_double_payload(data)
-    if parsed:
-        global round_index
-        round_index = round_index + 1
-        decrementar_cooldown()
-        # Evitar duplicatas
-        if results_history:
-            last = results_history[-1]
-            if (last.get("round_id") == parsed.get("round_id") or
-                (last.get("number") == parsed.get("number") and
-                 abs((parsed.get("timestamp", 0) - last.get("timestamp", 0))) < 2000)):
-                return
-        
-        results_history.append(parsed)
-        # Manter apenas últimos 100 resultados
-        if len(results_history) > 100:
-            results_history = results_history[-100:]
-            
-        # Salvar no banco de dados de forma assíncrona
-        try:
-            asyncio.create_task(save_stats_to_db())
-        except Exception:
-            pass
-        
-        # Notificar clientes SSE com resultado
-        result_payload = {"type": "double_result", "data": parsed}
-        message = f"event: double_result\ndata: {json.dumps(result_payload)}\n\n"
-        for queue in event_clients:
-            try:
-                queue.put_nowait(message)
-            except:
-                pass
-        # Se o martingale estiver ativado, avaliar pendentes contra o resultado atual
-        try:
-            if CONFIG.MARTINGALE_ENABLED and pending_bets:
-                # Curr result color
-                res_color = parsed.get('color')
-                now_ts = int(time.time() * 1000)
-                remove_ids = []
-                for pb in list(pending_bets):
-                    # Verificar se perdeu ou ganhou
-                    attempts_left = pb.get('attemptsLeft', CONFIG.MARTINGALE_MAX_ATTEMPTS)
-                    target_color = pb.get('color')
-                    pk = pb.get('patternKey')
-                    raw_score = pb.get('chance', 0)
-                    
-                    # Evitar avaliar um pending bet usando a MESMA rodada que o criou
-                    # Usa round_index para evitar problemas de relógio/timestamp
-                    created_round = pb.get('createdRound')
-                    if created_round is not None and created_round == round_index:
-                        print(f"[MARTINGALE] Pulando bet {pb.get('id')} — criada na mesma rodada {created_round}")
-                        continue
-
-                    print(f"[MARTINGALE] Verificando bet {pb.get('id')} | Alvo: {target_color} | Saiu: {res_color} | Tentativas rest: {attempts_left}")
-                    
-                    # Verificar WIN: cor alvo OU white (se protect_white estiver ativo)
-                    protect_white = pb.get('protect_white', False)
-                    is_win = (res_color == target_color) or (protect_white and res_color == 'white')
-                    
-                    if is_win:
-                        # Ganhou
-                        print(f"[MARTINGALE] WIN detectado para {pb.get('id')} | Cor alvo: {target_color} | Saiu: {res_color} | Protect white: {protect_white}")
-                        pb['attemptsUsed'] = pb.get('attemptsUsed', 0) + 1
-                        pb['resolved'] = True
-                        pb['result'] = 'win'
-                        pb['resolvedAt'] = now_ts
-                        update_pattern_stat(pk, True)
-                        try:
-                            online_update_platt(raw_score, 1)
-                        except Exception:
-                            pass
-                        registrar_resultado(True)
-                        try:
-                            registrar_resultado_sinal(pb.get('confLabel', 'media'), True)
-                        except Exception:
-                            pass
-                        try:
-                            last_win_ts = now_ts
-                            asyncio.create_task(save_stats_to_db())
-                        except Exception:
-                            pass
-                        # Enviar SSE informando o resultado
-                        bet_payload = {"type": "bet_result", "data": pb}
-                        bet_message = f"event: bet_result\ndata: {json.dumps(bet_payload)}\n\n"
-                        for queue in event_clients:
-                            try:
-                                queue.put_nowait(bet_message)
-                            except:
-                                pass
-                        remove_ids.append(pb.get('id'))
-                        # Salvar no histórico para estatísticas
-                        try:
-                            asyncio.create_task(save_signal_to_history(pb, 'win', pb['attemptsUsed'], 'playnabet'))
-                        except Exception:
-                            pass
-                    else:
-                        # decrement attempts
-                        pb['attemptsLeft'] = attempts_left - 1
-                        pb['attemptsUsed'] = pb.get('attemptsUsed', 0) + 1
-                        if pb['attemptsLeft'] <= 0:
-                            # Loss
-                            print(f"[MARTINGALE] LOSS detectado para {pb.get('id')}")
-                            pb['resolved'] = True
-                            pb['result'] = 'loss'
-                            pb['resolvedAt'] = now_ts
-                            update_pattern_stat(pk, False)
-                            try:
-                                online_update_platt(raw_score, 0)
-                            except Exception:
-                                pass
-                            registrar_resultado(False)
-                            try:
-                                registrar_resultado_sinal(pb.get('confLabel', 'media'), False)
-                            except Exception:
-                                pass
-                            try:
-                                last_loss_ts = now_ts
-                                asyncio.create_task(save_stats_to_db())
-                            except Exception:
-                                pass
-                            # Ativar cooldown baseado em tempo após loss
-                            global loss_cooldown_until
-                            loss_cooldown_until = now_ts + (LOSS_COOLDOWN_MINUTES * 60 * 1000)
-                            cooldown_end_time = time.strftime('%H:%M:%S', time.localtime((now_ts + (LOSS_COOLDOWN_MINUTES * 60 * 1000)) / 1000))
-                            print(f"🚫 [COOLDOWN] Loss detectado! Pausando sinais por {LOSS_COOLDOWN_MINUTES} minutos até {cooldown_end_time}")
-                            
-                            bet_payload = {"type": "bet_result", "data": pb}
-                            bet_message = f"event: bet_result\ndata: {json.dumps(bet_payload)}\n\n"
-                            for queue in event_clients:
-                                try:
-                                    queue.put_nowait(bet_message)
-                                except:
-                                    pass
-                            remove_ids.append(pb.get('id'))
-                            # Salvar no histórico para estatísticas
-                            try:
-                                asyncio.create_task(save_signal_to_history(pb, 'loss', pb['attemptsUsed'], 'playnabet'))
-                            except Exception:
-                                pass
-                # Limpar pendentes resolvidos
-                if remove_ids:
-                    pending_bets[:] = [p for p in pending_bets if p.get('id') not in remove_ids]
-        except Exception:
-            print("❌ Erro ao processar martingale:")
-            traceback.print_exc()
-        
-        # Detectar sinal após adicionar resultado
-        if len(results_history) >= 5:
-            try:
-                # Verificar cooldown baseado em tempo após loss
-                current_ts = int(time.time() * 1000)
-                if loss_cooldown_until > 0 and current_ts < loss_cooldown_until:
-                    remaining_secs = int((loss_cooldown_until - current_ts) / 1000)
-                    remaining_mins = remaining_secs // 60
-                    remaining_secs = remaining_secs % 60
-                    print(f"⏳ [COOLDOWN] Sinal suprimido - cooldown ativo (restam {remaining_mins}m{remaining_secs}s)")
-                    signal = None
-                # Se bloqueio estiver ativado e existirem apostas pendentes, não detectar novos sinais
-                elif CONFIG.BLOCK_SIGNALS_WHILE_PENDING and pending_bets:
-                    # Debug: informar que sinal foi suprimido por pendente
-                    print(f"[DBG] Sinal suprimido: existem {len(pending_bets)} pendentes e BLOCK_SIGNALS_WHILE_PENDING=True")
-                    signal = None
-                else:
-                    signal = None
-                    # Opção: usar SignalEngine simples (implementa os 8 padrões)
-                    if getattr(CONFIG, 'USE_PATTERN_SIGNALS', False) and USE_PATTERN_ENGINE:
-                        # Mapear histórico para formato curto ['V','P','B']
-                        short_hist = []
-                        for r in results_history:
-                            c = r.get('color')
-                            if c == 'red':
-                                short_hist.append('V')
-                            elif c == 'black':
-                                short_hist.append('P')
-                            else:
-                                short_hist.append('B')
-                        pe = pattern_engine.avaliar_historico(short_hist, rodada_atual=len(short_hist))
-                        if pe.get('signal'):
-                            # Mapear para formato de sinal compatível
-                            pid = pe.get('pattern_id')
-                            sugg = pe.get('suggestion')
-                            conf_label = pe.get('confidence')
-                            # converter sugestão para cores do sistema
-                            color_map = {'V': 'red', 'P': 'black', 'B': 'white'}
-                            suggested_color = color_map.get(sugg, None)
-                            if suggested_color == 'white':
-                                suggested_color = None
-                            # chance estimada simplificada baseada no label de confiança
-                            chance_map = {'alto': 85, 'medio-alto': 75, 'medio': 65, 'baixo-medio': 55, 'baixo': 30}
-                            chance_pct = chance_map.get(conf_label, 50)
-                            targets = numbers_for_color(suggested_color) if suggested_color else []
-                            if not suggested_color:
-                                signal = None
-                            else:
-                                signal = {
-                                'id': f'ps_{int(time.time()*1000)}',
-                                'type': 'MEDIUM_SIGNAL' if conf_label in ('medio','medio-alto') else ('STRONG_SIGNAL' if conf_label in ('alto','medio-alto') else 'WEAK_SIGNAL'),
-                                'color': '#90ee90',
-                                'description': f'PatternEngine P{pid} detected',
-                                'patternKey': f'P{pid}',
-                                'confidence': 8.5 if conf_label == 'alto' else (7.5 if conf_label in ('medio','medio-alto') else 6.0),
-                                'suggestedBet': {
-                                    'type': 'color',
-                                    'color': suggested_color,
-                                    'numbers': targets,
-                                    'coverage': f"{len(targets)} números",
-                                    'expectedRoi': 'Simulado',
-                                    'protect_white': True
-                                },
-                                'targets': targets,
-                                'reasons': [f'PatternEngine: P{pid}'],
-                                'validFor': 3,
-                                'timestamp': int(time.time() * 1000),
-                                'chance': chance_pct,
-                                'afterNumber': None,
-                                'afterColor': None,
-                                'suggestedText': f"Sinal P{pid}: apostar {suggested_color}" if suggested_color else 'Sinal'
-                                }
-                    # Se não foi gerado sinal pelo pattern engine, manter o detector original
-                    if not signal:
-                        signal = detect_best_double_signal(results_history)
-                if signal:
-                    if not pode_emitir_alerta():
-                        if modo_stop:
-                            try:
-                                global sinais_perdidos_por_pausa
-                                sinais_perdidos_por_pausa += 1
-                            except Exception:
-                                pass
-                            allow_compensation = False
-                            try:
-                                allow_compensation = compensation_remaining > 0 and signal.get('chance', 0) >= 65
-                            except Exception:
-                                allow_compensation = False
-                            if not allow_compensation:
-                                print(f"[COOLDOWN] Stop temporário ativo ({stop_counter} rodadas restantes)")
-                                return
-                            else:
-                                try:
-                                    compensation_remaining = max(0, compensation_remaining - 1)
-                                except Exception:
-                                    pass
-                        elif cooldown_contador > 0:
-                            print(f"[COOLDOWN] Padrão detectado mas cooldown ativo ({cooldown_contador} rodadas restantes)")
-                            return
-                        else:
-                            print(f"[COOLDOWN] Limite global atingido ({GLOBAL_MAX_ALERTS}/{GLOBAL_WINDOW_ROUNDS}) — alerta suprimido")
-                            return
-                    # Antes de enviar a notificação, criar pendente para martingale (se ativado)
-                    pb_id = None
-                    try:
-                        if CONFIG.MARTINGALE_ENABLED:
-                            pb_id = f"pb_{int(time.time() * 1000)}"
-                            signal['id'] = pb_id
-                    except Exception:
-                        pb_id = None
-                    # Notificar clientes SSE com sinal
-                    try:
-                        signal['rodada_numero'] = round_index
-                    except Exception:
-                        pass
-                    signal_payload = {"type": "signal", "data": signal}
-                    signal_message = f"event: signal\ndata: {json.dumps(signal_payload)}\n\n"
-                    for queue in event_clients:
-                        try:
-                            queue.put_nowait(signal_message)
-                        except:
-                            pass
-                    try:
-                        global sinais_emitidos_hoje
-                        sinais_emitidos_hoje += 1
-                    except Exception:
-                        pass
-                    registrar_alerta()
-                    ativar_cooldown("basico")
-                    # Se martingale ativado, anexar pendente
-                    try:
-                        if CONFIG.MARTINGALE_ENABLED:
-                            pb = {
-                                'id': pb_id,
-                                'patternKey': signal.get('patternKey'),
-                                'color': signal.get('suggestedBet', {}).get('color'),
-                                'numbers': signal.get('suggestedBet', {}).get('numbers', []),
-                                'chance': signal.get('chance', 0),
-                                'createdAt': int(time.time() * 1000),
-                                'createdRound': round_index,
-                                'attemptsLeft': (signal.get('gales_permitidos', 0) + 1) if signal.get('gales_permitidos') is not None else CONFIG.MARTINGALE_MAX_ATTEMPTS,
-                                'attemptsUsed': 0,
-                                'protect_white': signal.get('suggestedBet', {}).get('protect_white', False),
-                                'confLabel': signal.get('confLabel', 'media'),
-                            }
-                            pending_bets.append(pb)
-                    except Exception:
-                        pass
-                    # Adicionar martingale/pending bet ao monitorar futuro
-                    # (Bloco duplicado removido)
-            except Exception as e:
-                # Ignorar erros na detecção de sinais
-                pass
+    # Para o cliente e o broadcaster e grava o global_stats pendente
+    await playnabet_table.stop()
+    print("[shutdown] WSClient finalizado")
+    # Gravar o que estiver pendente (lotes de histórico/logs) antes de sair
+    await signal_history_writer.close()
+    await activity_log_writer.close()
+    await close_store()
+    await shared_feed.stop()
 
 # ============================================================
 # VERABET DOUBLE INTEGRATION
 # ============================================================
-from services.verabet_client import VeraBetClient, parse_verabet_result, fetch_initial_history
+from services.verabet_client import VeraBetClient, parse_verabet_result, fetch_initial_history, close_session as close_verabet_session
 from services.verabet_patterns import VeraBetPatternEngine
 
-# Estado global VeraBet (separado do PlayNaBet)
-verabet_results_history: List[Dict] = []
-verabet_ws_connection: VeraBetClient = None
-verabet_ws_connected = False
-verabet_event_clients: List[asyncio.Queue] = []
-verabet_pending_bets: List[Dict] = []
-verabet_round_index = 0
-verabet_signal_stats = {
-    "alta": {"total": 0, "acertos": 0, "taxa": 0.0},
-    "media": {"total": 0, "acertos": 0, "taxa": 0.0},
-    "baixa": {"total": 0, "acertos": 0, "taxa": 0.0},
-    "geral": {"total": 0, "acertos": 0, "taxa": 0.0}
-}
-verabet_win_streak_history = []
-verabet_current_win_streak = 0
-verabet_max_win_streak = 0
-verabet_last_win_ts = None
-verabet_last_loss_ts = None
-verabet_signal_outcome_history = []  # Histórico de outcomes: [{'outcome': 'win'|'loss', 'ts': timestamp}]
-verabet_loss_cooldown_until = 0  # Timestamp (ms) até quando o cooldown está ativo para VeraBet
-
 # VeraBet pattern engine instance (motor dedicado para VeraBet)
 try:
     verabet_pattern_engine = VeraBetPatternEngine()
@@ -1517,341 +937,37 @@ except Exception as e:
     verabet_pattern_engine = None
     print(f"⚠️ Erro ao inicializar VeraBet Pattern Engine: {e}")
 
-async def save_verabet_stats_to_db():
-    """Salva estatísticas do VeraBet no MongoDB para persistência"""
-    try:
-        if db_module.db is None:
-            return
-        
-        stats_doc = {
-            "_id": "verabet_stats",
-            "signal_stats": verabet_signal_stats,
-            "last_win_ts": verabet_last_win_ts,
-            "last_loss_ts": verabet_last_loss_ts,
-            "current_win_streak": verabet_current_win_streak,
-            "max_win_streak": verabet_max_win_streak,
-            "win_streak_history": verabet_win_streak_history[-100:],  # últimas 100
-            "signal_outcome_history": verabet_signal_outcome_history[-100:],  # últimos 100 outcomes
-            "results_history": verabet_results_history[-50:],  # últimos 50 resultados
-            "updated_at": int(time.time() * 1000)
-        }
-        
-        await db_module.db.stats.update_one(
-            {"_id": "verabet_stats"},
-            {"$set": stats_doc},
-            upsert=True
-        )
-    except Exception as e:
-        print(f"[VeraBet] Erro ao salvar stats no DB: {e}")
 
-async def load_verabet_stats_from_db():
-    """Carrega estatísticas do VeraBet do MongoDB na inicialização"""
-    global verabet_signal_stats, verabet_last_win_ts, verabet_last_loss_ts
-    global verabet_current_win_streak, verabet_max_win_streak, verabet_win_streak_history
-    global verabet_results_history
-    try:
-        if db_module.db is None:
-            return
-        
-        stats_doc = await db_module.db.stats.find_one({"_id": "verabet_stats"})
-        if stats_doc:
-            verabet_signal_stats.update(stats_doc.get("signal_stats", {}))
-            verabet_last_win_ts = stats_doc.get("last_win_ts")
-            verabet_last_loss_ts = stats_doc.get("last_loss_ts")
-            verabet_current_win_streak = stats_doc.get("current_win_streak", 0)
-            verabet_max_win_streak = stats_doc.get("max_win_streak", 0)
-            verabet_win_streak_history = stats_doc.get("win_streak_history", [])
-            global verabet_signal_outcome_history
-            verabet_signal_outcome_history = stats_doc.get("signal_outcome_history", [])
-            
-            # Carregar histórico de resultados se existir
-            loaded_results = stats_doc.get("results_history", [])
-            if loaded_results:
-                verabet_results_history = loaded_results
-            
-            print(f"✅ [VeraBet] Estatísticas carregadas do DB: {len(verabet_win_streak_history)} streaks, max: {verabet_max_win_streak}, results: {len(verabet_results_history)}")
-    except Exception as e:
-        print(f"[VeraBet] Erro ao carregar stats do DB: {e}")
-
-
-def verabet_on_message(data: Dict):
-    """Callback para mensagens do cliente VeraBet"""
-    global verabet_results_history, verabet_ws_connected, verabet_round_index
-    
-    if data.get("type") == "status":
-        verabet_ws_connected = data.get("connected", False)
-        message = f"event: status\ndata: {json.dumps(data)}\n\n"
-        for queue in verabet_event_clients:
-            try:
-                queue.put_nowait(message)
-            except:
-                pass
-        return
-    
-    # Processar resultado do Double
-    if data.get("source") == "verabet":
-        verabet_round_index += 1
-        
-        # Evitar duplicatas
-        if verabet_results_history:
-            last = verabet_results_history[-1]
-            if last.get("round_id") == data.get("round_id"):
-                return
-        
-        verabet_results_history.append(data)
-        if len(verabet_results_history) > 100:
-            verabet_results_history = verabet_results_history[-100:]
-        
-        # Notificar clientes SSE
-        result_payload = {"type": "double_result", "data": data}
-        message = f"event: double_result\ndata: {json.dumps(result_payload)}\n\n"
-        for queue in verabet_event_clients:
-            try:
-                queue.put_nowait(message)
-            except:
-                pass
-        
-        # Avaliar pendentes
-        signal_just_resolved = False  # Flag para bloquear novo sinal após resolução
-        try:
-            if CONFIG.MARTINGALE_ENABLED and verabet_pending_bets:
-                res_color = data.get('color')
-                now_ts = int(time.time() * 1000)
-                remove_ids = []
-                
-                print(f"[VeraBet] Avaliando {len(verabet_pending_bets)} pendente(s) | Resultado: {res_color}")
-                
-                for pb in list(verabet_pending_bets):
-                    attempts_left = pb.get('attemptsLeft', CONFIG.MARTINGALE_MAX_ATTEMPTS)
-                    target_color = pb.get('color')
-                    
-                    created_round = pb.get('createdRound')
-                    if created_round is not None and created_round == verabet_round_index:
-                        print(f"[VeraBet] Pulando pendente {pb.get('id')} - mesma rodada de criação")
-                        continue
-                    
-                    protect_white = pb.get('protect_white', False)
-                    is_win = (res_color == target_color) or (protect_white and res_color == 'white')
-                    
-                    print(f"[VeraBet] Pendente {pb.get('patternKey')} | Alvo: {target_color} | Saiu: {res_color} | Tentativas: {pb.get('attemptsUsed', 0)+1}/{3}")
-                    
-                    if is_win:
-                        pb['attemptsUsed'] = pb.get('attemptsUsed', 0) + 1
-                        pb['resolved'] = True
-                        pb['result'] = 'win'
-                        pb['resolvedAt'] = now_ts
-                        verabet_registrar_resultado_sinal(pb.get('confLabel', 'media'), True)
-                        bet_payload = {"type": "bet_result", "data": pb}
-                        bet_message = f"event: bet_result\ndata: {json.dumps(bet_payload)}\n\n"
-                        for queue in verabet_event_clients:
-                            try:
-                                queue.put_nowait(bet_message)
-                            except:
-                                pass
-                        remove_ids.append(pb.get('id'))
-                        signal_just_resolved = True
-                        print(f"[VeraBet] ✅ WIN detectado para {pb.get('patternKey')} após {pb['attemptsUsed']} tentativa(s)")
-                        # Salvar no histórico para estatísticas
-                        try:
-                            asyncio.create_task(save_signal_to_history(pb, 'win', pb['attemptsUsed'], 'verabet'))
-                        except Exception:
-                            pass
-                    else:
-                        pb['attemptsLeft'] = attempts_left - 1
-                        pb['attemptsUsed'] = pb.get('attemptsUsed', 0) + 1
-                        print(f"[VeraBet] ❌ Não acertou - tentativas restantes: {pb['attemptsLeft']}")
-                        if pb['attemptsLeft'] <= 0:
-                            pb['resolved'] = True
-                            pb['result'] = 'loss'
-                            pb['resolvedAt'] = now_ts
-                            verabet_registrar_resultado_sinal(pb.get('confLabel', 'media'), False)
-                            
-                            # Ativar cooldown baseado em tempo após loss para VeraBet
-                            global verabet_loss_cooldown_until
-                            verabet_loss_cooldown_until = now_ts + (LOSS_COOLDOWN_MINUTES * 60 * 1000)
-                            cooldown_end_time = time.strftime('%H:%M:%S', time.localtime((now_ts + (LOSS_COOLDOWN_MINUTES * 60 * 1000)) / 1000))
-                            print(f"🚫 [VeraBet COOLDOWN] Loss detectado! Pausando sinais por {LOSS_COOLDOWN_MINUTES} minutos até {cooldown_end_time}")
-                            
-                            bet_payload = {"type": "bet_result", "data": pb}
-                            bet_message = f"event: bet_result\ndata: {json.dumps(bet_payload)}\n\n"
-                            for queue in verabet_event_clients:
-                                try:
-                                    queue.put_nowait(bet_message)
-                                except:
-                                    pass
-                            remove_ids.append(pb.get('id'))
-                            signal_just_resolved = True
-                            print(f"[VeraBet] ❌ LOSS detectado para {pb.get('patternKey')} após 3 tentativas")
-                            # Salvar no histórico para estatísticas
-                            try:
-                                asyncio.create_task(save_signal_to_history(pb, 'loss', pb['attemptsUsed'], 'verabet'))
-                            except Exception:
-                                pass
-                
-                if remove_ids:
-                    verabet_pending_bets[:] = [p for p in verabet_pending_bets if p.get('id') not in remove_ids]
-        except Exception as e:
-            print(f"[VeraBet] Erro ao avaliar pendentes: {e}")
-        
-        
-        # Detectar sinal usando VeraBetPatternEngine
-        # Deve funcionar mesmo sem clientes SSE conectados — stats precisam persistir 24/7
-        # Ainda bloqueamos se houver pendentes ou se acabou de resolver um sinal
-        if len(verabet_results_history) >= 3 and verabet_pattern_engine:
-            try:
-                # Verificar cooldown baseado em tempo após loss para VeraBet
-                current_ts = int(time.time() * 1000)
-                if verabet_loss_cooldown_until > 0 and current_ts < verabet_loss_cooldown_until:
-                    remaining_secs = int((verabet_loss_cooldown_until - current_ts) / 1000)
-                    remaining_mins = remaining_secs // 60
-                    remaining_secs = remaining_secs % 60
-                    print(f"⏳ [VeraBet COOLDOWN] Sinal suprimido - cooldown ativo (restam {remaining_mins}m{remaining_secs}s)")
-                    signal = None
-                # VeraBet SEMPRE bloqueia sinais enquanto houver pendente (independente de CONFIG)
-                # Também bloqueia se acabamos de resolver um sinal nesta rodada
-                elif verabet_pending_bets or signal_just_resolved:
-                    # Há sinal pendente ou acabamos de resolver, não detectar novo
-                    if signal_just_resolved:
-                        print(f"[VeraBet] Bloqueando novo sinal - acabou de resolver um")
-                    signal = None
-                else:
-                    # Converter histórico para formato V/P/B
-                    short_hist = []
-                    for r in verabet_results_history:
-                        c = r.get('color')
-                        if c == 'red':
-                            short_hist.append('V')
-                        elif c == 'black':
-                            short_hist.append('P')
-                        else:
-                            short_hist.append('B')
-                    
-                    # Usar o método gerar_sinal do VeraBetPatternEngine
-                    signal = verabet_pattern_engine.gerar_sinal(short_hist)
-                    
-                    # Adicionar informação do último resultado ao sinal
-                    if signal and verabet_results_history:
-                        last_result = verabet_results_history[-1]
-                        last_num = last_result.get('number', '?')
-                        last_color = last_result.get('color', '')
-                        last_color_name = 'Vermelho' if last_color == 'red' else 'Preto' if last_color == 'black' else 'Branco'
-                        suggested_color_name = 'Vermelho' if signal.get('color') == 'red' else 'Preto'
-                        
-                        # Atualizar descrição para mostrar o número que disparou
-                        signal['description'] = f"Após o {last_num} {last_color_name} → Aposte no {suggested_color_name}!"
-                        signal['lastNumber'] = last_num
-                        signal['lastColor'] = last_color
-                
-                if signal:
-                    print(f"[VeraBet] Sinal detectado: {signal.get('patternKey')} → {signal.get('color')} ({signal.get('chance')}%)")
-                    
-                    signal_payload = {"type": "signal", "data": signal}
-                    signal_message = f"event: signal\ndata: {json.dumps(signal_payload)}\n\n"
-                    clients_notified = 0
-                    for queue in verabet_event_clients:
-                        try:
-                            queue.put_nowait(signal_message)
-                            clients_notified += 1
-                        except:
-                            pass
-                    
-                    
-                    # SEMPRE adicionar aos pendentes se martingale estiver ativo, mesmo sem clientes
-                    # Isso garante que o histórico de wins/losses seja gerado 24/7
-                    if CONFIG.MARTINGALE_ENABLED:
-                        pb = {
-                            'id': signal.get('id'),
-                            'patternKey': signal.get('patternKey'),
-                            'color': signal.get('color'),
-                            'numbers': signal.get('targets', []),
-                            'chance': signal.get('chance', 0),
-                            'createdAt': int(time.time() * 1000),
-                            'createdRound': verabet_round_index,
-                            'attemptsLeft': signal.get('maxAttempts', 3),
-                            'attemptsUsed': 0,
-                            'protect_white': signal.get('protect_white', False),
-                            'confLabel': signal.get('confLabel', 'media'),
-                        }
-                        verabet_pending_bets.append(pb)
-                        
-                        if clients_notified > 0:
-                            print(f"[VeraBet] Sinal enviado para {clients_notified} cliente(s)")
-                        else:
-                            print(f"[VeraBet] Sinal registrado internamente (sem clientes conectados)")
-            except Exception as e:
-                print(f"[VeraBet] Erro na detecção de sinal: {e}")
-
-def verabet_registrar_resultado_sinal(confianca: str, acertou: bool):
-    global verabet_current_win_streak, verabet_max_win_streak, verabet_win_streak_history
-    global verabet_last_win_ts, verabet_last_loss_ts, verabet_signal_outcome_history
-    try:
-        lbl = confianca if confianca in ("alta", "media", "baixa") else "media"
-        verabet_signal_stats[lbl]["total"] = verabet_signal_stats[lbl].get("total", 0) + 1
-        verabet_signal_stats["geral"]["total"] = verabet_signal_stats["geral"].get("total", 0) + 1
-        
-        # Registrar outcome no histórico
-        outcome = "win" if acertou else "loss"
-        verabet_signal_outcome_history.append({"outcome": outcome, "ts": int(time.time() * 1000)})
-        if len(verabet_signal_outcome_history) > 100:
-            verabet_signal_outcome_history = verabet_signal_outcome_history[-100:]
-        
-        if acertou:
-            verabet_signal_stats[lbl]["acertos"] = verabet_signal_stats[lbl].get("acertos", 0) + 1
-            verabet_signal_stats["geral"]["acertos"] = verabet_signal_stats["geral"].get("acertos", 0) + 1
-            verabet_current_win_streak += 1
-            if verabet_current_win_streak > verabet_max_win_streak:
-                verabet_max_win_streak = verabet_current_win_streak
-            verabet_last_win_ts = int(time.time() * 1000)
-        else:
-            if verabet_current_win_streak > 0:
-                verabet_win_streak_history.append(verabet_current_win_streak)
-                if len(verabet_win_streak_history) > 100:
-                    verabet_win_streak_history = verabet_win_streak_history[-100:]
-            verabet_current_win_streak = 0
-            verabet_last_loss_ts = int(time.time() * 1000)
-        
-        # Salvar no banco de dados de forma assíncrona
-        try:
-            asyncio.create_task(save_verabet_stats_to_db())
-        except Exception:
-            pass
-    except Exception:
-        pass
-
-def verabet_get_consecutive_losses():
-    """
-    Conta quantas VEZES aconteceu uma sequência de 2+ losses consecutivos.
-    Retorna (contagem, timestamp_ultima_sequencia)
-    """
-    count = 0
-    last_sequence_ts = None
-    in_loss_streak = False
-    current_streak = 0
-    streak_start_ts = None
-    
-    for entry in verabet_signal_outcome_history:
-        if entry.get("outcome") == "loss":
-            if not in_loss_streak:
-                # Primeiro loss da possível sequência
-                in_loss_streak = True
-                current_streak = 1
-                streak_start_ts = entry.get("ts")
-            else:
-                current_streak += 1
-        else:
-            if in_loss_streak and current_streak >= 2:
-                count += 1  # Terminou uma sequência válida de 2+ losses
-                last_sequence_ts = streak_start_ts
-            in_loss_streak = False
-            current_streak = 0
-            streak_start_ts = None
-    
-    # Checar se terminou em sequência ainda ativa
-    if in_loss_streak and current_streak >= 2:
-        count += 1
-        last_sequence_ts = streak_start_ts
-    
-    return count, last_sequence_ts
+def verabet_result(data: Dict) -> Optional[Dict]:
+    """Mensagens do VeraBetClient já vêm parseadas; demais fontes são ignoradas"""
+    return data if data.get("source") == "verabet" else None
+
+
+# Mesa VeraBet (separada do PlayNaBet): sempre bloqueia sinais com pendente
+verabet_table = TablePipeline(
+    "verabet",
+    lambda handler: VeraBetClient(handler),
+    verabet_pattern_engine,
+    parse=verabet_result,
+    history_size=CONFIG.RESULTS_HISTORY_SIZE,
+    loss_cooldown_ms=LOSS_COOLDOWN_MINUTES * 60 * 1000,
+    martingale=CONFIG.MARTINGALE_ENABLED,
+    max_attempts=CONFIG.MARTINGALE_MAX_ATTEMPTS,
+    on_resolved=lambda bet, result: save_signal_to_history(bet, result, bet.get("attemptsUsed", 0), "verabet"),
+    broadcaster=SSEBroadcaster(
+        "verabet",
+        replay_size=CONFIG.SSE_REPLAY_SIZE,
+        max_queue=CONFIG.SSE_MAX_QUEUE,
+        max_lag_seconds=CONFIG.SSE_MAX_LAG_SECONDS,
+    ),
+)
+verabet_results_history = verabet_table.history
+verabet_pending_bets = verabet_table.pending_bets
+verabet_broadcaster = verabet_table.broadcaster
+verabet_state = verabet_table.state
+verabet_stats_persister = table_stats_persister(verabet_table, "verabet_stats")
+table_registry.add(verabet_table, autostart=False)
+shared_feed.add_channel("verabet", verabet_broadcaster, verabet_results_history)
 
 # VeraBet Routes
 @app.get("/playnabet", response_class=HTMLResponse)
@@ -1862,25 +978,28 @@ async def playnabet_page(request: Request):
     except Exception:
         return HTMLResponse(content="", status_code=302, headers={"Location": "/auth"})
     
-    html_path = os.path.join(base_dir, "index.html")
-    if os.path.exists(html_path):
-        with open(html_path, "r", encoding="utf-8") as f:
-            return HTMLResponse(content=f.read())
+    response = static_assets.response(request, "index.html")
+    if response is not None:
+        return response
     return HTMLResponse("<h1>PlayNaBet page not found</h1>", status_code=404)
 
 @app.get("/verabet_app.js")
-async def verabet_app_js():
-    js_path = os.path.join(base_dir, "verabet_app.js")
-    if os.path.exists(js_path):
-        return FileResponse(js_path, media_type="application/javascript")
+async def verabet_app_js(request: Request):
+    response = static_assets.response(request, "verabet_app.js")
+    if response is not None:
+        return response
     return {"error": "File not found"}, 404
 
 @app.get("/verabet/api/status")
 async def verabet_status():
+    client = verabet_table.client
     return {
         "ok": True,
-        "wsConnected": verabet_ws_connected,
+        "wsConnected": table_state(verabet_table)["connected"],
         "hasToken": False,
+        "sse": verabet_broadcaster.stats(),
+        "poller": client.stats() if client is not None else None,
+        "statsWrites": verabet_stats_persister.stats(),
         "timestamp": int(time.time() * 1000)
     }
 
@@ -1888,7 +1007,7 @@ async def verabet_status():
 async def verabet_api_get_results(limit: int = 20):
     return {
         "ok": True,
-        "wsConnected": verabet_ws_connected,
+        "wsConnected": table_state(verabet_table)["connected"],
         "results_count": len(verabet_results_history),
         "results": verabet_results_history[:limit],
     }
@@ -1896,16 +1015,13 @@ async def verabet_api_get_results(limit: int = 20):
 @app.get("/verabet/api/signal_stats")
 async def verabet_api_signal_stats():
     try:
-        geral = verabet_signal_stats.get("geral", {})
-        total = int(geral.get("total", 0))
-        acertos = int(geral.get("acertos", 0))
-        perdas = max(0, total - acertos)
+        state = table_state(verabet_table)
         return {
             "ok": True,
-            "wins": acertos,
-            "losses": perdas,
-            "lastWinTime": verabet_last_win_ts,
-            "lastLossTime": verabet_last_loss_ts,
+            "wins": state["wins"],
+            "losses": state["losses"],
+            "lastWinTime": state["lastWinTime"],
+            "lastLossTime": state["lastLossTime"],
         }
     except Exception as e:
         return {"ok": False, "error": str(e)}
@@ -1913,21 +1029,16 @@ async def verabet_api_signal_stats():
 @app.get("/verabet/api/win_streaks")
 async def verabet_api_win_streaks():
     try:
-        avg_wins = 0.0
-        if len(verabet_win_streak_history) > 0:
-            avg_wins = sum(verabet_win_streak_history) / len(verabet_win_streak_history)
-        # Calcular sequências de losses consecutivos (2+ seguidos)
-        loss_sequences_count, last_sequence_ts = verabet_get_consecutive_losses()
-        
+        state = table_state(verabet_table)
         return {
             "ok": True,
-            "currentStreak": verabet_current_win_streak,
-            "maxStreak": verabet_max_win_streak,
-            "consecutiveLossesCount": loss_sequences_count,
-            "lastConsecutiveLossTime": last_sequence_ts,
-            "averageWinsBetweenLosses": round(avg_wins, 2),
-            "streakHistory": verabet_win_streak_history[-10:] if len(verabet_win_streak_history) > 0 else [],
-            "totalStreaks": len(verabet_win_streak_history)
+            "currentStreak": state["currentStreak"],
+            "maxStreak": state["maxStreak"],
+            "consecutiveLossesCount": state["consecutiveLossesCount"],
+            "lastConsecutiveLossTime": state["lastConsecutiveLossTime"],
+            "averageWinsBetweenLosses": state["averageWinsBetweenLosses"],
+            "streakHistory": state["streakHistory"],
+            "totalStreaks": state["totalStreaks"]
         }
     except Exception as e:
         return {"ok": False, "error": str(e)}
@@ -1935,41 +1046,17 @@ async def verabet_api_win_streaks():
 @app.get("/verabet/events")
 async def verabet_events(request: Request):
     """Server-Sent Events para VeraBet Double"""
-    async def event_generator():
-        global verabet_ws_connected, verabet_ws_connection
-        
-        queue = asyncio.Queue()
-        verabet_event_clients.append(queue)
-        
-        try:
-            yield f"event: status\ndata: {json.dumps({'type': 'status', 'connected': verabet_ws_connected, 'ts': int(time.time() * 1000)})}\n\n"
-            
-            if verabet_ws_connection is None:
-                verabet_ws_connection = VeraBetClient(verabet_on_message)
-                await verabet_ws_connection.start()
-            
-            last_heartbeat = time.time()
-            while True:
-                if await request.is_disconnected():
-                    break
-                
-                try:
-                    message = await asyncio.wait_for(queue.get(), timeout=0.1)
-                    yield message
-                except asyncio.TimeoutError:
-                    pass
-                
-                if time.time() - last_heartbeat >= 10:
-                    yield f"event: ping\ndata: {json.dumps({'type': 'ping', 'ts': int(time.time() * 1000)})}\n\n"
-                    last_heartbeat = time.time()
-                
-                await asyncio.sleep(0.1)
-        finally:
-            if queue in verabet_event_clients:
-                verabet_event_clients.remove(queue)
+    if is_ingestor():
+        await verabet_table.start()
+
+    sub = verabet_broadcaster.subscribe()
+    initial = shared_feed.last_frame("verabet", "status") or format_sse("status", {'type': 'status', 'connected': verabet_table.connected, 'ts': int(time.time() * 1000)})
+    initial += state_bootstrap(verabet_table)
+    # Reconexão: reenviar da memória os eventos perdidos desde o Last-Event-ID
+    initial += verabet_broadcaster.resume(last_event_id(request))
     
     return StreamingResponse(
-        event_generator(),
+        verabet_broadcaster.stream(sub, initial),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
@@ -1981,36 +1068,149 @@ async def verabet_events(request: Request):
 @app.on_event("startup")
 async def startup_verabet_client():
     """Iniciar cliente VeraBet na inicialização"""
-    global verabet_ws_connection, verabet_results_history
+    if not is_ingestor():
+        return
     try:
         # Carregar estatísticas do MongoDB
-        await load_verabet_stats_from_db()
+        await load_table_stats(verabet_table, "verabet_stats")
         
         # Carregar histórico inicial (se não foi carregado do DB)
         if len(verabet_results_history) == 0:
             initial_history = await fetch_initial_history(limit=30)
             if initial_history:
-                verabet_results_history = initial_history
+                verabet_table.load_history(initial_history)
                 print(f"[VeraBet] Histórico inicial carregado: {len(verabet_results_history)} resultados")
         else:
             print(f"[VeraBet] Histórico já carregado do DB: {len(verabet_results_history)} resultados")
         
-        if verabet_ws_connection is None:
-            verabet_ws_connection = VeraBetClient(verabet_on_message)
-            await verabet_ws_connection.start()
+        if verabet_table.client is None:
+            await verabet_table.start()
             print("[VeraBet] Cliente de polling iniciado")
     except Exception as e:
         print(f"[VeraBet] Falha ao iniciar cliente: {e}")
 
 @app.on_event("shutdown")
 async def shutdown_verabet_client():
-    global verabet_ws_connection
+    # Para o cliente e o broadcaster e grava o verabet_stats pendente
+    await verabet_table.stop()
+    print("[VeraBet] Cliente finalizado")
+
+# ============================================================
+# MESAS ADICIONAIS (CONFIG.TABLES)
+# ============================================================
+
+def _table_client_factory(kind: str, url: str):
+    if kind == "ws":
+        return lambda handler: WSClient(url or CONFIG.WS_URL, handler, queue_size=CONFIG.WS_QUEUE_SIZE, overflow=CONFIG.WS_OVERFLOW_POLICY)
+    return lambda handler: VeraBetClient(handler, url=url) if url else VeraBetClient(handler)
+
+
+def _table_on_resolved(name: str):
+    def on_resolved(bet: Dict, result: str):
+        return save_signal_to_history(bet, result, bet.get("attemptsUsed", 0), name)
+    return on_resolved
+
+
+def _table_stats_id(table: TablePipeline) -> str:
+    return f"{table.name}_stats"
+
+
+for _spec in CONFIG.TABLES:
     try:
-        if verabet_ws_connection is not None:
-            await verabet_ws_connection.stop()
-            print("[VeraBet] Cliente finalizado")
+        _name, _kind = _spec["name"], _spec.get("kind", "verabet")
+        if _name in ("playnabet", "verabet"):
+            raise ValueError("nome reservado")
+        _options = dict(
+            history_size=CONFIG.RESULTS_HISTORY_SIZE,
+            loss_cooldown_ms=LOSS_COOLDOWN_MINUTES * 60 * 1000,
+            martingale=CONFIG.MARTINGALE_ENABLED,
+            max_attempts=CONFIG.MARTINGALE_MAX_ATTEMPTS,
+            on_resolved=_table_on_resolved(_name),
+        )
+        if _kind == "ws":
+            # Mesmo fluxo do PlayNaBet (features, governador, calibração)
+            _table = PlayNaBetPipeline(
+                _name, _table_client_factory(_kind, _spec.get("url")),
+                SignalEngine() if USE_PATTERN_ENGINE else None,
+                block_while_pending=CONFIG.BLOCK_SIGNALS_WHILE_PENDING, **_options)
+        else:
+            _table = TablePipeline(
+                _name, _table_client_factory(_kind, _spec.get("url")),
+                VeraBetPatternEngine(), parse=verabet_result, **_options)
+        table_registry.add(_table)
+        stats_cache.add_platform(_name)
+        table_stats_persister(_table, _table_stats_id(_table))
+        shared_feed.add_channel(_name, _table.broadcaster, _table.history)
+        print(f"✅ Mesa '{_name}' ({_kind}) configurada")
     except Exception as e:
-        print(f"[VeraBet] Erro ao finalizar cliente: {e}")
+        print(f"⚠️ Mesa inválida em TABLES ({_spec}): {e}")
+
+
+def _get_table(name: str) -> TablePipeline:
+    table = table_registry.get(name)
+    if table is None:
+        raise HTTPException(status_code=404, detail="Mesa não encontrada")
+    return table
+
+
+@app.get("/api/tables")
+async def api_tables():
+    return {"ok": True, "tables": table_registry.stats(), "timestamp": int(time.time() * 1000)}
+
+
+@app.get("/tables/{name}/events")
+async def table_events(name: str, request: Request):
+    table = _get_table(name)
+    if is_ingestor():
+        await table.start()
+    sub = table.broadcaster.subscribe()
+    initial = shared_feed.last_frame(name, "status") or format_sse("status", {'type': 'status', 'connected': table.connected, 'ts': int(time.time() * 1000)})
+    initial += state_bootstrap(table)
+    # Reconexão: reenviar da memória os eventos perdidos desde o Last-Event-ID
+    initial += table.broadcaster.resume(last_event_id(request))
+    return StreamingResponse(
+        table.broadcaster.stream(sub, initial),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "Access-Control-Allow-Origin": "*",
+        }
+    )
+
+
+@app.get("/tables/{name}/api/status")
+async def table_status(name: str):
+    return {"ok": True, **_get_table(name).status(), "timestamp": int(time.time() * 1000)}
+
+
+@app.get("/tables/{name}/api/results")
+async def table_results(name: str, limit: int = 20):
+    table = _get_table(name)
+    return {
+        "ok": True,
+        "wsConnected": table_state(table)["connected"],
+        "results_count": len(table.history),
+        "results": table.history[:limit],
+        "pending": table.pending_bets,
+    }
+
+
+@app.on_event("startup")
+async def startup_tables():
+    if is_ingestor():
+        for table in table_registry.managed():
+            await load_table_stats(table, _table_stats_id(table))
+        await table_registry.start_all()
+
+
+@app.on_event("shutdown")
+async def shutdown_tables():
+    await table_registry.stop_all()
+    # Sessão HTTP compartilhada pelos clientes VeraBet (registrado por último)
+    await close_verabet_session()
+    # Liberar a liderança só depois dos flushes: um seguidor assume em seguida
+    await leader.stop()
 
 # ============================================================
 
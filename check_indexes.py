@@ -0,0 +1,27 @@
+import asyncio
+import db
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+async def check():
+    # Initialize DB
+    uri = os.getenv("MONGO_URI")
+    if not uri:
+        print("MONGO_URI not found in env")
+        return
+    
+    # Index creation runs explicitly below, inside this loop
+    db.init_db(uri=uri, create_indexes=False)
+    
+    await db.ensure_indexes(db.db)
+    report = await db.explain_check(db.db)
+    for r in report:
+        status = "ERROR" if "error" in r else ("COLLSCAN" if r["collscan"] else "ok")
+        print(f"{status:9s} {r['collection']:16s} {r['filter']}  {' <- '.join(r.get('stages', []))}")
+    scans = sum(1 for r in report if r.get("collscan"))
+    print(f"\n{scans} collection scan(s) in {len(report)} access paths.")
+
+if __name__ == "__main__":
+    asyncio.run(check())
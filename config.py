@@ -2,7 +2,9 @@
 Configurações do DBcolor
 Equivalente ao double.config.js
 """
+import json
 import os
+import tempfile
 from dotenv import load_dotenv
 
 # Carregar variáveis de ambiente do arquivo .env
@@ -11,6 +13,11 @@ load_dotenv()
 class Config:
     # WebSocket URL
     WS_URL = os.getenv("PLAYNABETS_WS_URL", "wss://play.soline.bet:5903/Game")
+    # Pipeline do WSClient: tamanho da fila entre recepção e processamento
+    # e política quando cheia ("block", "drop_oldest" ou "drop_newest").
+    # As políticas de descarte podem perder rodadas; "block" não perde nenhuma.
+    WS_QUEUE_SIZE = int(os.getenv("WS_QUEUE_SIZE", "256"))
+    WS_OVERFLOW_POLICY = os.getenv("WS_OVERFLOW_POLICY", "block")
     
     # Janelas e thresholds
     SEQ_LEN = 4  # sequência mínima para color_streak
@@ -20,6 +27,41 @@ class Config:
     
     # Qualidade mínima da amostra
     MIN_SAMPLE_TOTAL = 6
+
+    # Capacidade do histórico de resultados em memória (anel por plataforma)
+    RESULTS_HISTORY_SIZE = int(os.getenv("RESULTS_HISTORY_SIZE", "100"))
+
+    # Cache das respostas de /api/stats/* (entradas LRU e TTL em segundos)
+    STATS_CACHE_SIZE = int(os.getenv("STATS_CACHE_SIZE", "256"))
+    STATS_CACHE_TTL_SECONDS = float(os.getenv("STATS_CACHE_TTL_SECONDS", "60"))
+    # Janela de coalescência das escritas de global_stats/verabet_stats no MongoDB
+    STATS_WRITE_WINDOW_SECONDS = float(os.getenv("STATS_WRITE_WINDOW_SECONDS", "2"))
+    # Inserções em lote de signal_history/activity_logs: tamanho do lote,
+    # atraso máximo até o flush e limite de documentos em memória
+    BULK_INSERT_BATCH = int(os.getenv("BULK_INSERT_BATCH", "500"))
+    BULK_INSERT_DELAY_SECONDS = float(os.getenv("BULK_INSERT_DELAY_SECONDS", "1"))
+    BULK_INSERT_MAX_BUFFER = int(os.getenv("BULK_INSERT_MAX_BUFFER", "10000"))
+    # Cache de usuários autenticados (get_current_user): entradas e TTL em segundos
+    USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "1024"))
+    USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+    # Recarregar páginas/JS/CSS quando os arquivos mudarem (desenvolvimento, mesma flag DEV do main.py)
+    STATIC_DEV_RELOAD = os.getenv("DEV", "false").lower() in ("1", "true", "yes")
+    # Eventos (double_result/signal/bet_result) guardados por plataforma para replay via Last-Event-ID
+    SSE_REPLAY_SIZE = int(os.getenv("SSE_REPLAY_SIZE", "256"))
+    # Fila por cliente SSE: frames pendentes e atraso máximos antes de desconectar o cliente lento
+    SSE_MAX_QUEUE = int(os.getenv("SSE_MAX_QUEUE", "256"))
+    SSE_MAX_LAG_SECONDS = float(os.getenv("SSE_MAX_LAG_SECONDS", "60"))
+    # Mesas adicionais (além de playnabet/verabet), cada uma com pipeline próprio.
+    # JSON: [{"name": "mesa2", "kind": "verabet" | "ws", "url": "..."}]
+    TABLES = json.loads(os.getenv("TABLES", "[]") or "[]")
+    # Vários workers: "producer" ingere e grava no anel em memória compartilhada,
+    # "consumer" só lê dele e atende SSE/resultados; "auto" elege o produtor por
+    # trava de arquivo (LEADER_LOCK_PATH); "single" = processo único
+    WORKER_ROLE = os.getenv("WORKER_ROLE", "single").lower()
+    SHM_NAME = os.getenv("SHM_NAME", "dbcolor")
+    SHM_EVENT_SLOTS = int(os.getenv("SHM_EVENT_SLOTS", "1024"))
+    SHM_SLOT_SIZE = int(os.getenv("SHM_SLOT_SIZE", "8192"))
+    LEADER_LOCK_PATH = os.getenv("LEADER_LOCK_PATH", os.path.join(tempfile.gettempdir(), f"{SHM_NAME}.leader.lock"))
     
     # Seleção
     RANDOMIZE_TOP_DELTA = 5
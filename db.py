@@ -1,4 +1,6 @@
 import os
+import time
+from datetime import datetime
 from motor.motor_asyncio import AsyncIOMotorClient
 
 MONGO_URI = os.getenv("MONGO_URI") or os.getenv("PLAYNABETS_WS_URL") or ""
@@ -6,10 +8,117 @@ if not MONGO_URI:
     # Keep default empty and rely on env var in production
     MONGO_URI = None
 
+# Run the explain-plan check after building indexes (reports collection scans)
+EXPLAIN_CHECK = os.getenv("DB_EXPLAIN_CHECK", "").lower() in ("1", "true", "yes")
+
 client = None
 db = None
 
-def init_db(app=None, uri=None):
+# Declarative index registry: collection -> list of index specs.
+# Compound keys follow equality -> sort -> range order for the access paths below.
+INDEXES = {
+    "users": [
+        {"keys": [("email", 1)], "unique": True},
+        # admin_stats: active users by last_login
+        {"keys": [("last_login", 1)]},
+    ],
+    "signal_history": [
+        # /api/stats/* and signals-history with platform=all: createdAt range, sorted by createdAt
+        {"keys": [("createdAt", -1)]},
+        # same, filtered by platform
+        {"keys": [("platform", 1), ("createdAt", -1)]},
+    ],
+    "activity_logs": [
+        # admin_logs without filter: sorted by timestamp
+        {"keys": [("timestamp", -1)]},
+        # admin_logs filtered by action
+        {"keys": [("action", 1), ("timestamp", -1)]},
+    ],
+    "signal_rollups": [
+        {"keys": [("date", 1), ("hour", 1)]},
+        {"keys": [("platform", 1), ("date", 1)]},
+    ],
+}
+
+# Representative queries for the explain-plan check (collection, filter, sort)
+EXPLAIN_QUERIES = [
+    ("signal_history", {"createdAt": {"$gte": 0}}, [("createdAt", -1)]),
+    ("signal_history", {"createdAt": {"$gte": 0}, "platform": "playnabet"}, [("createdAt", -1)]),
+    ("activity_logs", {}, [("timestamp", -1)]),
+    ("activity_logs", {"action": "login"}, [("timestamp", -1)]),
+    ("users", {"email": "check@example.com"}, None),
+    ("users", {"last_login": {"$gte": datetime(2000, 1, 1)}}, None),
+    ("signal_rollups", {"date": {"$gte": "2000-01-01"}, "platform": "playnabet"}, None),
+]
+
+
+async def ensure_indexes(database=None, collections=None):
+    """Create the registry indexes (idempotent) and log build timings"""
+    database = database if database is not None else db
+    report = []
+    for coll, specs in INDEXES.items():
+        if collections is not None and coll not in collections:
+            continue
+        for spec in specs:
+            options = {k: v for k, v in spec.items() if k != "keys"}
+            t0 = time.perf_counter()
+            try:
+                name = await database[coll].create_index(spec["keys"], **options)
+                ms = (time.perf_counter() - t0) * 1000
+                print(f"[db] index {coll}.{name} ready in {ms:.1f}ms")
+                report.append({"collection": coll, "index": name, "ms": round(ms, 1), "ok": True})
+            except Exception as e:
+                print(f"[db] failed to create index on {coll} {spec['keys']}: {e}")
+                report.append({"collection": coll, "keys": spec["keys"], "ok": False, "error": str(e)})
+    return report
+
+
+def _plan_stages(plan):
+    """Flatten the stage names of a winning plan (classic and SBE formats)"""
+    stages = []
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        if not isinstance(node, dict):
+            continue
+        if "stage" in node:
+            stages.append(node["stage"])
+        for key in ("inputStage", "queryPlan"):
+            if key in node:
+                stack.append(node[key])
+        stack.extend(node.get("inputStages", []))
+    return stages
+
+
+async def explain_check(database=None):
+    """Explain the registry access paths and report collection scans"""
+    database = database if database is not None else db
+    report = []
+    for coll, flt, sort in EXPLAIN_QUERIES:
+        try:
+            cursor = database[coll].find(flt)
+            if sort:
+                cursor = cursor.sort(sort)
+            plan = await cursor.explain()
+            stages = _plan_stages(plan.get("queryPlanner", {}).get("winningPlan", {}))
+            collscan = "COLLSCAN" in stages
+            if collscan:
+                print(f"[db] COLLSCAN on {coll} filter={flt} sort={sort}")
+            report.append({"collection": coll, "filter": str(flt), "stages": stages, "collscan": collscan})
+        except Exception as e:
+            print(f"[db] explain failed on {coll}: {e}")
+            report.append({"collection": coll, "filter": str(flt), "error": str(e)})
+    return report
+
+
+async def ensure_indexes_and_check(database=None):
+    await ensure_indexes(database)
+    if EXPLAIN_CHECK:
+        await explain_check(database)
+
+
+def init_db(app=None, uri=None, create_indexes=True):
+    """create_indexes=False skips the built-in index creation (callers that run it themselves)."""
     global client, db
     uri = uri or MONGO_URI or os.getenv("MONGO_URI")
     if not uri:
@@ -21,22 +130,27 @@ def init_db(app=None, uri=None):
     except Exception:
         dbname = "dbdouble"
     db = client[dbname]
-    # Optional: create index on users email
-    async def ensure_indexes():
-        await db.users.create_index("email", unique=True)
+    if not create_indexes:
+        return
     # If an app is provided we can schedule background task
     if app:
         @app.on_event("startup")
         async def _init_indexes():
             try:
-                await ensure_indexes()
+                await ensure_indexes_and_check(db)
             except Exception:
                 pass
     else:
-        # create indexes immediately (async I/O contexts should call directly)
+        # create indexes immediately; inside a running loop run_until_complete
+        # would fail, so async callers must await ensure_indexes themselves
         import asyncio
+        try:
+            asyncio.get_running_loop()
+            return
+        except RuntimeError:
+            pass
         try:
             loop = asyncio.get_event_loop()
-            loop.run_until_complete(ensure_indexes())
+            loop.run_until_complete(ensure_indexes_and_check(db))
         except Exception:
             pass
@@ -0,0 +1,25 @@
+import asyncio
+import db
+from dotenv import load_dotenv
+import os
+
+from services import stats_rollups
+
+load_dotenv()
+
+async def rebuild_rollups():
+    # Initialize DB
+    uri = os.getenv("MONGO_URI")
+    if not uri:
+        print("MONGO_URI not found in env")
+        return
+    
+    db.init_db(uri=uri)
+    
+    total = await db.db.signal_history.count_documents({})
+    print(f"Rebuilding rollups from {total} signals...")
+    buckets = await stats_rollups.rebuild(db.db)
+    print(f"Rebuild complete. {buckets} rollup buckets written to '{stats_rollups.ROLLUPS_COLLECTION}'.")
+
+if __name__ == "__main__":
+    asyncio.run(rebuild_rollups())
@@ -4,6 +4,10 @@ from datetime import datetime, timedelta
 from typing import Optional
 from pymongo import ReturnDocument
 import db as db_module
+from services import stats_queries, stats_rollups
+from services.bulk_writer import BufferedInserter
+from services.user_cache import UserCache
+from config import CONFIG
 import time
 from models.auth_models import UserIn, UserOut, Token
 from auth_utils import get_password_hash, verify_password
@@ -11,6 +15,18 @@ from jwt_utils import create_access_token, decode_access_token
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
+# Usuários autenticados em memória (get_current_user sem ida ao banco a cada requisição)
+user_cache = UserCache(CONFIG.USER_CACHE_SIZE, CONFIG.USER_CACHE_TTL_SECONDS)
+
+# Logs de atividade gravados em lote (insert_many) em vez de um insert por evento
+activity_log_writer = BufferedInserter(
+    "activity_logs",
+    lambda: db_module.db.activity_logs if db_module.db is not None else None,
+    max_batch=CONFIG.BULK_INSERT_BATCH,
+    max_delay_seconds=CONFIG.BULK_INSERT_DELAY_SECONDS,
+    max_buffer=CONFIG.BULK_INSERT_MAX_BUFFER,
+)
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login", auto_error=False)
 
 # Fuso horário de Brasília (UTC-3)
@@ -44,7 +60,7 @@ async def log_user_activity(user_email: str, action: str, details: str = "", req
             "datetime": brazil_now.replace(tzinfo=None)  # Salvar sem timezone info para MongoDB
         }
         
-        await db_module.db.activity_logs.insert_one(log_doc)
+        activity_log_writer.add(log_doc)
     except Exception as e:
         print(f"Erro ao registrar log de atividade: {e}")
 
@@ -89,6 +105,7 @@ async def register(user: UserIn):
         "last_login": get_brazil_time().replace(tzinfo=None),
     }
     res = await db_module.db.users.insert_one(doc)
+    user_cache.invalidate(user.email)
     return UserOut(
         id=str(res.inserted_id), 
         email=user.email, 
@@ -114,6 +131,7 @@ async def login(request: Request, response: Response, form_data: OAuth2PasswordR
         {"email": user["email"]},
         {"$set": {"last_login": get_brazil_time().replace(tzinfo=None)}}
     )
+    user_cache.invalidate(user["email"])
     token = create_access_token({"sub": user["email"]})
     # Log successful login
     await log_user_activity(user["email"], "login", "Login bem-sucedido", request)
@@ -147,9 +165,13 @@ async def get_current_user(request: Request):
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token inválido")
     except Exception:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token inválido")
-    user = await db_module.db.users.find_one({"email": email})
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Usuário não encontrado")
+    user = user_cache.get(email)
+    if user is None:
+        generation = user_cache.generation
+        user = await db_module.db.users.find_one({"email": email})
+        if not user:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Usuário não encontrado")
+        user_cache.put(email, user, generation)
     return user
 
 async def get_admin_user(current_user: dict = Depends(get_current_user)):
@@ -185,6 +207,7 @@ async def set_bankroll(payload: dict, current_user: dict = Depends(get_current_u
     except Exception:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Valor inválido para banca")
     await db_module.db.users.update_one({"email": current_user.get("email")}, {"$set": {"bankroll": val}})
+    user_cache.invalidate(current_user.get("email"))
     return {"bankroll": val}
 
 
@@ -212,6 +235,7 @@ async def update_preferences(payload: dict, current_user: dict = Depends(get_cur
         {"$set": update_data}, 
         return_document=ReturnDocument.AFTER
     )
+    user_cache.invalidate(current_user.get("email"))
     if result:
         return {
             "enabled_colors": result.get("enabled_colors", ["red", "black", "white"]),
@@ -236,10 +260,11 @@ async def admin_stats(admin_user: dict = Depends(get_admin_user)):
     cutoff_ts = int(cutoff.timestamp() * 1000)
     
     try:
-        signals = await db_module.db.signal_history.find({"createdAt": {"$gte": cutoff_ts}}).to_list(length=10000)
-        total_signals = len(signals)
-        wins = sum(1 for s in signals if s.get("result") == "win")
-        signal_rate = round((wins / total_signals * 100), 2) if total_signals > 0 else 0
+        source = await stats_rollups.source(db_module.db)
+        counts = await stats_queries.totals(source, source.match(since_ms=cutoff_ts))
+        total_signals = counts["total"]
+        wins = counts["wins"]
+        signal_rate = stats_queries.rate(wins, total_signals)
     except Exception:
         total_signals = 0
         wins = 0
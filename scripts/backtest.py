@@ -0,0 +1,46 @@
+"""Backtest offline dos motores de sinal (ver services/backtest.py)
+
+Uso:
+  python scripts/backtest.py --engine pattern --rounds 1000000
+  python scripts/backtest.py --engine playnabet --file resultados.json
+
+O arquivo pode ser uma lista JSON de números (0..14) ou de resultados
+({"number": ...}), ou texto com um número por linha, do mais antigo ao mais novo.
+"""
+import os, sys, json, random, argparse
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if repo_root not in sys.path:
+    sys.path.insert(0, repo_root)
+
+from services.backtest import ENGINES, run_backtest
+
+
+def load_numbers(path):
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        return [int(line) for line in text.split() if line.strip()]
+    return [int(x["number"]) if isinstance(x, dict) else int(x) for x in data]
+
+
+parser = argparse.ArgumentParser(description="Backtest dos motores de sinal")
+parser.add_argument("--engine", choices=ENGINES, default="playnabet")
+parser.add_argument("--file", help="histórico de resultados (JSON ou um número por linha)")
+parser.add_argument("--rounds", type=int, default=100000, help="rodadas sintéticas (sem --file)")
+parser.add_argument("--seed", type=int, default=0)
+parser.add_argument("--round-seconds", type=float, default=30.0)
+parser.add_argument("--max-attempts", type=int, default=None)
+parser.add_argument("--no-learn", action="store_true", help="não atualizar stats/Platt durante o replay")
+args = parser.parse_args()
+
+if args.file:
+    numbers = load_numbers(args.file)
+else:
+    rng = random.Random(args.seed)
+    numbers = [rng.randint(0, 14) for _ in range(args.rounds)]
+
+report = run_backtest(numbers, args.engine, round_seconds=args.round_seconds,
+                      max_attempts=args.max_attempts, seed=args.seed, learn=not args.no_learn)
+print(json.dumps(report, indent=2, ensure_ascii=False))
@@ -0,0 +1,56 @@
+"""Benchmark: custo de serialização por evento SSE (json da stdlib x encoder rápido)
+Uso: python scripts/bench_serialization.py [assinantes] [eventos]
+"""
+import os, sys, json, time
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if repo_root not in sys.path:
+    sys.path.insert(0, repo_root)
+
+from services.serialization import BACKEND, sse_frame
+from services.sse_broadcaster import SSEBroadcaster
+
+subscribers = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+events = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+# Payloads representativos do on_message
+result_payload = {"type": "double_result", "data": {
+    "number": 5, "color": "red", "round_id": "round_1792271946709", "timestamp": 1792271950909,
+    "source": "playnabets", "raw": {"number": 5, "timestamp": 1792271950909, "extra": list(range(40))}}}
+signal_payload = {"type": "signal", "data": {
+    "id": "sig_1792271950909", "type": "double_signal", "platform": "playnabet", "color": "black",
+    "numbers": [8, 9, 10, 11, 12, 13, 14], "chance": 67, "patternKey": "color_streak",
+    "reasons": ["Sequência de 4 vermelhos", "Branco como proteção"], "createdAt": 1792271950909}}
+payloads = [("double_result", result_payload), ("signal", signal_payload)]
+
+
+def legacy(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n".encode("utf-8")
+
+
+def bench(name, fn, per_subscriber):
+    # Fan-out real nos dois casos: um frame por assinante numa fila Subscriber.
+    # As filas são esvaziadas a cada evento (fora do tempo medido) para não acumular.
+    broadcaster = SSEBroadcaster("bench", heartbeat_seconds=3600, max_queue=2, max_lag_seconds=float("inf"))
+    subs = [broadcaster.subscribe() for _ in range(subscribers)]
+    elapsed = 0.0
+    for i in range(events):
+        event, payload = payloads[i & 1]
+        tag = event.encode("utf-8")
+        started = time.perf_counter()
+        if per_subscriber:
+            for sub in subs:
+                sub.push(fn(event, payload), tag)
+        else:
+            broadcaster.publish_frame(fn(event, payload), tag)
+        elapsed += time.perf_counter() - started
+        for sub in subs:
+            sub.frames.clear()
+            sub.pending_since = None
+    print(f"{name:38s} {elapsed * 1e6 / events:10.1f} us/evento")
+
+
+print(f"encoder={BACKEND} assinantes={subscribers} eventos={events}")
+bench("stdlib json.dumps uma vez por evento", legacy, False)
+bench(f"{BACKEND} sse_frame uma vez por evento", sse_frame, False)
+if subscribers * events <= 2_000_000:
+    bench("stdlib json.dumps por assinante", legacy, True)
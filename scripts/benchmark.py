@@ -0,0 +1,314 @@
+"""Suite de benchmarks dos caminhos quentes (detecção, ingestão e fan-out SSE)
+
+Gera um fluxo sintético e reprodutível de rodadas (seed fixa), mede latência
+por chamada (p50/p90/p99/max) e alocações (tracemalloc) de cada caso e salva
+um JSON em bench_results/ para comparar execuções.
+
+Uso:
+  python scripts/benchmark.py                       # todos os casos
+  python scripts/benchmark.py --only detect --calls 2000
+  python scripts/benchmark.py --pending 10 --clients 5000
+  python scripts/benchmark.py --compare bench_results/a.json bench_results/b.json
+"""
+import os, sys, io, json, time, random, asyncio, argparse, platform, subprocess, tracemalloc, contextlib
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if repo_root not in sys.path:
+    sys.path.insert(0, repo_root)
+
+from services.parser import parse_double_payload
+from services.double import detect_double_patterns, detect_best_double_signal
+from services.double_features import DoubleFeatureState, color_to_token
+from services.pattern_signals import SignalEngine
+from services.verabet_patterns import VeraBetPatternEngine
+from services.result_ring import ResultRing
+from services.sse_broadcaster import SSEBroadcaster
+from services.adaptive_calibration import isolated_store
+
+RESULTS_DIR = os.path.join(repo_root, "bench_results")
+
+
+# --- Fluxo sintético de rodadas ---
+
+def synthetic_payloads(n, seed):
+    """Payloads no formato do upstream PlayNaBet, com timestamps espaçados"""
+    rng = random.Random(seed)
+    base = 1_700_000_000_000
+    return [
+        {"value": str(rng.randint(0, 14)), "timestamp": base + i * 30_000, "gameId": f"g{seed}_{i}"}
+        for i in range(n)
+    ]
+
+
+def warm_history(payloads, size=100):
+    parsed = [parse_double_payload(p) for p in payloads[:size]]
+    ring = ResultRing(size, source="playnabets")
+    ring.extend(parsed)
+    return parsed, ring, DoubleFeatureState.from_results(parsed)
+
+
+# --- Medição ---
+
+def percentile(sorted_vals, q):
+    if not sorted_vals:
+        return 0.0
+    k = min(len(sorted_vals) - 1, max(0, int(round(q / 100 * (len(sorted_vals) - 1)))))
+    return sorted_vals[k]
+
+
+def measure(call, calls, setup=None, alloc_calls=None):
+    """Executa `call(i)` `calls` vezes; `setup(i)` roda fora do cronômetro"""
+    timings = []
+    for i in range(calls):
+        if setup:
+            setup(i)
+        t0 = time.perf_counter_ns()
+        call(i)
+        timings.append(time.perf_counter_ns() - t0)
+    timings.sort()
+    us = [t / 1000 for t in timings]
+
+    # Alocações numa segunda passada (tracemalloc distorce o tempo)
+    # (só a chamada é contabilizada, o setup fica de fora)
+    alloc_calls = alloc_calls or min(calls, 200)
+    net_bytes = peak_bytes = net_blocks = 0
+    tracemalloc.start()
+    for i in range(alloc_calls):
+        if setup:
+            setup(i)
+        before, _ = tracemalloc.get_traced_memory()
+        blocks_before = sys.getallocatedblocks()
+        tracemalloc.reset_peak()
+        call(i)
+        current, peak = tracemalloc.get_traced_memory()
+        net_blocks += sys.getallocatedblocks() - blocks_before
+        net_bytes += current - before
+        peak_bytes = max(peak_bytes, peak - before)
+    tracemalloc.stop()
+
+    return {
+        "calls": calls,
+        "mean_us": round(sum(us) / len(us), 3),
+        "p50_us": round(percentile(us, 50), 3),
+        "p90_us": round(percentile(us, 90), 3),
+        "p99_us": round(percentile(us, 99), 3),
+        "max_us": round(us[-1], 3),
+        "ops_per_sec": round(1e6 / (sum(us) / len(us)), 1) if sum(us) else None,
+        "alloc_peak_bytes": peak_bytes,
+        "alloc_net_bytes_per_call": round(net_bytes / alloc_calls, 1),
+        "alloc_net_blocks_per_call": round(net_blocks / alloc_calls, 2),
+    }
+
+
+# --- Casos ---
+
+def case_parse(args):
+    payloads = synthetic_payloads(args.calls, args.seed)
+    return measure(lambda i: parse_double_payload(payloads[i]), args.calls)
+
+
+def case_detect_patterns(args):
+    payloads = synthetic_payloads(args.calls + 100, args.seed)
+    parsed, _, features = warm_history(payloads)
+    stream = [parse_double_payload(p) for p in payloads[100:]]
+    window = list(parsed)
+
+    def setup(i):
+        r = stream[i]
+        window.append(r)
+        del window[0]
+        features.push_result(r)
+
+    return measure(lambda i: detect_double_patterns(window, features), args.calls, setup)
+
+
+def case_detect_best(args):
+    payloads = synthetic_payloads(args.calls + 100, args.seed)
+    _, ring, features = warm_history(payloads)
+    stream = [parse_double_payload(p) for p in payloads[100:]]
+    random.seed(args.seed)
+
+    def setup(i):
+        ring.append(stream[i])
+        features.push_result(stream[i])
+
+    return measure(lambda i: detect_best_double_signal(ring, features=features), args.calls, setup)
+
+
+def case_signal_engine(args):
+    payloads = synthetic_payloads(args.calls + 100, args.seed)
+    tokens = [color_to_token(parse_double_payload(p)["color"]) for p in payloads]
+    engine = SignalEngine()
+    return measure(lambda i: engine.avaliar_historico(tokens[i:i + 100], rodada_atual=i + 100), args.calls)
+
+
+def case_signal_engine_stream(args):
+    payloads = synthetic_payloads(args.calls + 100, args.seed)
+    tokens = [color_to_token(parse_double_payload(p)["color"]) for p in payloads]
+    engine = SignalEngine()
+    stream = engine.novo_stream()
+    stream.extend(tokens[:100])
+    return measure(lambda i: engine.avaliar_stream(stream, rodada_atual=i + 100), args.calls,
+                   lambda i: stream.push(tokens[100 + i]))
+
+
+def case_verabet_engine(args):
+    payloads = synthetic_payloads(args.calls + 100, args.seed)
+    tokens = [color_to_token(parse_double_payload(p)["color"]) for p in payloads]
+    engine = VeraBetPatternEngine()
+    engine.cooldown_seconds = 0  # mede a votação completa em toda rodada
+    return measure(lambda i: engine.avaliar_historico(tokens[i:i + 100]), args.calls)
+
+
+def case_on_message(args):
+    """Caminho completo da mesa PlayNaBet (app.on_message) com N apostas pendentes e detecção sempre liberada"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app
+    payloads = synthetic_payloads(args.calls + 100, args.seed)
+    template = [
+        {"id": f"bench_pb_{k}", "patternKey": "bench", "color": "red" if k % 2 else "black",
+         "numbers": [], "chance": 60, "createdAt": 0, "createdRound": -1,
+         "attemptsLeft": 10 ** 9, "attemptsUsed": 0, "protect_white": False, "confLabel": "media"}
+        for k in range(args.pending)
+    ]
+    sink = io.StringIO()
+    result = {}
+
+    table = app.playnabet_table
+
+    async def run():
+        table.reset()
+        with contextlib.redirect_stdout(sink):
+            for p in payloads[:100]:
+                app.on_message(dict(p))
+
+        def setup(i):
+            table.pending_bets[:] = [dict(pb) for pb in template]
+            table.loss_cooldown_until = 0
+            table.governor.reset()
+            sink.seek(0)
+            sink.truncate()
+
+        def call(i):
+            with contextlib.redirect_stdout(sink):
+                app.on_message(dict(payloads[100 + i % args.calls]))
+
+        # Resoluções atualizam stats/Platt: usar cópia em memória do store
+        with isolated_store():
+            result.update(measure(call, args.calls, setup))
+        await asyncio.sleep(0)  # deixar as tasks de persistência (sem DB) terminarem
+
+    asyncio.run(run())
+    result["pending"] = args.pending
+    return result
+
+
+def case_sse_fanout(args):
+    """Publicação de um sinal para N assinantes SSE"""
+    result = {}
+    payload = {"type": "signal", "data": {"id": "bench", "color": "red", "chance": 70,
+                                          "targets": list(range(1, 8)), "reasons": ["bench"]}}
+
+    async def run():
+        broadcaster = SSEBroadcaster("bench", heartbeat_seconds=3600)
+        subs = [broadcaster.subscribe() for _ in range(args.clients)]
+
+        def setup(i):
+            if i % 50 == 0:
+                for s in subs:
+                    s.frames.clear()
+
+        result.update(measure(lambda i: broadcaster.publish("signal", payload), args.calls, setup))
+        await broadcaster.stop()
+
+    asyncio.run(run())
+    result["clients"] = args.clients
+    return result
+
+
+CASES = {
+    "parse_double_payload": case_parse,
+    "detect_double_patterns": case_detect_patterns,
+    "detect_best_double_signal": case_detect_best,
+    "signal_engine.avaliar_historico": case_signal_engine,
+    "signal_engine.avaliar_stream": case_signal_engine_stream,
+    "verabet_engine.avaliar_historico": case_verabet_engine,
+    "on_message": case_on_message,
+    "sse_fanout": case_sse_fanout,
+}
+
+
+# --- Saída / comparação ---
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=repo_root,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+def print_table(results):
+    print(f"{'caso':36s} {'p50 us':>10s} {'p90 us':>10s} {'p99 us':>10s} {'max us':>10s} {'peak B':>9s}")
+    for name, r in results.items():
+        print(f"{name:36s} {r['p50_us']:10.1f} {r['p90_us']:10.1f} {r['p99_us']:10.1f} {r['max_us']:10.1f} "
+              f"{r['alloc_peak_bytes']:9d}")
+
+
+def compare(old_path, new_path):
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)["results"]
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)["results"]
+    print(f"{'caso':36s} {'p50 antes':>10s} {'p50 depois':>11s} {'razão':>7s} {'p99 antes':>10s} {'p99 depois':>11s}")
+    for name in new:
+        if name not in old:
+            continue
+        a, b = old[name], new[name]
+        ratio = (b["p50_us"] / a["p50_us"]) if a["p50_us"] else float("nan")
+        print(f"{name:36s} {a['p50_us']:10.1f} {b['p50_us']:11.1f} {ratio:7.2f} {a['p99_us']:10.1f} {b['p99_us']:11.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks dos caminhos quentes")
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--pending", type=int, default=5, help="apostas pendentes no caso on_message")
+    parser.add_argument("--clients", type=int, default=1000, help="assinantes no caso sse_fanout")
+    parser.add_argument("--only", help="filtrar casos por substring")
+    parser.add_argument("--out", help="arquivo JSON de saída (padrão: bench_results/bench_<ts>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("ANTES", "DEPOIS"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    results = {}
+    for name, fn in CASES.items():
+        if args.only and args.only not in name:
+            continue
+        results[name] = fn(args)
+
+    print_table(results)
+    doc = {
+        "meta": {
+            "timestamp": int(time.time() * 1000),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "calls": args.calls,
+            "seed": args.seed,
+            "pending": args.pending,
+            "clients": args.clients,
+        },
+        "results": results,
+    }
+    out = args.out or os.path.join(RESULTS_DIR, f"bench_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(doc, f, indent=2)
+    print(f"\nResultados salvos em {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,20 +5,12 @@ repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if repo_root not in sys.path:
     sys.path.insert(0, repo_root)
 
-from app import on_message, results_history, pending_bets, event_clients
+from app import on_message, results_history, pending_bets, event_broadcaster
 from config import CONFIG
 
-# Dummy queue para capturar SSE events
-class DummyQueue:
-    def __init__(self):
-        self.events = []
-    def put_nowait(self, msg):
-        print('SSE:', msg)
-        self.events.append(msg)
-
-# Reiniciar
-results_history.clear(); pending_bets.clear(); event_clients.clear()
-q = DummyQueue(); event_clients.append(q)
+# Reiniciar e assinar o broadcaster para capturar SSE events
+results_history.clear(); pending_bets.clear()
+sub = event_broadcaster.subscribe()
 
 # Simular uma pending bet como se um signal tivesse sido emitido
 pb = {'id': 'test_block_pb1', 'patternKey': 'triple_repeat', 'color': 'red', 'numbers': [1,2,3], 'chance': 70, 'createdAt': int(time.time()*1000), 'attemptsLeft': CONFIG.MARTINGALE_MAX_ATTEMPTS, 'attemptsUsed': 0}
@@ -39,8 +31,8 @@ emit(8)
 
 # No final, verificar se algum 'signal' foi enviado por causa desse padrão novo (deveria NÃO enviar)
 print('\nEvents captured:')
-for e in q.events:
-    print(e)
+for e in sub.frames:
+    print(e.decode())
 
 print('\nPending bets after:', pending_bets)
 print('Done')
@@ -5,23 +5,13 @@ repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if repo_root not in sys.path:
     sys.path.insert(0, repo_root)
 
-from app import on_message, results_history, pending_bets, event_clients
+from app import on_message, results_history, pending_bets, event_broadcaster
 from services.parser import parse_double_payload
 from config import CONFIG
 import time
 
-# Criar dummy queue para capturar SSE
-class DummyQueue:
-    def __init__(self):
-        self.items = []
-    def put_nowait(self, msg):
-        print('SSE Message:', msg)
-
-# garantir event_clients vazio e trocar por dummy
-if event_clients:
-    event_clients.clear()
-q = DummyQueue()
-event_clients.append(q)
+# Assinar o broadcaster para capturar SSE
+sub = event_broadcaster.subscribe()
 
 # Função utilitaria: enviar resultados via on_message
 emit_counter = 0
@@ -45,6 +35,8 @@ emit_result(8)
 emit_result(2)
 
 # Esperar para flush
+for frame in sub.frames:
+    print('SSE Message:', frame.decode())
 print('Pending bets:', pending_bets)
 print('Results history:', [r['number'] for r in results_history[-10:]])
 
@@ -6,19 +6,13 @@ repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if repo_root not in sys.path:
     sys.path.insert(0, repo_root)
 
-from app import on_message, results_history, pending_bets, event_clients
+from app import on_message, results_history, pending_bets, event_broadcaster
 from config import CONFIG
 import json
 import time
 
-# Dummy queue
-class DummyQueue:
-    def put_nowait(self, msg):
-        print('SSE:', msg)
-
 # Reset environment
-event_clients.clear()
-event_clients.append(DummyQueue())
+sub = event_broadcaster.subscribe()
 results_history.clear()
 pending_bets.clear()
 
@@ -49,6 +43,9 @@ emit(8)  # black -> should be miss
 emit(8)  # black -> miss
 emit(1)  # red -> should be win if attempts left > 0
 
+for frame in sub.frames:
+    print('SSE:', frame.decode())
+
 print('Pending bets after flow:', pending_bets)
 print('Results history:', [r['number'] for r in results_history[-10:]])
 
@@ -1,13 +1,24 @@
 """
 Calibração adaptativa usando Platt scaling
 Equivalente ao adaptiveCalibration.js
+
+Os parâmetros Platt e as estatísticas por padrão ficam em memória (carregados
+do disco uma vez). As alterações marcam o store como sujo e um flusher em
+segundo plano grava snapshots atômicos (arquivo temporário + rename) fora do
+event loop; se a gravação falhar, o store volta a ficar sujo e o próximo flush
+tenta de novo. `close_store()` faz o flush final no shutdown.
 """
+import asyncio
 import json
 import os
+import threading
+import time
+from contextlib import contextmanager
 from typing import Dict, Optional
 
 STORAGE_FILE = "platt_params.json"
 PATTERN_STATS_FILE = "pattern_stats.json"
+FLUSH_INTERVAL_SECONDS = 5.0
 
 def _read_json(filepath: str) -> Optional[Dict]:
     """Ler JSON do arquivo"""
@@ -19,20 +30,212 @@ def _read_json(filepath: str) -> Optional[Dict]:
         print(f"Erro ao ler {filepath}: {e}")
     return None
 
-def _write_json(filepath: str, obj: Dict):
-    """Escrever JSON no arquivo"""
+def _write_json(filepath: str, obj: Dict) -> bool:
+    """Escrever JSON de forma atômica (temp + rename); False se falhou"""
+    tmp_path = f"{filepath}.tmp"
     try:
-        with open(filepath, "w", encoding="utf-8") as f:
+        with open(tmp_path, "w", encoding="utf-8") as f:
             json.dump(obj, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filepath)
+        return True
     except Exception as e:
         print(f"Erro ao escrever {filepath}: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return False
+
+
+class CalibrationStore:
+    """Estado em memória + persistência write-behind"""
+
+    def __init__(self, platt_file: str = STORAGE_FILE, stats_file: str = PATTERN_STATS_FILE):
+        self.platt_file = platt_file
+        self.stats_file = stats_file
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._platt: Optional[Dict] = None
+        self._stats: Dict[str, Dict] = {}
+        self._dirty_platt = False
+        self._dirty_stats = False
+        self._task: Optional[asyncio.Task] = None
+
+    def _ensure_loaded(self):
+        if self._loaded or self.platt_file is None:
+            self._loaded = True
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            p = _read_json(self.platt_file)
+            if p and isinstance(p.get("A"), (int, float)) and isinstance(p.get("B"), (int, float)):
+                self._platt = p
+            self._stats = _read_json(self.stats_file) or {}
+            self._loaded = True
+
+    # --- Leitura / escrita em memória ---
+
+    def platt(self) -> Optional[Dict]:
+        self._ensure_loaded()
+        return self._platt
+
+    def set_platt(self, obj: Dict):
+        self._ensure_loaded()
+        with self._lock:
+            self._platt = obj
+            self._dirty_platt = True
+
+    def stats(self) -> Dict[str, Dict]:
+        """Referência às estatísticas (somente leitura para os chamadores)"""
+        self._ensure_loaded()
+        return self._stats
+
+    def update_stat(self, key: str, hit: bool) -> Dict:
+        self._ensure_loaded()
+        with self._lock:
+            cur = dict(self._stats.get(key) or {"wins": 0, "losses": 0, "updatedAt": None})
+            if hit:
+                cur["wins"] = cur.get("wins", 0) + 1
+            else:
+                cur["losses"] = cur.get("losses", 0) + 1
+            cur["updatedAt"] = int(time.time() * 1000)
+            self._stats[key] = cur
+            self._dirty_stats = True
+            return dict(cur)
+
+    def reset(self):
+        """Zerar parâmetros Platt e estatísticas em memória (o flush grava o estado vazio)"""
+        self._ensure_loaded()
+        with self._lock:
+            self._platt = None
+            self._stats = {}
+            self._dirty_platt = True
+            self._dirty_stats = True
+
+    # --- Persistência ---
+
+    def _snapshot(self):
+        """Copiar o que está sujo e limpar as flags (sob lock); platt {} = remover arquivo"""
+        with self._lock:
+            platt = (dict(self._platt) if self._platt is not None else {}) if self._dirty_platt else None
+            stats = {k: dict(v) for k, v in self._stats.items()} if self._dirty_stats else None
+            self._dirty_platt = False
+            self._dirty_stats = False
+        return platt, stats
+
+    def _write(self, platt: Optional[Dict], stats: Optional[Dict]) -> bool:
+        """Gravar o snapshot; o que falhar volta a ficar sujo para o próximo flush"""
+        platt_ok = stats_ok = True
+        if platt is not None and self.platt_file:
+            if platt:
+                platt_ok = _write_json(self.platt_file, platt)
+            else:
+                try:
+                    os.remove(self.platt_file)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    print(f"Erro ao remover {self.platt_file}: {e}")
+                    platt_ok = False
+        if stats is not None and self.stats_file:
+            stats_ok = _write_json(self.stats_file, stats)
+        if not (platt_ok and stats_ok):
+            with self._lock:
+                self._dirty_platt = self._dirty_platt or not platt_ok
+                self._dirty_stats = self._dirty_stats or not stats_ok
+        return platt_ok and stats_ok
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty_platt or self._dirty_stats
+
+    def flush(self) -> bool:
+        """Gravar snapshot de forma síncrona (scripts/testes); False se a gravação falhou"""
+        if not self.dirty:
+            return True
+        return self._write(*self._snapshot())
+
+    async def flush_async(self) -> bool:
+        """Gravar snapshot em thread, sem bloquear o event loop; False se a gravação falhou"""
+        if not self.dirty:
+            return True
+        platt, stats = self._snapshot()
+        return await asyncio.get_running_loop().run_in_executor(None, self._write, platt, stats)
+
+    async def _flush_loop(self, interval: float):
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    await self.flush_async()
+                except Exception as e:
+                    print(f"[calibration] Erro no flush: {e}")
+        except asyncio.CancelledError:
+            pass
+
+    def start(self, interval: float = FLUSH_INTERVAL_SECONDS):
+        """Iniciar flusher periódico no loop atual"""
+        self._ensure_loaded()
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._flush_loop(interval))
+
+    async def close(self):
+        """Parar o flusher e gravar o estado pendente"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush_async()
+
+
+_store = CalibrationStore()
+
+
+@contextmanager
+def isolated_store():
+    """
+    Trocar temporariamente o store global por uma cópia só em memória
+    (sem arquivos), para simulações offline que não podem alterar o estado real.
+    """
+    global _store
+    previous = _store
+    store = CalibrationStore(None, None)
+    platt = previous.platt()
+    store._platt = dict(platt) if platt else None
+    store._stats = {k: dict(v) for k, v in previous.stats().items()}
+    _store = store
+    try:
+        yield store
+    finally:
+        _store = previous
+
+
+def start_store(interval: float = FLUSH_INTERVAL_SECONDS):
+    """Iniciar persistência write-behind (chamar no startup do app)"""
+    _store.start(interval)
+
+async def close_store():
+    """Flush final (chamar no shutdown do app)"""
+    await _store.close()
+
+def flush_store():
+    """Flush síncrono, para scripts fora do event loop"""
+    _store.flush()
+
+async def reset_store() -> bool:
+    """Apagar a calibração (memória e disco, gravando fora do event loop)"""
+    _store.reset()
+    return await _store.flush_async()
 
 def get_platt_params() -> Optional[Dict]:
     """Obter parâmetros Platt"""
-    p = _read_json(STORAGE_FILE)
-    if p and isinstance(p.get("A"), (int, float)) and isinstance(p.get("B"), (int, float)):
-        return p
-    return None
+    return _store.platt()
 
 def set_platt_params(A: float, B: float) -> Dict:
     """Definir parâmetros Platt"""
@@ -41,7 +244,7 @@ def set_platt_params(A: float, B: float) -> Dict:
         "B": float(B) if B else 0,
         "updatedAt": int(time.time() * 1000)
     }
-    _write_json(STORAGE_FILE, obj)
+    _store.set_platt(obj)
     return obj
 
 def online_update_platt(raw_score: float, label: int, opts: Dict = None) -> Dict:
@@ -52,49 +255,37 @@ def online_update_platt(raw_score: float, label: int, opts: Dict = None) -> Dict
     """
     opts = opts or {}
     lr = opts.get("lr", 0.05)
-    
+
     def clip(v):
         return min(1e6, max(-1e6, v))
-    
+
     prev = get_platt_params() or {"A": 0, "B": 0}
     A = float(prev.get("A", 0))
     B = float(prev.get("B", 0))
-    
+
     x = float(raw_score) if raw_score else 0
     z = clip(A * x + B)
     p = 1 / (1 + pow(2.71828, -z))
     err = p - (1 if label else 0)
-    
+
     # Gradientes
     gradA = err * x
     gradB = err * 1
-    
+
     A = A - lr * gradA
     B = B - lr * gradB
-    
+
     return set_platt_params(A, B)
 
 def get_pattern_stat(key: str) -> Dict:
     """Obter estatísticas de um padrão"""
-    s = _read_json(PATTERN_STATS_FILE) or {}
-    return s.get(key, {"wins": 0, "losses": 0, "updatedAt": None})
+    cur = _store.stats().get(key)
+    return dict(cur) if cur else {"wins": 0, "losses": 0, "updatedAt": None}
 
 def update_pattern_stat(key: str, hit: bool) -> Dict:
     """Atualizar estatísticas de um padrão"""
-    s = _read_json(PATTERN_STATS_FILE) or {}
-    cur = s.get(key, {"wins": 0, "losses": 0, "updatedAt": None})
-    if hit:
-        cur["wins"] = cur.get("wins", 0) + 1
-    else:
-        cur["losses"] = cur.get("losses", 0) + 1
-    cur["updatedAt"] = int(time.time() * 1000)
-    s[key] = cur
-    _write_json(PATTERN_STATS_FILE, s)
-    return cur
+    return _store.update_stat(key, hit)
 
 def getAll_pattern_stats() -> Dict:
-    """Obter todas as estatísticas de padrões"""
-    return _read_json(PATTERN_STATS_FILE) or {}
-
-import time  # Import necessário
-
+    """Obter todas as estatísticas de padrões (não modificar o dict retornado)"""
+    return _store.stats()
@@ -0,0 +1,612 @@
+"""
+Backtest offline dos motores de sinal
+
+Reproduz uma sequência longa de rodadas pelos três motores
+(`detect_best_double_signal`, `SignalEngine` e `VeraBetPatternEngine`) com a
+mesma lógica de martingale, gales, cooldowns e `protect_white` de
+`TablePipeline` / `PlayNaBetPipeline`, e devolve taxa de acerto por
+padrão, tentativas usadas, drawdown e o ROI de `/api/stats/overview`.
+
+A pontuação é vetorizada com NumPy quando instalado (opcional):
+- tabelas "próximo acerto" por cor alvo resolvem qualquer aposta em O(1)
+- os motores de padrões são avaliados para todas as rodadas de uma vez
+  (estado do autômato por rodada via código base 3 dos últimos tokens)
+Sem NumPy os mesmos cálculos rodam em Python puro, com o mesmo resultado.
+
+Cooldowns baseados em tempo (loss de 5 min, cooldown do VeraBet) são
+convertidos em rodadas usando `round_seconds`.
+"""
+import math
+import random
+import time
+from typing import Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depende do ambiente
+    np = None
+
+from config import CONFIG
+from services.adaptive_calibration import isolated_store, online_update_platt, update_pattern_stat
+from services.double import detect_best_double_signal
+from services.double_features import DoubleFeatureState
+from services.pattern_automaton import TOKENS
+from services.pattern_signals import SignalEngine
+from services.result_ring import ResultRing
+from services.verabet_patterns import VeraBetPatternEngine
+
+ENGINES = ("double", "pattern", "playnabet", "verabet")
+
+# Códigos de cor iguais aos índices do autômato (V, P, B)
+RED, BLACK, WHITE = 0, 1, 2
+CODE_BY_COLOR = {"red": RED, "black": BLACK, "white": WHITE}
+COLOR_BY_CODE = ("red", "black", "white")
+
+# Constantes do servidor (app.py)
+COOLDOWN_BASIC = 4
+COOLDOWN_AFTER_LOSS = 8
+ANTI_TILT_LOSS_STREAK = 2
+STOP_DURATION_ROUNDS = 12
+MIN_COOLDOWN_AFTER_WIN = 3
+GLOBAL_WINDOW_ROUNDS = 30
+GLOBAL_MAX_ALERTS = 4
+LOSS_COOLDOWN_MINUTES = 5
+
+# Mapeamentos usados pelo app para sinais do SignalEngine
+PATTERN_CHANCE = {'alto': 85, 'medio-alto': 75, 'medio': 65, 'baixo-medio': 55, 'baixo': 30}
+
+
+def color_of(number: int) -> str:
+    """0 -> white, 1-7 -> red, 8-14 -> black (igual ao parser)"""
+    if number == 0:
+        return "white"
+    return "red" if number <= 7 else "black"
+
+
+def color_codes(numbers: Sequence[int]):
+    """Códigos de cor por rodada (ndarray int8 com NumPy, lista sem)"""
+    if np is not None:
+        nums = np.asarray(numbers, dtype=np.int16)
+        return np.where(nums == 0, WHITE, np.where(nums <= 7, RED, BLACK)).astype(np.int8)
+    return [WHITE if n == 0 else (RED if n <= 7 else BLACK) for n in numbers]
+
+
+def next_hit_table(codes, target: int, protect_white: bool):
+    """
+    `out[i]` = primeira rodada j >= i em que a aposta em `target` acerta
+    (cor alvo, ou branco com protect_white); `len(codes)` se nunca.
+    """
+    n = len(codes)
+    if np is not None:
+        codes = np.asarray(codes)
+        mask = codes == target
+        if protect_white:
+            mask |= codes == WHITE
+        idx = np.where(mask, np.arange(n), n)
+        out = np.empty(n + 1, dtype=np.int64)
+        out[n] = n
+        out[:n] = np.minimum.accumulate(idx[::-1])[::-1]
+        return out
+    out = [n] * (n + 1)
+    nxt = n
+    for i in range(n - 1, -1, -1):
+        c = codes[i]
+        if c == target or (protect_white and c == WHITE):
+            nxt = i
+        out[i] = nxt
+    return out
+
+
+class HitTables:
+    """Cache das tabelas de próximo acerto por (cor alvo, protect_white)"""
+
+    def __init__(self, codes):
+        self.codes = codes
+        self.n = len(codes)
+        self._tables = {}
+
+    def get(self, target: int, protect_white: bool):
+        key = (target, bool(protect_white) and target != WHITE)
+        table = self._tables.get(key)
+        if table is None:
+            table = self._tables[key] = next_hit_table(self.codes, *key)
+        return table
+
+    def resolve(self, round_idx: int, target: int, attempts: int, protect_white: bool):
+        """
+        Resolver aposta criada na rodada `round_idx` (a própria rodada é pulada).
+        Retorna (win, tentativas_usadas, rodada_de_resolução) ou None se o
+        histórico acabar antes da resolução.
+        """
+        first = int(self.get(target, protect_white)[round_idx + 1])
+        used = first - round_idx
+        if first < self.n and used <= attempts:
+            return True, used, first
+        if round_idx + attempts >= self.n:
+            return None
+        return False, attempts, round_idx + attempts
+
+
+def score_signals(codes, rounds, targets, attempts, protect_white=True, tables: Optional[HitTables] = None):
+    """
+    Pontuação vetorizada de um lote de apostas independentes (sem gating).
+    Retorna (win, tentativas_usadas, resolvida) por aposta.
+    """
+    tables = tables or HitTables(codes)
+    n = tables.n
+    if np is not None:
+        rounds = np.asarray(rounds, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        attempts = np.broadcast_to(np.asarray(attempts, dtype=np.int64), rounds.shape)
+        first = np.full(rounds.shape, n, dtype=np.int64)
+        for target in (RED, BLACK, WHITE):
+            sel = targets == target
+            if sel.any():
+                first[sel] = tables.get(target, protect_white)[rounds[sel] + 1]
+        used = first - rounds
+        win = (first < n) & (used <= attempts)
+        used = np.where(win, used, attempts)
+        resolved = win | (rounds + attempts < n)
+        return win, used, resolved
+    win, used_out, resolved = [], [], []
+    if isinstance(attempts, int):
+        attempts = [attempts] * len(rounds)
+    for r, t, a in zip(rounds, targets, attempts):
+        res = tables.resolve(r, t, a, protect_white)
+        win.append(bool(res and res[0]))
+        used_out.append(res[1] if res else a)
+        resolved.append(res is not None)
+    return win, used_out, resolved
+
+
+# --- Motores de padrões avaliados em lote ---
+
+def pattern_states(automaton, codes):
+    """Estado do autômato após cada rodada"""
+    n = len(codes)
+    w = automaton.window
+    if np is None or n <= w:
+        states = []
+        st = automaton.initial
+        for c in codes:
+            st = automaton.advance(st, TOKENS[c])
+            states.append(st)
+        return np.asarray(states, dtype=np.int64) if np is not None else states
+
+    # Estado de sufixos completos (w tokens) indexado pelo código base 3
+    table = np.empty(3 ** w, dtype=np.int64)
+    for code in range(3 ** w):
+        digits, rest = [], code
+        for _ in range(w):
+            digits.append(TOKENS[rest % 3])
+            rest //= 3
+        table[code] = automaton.state_for(reversed(digits))
+
+    states = np.empty(n, dtype=np.int64)
+    st = automaton.initial
+    for i in range(w - 1):
+        st = automaton.advance(st, TOKENS[int(codes[i])])
+        states[i] = st
+    c = np.asarray(codes, dtype=np.int64)
+    code = np.zeros(n - w + 1, dtype=np.int64)
+    for k in range(w):
+        code = code * 3 + c[k:n - w + 1 + k]
+    states[w - 1:] = table[code]
+    return states
+
+
+def _signal_engine_decisions(automaton) -> List[Optional[Dict]]:
+    """Decisão do app (on_message) para cada estado do autômato do SignalEngine"""
+    engine = SignalEngine()
+    out = []
+    for state in range(automaton.num_states):
+        matches = [
+            {"pattern_id": pid, "priority": prio, "suggestion": s, "confidence": conf}
+            for pid, prio, s, conf in automaton.matches(state)
+        ]
+        pe = engine._decidir(matches)
+        color = {'V': 'red', 'P': 'black'}.get(pe.get('suggestion')) if pe.get('signal') else None
+        if not color:
+            out.append(None)
+            continue
+        out.append({
+            "key": f"P{pe['pattern_id']}",
+            "target": CODE_BY_COLOR[color],
+            "chance": PATTERN_CHANCE.get(pe.get('confidence'), 50),
+            "attempts": CONFIG.MARTINGALE_MAX_ATTEMPTS,
+            "protect_white": True,
+        })
+    return out
+
+
+def _verabet_decisions(automaton) -> List[Optional[Dict]]:
+    """Decisão do VeraBetPatternEngine por estado (cooldown aplicado no replay)"""
+    engine = VeraBetPatternEngine()
+    engine.cooldown_seconds = 0
+    out = []
+    for state in range(automaton.num_states):
+        matches = [
+            {"pattern_id": pid, "priority": prio, "suggestion": s, "confidence": conf, "chance": chance}
+            for pid, prio, s, conf, chance in automaton.matches(state)
+            if s
+        ]
+        res = engine._decidir(matches)
+        if not res.get("signal"):
+            out.append(None)
+            continue
+        out.append({
+            "key": f"P{res['pattern_id']}",
+            "target": CODE_BY_COLOR[res["color"]],
+            "chance": res["chance"],
+            "attempts": 3,
+            "protect_white": True,
+        })
+    return out
+
+
+def _candidates(decisions, states, min_len: int) -> Dict[int, Dict]:
+    """Rodadas com sinal candidato (índice -> decisão), calculadas em lote"""
+    if np is not None:
+        has = np.fromiter((d is not None for d in decisions), dtype=bool, count=len(decisions))
+        rounds = np.flatnonzero(has[states])
+        rounds = rounds[rounds >= min_len - 1]
+        picked = states[rounds]
+        return {int(r): decisions[int(s)] for r, s in zip(rounds, picked)}
+    return {
+        i: decisions[s] for i, s in enumerate(states)
+        if i >= min_len - 1 and decisions[s] is not None
+    }
+
+
+# --- Gating do servidor ---
+
+class PlayNaBetGate:
+    """Cooldowns por rodada do app (decrementar_cooldown / registrar_resultado / pode_emitir_alerta)"""
+
+    def __init__(self):
+        self.cooldown = 0
+        self.losses_in_row = 0
+        self.stop = False
+        self.stop_counter = 0
+        self.alert_rounds: List[int] = []
+        self.round = -1
+
+    def advance_to(self, round_idx: int):
+        """Aplicar decrementar_cooldown() para cada rodada até `round_idx`"""
+        steps = round_idx - self.round
+        if steps <= 0:
+            return
+        self.round = round_idx
+        if self.stop:
+            if steps < self.stop_counter:
+                self.stop_counter -= steps
+                return
+            steps -= self.stop_counter
+            self.stop_counter = 0
+            self.stop = False
+            self.losses_in_row = 0
+        self.cooldown = max(0, self.cooldown - steps)
+
+    def result(self, hit: bool):
+        if hit:
+            self.cooldown = max(MIN_COOLDOWN_AFTER_WIN, self.cooldown // 2)
+            self.losses_in_row = 0
+        else:
+            self.losses_in_row += 1
+            self.cooldown = COOLDOWN_AFTER_LOSS
+            if self.losses_in_row >= ANTI_TILT_LOSS_STREAK:
+                self.stop = True
+                self.stop_counter = STOP_DURATION_ROUNDS
+                self.cooldown = 0
+
+    def blocked_reason(self) -> Optional[str]:
+        if self.stop:
+            return "stop"
+        if self.cooldown > 0:
+            return "cooldown"
+        min_round = max(0, self.round - GLOBAL_WINDOW_ROUNDS + 1)
+        if sum(1 for r in self.alert_rounds[-GLOBAL_MAX_ALERTS:] if r >= min_round) >= GLOBAL_MAX_ALERTS:
+            return "global_limit"
+        return None
+
+    def emitted(self):
+        self.alert_rounds.append(self.round)
+        if len(self.alert_rounds) > 200:
+            self.alert_rounds = self.alert_rounds[-200:]
+        self.cooldown = COOLDOWN_BASIC
+
+
+def _bump(counter: Dict[str, int], key: str):
+    counter[key] = counter.get(key, 0) + 1
+
+
+def run_backtest(numbers: Sequence[int], engine: str = "playnabet", round_seconds: float = 30.0,
+                 max_attempts: Optional[int] = None, unit: float = 10.0, seed: Optional[int] = 0,
+                 options: Optional[Dict] = None, learn: bool = True) -> Dict:
+    """
+    Reproduzir `numbers` (0..14, mais antigo primeiro) pelo motor `engine`:
+    - "double": só `detect_best_double_signal` (fluxo on_message)
+    - "pattern": só `SignalEngine` (fluxo on_message)
+    - "playnabet": SignalEngine com fallback para o detector Double, como no app
+    - "verabet": `VeraBetPatternEngine` (fluxo do TablePipeline)
+
+    `max_attempts` só afeta o ROI (mesma regra de /api/stats/overview).
+    Com `learn` as estatísticas por padrão e o Platt evoluem durante o replay
+    como no app, numa cópia em memória do store (o estado real não é alterado).
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"engine deve ser um de {ENGINES}")
+    started = time.perf_counter()
+    if seed is not None:
+        random.seed(seed)  # desempate aleatório de choose_double_bet_signal
+    codes = color_codes(numbers)
+    n = len(codes)
+    tables = HitTables(codes)
+    loss_cooldown_rounds = math.ceil(LOSS_COOLDOWN_MINUTES * 60 / round_seconds)
+
+    bets: List[Dict] = []
+    pending: List[Dict] = []
+    suppressed: Dict[str, int] = {}
+    candidates: Dict[int, Dict] = {}
+    ungated = None
+
+    if engine in ("pattern", "playnabet", "verabet"):
+        if engine == "verabet":
+            automaton = VeraBetPatternEngine.automaton()
+            decisions = _verabet_decisions(automaton)
+            min_len = 3
+        else:
+            automaton = SignalEngine.automaton()
+            decisions = _signal_engine_decisions(automaton)
+            min_len = 5
+        states = pattern_states(automaton, codes)
+        candidates = _candidates(decisions, states, min_len)
+        ungated = _score_candidates(codes, candidates, tables, max_attempts)
+
+    use_double = engine in ("double", "playnabet")
+    # Só o detector Double consome as stats aprendidas
+    learn = learn and use_double
+    if use_double:
+        ring = ResultRing(CONFIG.RESULTS_HISTORY_SIZE, source="backtest")
+        features = DoubleFeatureState()
+
+    def open_bet(r: int, decision: Dict):
+        res = tables.resolve(r, decision["target"], decision["attempts"], decision["protect_white"])
+        bet = {"round": r, "key": decision["key"], "target": decision["target"],
+               "attempts": decision["attempts"], "chance": decision["chance"], "resolution": res}
+        if res is None:
+            _bump(suppressed, "open_at_end")
+        else:
+            pending.append(bet)
+
+    def settle(r: int, on_result) -> bool:
+        """Resolver pendentes cuja resolução cai na rodada `r`"""
+        settled = False
+        for bet in list(pending):
+            if bet["resolution"][2] == r:
+                pending.remove(bet)
+                bets.append(bet)
+                on_result(bet)
+                settled = True
+        return settled
+
+    # Store de calibração isolado: detect_best_double_signal lê as stats aprendidas
+    with isolated_store():
+        if engine == "verabet":
+            engine_cooldown_rounds = math.ceil(VeraBetPatternEngine().cooldown_seconds / round_seconds)
+            loss_until = -1
+            last_signal = -10 ** 9
+            for r in _event_rounds(n, False, sorted(candidates), pending):
+                outcomes: List[bool] = []
+                just_resolved = settle(r, lambda bet: outcomes.append(bet["resolution"][0]))
+                if just_resolved and not all(outcomes):
+                    loss_until = r + loss_cooldown_rounds
+                decision = candidates.get(r)
+                if decision is None:
+                    continue
+                if r < loss_until:
+                    _bump(suppressed, "loss_cooldown")
+                # VeraBet sempre bloqueia com pendente ou resolução na mesma rodada
+                elif pending or just_resolved:
+                    _bump(suppressed, "pending")
+                elif r - last_signal < engine_cooldown_rounds:
+                    _bump(suppressed, "engine_cooldown")
+                else:
+                    last_signal = r
+                    open_bet(r, decision)
+        else:
+            gate = PlayNaBetGate()
+            loss_until = -1
+            block_pending = CONFIG.BLOCK_SIGNALS_WHILE_PENDING
+
+            def on_result(bet: Dict):
+                nonlocal loss_until
+                hit = bet["resolution"][0]
+                if learn:
+                    # Mesmo aprendizado online do app (store isolado, ver abaixo)
+                    update_pattern_stat(bet["key"], hit)
+                    try:
+                        online_update_platt(bet["chance"], 1 if hit else 0)
+                    except Exception:
+                        pass
+                gate.result(hit)
+                if not hit:
+                    loss_until = gate.round + loss_cooldown_rounds
+
+            # O detector Double precisa ver todas as rodadas; o motor de padrões só as com eventos
+            for r in _event_rounds(n, use_double, sorted(candidates), pending):
+                gate.advance_to(r)
+                if use_double:
+                    result = {"number": int(numbers[r]), "color": COLOR_BY_CODE[codes[r]], "round_id": str(r), "timestamp": r}
+                    ring.append(result)
+                    features.push_result(result)
+                if pending:
+                    settle(r, on_result)
+                if r < 4:
+                    continue
+                if r < loss_until:
+                    if use_double or r in candidates:
+                        _bump(suppressed, "loss_cooldown")
+                    continue
+                if block_pending and pending:
+                    _bump(suppressed, "pending")
+                    continue
+                decision = candidates.get(r)
+                if decision is None and use_double:
+                    decision = _double_decision(detect_best_double_signal(ring, options, features=features))
+                if decision is None:
+                    continue
+                reason = gate.blocked_reason()
+                if reason:
+                    _bump(suppressed, reason)
+                    continue
+                gate.emitted()
+                open_bet(r, decision)
+
+    report = summarize(bets, max_attempts=max_attempts, unit=unit)
+    report.update({
+        "engine": engine,
+        "rounds": n,
+        "roundSeconds": round_seconds,
+        "suppressed": suppressed,
+        "vectorized": np is not None,
+        "elapsedMs": round((time.perf_counter() - started) * 1000, 1),
+    })
+    if ungated is not None:
+        report["ungatedByPattern"] = ungated
+    return report
+
+
+def _event_rounds(n: int, dense: bool, candidate_rounds: List[int], pending: List[Dict]):
+    """Rodadas a visitar: todas (dense) ou só candidatos + resoluções pendentes, em ordem"""
+    if dense:
+        yield from range(n)
+        return
+    i = 0
+    while True:
+        nxt_c = candidate_rounds[i] if i < len(candidate_rounds) else None
+        nxt_p = min(b["resolution"][2] for b in pending) if pending else None
+        if nxt_c is None and nxt_p is None:
+            return
+        if nxt_p is None or (nxt_c is not None and nxt_c <= nxt_p):
+            i += 1
+            yield nxt_c
+        else:
+            yield nxt_p
+
+
+def _double_decision(signal: Optional[Dict]) -> Optional[Dict]:
+    """Converter o sinal de detect_best_double_signal na aposta pendente do app"""
+    if not signal:
+        return None
+    bet = signal.get("suggestedBet") or {}
+    target = CODE_BY_COLOR.get(bet.get("color"))
+    if target is None:
+        return None
+    gales = signal.get("gales_permitidos")
+    return {
+        "key": signal.get("patternKey"),
+        "target": target,
+        "chance": signal.get("chance", 0),
+        "attempts": gales + 1 if gales is not None else CONFIG.MARTINGALE_MAX_ATTEMPTS,
+        "protect_white": bet.get("protect_white", False),
+    }
+
+
+def _score_candidates(codes, candidates: Dict[int, Dict], tables: HitTables, max_attempts: Optional[int]) -> Dict:
+    """Taxa de acerto de cada padrão em todas as rodadas em que dispara (sem cooldowns)"""
+    if not candidates:
+        return {}
+    rounds = sorted(candidates)
+    decs = [candidates[r] for r in rounds]
+    keys = [d["key"] for d in decs]
+    win, used, resolved = score_signals(
+        codes, rounds, [d["target"] for d in decs], [d["attempts"] for d in decs], True, tables
+    )
+    limit = max_attempts if max_attempts is not None else CONFIG.MARTINGALE_MAX_ATTEMPTS
+    out: Dict[str, Dict] = {}
+    if np is not None:
+        keys_arr = np.asarray(keys)
+        ok = np.asarray(resolved)
+        hits = np.asarray(win) & (np.asarray(used) <= limit)
+        uniq, inv = np.unique(keys_arr[ok], return_inverse=True)
+        totals = np.bincount(inv, minlength=len(uniq))
+        wins = np.bincount(inv, weights=hits[ok], minlength=len(uniq))
+        for k, t, w in zip(uniq.tolist(), totals.tolist(), wins.tolist()):
+            out[k] = _rate_entry(int(t), int(w))
+        return out
+    for k, w, u, ok in zip(keys, win, used, resolved):
+        if not ok:
+            continue
+        entry = out.setdefault(k, [0, 0])
+        entry[0] += 1
+        entry[1] += 1 if (w and u <= limit) else 0
+    return {k: _rate_entry(t, w) for k, (t, w) in out.items()}
+
+
+def _rate_entry(total: int, wins: int) -> Dict:
+    return {
+        "total": total,
+        "wins": wins,
+        "losses": total - wins,
+        "rate": round(wins / total * 100, 2) if total > 0 else 0,
+    }
+
+
+def summarize(bets: List[Dict], max_attempts: Optional[int] = None, unit: float = 10.0) -> Dict:
+    """Métricas agregadas das apostas resolvidas"""
+    limit = max_attempts if max_attempts is not None else CONFIG.MARTINGALE_MAX_ATTEMPTS
+    total = len(bets)
+    keys = [b["key"] for b in bets]
+    wins_raw = [b["resolution"][0] for b in bets]
+    used = [b["resolution"][1] for b in bets]
+
+    if np is not None and total:
+        win_arr = np.asarray(wins_raw, dtype=bool)
+        used_arr = np.asarray(used, dtype=np.int64)
+        counted = win_arr & (used_arr <= limit)
+        wins = int(counted.sum())
+        # Martingale: aposta dobra a cada tentativa; win rende +unit, loss perde a soma das apostas
+        pnl = np.where(win_arr, unit, -(2.0 ** used_arr - 1) * unit)
+        equity = np.cumsum(pnl)
+        peak = np.maximum.accumulate(np.concatenate(([0.0], equity)))[1:]
+        max_dd = float(np.max(peak - equity)) if total else 0.0
+        profit = float(equity[-1])
+        attempts_hist = {int(k): int(v) for k, v in zip(*np.unique(used_arr[win_arr], return_counts=True))}
+        uniq, inv = np.unique(np.asarray(keys), return_inverse=True)
+        totals = np.bincount(inv, minlength=len(uniq))
+        pwins = np.bincount(inv, weights=counted, minlength=len(uniq))
+        by_pattern = {k: _rate_entry(int(t), int(w)) for k, t, w in zip(uniq.tolist(), totals.tolist(), pwins.tolist())}
+    else:
+        wins = 0
+        equity = peak = max_dd = 0.0
+        attempts_hist: Dict[int, int] = {}
+        acc: Dict[str, List[int]] = {}
+        for k, w, u in zip(keys, wins_raw, used):
+            hit = w and u <= limit
+            wins += 1 if hit else 0
+            equity += unit if w else -(2.0 ** u - 1) * unit
+            peak = max(peak, equity)
+            max_dd = max(max_dd, peak - equity)
+            if w:
+                attempts_hist[u] = attempts_hist.get(u, 0) + 1
+            entry = acc.setdefault(k, [0, 0])
+            entry[0] += 1
+            entry[1] += 1 if hit else 0
+        profit = float(equity)
+        by_pattern = {k: _rate_entry(t, w) for k, (t, w) in sorted(acc.items())}
+
+    losses = total - wins
+    return {
+        "total": total,
+        "wins": wins,
+        "losses": losses,
+        "rate": round((wins / total * 100), 2) if total > 0 else 0,
+        # Mesma fórmula de /api/stats/overview (aposta R$10, retorno 2x no win)
+        "roi": round(((wins * 20) - (total * 10)) / (total * 10) * 100, 2) if total > 0 else 0,
+        "maxAttempts": limit,
+        "attemptsUsed": dict(sorted(attempts_hist.items())),
+        "byPattern": by_pattern,
+        "martingaleProfit": round(profit, 2),
+        "maxDrawdown": round(float(max_dd), 2),
+    }
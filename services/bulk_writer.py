@@ -0,0 +1,176 @@
+"""
+Inserções em lote com buffer
+
+Eventos de alta frequência (sinais resolvidos, logs de atividade) entram num
+buffer em memória e são gravados com `insert_many(ordered=False)` quando o
+lote atinge `max_batch` documentos ou quando passam `max_delay_seconds` desde
+o primeiro pendente: uma rajada custa um round trip em vez de centenas.
+
+Se o `insert_many` falha sem detalhes por documento (rede, troca de primário,
+timeout), o lote volta para o início do buffer e é repetido com backoff
+exponencial. Documentos recusados individualmente (`writeErrors`, ex.: chave
+duplicada) não são repetidos. O buffer é limitado (`max_buffer`): se o banco
+ficar indisponível, os documentos mais antigos são descartados. Todo documento
+perdido é contado em `dropped`. `close()` faz o flush final no shutdown, com
+poucas tentativas.
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional
+
+
+class BufferedInserter:
+    def __init__(self, name: str, resolve: Callable[[], object], max_batch: int = 500,
+                 max_delay_seconds: float = 1.0, max_buffer: int = 10000,
+                 on_flush: Optional[Callable[[List[Dict]], Awaitable[None]]] = None,
+                 retry_seconds: float = 1.0, max_retry_seconds: float = 30.0):
+        """
+        `resolve()` devolve a coleção de destino (ou None sem banco);
+        `on_flush(docs)` roda após cada lote com os documentos efetivamente
+        gravados (ex.: atualizar agregados).
+        """
+        self.name = name
+        self.resolve = resolve
+        self.max_batch = max_batch
+        self.max_delay_seconds = max_delay_seconds
+        self.max_buffer = max_buffer
+        self.on_flush = on_flush
+        self.retry_seconds = retry_seconds
+        self.max_retry_seconds = max_retry_seconds
+        self._failed = 0  # falhas seguidas do insert_many
+        self._closing = False
+        self._buffer: Deque[Dict] = deque()
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self.inserted = 0
+        self.batches = 0
+        self.errors = 0
+        self.dropped = 0
+        self.last_flush_ms: Optional[float] = None
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    def __len__(self):
+        return len(self._buffer)
+
+    def add(self, doc: Dict):
+        """Enfileirar um documento (não bloqueia)"""
+        if len(self._buffer) >= self.max_buffer:
+            self._buffer.popleft()
+            self.dropped += 1
+        self._buffer.append(doc)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # fora do event loop: fica no buffer até o próximo flush
+        if self._task is None or self._task.done():
+            self._wake = asyncio.Event()
+            self._lock = self._lock or asyncio.Lock()
+            self._task = loop.create_task(self._run())
+        elif len(self._buffer) >= self.max_batch and not self._failed:
+            self._wake.set()  # em backoff o lote cheio espera a próxima tentativa
+
+    def _backoff(self) -> float:
+        return min(self.max_retry_seconds, self.retry_seconds * 2 ** max(0, self._failed - 1))
+
+    async def _run(self):
+        try:
+            while self._buffer and not self._closing:
+                delay = self._backoff() if self._failed else self.max_delay_seconds
+                try:
+                    await asyncio.wait_for(self._wake.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+                await self.flush()
+        except asyncio.CancelledError:
+            pass
+
+    def _requeue(self, batch: List[Dict]):
+        """Devolver um lote não gravado ao início do buffer (respeitando `max_buffer`)"""
+        room = self.max_buffer - len(self._buffer)
+        if room < len(batch):
+            lost = len(batch) - max(0, room)
+            self.dropped += lost
+            batch = batch[lost:]  # descartar os mais antigos
+        self._buffer.extendleft(reversed(batch))
+
+    async def flush(self) -> bool:
+        """Gravar o buffer em lotes de `max_batch`; False se parou numa falha (lote devolvido ao buffer)"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while self._buffer:
+                coll = self.resolve()
+                if coll is None:
+                    # Sem banco: descartar (mesmo comportamento do insert_one antigo)
+                    self.dropped += len(self._buffer)
+                    self._buffer.clear()
+                    return True
+                n = min(self.max_batch, len(self._buffer))
+                batch = [self._buffer.popleft() for _ in range(n)]
+                t0 = time.perf_counter()
+                written = batch
+                try:
+                    result = await coll.insert_many(batch, ordered=False)
+                    self.inserted += len(result.inserted_ids)
+                except Exception as e:
+                    self.errors += 1
+                    details = getattr(e, "details", None)
+                    if not details:
+                        # Falha transitória: nada garantido como gravado, repetir o lote
+                        self._failed += 1
+                        self._requeue(batch)
+                        print(f"[{self.name}] Erro no insert_many ({n} docs), nova tentativa em {self._backoff():.1f}s: {e}")
+                        return False
+                    # ordered=False: os demais documentos do lote foram gravados;
+                    # os recusados (writeErrors) não adianta repetir
+                    failed = {err.get("index") for err in details.get("writeErrors", [])}
+                    written = [d for i, d in enumerate(batch) if i not in failed]
+                    self.inserted += len(written)
+                    self.dropped += len(batch) - len(written)
+                    print(f"[{self.name}] {len(batch) - len(written)} de {n} docs recusados no insert_many: {e}")
+                self._failed = 0
+                ms = (time.perf_counter() - t0) * 1000
+                self.batches += 1
+                self.last_flush_ms = round(ms, 2)
+                self.max_flush_ms = max(self.max_flush_ms, self.last_flush_ms)
+                self._total_flush_ms += ms
+                if self.on_flush is not None and written:
+                    try:
+                        await self.on_flush(written)
+                    except Exception as e:
+                        print(f"[{self.name}] Erro no pós-flush: {e}")
+            return True
+
+    async def close(self, retries: int = 2):
+        """Gravar o restante e aguardar o flusher (shutdown); o que não gravar conta em `dropped`"""
+        self._closing = True
+        if self._task is not None and not self._task.done():
+            # Acordar o flusher em vez de cancelar (não interromper um lote em gravação)
+            self._wake.set()
+            await self._task
+        self._task = None
+        for attempt in range(retries + 1):
+            if await self.flush():
+                return
+            if attempt < retries:
+                await asyncio.sleep(min(self._backoff(), 1.0))
+        print(f"[{self.name}] {len(self._buffer)} docs não gravados no shutdown")
+        self.dropped += len(self._buffer)
+        self._buffer.clear()
+
+    def stats(self) -> Dict:
+        return {
+            "buffered": len(self._buffer),
+            "inserted": self.inserted,
+            "batches": self.batches,
+            "errors": self.errors,
+            "dropped": self.dropped,
+            "retrying": self._failed > 0,
+            "last_flush_ms": self.last_flush_ms,
+            "max_flush_ms": round(self.max_flush_ms, 2),
+            "avg_flush_ms": round(self._total_flush_ms / self.batches, 2) if self.batches else None,
+        }
@@ -8,6 +8,7 @@ import time
 from config import CONFIG
 from services.parser import summarize_results
 from services.adaptive_calibration import get_platt_params, update_pattern_stat, online_update_platt, getAll_pattern_stats
+from services.double_features import DoubleFeatureState, COLOR_BY_TOKEN, color_to_token
 import uuid
 
 # Cooldown de sinais
@@ -60,361 +61,292 @@ def build_double_stats(results: List[Dict]) -> Dict:
     
     return stats
 
-def compute_double_signal_chance(advice: Dict, results: List[Dict]) -> int:
+def compute_double_signal_chance(advice: Dict, results: List[Dict], features: Optional[DoubleFeatureState] = None) -> int:
     """Calcular chance de acerto do sinal"""
-    sample = results[-50:] if len(results) >= 50 else results
-    s = build_double_stats(sample)
-    total = s.get("total", 0)
-    
+    f = features if features is not None else DoubleFeatureState.from_results(results)
+    total = f.size(50)
+
     def pct(n, base):
         return round((n / total) * 100) if total >= 10 else base
-    
+
     base = 0
     bonus = 0
     penalty = 0
-    
+
     if advice.get("type") == "color":
         color = advice.get("color", "white")
+        tok = color_to_token(color)
         base_fallback = 7 if color == "white" else 47
-        
+
+        def nw_count(window: int) -> int:
+            # Contagem da cor considerando apenas rodadas não brancas
+            return f.count(window, tok) if tok != "B" else 0
+
+        def run_of(token: str) -> int:
+            # Sequência atual da cor até o último Branco
+            return f.run_len if token != "B" and f.run_token == token else 0
+
         if color == "white":
-            base = pct(s["color"].get("white", 0), base_fallback)
+            base = pct(f.count(50, "B"), base_fallback)
         else:
-            non_white_total = s["color"].get("red", 0) + s["color"].get("black", 0)
-            base = round((s["color"].get(color, 0) / non_white_total) * 100) if non_white_total >= 8 else base_fallback
-        
+            non_white_total = f.count(50, "V") + f.count(50, "P")
+            base = round((f.count(50, tok) / non_white_total) * 100) if non_white_total >= 8 else base_fallback
+
         # Bônus por padrões
         key = advice.get("key")
-        last5 = results[-5:] if len(results) >= 5 else results
-        last5_colors = [r.get("color") for r in last5 if r.get("color")]
-        whites_recent = sum(1 for c in last5_colors if c == "white")
-        
+        whites_recent = f.count(5, "B")
+        opp_tok = "P" if color == "red" else "V"
+
         if key == "color_streak":
             # Comprimento da sequência
-            len_seq = 0
-            for i in range(len(results) - 1, -1, -1):
-                c = results[i].get("color")
-                if not c or c == "white":
-                    break
-                if c == color:
-                    len_seq += 1
-                else:
-                    break
+            len_seq = run_of(tok)
             bonus += min(12, 3 + round(len_seq * 1.5))
-        
+
         elif key == "streak_break_opposite":
-            opp = "black" if color == "red" else "red"
-            opp_len = 0
-            for i in range(len(results) - 1, -1, -1):
-                c = results[i].get("color")
-                if not c or c == "white":
-                    break
-                if c == opp:
-                    opp_len += 1
-                else:
-                    break
+            opp_len = run_of(opp_tok)
             bonus += min(11, 3 + round(opp_len * 1.3))
-        
+
         elif key == "triple_repeat":
             bonus += 6
         elif key == "red_black_balance":
-            last20 = results[-CONFIG.IMBALANCE_WINDOW:] if len(results) >= CONFIG.IMBALANCE_WINDOW else results
-            s20 = build_double_stats(last20)
-            diff = abs(s20["color"].get("red", 0) - s20["color"].get("black", 0))
+            w = CONFIG.IMBALANCE_WINDOW
+            diff = abs(f.count(w, "V") - f.count(w, "P"))
             bonus += min(10, 3 + diff * 1.2)
         elif key == "two_in_a_row_trend":
-            last5_non_white = [r.get("color") for r in last5 if r.get("color") != "white"]
-            support = sum(1 for c in last5_non_white if c == color)
+            support = nw_count(5)
             bonus += min(9, 3 + support * 1.2)
         elif key == "alternation_break":
-            alt_window = results[-max(CONFIG.ALTERNATION_WINDOW, 4):]
-            alt_colors = [r.get("color") for r in alt_window if r.get("color") != "white"]
-            alt_len = len(alt_colors)
+            alt_len = f.non_white(max(CONFIG.ALTERNATION_WINDOW, 4))
             bonus += min(8, 3 + int(alt_len / 1.5))
         elif key == "momentum_bias":
-            last5_non_white = [r.get("color") for r in last5 if r.get("color") != "white"]
-            support = sum(1 for c in last5_non_white if c == color)
+            support = nw_count(5)
             bonus += min(10, 4 + support * 1.2)
         elif key == "after_white_previous_color":
-            last3 = [r.get("color") for r in results[-3:]]
-            if len(last3) >= 2 and last3[-1] == "white":
-                prev = last3[-2]
-                if prev == color:
+            if f.total >= 2 and f.last_token == "B":
+                if f.prev_token == tok:
                     bonus += 7
         elif key == "hot_zone_last10":
-            last10 = results[-10:]
-            last10_non_white = [r.get("color") for r in last10 if r.get("color") != "white"]
-            tally = {}
-            for c in last10_non_white:
-                tally[c] = tally.get(c, 0) + 1
-            cnt = tally.get(color, 0)
+            cnt = nw_count(10)
             bonus += min(10, max(0, (cnt - 4) * 1.3))
         elif key == "last_single_continuity":
             bonus += 4
         elif key == "short_streak_3":
             bonus += 5
         elif key == "light_imbalance_10":
-            last10_stats = build_double_stats(results[-10:])
-            diff10 = abs(last10_stats["color"].get("red", 0) - last10_stats["color"].get("black", 0))
+            diff10 = abs(f.count(10, "V") - f.count(10, "P"))
             bonus += min(7, 2 + diff10)
         elif key == "two_of_three":
             bonus += 4
         elif key == "streak_4":
             bonus += 6
         elif key == "streak_break_4plus":
-            opp4 = "black" if color == "red" else "red"
-            opp_len4 = 0
-            for i in range(len(results) - 1, -1, -1):
-                c = results[i].get("color")
-                if not c or c == "white":
-                    break
-                if c == opp4:
-                    opp_len4 += 1
-                else:
-                    break
+            opp_len4 = run_of(opp_tok)
             bonus += min(9, 3 + round(opp_len4 * 1.2))
         else:
             bonus += 2
-        
+
         # Penalização por brancos recentes
         if whites_recent >= 1:
             penalty += 1
-        if "white" in last5_colors[-2:]:
+        if f.count(2, "B") > 0:
             penalty += 0.5
-        
+
         # Bônus por proporção na janela 12
-        last12 = results[-12:]
-        last12_non_white = [r.get("color") for r in last12 if r.get("color") != "white"]
-        if len(last12_non_white) >= 6:
-            tally12 = {}
-            for c in last12_non_white:
-                tally12[c] = tally12.get(c, 0) + 1
-            cnt12 = tally12.get(color, 0)
-            pct12 = round((cnt12 / len(last12_non_white)) * 100)
+        non_white12 = f.non_white(12)
+        if non_white12 >= 6:
+            cnt12 = nw_count(12)
+            pct12 = round((cnt12 / non_white12) * 100)
             if pct12 >= 50:
                 bonus += min(6, int((pct12 - 45) / 3))
     else:
         base = 10
-    
+
     chance = round(base + bonus - penalty)
     return max(4, min(89, chance))
 
-def detect_double_patterns(results: List[Dict]) -> List[Dict]:
+def detect_double_patterns(results: List[Dict], features: Optional[DoubleFeatureState] = None) -> List[Dict]:
     """Detectar padrões no Double"""
     patterns = []
-    if not isinstance(results, list) or len(results) < 3:
+    if results is None or len(results) < 3:
         return patterns
-    
-    last10 = results[-10:]
-    colors = [r.get("color") for r in last10 if r.get("color")]
-    
+
+    # Estado incremental: sem features, reconstruir a partir da lista (scripts/testes)
+    f = features if features is not None else DoubleFeatureState.from_results(results)
+    streak_color = COLOR_BY_TOKEN.get(f.run_token) if f.run_token in ("V", "P") else None
+
     # 1) Sequência de mesma cor (5+)
     seq_len = 5
-    if len(colors) >= seq_len:
-        tail = colors[-seq_len:]
-        if all(c == tail[0] for c in tail) and tail[0] != "white":
-            patterns.append({
-                "key": "color_streak",
-                "description": f"Sequência de {tail[0]} detectada: {', '.join(tail)}",
-                "risk": "medium",
-                "targets": {"type": "color", "color": tail[0]}
-            })
-    
+    if streak_color and f.run_len >= seq_len:
+        tail = [streak_color] * seq_len
+        patterns.append({
+            "key": "color_streak",
+            "description": f"Sequência de {tail[0]} detectada: {', '.join(tail)}",
+            "risk": "medium",
+            "targets": {"type": "color", "color": tail[0]}
+        })
+
     # 1b) Contra-sequência após streak longo (6+)
-    last_non_white = [r.get("color") for r in reversed(results) if r.get("color") and r.get("color") != "white"]
-    if len(last_non_white) >= 6:
-        len_seq = 1
-        for i in range(1, len(last_non_white)):
-            if last_non_white[i] == last_non_white[0]:
-                len_seq += 1
-            else:
-                break
-        if len_seq >= 6:
-            streak_color = last_non_white[0]
-            opp = "black" if streak_color == "red" else "red"
-            patterns.append({
-                "key": "streak_break_opposite",
-                "description": f"Sequência longa de {streak_color} ({len_seq}). Quebra provável: {opp}.",
-                "risk": "medium",
-                "targets": {"type": "color", "color": opp}
-            })
-    
+    len_seq = f.nw_run_len
+    if len_seq >= 6:
+        nw_color = COLOR_BY_TOKEN[f.nw_run_token]
+        opp = "black" if nw_color == "red" else "red"
+        patterns.append({
+            "key": "streak_break_opposite",
+            "description": f"Sequência longa de {nw_color} ({len_seq}). Quebra provável: {opp}.",
+            "risk": "medium",
+            "targets": {"type": "color", "color": opp}
+        })
+
     # 2) Trinca exata (3 últimas iguais)
-    last3 = [r.get("color") for r in results[-3:] if r.get("color")]
-    if len(last3) == 3 and all(c == last3[0] for c in last3) and last3[0] != "white":
-        opp = "black" if last3[0] == "red" else "red"
+    if streak_color and f.run_len >= 3:
+        opp = "black" if streak_color == "red" else "red"
         patterns.append({
             "key": "triple_repeat",
-            "description": f"Trinca de {last3[0]} detectada, sugerindo {opp}",
+            "description": f"Trinca de {streak_color} detectada, sugerindo {opp}",
             "risk": "low",
             "targets": {"type": "color", "color": opp}
         })
-    
+
     # 3) Desequilíbrio Red/Black nos últimos 20
-    last20 = results[-CONFIG.IMBALANCE_WINDOW:]
-    s20 = build_double_stats(last20)
-    diff = abs(s20["color"].get("red", 0) - s20["color"].get("black", 0))
+    w = CONFIG.IMBALANCE_WINDOW
+    red20 = f.count(w, "V")
+    black20 = f.count(w, "P")
+    diff = abs(red20 - black20)
     if diff >= CONFIG.IMBALANCE_DIFF:
-        dom = "red" if s20["color"].get("red", 0) > s20["color"].get("black", 0) else "black"
+        dom = "red" if red20 > black20 else "black"
         patterns.append({
             "key": "red_black_balance",
             "description": f"Desequilíbrio recente favorece {dom} (Δ={diff})",
             "risk": "low",
             "targets": {"type": "color", "color": dom}
         })
-    
+
     # 3b) Hot zone: 7+ de 10 últimos
-    last10_non_white = [r.get("color") for r in results[-10:] if r.get("color") != "white"]
-    if len(last10_non_white) >= 7:
-        tally10 = {}
-        for c in last10_non_white:
-            tally10[c] = tally10.get(c, 0) + 1
-        entries10 = sorted(tally10.items(), key=lambda x: x[1], reverse=True)
-        if entries10 and entries10[0][1] >= 7:
-            hot = entries10[0][0]
-            patterns.append({
-                "key": "hot_zone_last10",
-                "description": f"Zona quente: {entries10[0][1]}/10 favorecem {hot}",
-                "risk": "low",
-                "targets": {"type": "color", "color": hot}
-            })
-    
+    red10 = f.count(10, "V")
+    black10 = f.count(10, "P")
+    hot_count = max(red10, black10)
+    if hot_count >= 7:
+        hot = "red" if red10 >= black10 else "black"
+        patterns.append({
+            "key": "hot_zone_last10",
+            "description": f"Zona quente: {hot_count}/10 favorecem {hot}",
+            "risk": "low",
+            "targets": {"type": "color", "color": hot}
+        })
+
     # 4) Alternância prolongada
-    alt_window = results[-max(CONFIG.ALTERNATION_WINDOW, 4):]
-    alt_colors = [r.get("color") for r in alt_window if r.get("color") != "white"]
-    if len(alt_colors) >= CONFIG.ALTERNATION_WINDOW:
-        last_alt = alt_colors[-CONFIG.ALTERNATION_WINDOW:]
-        alternates = all(last_alt[i] != last_alt[i-1] for i in range(1, len(last_alt)))
-        if alternates:
-            suggest = last_alt[-1]
-            patterns.append({
-                "key": "alternation_break",
-                "description": f"Alternância detectada: {', '.join(last_alt)}. Tendência de quebra em {suggest}.",
-                "risk": "low",
-                "targets": {"type": "color", "color": suggest}
-            })
-    
-    # 5) Dupla sequência
-    last2 = [r.get("color") for r in results[-2:] if r.get("color")]
-    last3_colors = [r.get("color") for r in results[-3:] if r.get("color")]
-    if (len(last2) == 2 and last2[0] == last2[1] and last2[0] != "white" and
-        not (len(last3_colors) == 3 and all(c == last3_colors[0] for c in last3_colors))):
+    alt_window = CONFIG.ALTERNATION_WINDOW
+    if f.non_white(max(alt_window, 4)) >= alt_window and f.alt_len >= alt_window:
+        suggest = COLOR_BY_TOKEN[f.last_nw_token]
+        other = "black" if suggest == "red" else "red"
+        last_alt = [suggest if (alt_window - 1 - i) % 2 == 0 else other for i in range(alt_window)]
+        patterns.append({
+            "key": "alternation_break",
+            "description": f"Alternância detectada: {', '.join(last_alt)}. Tendência de quebra em {suggest}.",
+            "risk": "low",
+            "targets": {"type": "color", "color": suggest}
+        })
+
+    # 5) Dupla sequência (exatamente 2, trinca fica para os padrões acima)
+    if streak_color and f.run_len == 2:
         patterns.append({
             "key": "two_in_a_row_trend",
-            "description": f"Dupla de {last2[0]} detectada. Continuidade provável.",
+            "description": f"Dupla de {streak_color} detectada. Continuidade provável.",
             "risk": "medium",
-            "targets": {"type": "color", "color": last2[0]}
+            "targets": {"type": "color", "color": streak_color}
         })
-    
+
     # 6) Momentum: 4 de 5 últimos
-    last5_colors = [r.get("color") for r in results[-5:] if r.get("color") != "white"]
-    if len(last5_colors) >= 4:
-        tally = {}
-        for c in last5_colors:
-            tally[c] = tally.get(c, 0) + 1
-        entries = sorted(tally.items(), key=lambda x: x[1], reverse=True)
-        if entries and entries[0][1] >= 4:
-            dom = entries[0][0]
-            patterns.append({
-                "key": "momentum_bias",
-                "description": f"Momentum favorece {dom} (4/5 recentes)",
-                "risk": "low",
-                "targets": {"type": "color", "color": dom}
-            })
-    
+    red5 = f.count(5, "V")
+    black5 = f.count(5, "P")
+    if max(red5, black5) >= 4:
+        dom = "red" if red5 >= black5 else "black"
+        patterns.append({
+            "key": "momentum_bias",
+            "description": f"Momentum favorece {dom} (4/5 recentes)",
+            "risk": "low",
+            "targets": {"type": "color", "color": dom}
+        })
+
     # 7) Após Branco: retomar cor anterior
-    last4 = [r.get("color") for r in results[-4:]]
-    if len(last4) >= 2 and last4[-1] == "white":
-        prev_color = last4[-2]
-        if prev_color and prev_color != "white":
-            patterns.append({
-                "key": "after_white_previous_color",
-                "description": f"Após branco, retomar {prev_color}",
-                "risk": "low",
-                "targets": {"type": "color", "color": prev_color}
-            })
-    
+    if f.last_token == "B" and f.prev_token in ("V", "P"):
+        prev_color = COLOR_BY_TOKEN[f.prev_token]
+        patterns.append({
+            "key": "after_white_previous_color",
+            "description": f"Após branco, retomar {prev_color}",
+            "risk": "low",
+            "targets": {"type": "color", "color": prev_color}
+        })
+
     # 8) Último resultado único: continuidade
-    last1 = [r.get("color") for r in results[-1:] if r.get("color")]
-    if len(last1) == 1 and last1[0] != "white":
+    if f.last_token in ("V", "P"):
+        last_color = COLOR_BY_TOKEN[f.last_token]
         patterns.append({
             "key": "last_single_continuity",
-            "description": f"Último foi {last1[0]}, continuidade provável",
+            "description": f"Último foi {last_color}, continuidade provável",
             "risk": "low",
-            "targets": {"type": "color", "color": last1[0]}
+            "targets": {"type": "color", "color": last_color}
         })
-    
+
     # 9) Sequência curta de 3
-    if len(colors) >= 3:
-        tail3 = colors[-3:]
-        if all(c == tail3[0] for c in tail3) and tail3[0] != "white":
-            patterns.append({
-                "key": "short_streak_3",
-                "description": f"Sequência curta de {tail3[0]}: {', '.join(tail3)}",
-                "risk": "medium",
-                "targets": {"type": "color", "color": tail3[0]}
-            })
-    
+    if streak_color and f.run_len >= 3:
+        tail3 = [streak_color] * 3
+        patterns.append({
+            "key": "short_streak_3",
+            "description": f"Sequência curta de {tail3[0]}: {', '.join(tail3)}",
+            "risk": "medium",
+            "targets": {"type": "color", "color": tail3[0]}
+        })
+
     # 10) Desequilíbrio leve nos últimos 10
-    last10_stats = build_double_stats(results[-10:])
-    diff10 = abs(last10_stats["color"].get("red", 0) - last10_stats["color"].get("black", 0))
-    if diff10 >= 2 and last10_stats["total"] >= 8:
-        dom10 = "red" if last10_stats["color"].get("red", 0) > last10_stats["color"].get("black", 0) else "black"
+    diff10 = abs(red10 - black10)
+    if diff10 >= 2 and f.size(10) >= 8:
+        dom10 = "red" if red10 > black10 else "black"
         patterns.append({
             "key": "light_imbalance_10",
             "description": f"Desequilíbrio leve nos últimos 10 favorece {dom10} (Δ={diff10})",
             "risk": "low",
             "targets": {"type": "color", "color": dom10}
         })
-    
+
     # 11) Padrão de 2 em 3 últimos
-    last3_non_white = [r.get("color") for r in results[-3:] if r.get("color") != "white"]
-    if len(last3_non_white) >= 2:
-        tally3 = {}
-        for c in last3_non_white:
-            tally3[c] = tally3.get(c, 0) + 1
-        entries3 = sorted(tally3.items(), key=lambda x: x[1], reverse=True)
-        if entries3 and entries3[0][1] >= 2:
-            dom3 = entries3[0][0]
-            patterns.append({
-                "key": "two_of_three",
-                "description": f"2 de 3 últimos são {dom3}",
-                "risk": "low",
-                "targets": {"type": "color", "color": dom3}
-            })
-    
+    red3 = f.count(3, "V")
+    black3 = f.count(3, "P")
+    if max(red3, black3) >= 2:
+        dom3 = "red" if red3 >= black3 else "black"
+        patterns.append({
+            "key": "two_of_three",
+            "description": f"2 de 3 últimos são {dom3}",
+            "risk": "low",
+            "targets": {"type": "color", "color": dom3}
+        })
+
     # 12) Sequência de 4
-    if len(colors) >= 4:
-        tail4 = colors[-4:]
-        if all(c == tail4[0] for c in tail4) and tail4[0] != "white":
-            patterns.append({
-                "key": "streak_4",
-                "description": f"Sequência de 4 {tail4[0]}: {', '.join(tail4)}",
-                "risk": "medium",
-                "targets": {"type": "color", "color": tail4[0]}
-            })
-    
+    if streak_color and f.run_len >= 4:
+        tail4 = [streak_color] * 4
+        patterns.append({
+            "key": "streak_4",
+            "description": f"Sequência de 4 {tail4[0]}: {', '.join(tail4)}",
+            "risk": "medium",
+            "targets": {"type": "color", "color": tail4[0]}
+        })
+
     # 13) Contra-sequência após streak de 4+
-    if len(last_non_white) >= 4:
-        len4 = 1
-        for i in range(1, len(last_non_white)):
-            if last_non_white[i] == last_non_white[0]:
-                len4 += 1
-            else:
-                break
-        if 4 <= len4 < 6:
-            streak_color4 = last_non_white[0]
-            opp4 = "black" if streak_color4 == "red" else "red"
-            patterns.append({
-                "key": "streak_break_4plus",
-                "description": f"Sequência de {len4} {streak_color4}. Quebra provável: {opp4}.",
-                "risk": "medium",
-                "targets": {"type": "color", "color": opp4}
-            })
-    
+    len4 = f.nw_run_len
+    if 4 <= len4 < 6:
+        streak_color4 = COLOR_BY_TOKEN[f.nw_run_token]
+        opp4 = "black" if streak_color4 == "red" else "red"
+        patterns.append({
+            "key": "streak_break_4plus",
+            "description": f"Sequência de {len4} {streak_color4}. Quebra provável: {opp4}.",
+            "risk": "medium",
+            "targets": {"type": "color", "color": opp4}
+        })
+
     return patterns
 
-def choose_double_bet_signal(patterns: List[Dict], results: List[Dict], options: Dict = None) -> Optional[Dict]:
+def choose_double_bet_signal(patterns: List[Dict], results: List[Dict], options: Dict = None,
+                             features: Optional[DoubleFeatureState] = None) -> Optional[Dict]:
     """Escolher melhor sinal de aposta"""
     if not patterns or len(patterns) == 0:
         return None
@@ -422,6 +354,8 @@ def choose_double_bet_signal(patterns: List[Dict], results: List[Dict], options:
         return None
     
     options = options or {}
+    if features is None:
+        features = DoubleFeatureState.from_results(results)
     last_key = options.get("lastKey")
     randomize_top_delta = options.get("randomizeTopDelta", CONFIG.RANDOMIZE_TOP_DELTA)
     preferred_color = options.get("preferredColor")
@@ -451,7 +385,7 @@ def choose_double_bet_signal(patterns: List[Dict], results: List[Dict], options:
     # Calcular score para cada candidato
     scored = []
     for advice in base_list:
-        chance = compute_double_signal_chance(advice, results)
+        chance = compute_double_signal_chance(advice, results, features)
         penalty_key = 4 if last_key and advice["key"] == last_key else 0
         risk_weight = 2 if advice["risk"] == "low" else (4 if advice["risk"] == "medium" else 7)
         
@@ -487,16 +421,22 @@ def numbers_for_color(color: str) -> List[int]:
         return [8, 9, 10, 11, 12, 13, 14]
     return []
 
-def detect_best_double_signal(results: List[Dict], options: Dict = None) -> Optional[Dict]:
-    """Detectar melhor sinal do Double"""
+def detect_best_double_signal(results: List[Dict], options: Dict = None,
+                              features: Optional[DoubleFeatureState] = None) -> Optional[Dict]:
+    """Detectar melhor sinal do Double
+
+    `features` é o estado incremental da plataforma; sem ele o estado é
+    reconstruído a partir de `results` (custo proporcional ao histórico).
+    """
     options = options or {}
+    if features is None:
+        features = DoubleFeatureState.from_results(results)
     
     # Qualidade mínima de amostra
-    sample_stats = build_double_stats(results[-50:])
-    if sample_stats.get("total", 0) < CONFIG.MIN_SAMPLE_TOTAL:
+    if features.size(50) < CONFIG.MIN_SAMPLE_TOTAL:
         return None
     
-    patterns = detect_double_patterns(results)
+    patterns = detect_double_patterns(results, features)
     # Se a configuração exigir apenas um padrão para emitir sinal, respeitar
     if CONFIG.EMIT_SIGNAL_ONLY_IF_SINGLE_PATTERN:
         # Não emitir se não houver exatamente 1 padrão detectado
@@ -552,12 +492,12 @@ def detect_best_double_signal(results: List[Dict], options: Dict = None) -> Opti
         # Criar payload simples a partir do pattern
         description = p.get("description")
         reasons = [description]
-        chance_pct = compute_double_signal_chance(advice, results)
+        chance_pct = compute_double_signal_chance(advice, results, features)
     else:
         signal_advice = choose_double_bet_signal(patterns, results, {
             "lastKey": last_key,
             "preferredColor": preferred_color
-        })
+        }, features)
 
         if not signal_advice:
             return None
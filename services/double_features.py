@@ -0,0 +1,147 @@
+"""
+Estado incremental de features do Double
+Mantém streaks, alternância e contagens por janela atualizados em O(1) a cada resultado,
+para que os detectores não precisem refatiar o histórico a cada rodada.
+
+Representação dos tokens: "V" = Vermelho, "P" = Preto, "B" = Branco
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+from config import CONFIG
+
+TOKEN_BY_COLOR = {"red": "V", "black": "P", "white": "B"}
+COLOR_BY_TOKEN = {"V": "red", "P": "black", "B": "white"}
+
+# Janelas usadas por detect_double_patterns / compute_double_signal_chance
+DEFAULT_WINDOWS = (2, 3, 4, 5, 10, 12, 20, 50)
+
+
+def color_to_token(color: Optional[str]) -> str:
+    """Converter cor do sistema para token V/P/B (desconhecido vira Branco)"""
+    return TOKEN_BY_COLOR.get(color, "B")
+
+
+class DoubleFeatureState:
+    """
+    Features rolantes de uma plataforma/mesa.
+
+    Cada `push` custa O(número de janelas), independente do tamanho do histórico.
+    Campos principais:
+    - run_token / run_len: sequência atual (Branco conta como cor própria)
+    - nw_run_token / nw_run_len: sequência atual ignorando Brancos
+    - streak_before_white: (token, tamanho) da sequência interrompida pelo último Branco
+    - alt_len: tamanho da alternância atual na sequência sem Brancos
+    - whites_since_streak: Brancos desde o início da sequência atual sem Brancos
+    - count(janela, token): contagem por cor nas últimas N rodadas
+    """
+
+    def __init__(self, windows: Optional[Iterable[int]] = None):
+        ws = set(windows or DEFAULT_WINDOWS)
+        ws.add(CONFIG.IMBALANCE_WINDOW)
+        ws.add(max(CONFIG.ALTERNATION_WINDOW, 4))
+        self.windows: Tuple[int, ...] = tuple(sorted(w for w in ws if w > 0))
+        self.max_window = self.windows[-1]
+        self.reset()
+
+    def reset(self):
+        """Zerar o estado"""
+        self.total = 0
+        self._ring: List[Optional[str]] = [None] * self.max_window
+        self._counts: Dict[int, Dict[str, int]] = {w: {"V": 0, "P": 0, "B": 0} for w in self.windows}
+        self.last_token: Optional[str] = None
+        self.prev_token: Optional[str] = None
+        self.run_token: Optional[str] = None
+        self.run_len = 0
+        self.nw_run_token: Optional[str] = None
+        self.nw_run_len = 0
+        self.last_nw_token: Optional[str] = None
+        self.alt_len = 0
+        self.streak_before_white: Tuple[Optional[str], int] = (None, 0)
+        self.whites_since_streak = 0
+
+    @classmethod
+    def from_results(cls, results: Iterable[Dict], windows: Optional[Iterable[int]] = None) -> "DoubleFeatureState":
+        """Construir estado a partir de uma lista de resultados (ordem cronológica)"""
+        state = cls(windows)
+        state.extend(results)
+        return state
+
+    def rebuild(self, results: Iterable[Dict]):
+        """Recriar o estado a partir de um histórico carregado"""
+        self.reset()
+        self.extend(results)
+
+    def extend(self, results: Iterable[Dict]):
+        for r in results:
+            if r:
+                self.push_result(r)
+
+    def push_result(self, result: Dict):
+        """Adicionar um resultado parseado ({number, color, ...})"""
+        self.push(color_to_token(result.get("color")))
+
+    def push(self, token: str):
+        """Adicionar um token V/P/B"""
+        total = self.total
+        mw = self.max_window
+        ring = self._ring
+        # Atualizar contagens por janela (token que sai da janela antes de sobrescrever o anel)
+        for w, counts in self._counts.items():
+            if total >= w:
+                counts[ring[(total - w) % mw]] -= 1
+            counts[token] += 1
+        ring[total % mw] = token
+        self.total = total + 1
+
+        # Sequência bruta (Branco é uma cor)
+        if token == self.run_token:
+            self.run_len += 1
+        else:
+            if token == "B" and self.run_token in ("V", "P"):
+                self.streak_before_white = (self.run_token, self.run_len)
+            self.run_token = token
+            self.run_len = 1
+
+        # Sequência e alternância ignorando Brancos
+        if token == "B":
+            self.whites_since_streak += 1
+        else:
+            if token == self.nw_run_token:
+                self.nw_run_len += 1
+            else:
+                self.nw_run_token = token
+                self.nw_run_len = 1
+                self.whites_since_streak = 0
+            if self.last_nw_token is not None and token != self.last_nw_token:
+                self.alt_len += 1
+            else:
+                self.alt_len = 1
+            self.last_nw_token = token
+
+        self.prev_token = self.last_token
+        self.last_token = token
+
+    # --- Consultas ---
+
+    def size(self, window: int) -> int:
+        """Quantidade de rodadas efetivamente presentes na janela"""
+        return min(window, self.total)
+
+    def count(self, window: int, token: str) -> int:
+        """Contagem de um token nas últimas `window` rodadas"""
+        counts = self._counts.get(window)
+        if counts is not None:
+            return counts[token]
+        return sum(1 for t in self.tail(window) if t == token)
+
+    def non_white(self, window: int) -> int:
+        """Rodadas não brancas nas últimas `window` rodadas"""
+        return self.size(window) - self.count(window, "B")
+
+    def tail(self, n: int) -> List[str]:
+        """Últimos `n` tokens (mais antigo primeiro), limitado à maior janela"""
+        if n > self.max_window:
+            raise ValueError(f"Janela {n} maior que a capacidade do estado ({self.max_window})")
+        n = min(n, self.total)
+        mw = self.max_window
+        start = self.total - n
+        return [self._ring[i % mw] for i in range(start, self.total)]
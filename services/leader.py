@@ -0,0 +1,131 @@
+"""
+Eleição de líder entre workers por trava de arquivo
+
+Cada processo tenta uma trava exclusiva não bloqueante no mesmo arquivo
+(flock; msvcrt no Windows). Quem consegue é o líder e faz a ingestão, a
+detecção de sinais e a persistência; os demais seguem como consumidores e
+tentam de novo a cada `retry_seconds`. O sistema operacional libera a trava
+quando o processo líder morre, então o failover leva no máximo um intervalo,
+sem serviço externo.
+"""
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    try:
+        import msvcrt
+    except ImportError:
+        msvcrt = None
+
+
+def _try_lock(fd: int) -> bool:
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        elif msvcrt is not None:  # pragma: no cover
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock(fd: int):
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        elif msvcrt is not None:  # pragma: no cover
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    except OSError:
+        pass
+
+
+class LeaderElection:
+    def __init__(self, path: str, retry_seconds: float = 0.5):
+        self.path = path
+        self.retry_seconds = retry_seconds
+        self.is_leader = False
+        self.leader_since: Optional[float] = None
+        self.attempts = 0
+        self._fd: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def try_acquire(self) -> bool:
+        """Tentar virar líder agora (não bloqueia)"""
+        if self.is_leader:
+            return True
+        self.attempts += 1
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if not _try_lock(self._fd):
+            return False
+        self.is_leader = True
+        self.leader_since = time.time()
+        # PID do líder no arquivo (só informativo; a trava é o que vale)
+        try:
+            os.ftruncate(self._fd, 0)
+            os.pwrite(self._fd, str(os.getpid()).encode(), 0)
+        except (OSError, AttributeError):
+            pass
+        return True
+
+    def start(self, on_elected: Callable[[], Awaitable[None]],
+              on_follower_tick: Optional[Callable[[], Awaitable[None]]] = None):
+        """
+        Seguidor: tenta a trava a cada intervalo e chama `on_elected()` ao
+        assumir; `on_follower_tick()` roda a cada tentativa sem sucesso.
+        """
+        if self._task is None and not self.is_leader:
+            self._task = asyncio.get_running_loop().create_task(self._run(on_elected, on_follower_tick))
+
+    async def _run(self, on_elected, on_follower_tick):
+        try:
+            while not self.try_acquire():
+                if on_follower_tick is not None:
+                    try:
+                        await on_follower_tick()
+                    except Exception as e:
+                        print(f"[leader] Erro no seguidor: {e}")
+                await asyncio.sleep(self.retry_seconds)
+            print(f"[leader] PID {os.getpid()} assumiu a liderança")
+            await on_elected()
+        except asyncio.CancelledError:
+            pass
+
+    def leader_pid(self) -> Optional[int]:
+        try:
+            with open(self.path) as f:
+                return int(f.read().strip() or 0) or None
+        except (OSError, ValueError):
+            return None
+
+    async def stop(self):
+        """Liberar a trava (shutdown): um seguidor assume sem esperar a morte do processo"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._fd is not None:
+            if self.is_leader:
+                _unlock(self._fd)
+            os.close(self._fd)
+            self._fd = None
+        self.is_leader = False
+
+    def stats(self) -> Dict:
+        return {
+            "pid": os.getpid(),
+            "is_leader": self.is_leader,
+            "leader_pid": self.leader_pid(),
+            "leader_since": int(self.leader_since * 1000) if self.leader_since else None,
+            "attempts": self.attempts,
+        }
@@ -0,0 +1,111 @@
+"""
+Autômato compilado para os detectores de padrões V/P/B
+
+Os 8 detectores de `SignalEngine` e `VeraBetPatternEngine` só olham para as
+últimas rodadas (no máximo 6) e para o tamanho do histórico até esse limite.
+Por isso o conjunto de padrões pode ser compilado uma única vez num autômato
+finito cujos estados são os sufixos de até `window` tokens: cada rodada avança
+um token e devolve todos os padrões que casam naquele estado, com custo
+independente do tamanho do histórico.
+
+Os detectores originais continuam sendo a implementação de referência: a
+compilação executa cada detector sobre o sufixo que representa o estado.
+"""
+
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+TOKENS = ("V", "P", "B")
+TOKEN_INDEX = {"V": 0, "P": 1, "B": 2}
+
+# Maior janela usada pelos detectores (padrão 7: sequência de 6)
+DEFAULT_WINDOW = 6
+
+# (pattern_id, detector, prioridade)
+Detector = Tuple[int, Callable, int]
+
+
+class PatternAutomaton:
+    """
+    Tabela de transições + saídas por estado, imutável após a compilação.
+
+    Pode ser compartilhada por qualquer número de mesas; o estado de cada mesa
+    é apenas um inteiro (ver `PatternStream`).
+    Cada saída é uma tupla `(pattern_id, prioridade, *retorno_do_detector[1:])`.
+    """
+
+    def __init__(self, detectores: Sequence[Detector], window: int = DEFAULT_WINDOW):
+        self.window = window
+        self.initial = 0
+        self._transitions: List[int] = []
+        self._outputs: List[Tuple[tuple, ...]] = []
+        self._compile(list(detectores))
+
+    def _compile(self, detectores: List[Detector]):
+        ids: Dict[Tuple[str, ...], int] = {(): 0}
+        order: List[Tuple[str, ...]] = [()]
+        i = 0
+        while i < len(order):
+            suffix = order[i]
+            for tok in TOKENS:
+                nxt = (suffix + (tok,))[-self.window:]
+                if nxt not in ids:
+                    ids[nxt] = len(order)
+                    order.append(nxt)
+                self._transitions.append(ids[nxt])
+            i += 1
+
+        for suffix in order:
+            historico = list(suffix)
+            outs = []
+            for pid, fn, prio in detectores:
+                ret = fn(historico)
+                if ret[0]:
+                    outs.append((pid, prio) + tuple(ret[1:]))
+            self._outputs.append(tuple(outs))
+
+    @property
+    def num_states(self) -> int:
+        return len(self._outputs)
+
+    def advance(self, state: int, token: str) -> int:
+        """Avançar um token (tokens desconhecidos contam como Branco)"""
+        return self._transitions[state * 3 + TOKEN_INDEX.get(token, 2)]
+
+    def matches(self, state: int) -> Tuple[tuple, ...]:
+        """Padrões que casam no estado, na ordem da lista de detectores"""
+        return self._outputs[state]
+
+    def state_for(self, historico: Iterable[str]) -> int:
+        """Estado correspondente a um histórico completo"""
+        state = self.initial
+        for tok in historico:
+            state = self.advance(state, tok)
+        return state
+
+
+class PatternStream:
+    """Cursor de uma mesa sobre um autômato compartilhado"""
+
+    __slots__ = ("automaton", "state", "length")
+
+    def __init__(self, automaton: PatternAutomaton):
+        self.automaton = automaton
+        self.state = automaton.initial
+        self.length = 0
+
+    def push(self, token: str):
+        self.state = self.automaton.advance(self.state, token)
+        self.length += 1
+
+    def extend(self, tokens: Iterable[str]):
+        for tok in tokens:
+            self.push(tok)
+
+    def reset(self, tokens: Iterable[str] = ()):
+        self.state = self.automaton.initial
+        self.length = 0
+        self.extend(tokens)
+
+    @property
+    def matches(self) -> Tuple[tuple, ...]:
+        return self.automaton.matches(self.state)
@@ -9,7 +9,9 @@ de sinais) e funções para detectar os 8 padrões descritos no prompt do usuár
 Este código é apenas para análise e simulação — não recomenda apostas reais.
 """
 
-from typing import List, Optional, Dict, Tuple
+from typing import Callable, List, Optional, Dict, Tuple
+
+from services.pattern_automaton import PatternAutomaton, PatternStream
 
 # Configurações (ajustáveis)
 X_WINDOW = 20
@@ -48,6 +50,9 @@ def confidence_rank(conf_str: str) -> int:
 
 
 class SignalEngine:
+    # Autômato compilado dos detectores, compartilhado entre instâncias (ver automaton())
+    _automaton: Optional[PatternAutomaton] = None
+
     def __init__(self,
                  x_window: int = X_WINDOW,
                  cooldown: int = COOLDOWN_ROUNDS,
@@ -152,16 +157,9 @@ class SignalEngine:
         return False, None, None
 
     # --- Avaliação do histórico e decisão ---
-    def avaliar_historico(self, historico: List[str], rodada_atual: int) -> Dict:
-        # verifica stop
-        if rodada_atual <= self.stop_until_round:
-            return {"signal": False, "reason": "stop_ativo"}
-        # verifica cooldown
-        if rodada_atual - self.last_alert_round < self.cooldown:
-            return {"signal": False, "reason": "cooldown"}
-
+    def padroes(self) -> List[Tuple[int, Callable, int]]:
         # Lista de padrões com prioridades (maior prioridade primeiro)
-        padroes = [
+        return [
             (1, self.detectar_padrao1, 100),
             (6, self.detectar_padrao6, 90),
             (2, self.detectar_padrao2, 80),
@@ -172,8 +170,34 @@ class SignalEngine:
             (7, self.detectar_padrao7, 105),
         ]
 
+    @classmethod
+    def automaton(cls) -> PatternAutomaton:
+        """Autômato dos 8 padrões, compilado uma vez e compartilhado por todas as mesas"""
+        if cls.__dict__.get("_automaton") is None:
+            cls._automaton = PatternAutomaton(cls().padroes())
+        return cls._automaton
+
+    def novo_stream(self) -> PatternStream:
+        """Cursor por mesa para `avaliar_stream`"""
+        return PatternStream(self.automaton())
+
+    def _bloqueio(self, rodada_atual: int) -> Optional[Dict]:
+        # verifica stop
+        if rodada_atual <= self.stop_until_round:
+            return {"signal": False, "reason": "stop_ativo"}
+        # verifica cooldown
+        if rodada_atual - self.last_alert_round < self.cooldown:
+            return {"signal": False, "reason": "cooldown"}
+        return None
+
+    def avaliar_historico(self, historico: List[str], rodada_atual: int) -> Dict:
+        """Implementação de referência: executa os 8 detectores sobre o histórico"""
+        bloqueio = self._bloqueio(rodada_atual)
+        if bloqueio:
+            return bloqueio
+
         matches = []
-        for pid, fn, prio in padroes:
+        for pid, fn, prio in self.padroes():
             detected, suggestion, conf = fn(historico)
             if detected:
                 matches.append({
@@ -182,7 +206,21 @@ class SignalEngine:
                     "suggestion": suggestion,
                     "confidence": conf,
                 })
+        return self._decidir(matches)
+
+    def avaliar_stream(self, stream: PatternStream, rodada_atual: int) -> Dict:
+        """Mesmo resultado de `avaliar_historico`, lendo os padrões do autômato em O(1)"""
+        bloqueio = self._bloqueio(rodada_atual)
+        if bloqueio:
+            return bloqueio
+
+        matches = [
+            {"pattern_id": pid, "priority": prio, "suggestion": suggestion, "confidence": conf}
+            for pid, prio, suggestion, conf in stream.matches
+        ]
+        return self._decidir(matches)
 
+    def _decidir(self, matches: List[Dict]) -> Dict:
         if not matches:
             return {"signal": False, "reason": "nenhum_padrao"}
 
@@ -0,0 +1,223 @@
+"""
+Mesa PlayNaBet (feed WebSocket) sobre o TablePipeline
+
+Acrescenta ao fluxo padrão o que é próprio do PlayNaBet: deduplicação por
+round_id ou mesmo número em menos de 2s, features rolantes, SignalEngine (8
+padrões, com CONFIG.USE_PATTERN_SIGNALS) com fallback para
+`detect_best_double_signal`, calibração adaptativa a cada aposta resolvida e o
+governador de alertas (cooldown por rodadas, anti-tilt e limite global por
+janela). Mesas "ws" de CONFIG.TABLES usam a mesma classe.
+"""
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from config import CONFIG
+from services.adaptive_calibration import online_update_platt, update_pattern_stat
+from services.double import detect_best_double_signal, numbers_for_color
+from services.double_features import DoubleFeatureState
+from services.parser import parse_double_payload
+from services.table_pipeline import TablePipeline
+
+
+class AlertGovernor:
+    """Cooldown por rodadas, modo stop após perdas seguidas e limite de alertas por janela"""
+
+    COOLDOWN_BASIC = 4
+    COOLDOWN_AFTER_LOSS = 8
+    # Anti-tilt: pausa após perdas fortes consecutivas
+    ANTI_TILT_LOSS_STREAK = 2
+    STOP_DURATION_ROUNDS = 12
+    MIN_COOLDOWN_AFTER_WIN = 3
+    GLOBAL_WINDOW_ROUNDS = 30
+    GLOBAL_MAX_ALERTS = 4
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.cooldown_contador = 0
+        self.perdas_consecutivas = 0
+        self.modo_stop = False
+        self.stop_counter = 0
+        self.modo_conservador = False
+        # Rodadas em que houve alerta
+        self.historico_alertas: Deque[int] = deque(maxlen=200)
+        self.sinais_perdidos_por_pausa = 0
+        self.compensation_remaining = 0
+        self.sinais_emitidos_hoje = 0
+
+    def tick(self):
+        """Uma rodada nova: consome o stop ou o cooldown"""
+        if self.modo_stop:
+            self.stop_counter = max(0, self.stop_counter - 1)
+            if self.stop_counter == 0:
+                self.modo_stop = False
+                self.perdas_consecutivas = 0
+                # Sinais fortes perdidos durante a pausa podem ser compensados depois
+                self.compensation_remaining = self.sinais_perdidos_por_pausa
+                self.sinais_perdidos_por_pausa = 0
+            return
+        if self.cooldown_contador > 0:
+            self.cooldown_contador -= 1
+
+    def activate(self, tipo: str):
+        if tipo == "basico":
+            self.cooldown_contador = self.COOLDOWN_BASIC
+        elif tipo == "perda":
+            self.cooldown_contador = self.COOLDOWN_AFTER_LOSS
+            self.modo_conservador = True
+        elif tipo == "stop":
+            self.modo_stop = True
+            self.stop_counter = self.STOP_DURATION_ROUNDS
+            self.cooldown_contador = 0
+
+    def alerts_in_window(self, round_index: int) -> int:
+        min_round = max(0, round_index - self.GLOBAL_WINDOW_ROUNDS + 1)
+        return sum(1 for r in self.historico_alertas if r >= min_round)
+
+    def can_emit(self, round_index: int) -> bool:
+        if self.modo_stop or self.cooldown_contador > 0:
+            return False
+        return self.alerts_in_window(round_index) < self.GLOBAL_MAX_ALERTS
+
+    def allow(self, signal: Dict, round_index: int) -> bool:
+        """Liberar o sinal? Durante o stop, só sinais fortes usando a compensação"""
+        if self.can_emit(round_index):
+            return True
+        if self.modo_stop:
+            self.sinais_perdidos_por_pausa += 1
+            if self.compensation_remaining > 0 and signal.get("chance", 0) >= 65:
+                self.compensation_remaining -= 1
+                return True
+            print(f"[COOLDOWN] Stop temporário ativo ({self.stop_counter} rodadas restantes)")
+        elif self.cooldown_contador > 0:
+            print(f"[COOLDOWN] Padrão detectado mas cooldown ativo ({self.cooldown_contador} rodadas restantes)")
+        else:
+            print(f"[COOLDOWN] Limite global atingido ({self.GLOBAL_MAX_ALERTS}/{self.GLOBAL_WINDOW_ROUNDS}) — alerta suprimido")
+        return False
+
+    def register_alert(self, round_index: int):
+        self.historico_alertas.append(round_index)
+        self.sinais_emitidos_hoje += 1
+        self.activate("basico")
+
+    def register_result(self, hit: bool):
+        if hit:
+            self.cooldown_contador = max(self.MIN_COOLDOWN_AFTER_WIN, self.cooldown_contador // 2)
+            self.perdas_consecutivas = 0
+            self.modo_conservador = False
+        else:
+            self.perdas_consecutivas += 1
+            self.activate("perda")
+            if self.perdas_consecutivas >= self.ANTI_TILT_LOSS_STREAK:
+                self.activate("stop")
+
+
+# Sugestão do SignalEngine → cor do sistema e chance estimada pelo rótulo
+_PATTERN_COLORS = {"V": "red", "P": "black"}
+_PATTERN_CHANCE = {"alto": 85, "medio-alto": 75, "medio": 65, "baixo-medio": 55, "baixo": 30}
+
+
+class PlayNaBetPipeline(TablePipeline):
+    MIN_HISTORY = 5
+    BLOCK_AFTER_RESOLVE = False
+
+    def __init__(self, name: str, client_factory, engine=None, calibrate: bool = True, **kwargs):
+        """
+        `engine` é o SignalEngine (opcional); `calibrate` liga a atualização
+        das estatísticas por padrão e do Platt a cada aposta resolvida.
+        """
+        kwargs.setdefault("parse", parse_double_payload)
+        super().__init__(name, client_factory, engine, **kwargs)
+        # Features rolantes (atualizadas em O(1) a cada resultado)
+        self.features = DoubleFeatureState()
+        self.governor = AlertGovernor()
+        self.calibrate = calibrate
+
+    def is_duplicate(self, result: Dict) -> bool:
+        h = self.history
+        if not h:
+            return False
+        return (h.last_round_id() == result.get("round_id") or
+                (h.last_number() == result.get("number") and
+                 abs(result.get("timestamp", 0) - h.last_timestamp()) < 2000))
+
+    def on_result(self, result: Dict):
+        self.features.push_result(result)
+        self.governor.tick()
+
+    def on_outcome(self, pb: Dict, hit: bool):
+        if self.calibrate:
+            update_pattern_stat(pb.get("patternKey"), hit)
+            try:
+                online_update_platt(pb.get("chance", 0), 1 if hit else 0)
+            except Exception:
+                pass
+        self.governor.register_result(hit)
+
+    def find_signal(self) -> Optional[Dict]:
+        signal = None
+        if self.engine is not None and getattr(CONFIG, "USE_PATTERN_SIGNALS", False):
+            signal = self._pattern_engine_signal()
+        return signal or detect_best_double_signal(self.history, features=self.features)
+
+    def _pattern_engine_signal(self) -> Optional[Dict]:
+        # Autômato já avançado com o resultado atual (equivale a avaliar_historico)
+        pe = self.engine.avaliar_stream(self.stream, rodada_atual=len(self.history))
+        color = _PATTERN_COLORS.get(pe.get("suggestion")) if pe.get("signal") else None
+        if not color:
+            return None
+        pid = pe.get("pattern_id")
+        conf_label = pe.get("confidence")
+        targets = numbers_for_color(color)
+        now = int(time.time() * 1000)
+        return {
+            "id": f"ps_{now}",
+            "type": "MEDIUM_SIGNAL" if conf_label in ("medio", "medio-alto") else ("STRONG_SIGNAL" if conf_label == "alto" else "WEAK_SIGNAL"),
+            "color": "#90ee90",
+            "description": f"PatternEngine P{pid} detected",
+            "patternKey": f"P{pid}",
+            "confidence": 8.5 if conf_label == "alto" else (7.5 if conf_label in ("medio", "medio-alto") else 6.0),
+            "suggestedBet": {
+                "type": "color",
+                "color": color,
+                "numbers": targets,
+                "coverage": f"{len(targets)} números",
+                "expectedRoi": "Simulado",
+                "protect_white": True,
+            },
+            "targets": targets,
+            "reasons": [f"PatternEngine: P{pid}"],
+            "validFor": 3,
+            "timestamp": now,
+            "chance": _PATTERN_CHANCE.get(conf_label, 50),
+            "afterNumber": None,
+            "afterColor": None,
+            "suggestedText": f"Sinal P{pid}: apostar {color}",
+        }
+
+    def allow_signal(self, signal: Dict) -> bool:
+        return self.governor.allow(signal, self.round_index)
+
+    def decorate_signal(self, signal: Dict):
+        if self.martingale:
+            signal["id"] = f"pb_{int(time.time() * 1000)}"
+        signal["rodada_numero"] = self.round_index
+
+    def on_signal(self, signal: Dict):
+        self.governor.register_alert(self.round_index)
+
+    def _sync_derived(self):
+        super()._sync_derived()
+        self.features.rebuild(self.history)
+
+    def reset(self):
+        super().reset()
+        self.governor.reset()
+
+    def state_snapshot(self) -> Dict:
+        state = super().state_snapshot()
+        state["modoStop"] = self.governor.modo_stop
+        state["stopCounter"] = self.governor.stop_counter
+        return state
@@ -0,0 +1,134 @@
+"""
+Cache em processo das respostas de /api/stats/*
+
+As estatísticas só mudam quando um sinal é resolvido, então cada resposta é
+guardada (já serializada) por endpoint + parâmetros, junto com a versão da
+plataforma no momento do cálculo. `save_signal_to_history` incrementa a
+versão da plataforma (e a global, usada por platform=all), o que invalida
+exatamente as entradas afetadas. Só plataformas conhecidas (as duas do app e
+as mesas registradas com `add_platform`) têm versão própria: um `platform`
+qualquer vindo do cliente usa a versão de platform=all e não cria entradas
+no mapa de versões. O TTL limita a deriva da janela "últimos N
+dias" quando não chegam sinais novos.
+
+Respostas levam ETag (hash do corpo); If-None-Match igual devolve 304.
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from fastapi import Request, Response
+
+from services.serialization import dumps
+
+ALL_PLATFORMS = "all"
+PLATFORMS = ("playnabet", "verabet")
+
+
+class _Entry:
+    __slots__ = ("version", "expires_at", "body", "etag")
+
+    def __init__(self, version: int, expires_at: float, body: bytes, etag: str):
+        self.version = version
+        self.expires_at = expires_at
+        self.body = body
+        self.etag = etag
+
+
+class ResponseCache:
+    """LRU limitado por número de entradas, invalidado por versão de plataforma"""
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 60.0,
+                 platforms: Iterable[str] = PLATFORMS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple, _Entry]" = OrderedDict()
+        self._versions: Dict[str, int] = {p: 0 for p in (*platforms, ALL_PLATFORMS)}
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+
+    # --- Versões ---
+
+    def add_platform(self, platform: str):
+        """Registrar uma plataforma (mesa configurada) com versão própria"""
+        self._versions.setdefault(platform, 0)
+
+    def version(self, platform: str) -> int:
+        v = self._versions.get(platform)
+        return self._versions[ALL_PLATFORMS] if v is None else v
+
+    def bump(self, platform: str):
+        """Novos dados da plataforma: invalida as entradas dela e as de platform=all"""
+        if platform in self._versions and platform != ALL_PLATFORMS:
+            self._versions[platform] += 1
+        self._versions[ALL_PLATFORMS] += 1
+
+    def clear(self):
+        self._entries.clear()
+        for platform in list(self._versions):
+            self._versions[platform] += 1
+
+    # --- Entradas ---
+
+    def get(self, key: Tuple, platform: str) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.version != self.version(platform) or entry.expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: Tuple, platform: str, version: int, body: bytes) -> _Entry:
+        etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+        entry = _Entry(version, time.monotonic() + self.ttl_seconds, body, etag)
+        # Versão mudou durante o cálculo: responder, mas não guardar
+        if version == self.version(platform):
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    async def respond(self, request: Request, platform: str, params: Dict,
+                      compute: Callable[[], Awaitable[Dict]]) -> Response:
+        """
+        Servir `compute()` pelo cache. Só respostas `ok` são guardadas;
+        erros (ex.: banco desconectado) sempre recalculam.
+        """
+        key = (request.url.path, platform, tuple(sorted(params.items())))
+        entry = self.get(key, platform)
+        if entry is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            version = self.version(platform)
+            result = await compute()
+            body = dumps(result)
+            if not (isinstance(result, dict) and result.get("ok")):
+                return Response(body, media_type="application/json")
+            entry = self.put(key, platform, version, body)
+
+        headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+        if request.headers.get("if-none-match") == entry.etag:
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(entry.body, media_type="application/json", headers=headers)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0,
+            "not_modified": self.not_modified,
+            "evictions": self.evictions,
+            "versions": dict(self._versions),
+        }
@@ -0,0 +1,176 @@
+"""
+Histórico de resultados em anel colunar
+Substitui a lista de dicts `results_history`: append O(1) sem alocação,
+cores como tokens V/P/B num bytearray e visões sem cópia das últimas N rodadas.
+O payload bruto (`raw`) não é guardado: só os campos do registro (número, cor,
+round_id, timestamp, source, created_at) voltam nos dicts.
+"""
+import time
+from array import array
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+TOKEN_BY_COLOR = {"red": ord("V"), "black": ord("P"), "white": ord("B")}
+COLOR_BY_TOKEN = {ord("V"): "red", ord("P"): "black", ord("B"): "white"}
+
+
+
+def _coerce_timestamp(value) -> int:
+    """Timestamp em ms; aceita número, string numérica ou ISO (senão, hora do recebimento)"""
+    if not value:
+        return 0
+    try:
+        return int(value)
+    except (TypeError, ValueError, OverflowError):
+        pass
+    try:
+        return int(float(value))
+    except (TypeError, ValueError, OverflowError):
+        pass
+    try:
+        return int(datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp() * 1000)
+    except ValueError:
+        return int(time.time() * 1000)
+
+class ResultRing:
+    """
+    Anel de capacidade fixa com colunas paralelas:
+    - números em array('b') e cores (tokens) em bytearray, ambos espelhados
+      (cada posição é gravada em i e i + capacidade) para que qualquer janela
+      das últimas N rodadas seja contígua e exposta como memoryview
+    - round_id, timestamp, created_at e source (só quando difere do `source`
+      do anel) ao lado
+
+    Dicts só são montados quando a API precisa (indexação, fatias, iteração).
+    """
+
+    def __init__(self, capacity: int = 100, source: Optional[str] = None):
+        if capacity <= 0:
+            raise ValueError("capacity deve ser positiva")
+        self.capacity = capacity
+        self.source = source
+        self._numbers = array("b", bytes(2 * capacity))
+        self._colors = bytearray(2 * capacity)
+        self._round_ids: List[Optional[str]] = [None] * capacity
+        self._timestamps = array("q", bytes(8 * capacity))
+        self._created_at: List[Optional[str]] = [None] * capacity
+        self._sources: List[Optional[str]] = [None] * capacity
+        self._start = 0
+        self._len = 0
+        # listener("append", result) / listener("clear", None): replicação entre workers
+        self.listener: Optional[Callable[[str, Optional[Dict]], None]] = None
+
+    # --- Escrita ---
+
+    def append(self, result: Dict):
+        """Adicionar um resultado parseado; descarta o mais antigo quando cheio"""
+        cap = self.capacity
+        if self._len < cap:
+            pos = (self._start + self._len) % cap
+            self._len += 1
+        else:
+            pos = self._start
+            self._start = (self._start + 1) % cap
+        num = result.get("number")
+        num = -1 if num is None else int(num)
+        tok = TOKEN_BY_COLOR.get(result.get("color"), TOKEN_BY_COLOR["white"])
+        self._numbers[pos] = num
+        self._numbers[pos + cap] = num
+        self._colors[pos] = tok
+        self._colors[pos + cap] = tok
+        self._round_ids[pos] = result.get("round_id")
+        self._timestamps[pos] = _coerce_timestamp(result.get("timestamp"))
+        self._created_at[pos] = result.get("created_at")
+        source = result.get("source")
+        self._sources[pos] = source if source != self.source else None
+        if self.listener is not None:
+            self.listener("append", result)
+
+    def extend(self, results: Iterable[Dict]):
+        for r in results:
+            if r:
+                self.append(r)
+
+    def clear(self):
+        self._start = 0
+        self._len = 0
+        if self.listener is not None:
+            self.listener("clear", None)
+
+    # --- Acesso barato ao último resultado ---
+
+    def last_round_id(self) -> Optional[str]:
+        return self._round_ids[self._pos(-1)] if self._len else None
+
+    def last_number(self) -> Optional[int]:
+        return self._numbers[self._pos(-1)] if self._len else None
+
+    def last_timestamp(self) -> int:
+        return self._timestamps[self._pos(-1)] if self._len else 0
+
+    # --- Visões sem cópia ---
+
+    def colors(self, n: Optional[int] = None) -> memoryview:
+        """Tokens V/P/B das últimas `n` rodadas (mais antiga primeiro)"""
+        start, end = self._window(n)
+        return memoryview(self._colors)[start:end]
+
+    def numbers(self, n: Optional[int] = None) -> memoryview:
+        """Números das últimas `n` rodadas (mais antiga primeiro)"""
+        start, end = self._window(n)
+        return memoryview(self._numbers)[start:end]
+
+    def tokens(self, n: Optional[int] = None) -> str:
+        """String V/P/B para os motores de padrões"""
+        return self.colors(n).tobytes().decode("ascii")
+
+    # --- Interface de sequência (monta dicts) ---
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __bool__(self) -> bool:
+        return self._len > 0
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return [self._record(self._pos(i)) for i in range(*index.indices(self._len))]
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("ResultRing index out of range")
+        return self._record(self._pos(index))
+
+    def __iter__(self) -> Iterator[Dict]:
+        for i in range(self._len):
+            yield self._record(self._pos(i))
+
+    def to_dicts(self, n: Optional[int] = None) -> List[Dict]:
+        """Últimos `n` resultados como dicts (mais antigo primeiro)"""
+        n = self._len if n is None else min(n, self._len)
+        return self[self._len - n:]
+
+    # --- Internos ---
+
+    def _pos(self, i: int) -> int:
+        if i < 0:
+            i += self._len
+        return (self._start + i) % self.capacity
+
+    def _window(self, n: Optional[int]):
+        n = self._len if n is None else max(0, min(n, self._len))
+        end = self._start + self._len
+        return end - n, end
+
+    def _record(self, pos: int) -> Dict:
+        record = {
+            "number": self._numbers[pos],
+            "color": COLOR_BY_TOKEN[self._colors[pos]],
+            "round_id": self._round_ids[pos],
+            "timestamp": self._timestamps[pos],
+            "source": self._sources[pos] or self.source,
+        }
+        created_at = self._created_at[pos]
+        if created_at is not None:
+            record["created_at"] = created_at
+        return record
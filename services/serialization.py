@@ -0,0 +1,54 @@
+"""
+Serialização JSON centralizada
+Usa orjson quando instalado (opcional) e cai para o json da stdlib.
+Os frames SSE são montados uma única vez, já em bytes, e o mesmo objeto é
+reaproveitado por todos os assinantes.
+"""
+import json
+from typing import Any, Optional
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende do ambiente
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+
+def _dumps_stdlib(obj: Any) -> bytes:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj: Any) -> bytes:
+        """Serializar para bytes UTF-8 (JSON compacto)"""
+        try:
+            return orjson.dumps(obj, option=_ORJSON_OPTIONS)
+        except TypeError:
+            # Ex.: inteiros acima de 64 bits; a stdlib aceita
+            return _dumps_stdlib(obj)
+else:
+    dumps = _dumps_stdlib
+
+
+def dumps_str(obj: Any) -> str:
+    return dumps(obj).decode("utf-8")
+
+
+def sse_frame(event: str, payload: Any, event_id: Optional[str] = None) -> bytes:
+    """Montar o frame `[id: ...\\n]event: ...\\ndata: ...\\n\\n` em bytes"""
+    frame = b"event: " + event.encode("utf-8") + b"\ndata: " + dumps(payload) + b"\n\n"
+    if event_id is not None:
+        return b"id: " + event_id.encode("ascii") + b"\n" + frame
+    return frame
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse que usa o mesmo encoder dos frames SSE"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
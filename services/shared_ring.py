@@ -0,0 +1,512 @@
+"""
+Anel em memória compartilhada entre workers
+
+Um processo produtor (o que tem os clientes WS/VeraBet) grava no anel os
+frames SSE já codificados e os resultados do histórico; os demais workers
+leem o mesmo anel e repassam os frames aos seus assinantes SSE e os
+resultados aos seus `ResultRing`, de modo que qualquer worker atende
+`/events`, `/verabet/events` e `/api/results` com os mesmos dados.
+
+Layout do segmento (`multiprocessing.shared_memory`):
+- cabeçalho: magic, slots, slot_size e `head` (total de registros gravados)
+- slots de tamanho fixo: seq+1, canal, tipo, tamanho e payload
+
+Há um único escritor; o leitor valida o seq do slot antes e depois da cópia
+(seqlock), então um slot sobrescrito durante a leitura é contado como perdido
+em vez de entregue corrompido.
+
+Notificação: cada leitor cria um socket unix de datagrama em
+`<tmp>/<nome>.d/<pid>.sock` e o produtor envia um byte a cada gravação. Sem
+socket unix (Windows) ou se uma notificação se perder, o leitor também
+confere o `head` a cada `poll_seconds`.
+
+Controle: mensagens pequenas (invalidação de cache, reset do admin) vão no
+anel de eventos como registros `KIND_CONTROL` e chegam a todos os
+consumidores. Como o anel tem um único escritor, um consumidor envia a
+mensagem ao produtor por `<tmp>/<nome>.d/producer.cmd`; o produtor a aplica
+e a grava no anel.
+"""
+import asyncio
+import os
+import socket
+import struct
+import tempfile
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from services.serialization import dumps
+
+try:
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:  # pragma: no cover - depende do ambiente
+    import json
+
+    _loads = json.loads
+
+MAGIC = 0x44424352  # "DBCR"
+_HEADER = struct.Struct("<IIIxxxxQ")  # magic, slots, slot_size, head
+_SLOT = struct.Struct("<QBBxxI")  # seq+1, canal, tipo, tamanho
+
+KIND_FRAME = 1
+KIND_RESULT = 2
+KIND_CLEAR = 3
+KIND_CONTROL = 4
+
+# Frames guardados pelo consumidor para montar o início de cada conexão SSE
+TRACKED_EVENTS = (b"status", b"state")
+
+# Campos que o ResultRing guarda (o resto do resultado não é replicado)
+RESULT_FIELDS = ("number", "color", "round_id", "timestamp", "created_at")
+
+
+class SharedRing:
+    """Anel de registros de tamanho fixo num segmento de memória compartilhada"""
+
+    def __init__(self, name: str, slots: int = 1024, slot_size: int = 8192, create: bool = False):
+        self.name = name
+        if create:
+            try:
+                self.shm = shared_memory.SharedMemory(name=name, create=True,
+                                                      size=_HEADER.size + slots * slot_size)
+                _HEADER.pack_into(self.shm.buf, 0, MAGIC, slots, slot_size, 0)
+            except FileExistsError:
+                # Segmento de um produtor anterior: continuar do head atual
+                self.shm = shared_memory.SharedMemory(name=name)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        # O resource_tracker removeria o segmento quando este processo saísse
+        # (Python < 3.13), derrubando os outros workers; quem remove é `unlink()`
+        try:
+            resource_tracker.unregister(self.shm._name, "shared_memory")
+        except Exception:
+            pass
+        magic, self.slots, self.slot_size, _ = _HEADER.unpack_from(self.shm.buf, 0)
+        if magic != MAGIC:
+            raise ValueError(f"segmento {name} não é um SharedRing")
+        if create and (self.slots, self.slot_size) != (slots, slot_size):
+            print(f"[shared_ring] {name}: geometria existente mantida ({self.slots}x{self.slot_size})")
+        self.max_payload = self.slot_size - _SLOT.size
+        self.written = 0
+        self.oversize = 0
+
+    @property
+    def head(self) -> int:
+        return _HEADER.unpack_from(self.shm.buf, 0)[3]
+
+    def write(self, channel: int, kind: int, payload: bytes) -> Optional[int]:
+        """Gravar um registro (único escritor); None se não couber no slot"""
+        if len(payload) > self.max_payload:
+            self.oversize += 1
+            return None
+        buf = self.shm.buf
+        seq = self.head
+        off = _HEADER.size + (seq % self.slots) * self.slot_size
+        _SLOT.pack_into(buf, off, 0, channel, kind, len(payload))
+        start = off + _SLOT.size
+        buf[start:start + len(payload)] = payload
+        _SLOT.pack_into(buf, off, seq + 1, channel, kind, len(payload))
+        struct.pack_into("<Q", buf, _HEADER.size - 8, seq + 1)
+        self.written += 1
+        return seq
+
+    def read_from(self, seq: int, limit: int = 4096) -> Tuple[List[Tuple[int, int, bytes]], int, int]:
+        """
+        Registros a partir de `seq`: ([(canal, tipo, payload)], próximo seq, perdidos).
+        Registros já sobrescritos são pulados e contados como perdidos.
+        """
+        buf = self.shm.buf
+        head = self.head
+        lost = 0
+        if head - seq > self.slots:
+            lost += head - self.slots - seq
+            seq = head - self.slots
+        out = []
+        end = min(head, seq + limit)
+        while seq < end:
+            off = _HEADER.size + (seq % self.slots) * self.slot_size
+            tag, channel, kind, size = _SLOT.unpack_from(buf, off)
+            if tag == seq + 1:
+                start = off + _SLOT.size
+                payload = bytes(buf[start:start + size])
+                if _SLOT.unpack_from(buf, off)[0] == seq + 1:
+                    out.append((channel, kind, payload))
+                else:
+                    lost += 1
+            else:
+                lost += 1
+            seq += 1
+        return out, seq, lost
+
+    def close(self):
+        try:
+            self.shm.close()
+        except Exception:
+            pass
+
+    def unlink(self):
+        """Remover o segmento (os processos já anexados continuam lendo)"""
+        try:
+            resource_tracker.register(self.shm._name, "shared_memory")
+            self.shm.unlink()
+        except Exception:
+            pass
+
+
+class Notifier:
+    """Aviso de novos registros via sockets unix de datagrama (um por leitor)"""
+
+    def __init__(self, name: str):
+        self.dir = os.path.join(tempfile.gettempdir(), f"{name}.d")
+        self.enabled = hasattr(socket, "AF_UNIX")
+        self._sock: Optional[socket.socket] = None
+        self._path: Optional[str] = None
+        self._peers: List[str] = []
+        self._peers_at = 0.0
+        self.sent = 0
+
+    # --- Produtor ---
+
+    def notify(self):
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        if now - self._peers_at > 1.0:
+            try:
+                self._peers = [os.path.join(self.dir, f) for f in os.listdir(self.dir) if f.endswith(".sock")]
+            except OSError:
+                self._peers = []
+            self._peers_at = now
+        if not self._peers:
+            return
+        if self._sock is None:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._sock.setblocking(False)
+        for peer in list(self._peers):
+            try:
+                self._sock.sendto(b"\x01", peer)
+                self.sent += 1
+            except BlockingIOError:
+                pass  # leitor já tem avisos pendentes
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Leitor morto: remover o socket órfão
+                self._peers.remove(peer)
+                try:
+                    os.unlink(peer)
+                except OSError:
+                    pass
+            except OSError:
+                pass
+
+    # --- Leitor ---
+
+    def listen(self, wake: Callable[[], None]) -> bool:
+        """Registrar este processo como leitor; `wake()` roda a cada aviso"""
+        if not self.enabled:
+            return False
+        try:
+            os.makedirs(self.dir, exist_ok=True)
+            self._path = os.path.join(self.dir, f"{os.getpid()}.sock")
+            if os.path.exists(self._path):
+                os.unlink(self._path)
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._sock.bind(self._path)
+            self._sock.setblocking(False)
+        except OSError as e:
+            print(f"[shared_ring] Sem notificação por socket ({e}); usando polling")
+            self.enabled = False
+            return False
+
+        def on_readable():
+            try:
+                while True:
+                    self._sock.recv(64)
+            except (BlockingIOError, OSError):
+                pass
+            wake()
+
+        asyncio.get_running_loop().add_reader(self._sock.fileno(), on_readable)
+        return True
+
+    def close(self):
+        if self._sock is not None:
+            if self._path is not None:
+                try:
+                    asyncio.get_running_loop().remove_reader(self._sock.fileno())
+                except Exception:
+                    pass
+                try:
+                    os.unlink(self._path)
+                    os.rmdir(self.dir)  # só se não houver outros leitores
+                except OSError:
+                    pass
+            self._sock.close()
+            self._sock = None
+
+
+class SharedFeed:
+    """
+    Replica broadcasters SSE e históricos de resultados entre workers.
+
+    Canais são registrados na mesma ordem em todos os processos (o índice vai
+    no registro). No produtor, `start_producer()` liga o espelhamento; nos
+    demais, `start_consumer()` reconstrói o histórico a partir do anel de
+    resultados e passa a repassar os novos registros.
+    """
+
+    def __init__(self, name: str = "dbcolor", event_slots: int = 1024, slot_size: int = 8192,
+                 result_slots: int = 1024, poll_seconds: float = 0.5):
+        self.name = name
+        self.event_slots = event_slots
+        self.slot_size = slot_size
+        self.result_slots = result_slots
+        self.poll_seconds = poll_seconds
+        self.channels: List[Tuple[str, object, object]] = []
+        self.role = "single"
+        self.events: Optional[SharedRing] = None
+        self.results: Optional[SharedRing] = None
+        self.notifier = Notifier(name)
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._event_seq = 0
+        self._result_seq = 0
+        self.applied = 0
+        self.lost = 0
+        # Últimos frames de status/state por canal (frames iniciais dos SSE nos consumidores)
+        self._last_frames: Dict[Tuple[str, bytes], bytes] = {}
+        # on_control(msg) recebe as mensagens de controle (pode devolver corrotina)
+        self.on_control: Optional[Callable[[Dict], Any]] = None
+        self._commands: Optional[socket.socket] = None
+        self.controls = 0
+
+    @property
+    def command_path(self) -> str:
+        return os.path.join(self.notifier.dir, "producer.cmd")
+
+    def add_channel(self, name: str, broadcaster, history):
+        self.channels.append((name, broadcaster, history))
+
+    # --- Produtor ---
+
+    def start_producer(self):
+        self.events = SharedRing(f"{self.name}_events", self.event_slots, self.slot_size, create=True)
+        self.results = SharedRing(f"{self.name}_results", self.result_slots, 512, create=True)
+        for idx, (_, broadcaster, history) in enumerate(self.channels):
+            broadcaster.mirror = self._frame_writer(idx)
+            history.listener = self._result_writer(idx)
+        self.role = "producer"
+        self._listen_commands()
+        print(f"[shared_ring] Produtor em {self.name} ({len(self.channels)} canais)")
+
+    def _listen_commands(self):
+        """Receber mensagens de controle dos consumidores (sem socket unix: só local)"""
+        if not hasattr(socket, "AF_UNIX"):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        try:
+            os.makedirs(self.notifier.dir, exist_ok=True)
+            if os.path.exists(self.command_path):
+                os.unlink(self.command_path)  # produtor anterior
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            sock.bind(self.command_path)
+            sock.setblocking(False)
+        except OSError as e:
+            print(f"[shared_ring] Sem canal de controle ({e})")
+            return
+
+        def on_readable():
+            while True:
+                try:
+                    payload = sock.recv(self.events.max_payload)
+                except (BlockingIOError, OSError):
+                    return
+                try:
+                    msg = _loads(payload)
+                except ValueError:
+                    continue
+                self._dispatch(msg)
+                self._write_control(msg)
+
+        loop.add_reader(sock.fileno(), on_readable)
+        self._commands = sock
+
+    def _write_control(self, msg: Dict):
+        if self.events.write(0, KIND_CONTROL, dumps(msg)) is not None:
+            self.notifier.notify()
+
+    def publish_control(self, msg: Dict) -> bool:
+        """
+        Replicar uma mensagem de controle para os outros workers (quem chama
+        já a aplicou localmente). No consumidor ela passa pelo produtor, que
+        também a aplica. False se não houver para onde enviar.
+        """
+        if self.role == "producer":
+            self._write_control(msg)
+            return True
+        if self.role != "consumer" or not hasattr(socket, "AF_UNIX"):
+            return False
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+                sock.sendto(dumps(msg), self.command_path)
+            return True
+        except OSError as e:
+            print(f"[shared_ring] Falha ao enviar controle ao produtor: {e}")
+            return False
+
+    def _dispatch(self, msg: Dict):
+        self.controls += 1
+        if self.on_control is None:
+            return
+        try:
+            ret = self.on_control(msg)
+            if asyncio.iscoroutine(ret):
+                asyncio.get_running_loop().create_task(ret)
+        except Exception as e:
+            print(f"[shared_ring] Erro ao aplicar controle {msg.get('op')}: {e}")
+
+    def _frame_writer(self, idx: int):
+        def write(frame: bytes):
+            if self.events.write(idx, KIND_FRAME, frame) is not None:
+                self.notifier.notify()
+        return write
+
+    def _result_writer(self, idx: int):
+        def write(op: str, result: Optional[Dict]):
+            if op == "clear":
+                self.results.write(idx, KIND_CLEAR, b"")
+            else:
+                self.results.write(idx, KIND_RESULT, dumps({k: result.get(k) for k in RESULT_FIELDS}))
+        return write
+
+    # --- Consumidor ---
+
+    async def start_consumer(self, attach_timeout: float = 30.0):
+        deadline = time.monotonic() + attach_timeout
+        while True:
+            try:
+                self.events = SharedRing(f"{self.name}_events")
+                self.results = SharedRing(f"{self.name}_results")
+                break
+            except FileNotFoundError:
+                if time.monotonic() > deadline:
+                    raise
+                await asyncio.sleep(0.2)
+        # Histórico: reaplicar o que ainda está no anel de resultados
+        self._result_seq = max(0, self.results.head - self.results.slots)
+        self._apply_results()
+        # Eventos: só o último status/state de cada canal; o resto já foi entregue
+        seq = max(0, self.events.head - self.events.slots)
+        while seq < self.events.head:
+            records, seq, _ = self.events.read_from(seq)
+            for idx, kind, payload in records:
+                self._track_status(idx, kind, payload)
+        self._event_seq = seq
+        self._wake = asyncio.Event()
+        self.notifier.listen(self._wake.set)
+        self._task = asyncio.get_running_loop().create_task(self._consume())
+        self.role = "consumer"
+        print(f"[shared_ring] Consumidor de {self.name} (seq {self._event_seq})")
+
+    async def _consume(self):
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+                self._apply_results()
+                self._apply_events()
+        except asyncio.CancelledError:
+            pass
+
+    def _apply_results(self):
+        while self._result_seq < self.results.head:
+            records, self._result_seq, lost = self.results.read_from(self._result_seq)
+            self.lost += lost
+            for idx, kind, payload in records:
+                if idx >= len(self.channels):
+                    continue
+                history = self.channels[idx][2]
+                if kind == KIND_CLEAR:
+                    history.clear()
+                else:
+                    history.append(_loads(payload))
+
+    def _apply_events(self):
+        while self._event_seq < self.events.head:
+            records, self._event_seq, lost = self.events.read_from(self._event_seq)
+            self.lost += lost
+            for idx, kind, payload in records:
+                if kind == KIND_CONTROL:
+                    self._dispatch(_loads(payload))
+                elif idx < len(self.channels) and kind == KIND_FRAME:
+                    self._track_status(idx, kind, payload)
+                    self.channels[idx][1].publish_frame(payload)
+                    self.applied += 1
+
+    def _track_status(self, idx: int, kind: int, payload: bytes):
+        if kind != KIND_FRAME or idx >= len(self.channels):
+            return
+        for event in TRACKED_EVENTS:
+            if payload.startswith(b"event: " + event + b"\n"):
+                self._last_frames[(self.channels[idx][0], event)] = payload
+
+    def last_frame(self, channel: str, event: str) -> Optional[bytes]:
+        """Último frame `status`/`state` do produtor (None fora do modo consumidor)"""
+        if self.role != "consumer":
+            return None
+        return self._last_frames.get((channel, event.encode("ascii")))
+
+    def last_payload(self, channel: str, event: str) -> Optional[Dict]:
+        """Payload JSON do último frame `status`/`state` do produtor"""
+        frame = self.last_frame(channel, event)
+        if frame is None:
+            return None
+        start = frame.find(b"\ndata: ")
+        if start < 0:
+            return None
+        return _loads(frame[start + 7:].rstrip(b"\n"))
+
+    # --- Encerramento / consulta ---
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.notifier.close()
+        if self._commands is not None:
+            try:
+                asyncio.get_running_loop().remove_reader(self._commands.fileno())
+                os.unlink(self.command_path)
+            except Exception:
+                pass
+            self._commands.close()
+            self._commands = None
+        for _, broadcaster, history in self.channels:
+            broadcaster.mirror = None
+            history.listener = None
+        for ring in (self.events, self.results):
+            if ring is not None:
+                ring.close()
+        self.events = self.results = None
+        self.role = "single"
+
+    def stats(self) -> Dict:
+        out = {"role": self.role, "name": self.name, "lost": self.lost, "applied": self.applied,
+               "controls": self.controls}
+        if self.events is not None:
+            out["events"] = {"head": self.events.head, "slots": self.events.slots,
+                             "written": self.events.written, "oversize": self.events.oversize}
+            out["results_head"] = self.results.head
+        out["notifications"] = self.notifier.sent
+        return out
@@ -0,0 +1,260 @@
+"""
+Broadcaster de Server-Sent Events
+Cada evento é codificado uma única vez e entregue a todos os assinantes;
+os geradores SSE só acordam quando há dados e o heartbeat vem de um único timer compartilhado.
+
+Eventos de `REPLAY_EVENTS` levam um id `<época>.<seq>` e ficam num anel de
+replay limitado: um cliente que reconecta com `Last-Event-ID` recebe
+exatamente os frames perdidos, ou um evento `resync` se o id já saiu do anel
+(ou é de outra execução do servidor) e ele precisa recarregar o snapshot.
+
+A fila de cada assinante é limitada. Eventos de `COALESCED_EVENTS` guardam
+só o frame mais recente por tipo; os demais entram na fila até `max_queue`.
+Um assinante que passa desse limite, ou que tem frames pendentes há mais de
+`max_lag_seconds`, é desconectado: o navegador reconecta com `Last-Event-ID`
+e recupera o que perdeu pelo anel de replay (ou `resync`).
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Set, Tuple
+
+from services.serialization import BACKEND, sse_frame
+
+HEARTBEAT_SECONDS = 10
+REPLAY_SIZE = 256
+REPLAY_EVENTS = frozenset(("double_result", "signal", "bet_result"))
+COALESCED_EVENTS = frozenset((b"status", b"ping", b"state"))
+MAX_QUEUE = 256
+MAX_LAG_SECONDS = 60.0
+
+# Mantido para os chamadores existentes; frames são bytes
+format_sse = sse_frame
+
+
+def frame_event(frame: bytes) -> bytes:
+    """Tipo do evento de um frame já codificado (linha `event: `)"""
+    start = frame.find(b"event: ")
+    if start < 0:
+        return b""
+    start += 7
+    return frame[start:frame.index(b"\n", start)]
+
+
+class Subscriber:
+    """Fila limitada de frames de um cliente SSE, acordada por future (sem polling)"""
+
+    __slots__ = ("frames", "latest", "closed", "evicted", "created_at", "pending_since", "_waiter")
+
+    def __init__(self):
+        self.frames: Deque[bytes] = deque()
+        # Eventos coalescidos: só o último frame de cada tipo
+        self.latest: Dict[bytes, bytes] = {}
+        self.closed = False
+        self.evicted = False
+        self.created_at = time.time()
+        # Instante do frame pendente mais antigo (None com a fila vazia)
+        self.pending_since: Optional[float] = None
+        self._waiter: Optional[asyncio.Future] = None
+
+    @property
+    def depth(self) -> int:
+        return len(self.frames) + len(self.latest)
+
+    def push(self, frame: bytes, event: bytes = b""):
+        if self.closed:
+            return
+        if self.pending_since is None:
+            self.pending_since = time.monotonic()
+        if event in COALESCED_EVENTS:
+            self.latest.pop(event, None)
+            self.latest[event] = frame
+        else:
+            self.frames.append(frame)
+        self._wake()
+
+    def close(self):
+        self.closed = True
+        self._wake()
+
+    def evict(self):
+        """Descartar os frames pendentes e encerrar a conexão"""
+        self.evicted = True
+        self.frames.clear()
+        self.latest.clear()
+        self.pending_since = None
+        self.close()
+
+    def _wake(self):
+        waiter = self._waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    async def next_batch(self) -> Optional[bytes]:
+        """Aguardar e devolver todos os frames pendentes concatenados (None se fechado)"""
+        while not (self.frames or self.latest):
+            if self.closed:
+                return None
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+        self.pending_since = None
+        if len(self.frames) == 1 and not self.latest:
+            return self.frames.popleft()
+        # Coalescidos por último: são estado, vale a versão mais recente
+        batch = b"".join(self.frames) + b"".join(self.latest.values())
+        self.frames.clear()
+        self.latest.clear()
+        return batch
+
+
+class SSEBroadcaster:
+    """Distribui eventos de uma plataforma para todos os clientes SSE conectados"""
+
+    def __init__(self, name: str, heartbeat_seconds: float = HEARTBEAT_SECONDS, replay_size: int = REPLAY_SIZE,
+                 max_queue: int = MAX_QUEUE, max_lag_seconds: float = MAX_LAG_SECONDS):
+        self.name = name
+        self.heartbeat_seconds = heartbeat_seconds
+        self.max_queue = max_queue
+        self.max_lag_seconds = max_lag_seconds
+        self.evicted = 0
+        self.subscribers: Set[Subscriber] = set()
+        self.published = 0
+        self.last_fanout_ms = 0.0
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        # Época (início do processo, em hexa) + sequência: ids não se repetem entre reinícios
+        self.epoch = format(int(time.time() * 1000), "x")
+        self._seq = 0
+        self._replay: Deque[Tuple[str, bytes]] = deque(maxlen=replay_size)
+        self.replayed = 0
+        self.resyncs = 0
+        # Chamado com cada frame publicado (exceto ping) para replicar a outros workers
+        self.mirror: Optional[Callable[[bytes], None]] = None
+
+    def subscribe(self) -> Subscriber:
+        sub = Subscriber()
+        self.subscribers.add(sub)
+        self._ensure_heartbeat()
+        return sub
+
+    def unsubscribe(self, sub: Subscriber):
+        self.subscribers.discard(sub)
+        sub.close()
+
+    def publish(self, event: str, payload: Any) -> bytes:
+        """Codificar o evento uma vez e enfileirar para todos os assinantes"""
+        event_id = None
+        if event in REPLAY_EVENTS:
+            self._seq += 1
+            event_id = f"{self.epoch}.{self._seq}"
+        frame = sse_frame(event, payload, event_id)
+        self.publish_frame(frame, event.encode("utf-8"))
+        if self.mirror is not None and event != "ping":
+            self.mirror(frame)
+        return frame
+
+    def publish_frame(self, frame: bytes, event: Optional[bytes] = None):
+        if frame.startswith(b"id: "):
+            # Vale também para frames replicados de outro worker (id já no frame)
+            self._replay.append((frame[4:frame.index(b"\n")].decode("ascii"), frame))
+        if event is None:
+            event = frame_event(frame)
+        started = time.perf_counter()
+        lag_limit = time.monotonic() - self.max_lag_seconds
+        lagging = None
+        for sub in self.subscribers:
+            sub.push(frame, event)
+            if len(sub.frames) > self.max_queue or (sub.pending_since is not None and sub.pending_since < lag_limit):
+                if lagging is None:
+                    lagging = []
+                lagging.append(sub)
+        if lagging:
+            for sub in lagging:
+                self._evict(sub)
+        self.published += 1
+        self.last_fanout_ms = (time.perf_counter() - started) * 1000
+
+    def _evict(self, sub: Subscriber):
+        print(f"[sse:{self.name}] Cliente lento desconectado ({sub.depth} frames pendentes)")
+        self.subscribers.discard(sub)
+        sub.evict()
+        self.evicted += 1
+
+    def resume(self, last_event_id: Optional[str]) -> bytes:
+        """Frames publicados depois de `last_event_id` (b"" sem id; `resync` se perdidos)"""
+        if not last_event_id:
+            return b""
+        missed = []
+        for event_id, frame in reversed(self._replay):
+            if event_id == last_event_id:
+                self.replayed += len(missed)
+                return b"".join(reversed(missed))
+            missed.append(frame)
+        self.resyncs += 1
+        return sse_frame("resync", {"type": "resync", "lastEventId": last_event_id})
+
+    async def stream(self, sub: Subscriber, initial: Optional[bytes] = None):
+        """Gerador para StreamingResponse: só acorda quando há frames"""
+        try:
+            if initial:
+                yield initial
+            while True:
+                batch = await sub.next_batch()
+                if batch is None:
+                    break
+                yield batch
+        finally:
+            self.unsubscribe(sub)
+
+    def stats(self) -> Dict:
+        depths = [sub.depth for sub in self.subscribers]
+        return {
+            "name": self.name,
+            "encoder": BACKEND,
+            "subscribers": len(self.subscribers),
+            "published": self.published,
+            "last_fanout_ms": round(self.last_fanout_ms, 3),
+            "replay": {"buffered": len(self._replay), "replayed": self.replayed, "resyncs": self.resyncs},
+            "queues": {
+                "max_queue": self.max_queue,
+                "max_lag_seconds": self.max_lag_seconds,
+                "pending_total": sum(depths),
+                "pending_max": max(depths, default=0),
+                "evicted": self.evicted,
+            },
+        }
+
+    # --- Heartbeat compartilhado ---
+
+    def _ensure_heartbeat(self):
+        if self._heartbeat_task is not None and not self._heartbeat_task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._heartbeat_task = loop.create_task(self._heartbeat_loop())
+
+    async def _heartbeat_loop(self):
+        try:
+            while True:
+                await asyncio.sleep(self.heartbeat_seconds)
+                if self.subscribers:
+                    self.publish("ping", {"type": "ping", "ts": int(time.time() * 1000)})
+        except asyncio.CancelledError:
+            pass
+
+    async def stop(self):
+        """Encerrar heartbeat e fechar todos os assinantes"""
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat_task = None
+        for sub in list(self.subscribers):
+            self.unsubscribe(sub)
+
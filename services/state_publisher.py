@@ -0,0 +1,59 @@
+"""
+Estado da plataforma empurrado via SSE
+
+Em vez de cada cliente consultar periodicamente cooldown, status de conexão,
+sequências de wins e placar, o servidor monta um snapshot compacto e publica
+um evento `state` apenas quando ele muda (`refresh()` roda após cada mensagem
+processada). Cada nova conexão SSE recebe um snapshot inicial (`bootstrap()`).
+
+O snapshot guarda instantes absolutos (ex.: `lossCooldownUntil`) para só mudar
+quando o estado muda; o tempo restante (`cooldownRemainingMs`) é calculado ao
+montar cada frame, e o cliente conta a partir dele sem depender do relógio
+local. Por isso um frame `state` guardado não serve de frame inicial: num
+consumidor, `bootstrap(estado_replicado)` monta um novo.
+"""
+import time
+from typing import Callable, Dict, Optional
+
+from services.serialization import sse_frame
+
+
+class StatePublisher:
+    def __init__(self, broadcaster, snapshot: Callable[[], Dict]):
+        self.broadcaster = broadcaster
+        self.snapshot = snapshot
+        self._last: Optional[Dict] = None
+        self.refreshes = 0
+        self.published = 0
+
+    def _payload(self, state: Dict) -> Dict:
+        now = int(time.time() * 1000)
+        return {
+            "type": "state",
+            "data": state,
+            "serverTs": now,
+            "cooldownRemainingMs": max(0, (state.get("lossCooldownUntil") or 0) - now),
+        }
+
+    def refresh(self, force: bool = False):
+        """Publicar o estado se mudou desde a última publicação (ou sempre, com `force`)"""
+        self.refreshes += 1
+        try:
+            state = self.snapshot()
+        except Exception as e:
+            print(f"[state:{self.broadcaster.name}] Erro ao montar estado: {e}")
+            return
+        if state == self._last and not force:
+            return
+        self._last = state
+        self.published += 1
+        self.broadcaster.publish("state", self._payload(state))
+
+    def bootstrap(self, state: Optional[Dict] = None) -> bytes:
+        """Frame com o estado atual (ou o dado), enviado no início de cada conexão SSE"""
+        if state is None:
+            state = self.snapshot()
+        return sse_frame("state", self._payload(state))
+
+    def stats(self) -> Dict:
+        return {"refreshes": self.refreshes, "published": self.published}
@@ -0,0 +1,173 @@
+"""
+Arquivos estáticos servidos da memória
+
+Cada arquivo registrado é lido e hasheado uma única vez; as variantes gzip e
+brotli (se o módulo `brotli` estiver instalado) ficam prontas em memória.
+As respostas levam ETag (por codificação) e `Vary: Accept-Encoding`, e
+If-None-Match igual devolve 304.
+
+As páginas HTML têm as referências aos assets reescritas para URLs com o hash
+do conteúdo (`/app.js?v=<hash>`); nessas URLs o cache do navegador é longo e
+imutável, nas demais é `no-cache` (revalida via ETag).
+
+Com `dev_reload`, o mtime é verificado a cada requisição e o arquivo é
+recarregado quando muda (as páginas que o referenciam também).
+"""
+import gzip
+import hashlib
+import os
+import re
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depende do ambiente
+    brotli = None
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+MIN_COMPRESS_BYTES = 512
+
+
+class Asset:
+    __slots__ = ("path", "media_type", "mtime", "source", "body", "gzip", "br", "digest", "etag", "built_version")
+
+    def __init__(self, path: str, media_type: str):
+        self.path = path
+        self.media_type = media_type
+        self.mtime: Optional[float] = None
+        self.source = b""  # HTML antes da reescrita das URLs
+        self.body = b""
+        self.gzip: Optional[bytes] = None
+        self.br: Optional[bytes] = None
+        self.digest = ""
+        self.etag = ""
+        self.built_version = -1
+
+    def set_body(self, body: bytes):
+        self.body = body
+        self.digest = hashlib.sha256(body).hexdigest()[:16]
+        self.etag = f'"{self.digest}"'
+        self.gzip = self.br = None
+        if len(body) >= MIN_COMPRESS_BYTES:
+            gz = gzip.compress(body, compresslevel=9, mtime=0)
+            self.gzip = gz if len(gz) < len(body) else None
+            if brotli is not None:
+                br = brotli.compress(body, quality=11)
+                self.br = br if len(br) < len(body) else None
+
+
+class StaticAssets:
+    def __init__(self, base_dir: str, dev_reload: bool = False):
+        self.base_dir = base_dir
+        self.dev_reload = dev_reload
+        self._assets: Dict[str, Asset] = {}
+        self._html = set()
+        # Incrementado quando um asset (não HTML) muda: páginas são reescritas
+        self._version = 0
+        self.hits = 0
+        self.not_modified = 0
+        self.reloads = 0
+
+    def register(self, name: str, filename: str, media_type: str):
+        self._assets[name] = Asset(os.path.join(self.base_dir, filename), media_type)
+        if media_type.startswith("text/html"):
+            self._html.add(name)
+
+    # --- Carga ---
+
+    def _load(self, name: str, asset: Asset) -> bool:
+        """(Re)ler do disco se necessário; False se o arquivo não existe"""
+        if asset.mtime is not None and not self.dev_reload:
+            return True
+        try:
+            mtime = os.stat(asset.path).st_mtime
+        except OSError:
+            return asset.mtime is not None
+        if mtime == asset.mtime:
+            return True
+        with open(asset.path, "rb") as f:
+            raw = f.read()
+        if asset.mtime is not None:
+            self.reloads += 1
+        asset.mtime = mtime
+        if name in self._html:
+            asset.source = raw
+            asset.built_version = -1
+        else:
+            asset.set_body(raw)
+            self._version += 1
+        return True
+
+    def _render(self, name: str, asset: Asset):
+        """Reescrever as referências de uma página para URLs com hash"""
+        if self.dev_reload:
+            for other, a in self._assets.items():
+                if other not in self._html:
+                    self._load(other, a)
+        if asset.built_version == self._version:
+            return
+        html = asset.source.decode("utf-8")
+        for other in self._assets:
+            if other in self._html or not self._load(other, self._assets[other]):
+                continue
+            pattern = r'((?:src|href)=")/?' + re.escape(other) + r'(?:\?[^"]*)?"'
+            html = re.sub(pattern, lambda m, o=other: f'{m.group(1)}{self.url(o)}"', html)
+        asset.set_body(html.encode("utf-8"))
+        asset.built_version = self._version
+
+    def get(self, name: str) -> Optional[Asset]:
+        asset = self._assets.get(name)
+        if asset is None or not self._load(name, asset):
+            return None
+        if name in self._html:
+            self._render(name, asset)
+        return asset
+
+    def url(self, name: str) -> str:
+        """URL com hash do conteúdo (cache longo)"""
+        asset = self._assets[name]
+        return f"/{name}?v={asset.digest[:10]}" if asset.digest else f"/{name}"
+
+    # --- Resposta ---
+
+    def response(self, request: Request, name: str, status_code: int = 200) -> Optional[Response]:
+        asset = self.get(name)
+        if asset is None:
+            return None
+        self.hits += 1
+        versioned = request.query_params.get("v") == asset.digest[:10]
+
+        accept = request.headers.get("accept-encoding", "")
+        body, encoding = asset.body, None
+        if asset.br is not None and "br" in accept:
+            body, encoding = asset.br, "br"
+        elif asset.gzip is not None and "gzip" in accept:
+            body, encoding = asset.gzip, "gzip"
+        # ETag por representação (cada codificação tem a sua)
+        etag = f'"{asset.digest}-{encoding}"' if encoding else asset.etag
+        headers = {
+            "ETag": etag,
+            "Vary": "Accept-Encoding",
+            "Cache-Control": IMMUTABLE if versioned else "no-cache",
+        }
+        if etag in [t.strip() for t in request.headers.get("if-none-match", "").split(",")]:
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(body, status_code=status_code, media_type=asset.media_type, headers=headers)
+
+    def stats(self) -> Dict:
+        return {
+            "assets": {
+                name: {"bytes": len(a.body), "gzip": len(a.gzip) if a.gzip else None,
+                       "br": len(a.br) if a.br else None, "digest": a.digest}
+                for name, a in self._assets.items() if a.mtime is not None
+            },
+            "hits": self.hits,
+            "not_modified": self.not_modified,
+            "reloads": self.reloads,
+            "dev_reload": self.dev_reload,
+        }
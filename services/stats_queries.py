@@ -0,0 +1,203 @@
+"""
+Consultas de estatísticas de sinais via aggregation pipeline do MongoDB
+
+Os endpoints /api/stats/* e /api/auth/admin/stats agregam no servidor: só os
+campos necessários trafegam e o ajuste de `maxAttempts` (win com mais
+tentativas que o limite conta como loss) é calculado no banco.
+
+Duas fontes com a mesma interface:
+- `HistorySource`: documentos crus de `signal_history` (O(sinais));
+- `RollupSource`: contadores pré-agregados de `signal_rollups`
+  (ver services/stats_rollups.py), O(buckets).
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+try:
+    from zoneinfo import ZoneInfo
+    BRAZIL_TZ = ZoneInfo("America/Sao_Paulo")
+except Exception:
+    BRAZIL_TZ = timezone(timedelta(hours=-3))
+
+FIELDS = {"platform": 1, "patternKey": 1, "result": 1, "attemptsUsed": 1, "hour": 1, "date": 1, "_id": 0}
+
+
+def cutoff_ms(days: int, now: Optional[datetime] = None) -> int:
+    """Timestamp (ms) de `days` dias atrás, como nos endpoints"""
+    cutoff = (now or datetime.now()) - timedelta(days=days)
+    return int(cutoff.timestamp() * 1000)
+
+
+def brazil_datetime(ts_ms: int) -> datetime:
+    """Timestamp (ms) no fuso de Brasília (mesma convenção de `hour`/`date` dos sinais)"""
+    return datetime.fromtimestamp(ts_ms / 1000, tz=timezone.utc).astimezone(BRAZIL_TZ)
+
+
+def rate(wins: int, total: int) -> float:
+    return round((wins / total * 100), 2) if total > 0 else 0
+
+
+class HistorySource:
+    """Agregações sobre os documentos crus de `signal_history`"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def match(self, platform: str = "all", days: Optional[int] = None, since_ms: Optional[int] = None) -> Dict:
+        query: Dict[str, Any] = {}
+        if since_ms is None and days is not None:
+            since_ms = cutoff_ms(days)
+        if since_ms is not None:
+            query["createdAt"] = {"$gte": since_ms}
+        if platform != "all":
+            query["platform"] = platform
+        return query
+
+    def prefix(self) -> List[Dict]:
+        return [{"$project": FIELDS}]
+
+    def key(self, field: str, default: Any) -> Dict:
+        return {"$ifNull": [f"${field}", default]}
+
+    def total(self) -> Dict:
+        return {"$sum": 1}
+
+    def wins(self, max_attempts: Optional[int] = None) -> Dict:
+        """Soma de wins (respeitando `max_attempts`)"""
+        is_win = {"$eq": ["$result", "win"]}
+        if max_attempts is not None:
+            is_win = {"$and": [is_win, {"$lte": [{"$ifNull": ["$attemptsUsed", 1]}, max_attempts]}]}
+        return {"$sum": {"$cond": [is_win, 1, 0]}}
+
+    def wins_at(self, attempt: int) -> Dict:
+        """Soma de wins obtidos exatamente na tentativa `attempt`"""
+        return {"$sum": {"$cond": [
+            {"$and": [{"$eq": ["$result", "win"]}, {"$eq": [{"$ifNull": ["$attemptsUsed", 1]}, attempt]}]}, 1, 0
+        ]}}
+
+
+class RollupSource(HistorySource):
+    """
+    Agregações sobre `signal_rollups` (um documento por
+    plataforma × data × hora × padrão × confLabel com `total`, `wins` e
+    `winsByAttempt.<n>`). A janela tem granularidade de hora.
+    """
+
+    def match(self, platform: str = "all", days: Optional[int] = None, since_ms: Optional[int] = None) -> Dict:
+        query: Dict[str, Any] = {}
+        if since_ms is None and days is not None:
+            since_ms = cutoff_ms(days)
+        if since_ms is not None:
+            dt = brazil_datetime(since_ms)
+            date = dt.strftime("%Y-%m-%d")
+            query["$or"] = [{"date": {"$gt": date}}, {"date": date, "hour": {"$gte": dt.hour}}]
+        if platform != "all":
+            query["platform"] = platform
+        return query
+
+    def prefix(self) -> List[Dict]:
+        return []
+
+    def total(self) -> Dict:
+        return {"$sum": "$total"}
+
+    def wins(self, max_attempts: Optional[int] = None) -> Dict:
+        if max_attempts is None:
+            return {"$sum": "$wins"}
+        # Somar só as tentativas 1..max_attempts do mapa winsByAttempt
+        return {"$sum": {"$add": [{"$ifNull": [f"$winsByAttempt.{k}", 0]} for k in range(1, max_attempts + 1)] or [0]}}
+
+    def wins_at(self, attempt: int) -> Dict:
+        return {"$sum": {"$ifNull": [f"$winsByAttempt.{attempt}", 0]}}
+
+
+def grouped_pipeline(source: HistorySource, match: Dict, key: Any, max_attempts: Optional[int] = None) -> List[Dict]:
+    """$match → ($project) → $group por `key` com total e wins ajustados"""
+    return [
+        {"$match": match},
+        *source.prefix(),
+        {"$group": {"_id": key, "total": source.total(), "wins": source.wins(max_attempts)}},
+    ]
+
+
+async def _aggregate(source: HistorySource, pipeline: List[Dict]) -> List[Dict]:
+    return await source.collection.aggregate(pipeline).to_list(length=None)
+
+
+async def totals(source: HistorySource, match: Dict, max_attempts: Optional[int] = None) -> Dict[str, int]:
+    """Total de sinais e wins no filtro"""
+    rows = await _aggregate(source, grouped_pipeline(source, match, None, max_attempts))
+    if not rows:
+        return {"total": 0, "wins": 0}
+    return {"total": rows[0]["total"], "wins": rows[0]["wins"]}
+
+
+async def by_key(source: HistorySource, match: Dict, key: Any, max_attempts: Optional[int] = None) -> List[Dict]:
+    """Linhas `{key, total, wins}` agrupadas por `key` (expressão de agrupamento)"""
+    rows = await _aggregate(source, grouped_pipeline(source, match, key, max_attempts))
+    return [{"key": r["_id"], "total": r["total"], "wins": r["wins"]} for r in rows]
+
+
+async def overview(source: HistorySource, platform: str, days: int, max_attempts: int) -> Dict:
+    t = await totals(source, source.match(platform, days), max_attempts)
+    total, wins = t["total"], t["wins"]
+    return {
+        "total": total,
+        "wins": wins,
+        "losses": total - wins,
+        "rate": rate(wins, total),
+        # ROI simulado (aposta R$10, retorno 2x no win)
+        # ROI = ((wins * 20) - (total * 10)) / (total * 10) * 100
+        "roi": round(((wins * 20) - (total * 10)) / (total * 10) * 100, 2) if total > 0 else 0,
+    }
+
+
+async def by_hour(source: HistorySource, platform: str, days: int, max_attempts: int) -> List[Dict]:
+    rows = await by_key(source, source.match(platform, days), source.key("hour", 0), max_attempts)
+    found = {r["key"]: r for r in rows}
+    out = []
+    for hour in range(24):
+        r = found.get(hour, {"total": 0, "wins": 0})
+        out.append({"hour": hour, "total": r["total"], "wins": r["wins"], "rate": rate(r["wins"], r["total"])})
+    return out
+
+
+async def by_pattern(source: HistorySource, platform: str, days: int, max_attempts: Optional[int]) -> List[Dict]:
+    rows = await by_key(source, source.match(platform, days), source.key("patternKey", "unknown"), max_attempts)
+    out = [{"pattern": r["key"], "total": r["total"], "wins": r["wins"], "rate": rate(r["wins"], r["total"])} for r in rows]
+    out.sort(key=lambda x: x["total"], reverse=True)
+    return out
+
+
+async def by_day(source: HistorySource, platform: str, days: int, max_attempts: int) -> List[Dict]:
+    rows = await by_key(source, source.match(platform, days), source.key("date", "unknown"), max_attempts)
+    out = [{"date": r["key"], "total": r["total"], "wins": r["wins"], "rate": rate(r["wins"], r["total"])} for r in rows]
+    out.sort(key=lambda x: x["date"])
+    return out
+
+
+async def by_attempt(source: HistorySource, platform: str, days: int, max_attempts: int) -> Dict[str, int]:
+    """Wins na 1ª/2ª/3ª tentativa (até `max_attempts`) e total de sinais, numa só agregação"""
+
+    def win_at(k: int) -> Dict:
+        return source.wins_at(k) if k <= max_attempts else {"$sum": 0}
+
+    pipeline = [
+        {"$match": source.match(platform, days)},
+        *source.prefix(),
+        {"$group": {
+            "_id": None,
+            "total": source.total(),
+            "first": win_at(1),
+            "second": win_at(2),
+            "third": win_at(3),
+        }},
+    ]
+    rows = await _aggregate(source, pipeline)
+    r = rows[0] if rows else {}
+    return {
+        "first": r.get("first", 0),
+        "second": r.get("second", 0),
+        "third": r.get("third", 0),
+        "total": r.get("total", 0),
+    }
@@ -0,0 +1,159 @@
+"""
+Rollups pré-agregados do histórico de sinais
+
+Cada lote de sinais gravado faz `$inc` (um bulk_write) nos documentos de
+`signal_rollups`, chaveados por plataforma × data × hora × padrão × confLabel,
+com `total`, `wins` e
+`winsByAttempt.<attemptsUsed>`. Qualquer visão de `maxAttempts` sai desses
+contadores, então os endpoints de stats custam O(buckets) em vez de O(sinais).
+
+Os rollups só são usados depois de um rebuild completo a partir do histórico
+(`rebuild_stats_rollups.py`), que registra o marcador em `stats`.
+"""
+import time
+from typing import Dict, Optional
+
+from pymongo import UpdateOne
+
+import db as db_module
+from services.stats_queries import HistorySource, RollupSource
+
+ROLLUPS_COLLECTION = "signal_rollups"
+META_ID = "signal_rollups"
+
+_ready: Optional[bool] = None
+
+
+def rollup_id(doc: Dict) -> str:
+    return "|".join(str(doc.get(k)) for k in ("platform", "date", "hour", "patternKey", "confLabel"))
+
+
+def _attempts(value) -> int:
+    """Tentativas do sinal; só a ausência vira 1 (como o `$ifNull` do rebuild), 0 continua 0"""
+    return 1 if value is None else int(value)
+
+
+def rollup_update(history_doc: Dict):
+    """(filtro, update) de upsert para um documento de `signal_history`"""
+    attempts = _attempts(history_doc.get("attemptsUsed"))
+    win = 1 if history_doc.get("result") == "win" else 0
+    inc = {"total": 1, "wins": win}
+    if win:
+        inc[f"winsByAttempt.{attempts}"] = 1
+    fields = {
+        "platform": history_doc.get("platform"),
+        "date": history_doc.get("date"),
+        "hour": history_doc.get("hour"),
+        "patternKey": history_doc.get("patternKey") or "unknown",
+        "confLabel": history_doc.get("confLabel") or "media",
+    }
+    update = {"$inc": inc, "$setOnInsert": fields}
+    return {"_id": rollup_id(fields)}, update
+
+
+def merge_updates(history_docs) -> Dict[str, tuple]:
+    """Somar os incrementos de vários sinais por bucket"""
+    merged: Dict[str, tuple] = {}
+    for doc in history_docs:
+        flt, update = rollup_update(doc)
+        cur = merged.get(flt["_id"])
+        if cur is None:
+            merged[flt["_id"]] = (flt, update)
+            continue
+        inc = cur[1]["$inc"]
+        for k, v in update["$inc"].items():
+            inc[k] = inc.get(k, 0) + v
+    return merged
+
+
+async def record_many(db, history_docs):
+    """Incrementar os rollups de um lote de sinais num único bulk_write"""
+    merged = merge_updates(history_docs)
+    if merged:
+        await db[ROLLUPS_COLLECTION].bulk_write(
+            [UpdateOne(flt, update, upsert=True) for flt, update in merged.values()], ordered=False
+        )
+
+
+async def ready(db) -> bool:
+    """Rollups completos (já houve rebuild)? Resultado positivo fica em cache"""
+    global _ready
+    if _ready:
+        return True
+    meta = await db.stats.find_one({"_id": META_ID}, {"_id": 1})
+    _ready = meta is not None
+    return _ready
+
+
+async def source(db) -> HistorySource:
+    """Fonte das consultas de stats: rollups se prontos, senão o histórico cru"""
+    if await ready(db):
+        return RollupSource(db[ROLLUPS_COLLECTION])
+    return HistorySource(db.signal_history)
+
+
+def rebuild_pipeline() -> list:
+    """Agrupar o histórico cru por bucket × resultado × tentativas"""
+    return [
+        {"$project": {"_id": 0, "platform": 1, "date": 1, "hour": 1, "result": 1,
+                      "patternKey": {"$ifNull": ["$patternKey", "unknown"]},
+                      "confLabel": {"$ifNull": ["$confLabel", "media"]},
+                      "attemptsUsed": {"$ifNull": ["$attemptsUsed", 1]}}},
+        {"$group": {
+            "_id": {"platform": "$platform", "date": "$date", "hour": "$hour", "patternKey": "$patternKey",
+                    "confLabel": "$confLabel", "result": "$result", "attemptsUsed": "$attemptsUsed"},
+            "count": {"$sum": 1},
+        }},
+    ]
+
+
+def fold_rebuild_rows(rows) -> Dict[str, Dict]:
+    """Montar os documentos de rollup a partir das linhas de `rebuild_pipeline`"""
+    docs: Dict[str, Dict] = {}
+    for row in rows:
+        k = row["_id"]
+        rid = rollup_id(k)
+        doc = docs.get(rid)
+        if doc is None:
+            doc = docs[rid] = {
+                "_id": rid, "platform": k.get("platform"), "date": k.get("date"), "hour": k.get("hour"),
+                "patternKey": k.get("patternKey"), "confLabel": k.get("confLabel"),
+                "total": 0, "wins": 0, "winsByAttempt": {},
+            }
+        doc["total"] += row["count"]
+        if k.get("result") == "win":
+            doc["wins"] += row["count"]
+            att = str(_attempts(k.get("attemptsUsed")))
+            doc["winsByAttempt"][att] = doc["winsByAttempt"].get(att, 0) + row["count"]
+    return docs
+
+
+async def rebuild(db, batch_size: int = 1000) -> int:
+    """
+    Regenerar `signal_rollups` a partir de `signal_history`.
+    Grava numa coleção temporária e troca por rename (os leitores nunca veem
+    rollups parciais). Sinais salvos durante o rebuild podem ficar de fora:
+    rodar com o app parado ou repetir depois.
+    """
+    global _ready
+    rows = await db.signal_history.aggregate(rebuild_pipeline(), allowDiskUse=True).to_list(length=None)
+    docs = list(fold_rebuild_rows(rows).values())
+
+    tmp = db[f"{ROLLUPS_COLLECTION}_rebuild"]
+    await tmp.drop()
+    for i in range(0, len(docs), batch_size):
+        await tmp.insert_many(docs[i:i + batch_size], ordered=False)
+    if docs:
+        await tmp.rename(ROLLUPS_COLLECTION, dropTarget=True)
+    else:
+        await db[ROLLUPS_COLLECTION].drop()
+    # O rename descarta os índices do destino: recriar os do registro
+    await db_module.ensure_indexes(db, collections=[ROLLUPS_COLLECTION])
+
+    await db.stats.update_one(
+        {"_id": META_ID},
+        {"$set": {"rebuiltAt": int(time.time() * 1000), "buckets": len(docs)}},
+        upsert=True,
+    )
+    _ready = True
+    return len(docs)
@@ -0,0 +1,497 @@
+"""
+Pipeline por mesa (ingestão → histórico → motor → pendentes → SSE)
+
+Cada `TablePipeline` concentra o estado de uma mesa: cliente de ingestão,
+histórico em anel, motor de padrões com o cursor do autômato, cooldown
+pós-loss, apostas pendentes (martingale), estatísticas de sinais, sequências
+de wins, estado empurrado via SSE (`state`) e o documento de stats gravado
+pelo write-behind. As duas mesas do app (PlayNaBet e VeraBet) e as de
+CONFIG.TABLES usam esta mesma implementação; o que muda por plataforma fica
+nos ganchos (`is_duplicate`, `on_result`, `find_signal`, `allow_signal`,
+`decorate_signal`, `on_signal`, `on_outcome`), ver
+`services/playnabet_pipeline.py`. Várias mesas rodam no mesmo event loop como
+tasks independentes (cada cliente tem as suas); `TableRegistry` agrupa as
+mesas do processo.
+
+O fluxo padrão é o do VeraBet: bloqueia novos sinais enquanto houver pendente
+ou logo após uma resolução, e pausa `loss_cooldown_ms` após um loss.
+`TableMetrics` mede CPU e latência por mensagem.
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from services.double_features import color_to_token
+from services.result_ring import ResultRing
+from services.sse_broadcaster import SSEBroadcaster
+from services.state_publisher import StatePublisher
+
+
+class TableMetrics:
+    """CPU (thread_time) e latência de processamento por mensagem"""
+
+    __slots__ = ("name", "messages", "results", "signals", "resolved", "errors",
+                 "cpu_ns", "_latencies", "max_latency_us")
+
+    def __init__(self, name: str, window: int = 1024):
+        self.name = name
+        self.messages = 0
+        self.results = 0
+        self.signals = 0
+        self.resolved = 0
+        self.errors = 0
+        self.cpu_ns = 0
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self.max_latency_us = 0.0
+
+    def observe(self, wall_ns: int, cpu_ns: int):
+        self.messages += 1
+        self.cpu_ns += cpu_ns
+        us = wall_ns / 1000
+        self._latencies.append(us)
+        if us > self.max_latency_us:
+            self.max_latency_us = us
+
+    def snapshot(self) -> Dict:
+        lat = sorted(self._latencies)
+
+        def pct(q):
+            return round(lat[min(len(lat) - 1, int(q * (len(lat) - 1)))], 1) if lat else 0.0
+
+        return {
+            "messages": self.messages,
+            "results": self.results,
+            "signals": self.signals,
+            "resolved": self.resolved,
+            "errors": self.errors,
+            "cpu_ms": round(self.cpu_ns / 1e6, 2),
+            "latency_us": {"p50": pct(0.5), "p99": pct(0.99), "max": round(self.max_latency_us, 1)},
+        }
+
+
+def _new_signal_stats() -> Dict[str, Dict]:
+    return {k: {"total": 0, "acertos": 0, "taxa": 0.0} for k in ("alta", "media", "baixa", "geral")}
+
+
+def _color_name(color: Optional[str]) -> str:
+    return "Vermelho" if color == "red" else "Preto" if color == "black" else "Branco"
+
+
+class TablePipeline:
+    # Resultados mínimos no histórico antes de procurar sinais
+    MIN_HISTORY = 3
+    # Não emitir sinal na mesma rodada em que um pendente foi resolvido
+    BLOCK_AFTER_RESOLVE = True
+    # Outcomes guardados para a contagem de losses consecutivos
+    OUTCOME_HISTORY = 100
+
+    def __init__(self, name: str, client_factory: Callable[[Callable], Any], engine,
+                 parse: Optional[Callable[[Dict], Optional[Dict]]] = None, history_size: int = 100,
+                 loss_cooldown_ms: int = 5 * 60 * 1000, martingale: bool = True, max_attempts: int = 3,
+                 block_while_pending: bool = True, on_resolved: Optional[Callable[[Dict, str], Any]] = None,
+                 broadcaster: Optional[SSEBroadcaster] = None, source: Optional[str] = None):
+        """
+        `client_factory(on_message)` cria o cliente de ingestão (WSClient,
+        VeraBetClient...); `engine` precisa de `novo_stream()` e
+        `gerar_sinal_stream(stream)` (None = só o detector da subclasse);
+        `parse` converte a mensagem bruta num resultado (None = já vem
+        parseado); `on_resolved(bet, 'win'|'loss')` recebe cada aposta
+        resolvida (ex.: salvar no histórico).
+        """
+        self.name = name
+        self.client_factory = client_factory
+        self.client = None
+        self.connected = False
+        self.parse = parse
+        self.history = ResultRing(history_size, source=source or name)
+        self.engine = engine
+        self.stream = engine.novo_stream() if engine is not None else None
+        self.broadcaster = broadcaster or SSEBroadcaster(name)
+        self.pending_bets: List[Dict] = []
+        self.round_index = 0
+        self.loss_cooldown_ms = loss_cooldown_ms
+        self.loss_cooldown_until = 0
+        self.martingale = martingale
+        self.max_attempts = max_attempts
+        self.block_while_pending = block_while_pending
+        self.signal_stats = _new_signal_stats()
+        self.current_win_streak = 0
+        self.max_win_streak = 0
+        self.win_streak_history: List[int] = []
+        self.outcome_history: List[Dict] = []
+        self.last_win_ts: Optional[int] = None
+        self.last_loss_ts: Optional[int] = None
+        self.on_resolved = on_resolved
+        # WriteBehind do documento de stats (definido por quem persiste a mesa)
+        self.persister = None
+        self.metrics = TableMetrics(name)
+        self.state = StatePublisher(self.broadcaster, self.state_snapshot)
+
+    # --- Ciclo de vida ---
+
+    async def start(self):
+        if self.client is None:
+            self.client = self.client_factory(self.on_message)
+            await self.client.start()
+
+    async def stop(self):
+        if self.client is not None:
+            try:
+                await self.client.stop()
+            except Exception as e:
+                print(f"[{self.name}] Erro ao finalizar cliente: {e}")
+            self.client = None
+        await self.broadcaster.stop()
+        if self.persister is not None:
+            await self.persister.flush()
+
+    # --- Processamento ---
+
+    def on_message(self, data: Dict):
+        """Callback do cliente de ingestão: processa (com métricas) e empurra o estado se mudou"""
+        t0, c0 = time.perf_counter_ns(), time.thread_time_ns()
+        try:
+            self._handle(data)
+        except Exception as e:
+            self.metrics.errors += 1
+            print(f"[{self.name}] Erro ao processar mensagem: {e}")
+        finally:
+            self.metrics.observe(time.perf_counter_ns() - t0, time.thread_time_ns() - c0)
+        self.state.refresh()
+
+    def _handle(self, data: Dict):
+        if data.get("type") == "status":
+            self.connected = data.get("connected", False)
+            self.broadcaster.publish("status", data)
+            return
+
+        result = self.parse(data) if self.parse is not None else data
+        if not result or self.is_duplicate(result):
+            return  # duplicata não conta rodada (createdRound, cooldowns por rodada)
+
+        self.round_index += 1
+        self.metrics.results += 1
+        self.history.append(result)
+        if self.stream is not None:
+            self.stream.push(color_to_token(result.get("color")))
+        self.on_result(result)
+        self._mark_dirty()
+        self.broadcaster.publish("double_result", {"type": "double_result", "data": result})
+
+        just_resolved = self._resolve_pending(result.get("color"))
+        self._detect(just_resolved)
+
+    def _resolve_pending(self, res_color: Optional[str]) -> bool:
+        if not (self.martingale and self.pending_bets):
+            return False
+        now_ts = int(time.time() * 1000)
+        resolved = []
+        keep = []
+        for pb in self.pending_bets:
+            # Nunca avaliar um pendente com a mesma rodada que o criou
+            if pb.get("createdRound") == self.round_index:
+                keep.append(pb)
+                continue
+            pb["attemptsUsed"] = pb.get("attemptsUsed", 0) + 1
+            is_win = res_color == pb.get("color") or (pb.get("protect_white") and res_color == "white")
+            if not is_win:
+                pb["attemptsLeft"] = pb.get("attemptsLeft", self.max_attempts) - 1
+                if pb["attemptsLeft"] > 0:
+                    keep.append(pb)
+                    continue
+            pb["resolved"] = True
+            pb["result"] = "win" if is_win else "loss"
+            pb["resolvedAt"] = now_ts
+            resolved.append(pb)
+        if not resolved:
+            return False
+        self.pending_bets[:] = keep
+        for pb in resolved:
+            self._settle(pb, now_ts)
+        return True
+
+    def _settle(self, pb: Dict, now_ts: int):
+        """Contabilizar uma aposta resolvida (stats, cooldown, calibração, SSE, histórico)"""
+        outcome = pb["result"]
+        hit = outcome == "win"
+        self.metrics.resolved += 1
+        self._register_outcome(pb.get("confLabel", "media"), hit, now_ts)
+        if hit:
+            print(f"[{self.name}] ✅ WIN {pb.get('patternKey')} após {pb['attemptsUsed']} tentativa(s)")
+        else:
+            self.loss_cooldown_until = now_ts + self.loss_cooldown_ms
+            until = time.strftime('%H:%M:%S', time.localtime(self.loss_cooldown_until / 1000))
+            print(f"🚫 [{self.name}] LOSS {pb.get('patternKey')}: pausando sinais até {until}")
+        self.on_outcome(pb, hit)
+        self.broadcaster.publish("bet_result", {"type": "bet_result", "data": pb})
+        if self.on_resolved is not None:
+            try:
+                ret = self.on_resolved(pb, outcome)
+                if asyncio.iscoroutine(ret):
+                    try:
+                        loop = asyncio.get_running_loop()
+                    except RuntimeError:
+                        ret.close()  # fora do event loop (scripts): nada a persistir
+                    else:
+                        loop.create_task(ret)
+            except Exception as e:
+                print(f"[{self.name}] Erro ao registrar aposta resolvida: {e}")
+
+    def _register_outcome(self, label: str, hit: bool, now_ts: int):
+        lbl = label if label in ("alta", "media", "baixa") else "media"
+        for k in (lbl, "geral"):
+            s = self.signal_stats[k]
+            s["total"] += 1
+            if hit:
+                s["acertos"] += 1
+            s["taxa"] = round(s["acertos"] / s["total"] * 100, 2)
+        self.outcome_history.append({"outcome": "win" if hit else "loss", "ts": now_ts})
+        del self.outcome_history[:-self.OUTCOME_HISTORY]
+        if hit:
+            self.current_win_streak += 1
+            self.max_win_streak = max(self.max_win_streak, self.current_win_streak)
+            self.last_win_ts = now_ts
+        else:
+            if self.current_win_streak > 0:
+                self.win_streak_history.append(self.current_win_streak)
+                del self.win_streak_history[:-100]
+            self.current_win_streak = 0
+            self.last_loss_ts = now_ts
+        self._mark_dirty()
+
+    def _detect(self, just_resolved: bool):
+        if len(self.history) < self.MIN_HISTORY:
+            return
+        if int(time.time() * 1000) < self.loss_cooldown_until:
+            return
+        if self.pending_bets and self.block_while_pending:
+            return
+        if just_resolved and self.BLOCK_AFTER_RESOLVE:
+            return
+        signal = self.find_signal()
+        if not signal or not self.allow_signal(signal):
+            return
+        self.decorate_signal(signal)
+        signal["table"] = self.name
+        self.metrics.signals += 1
+        print(f"[{self.name}] Sinal: {signal.get('patternKey')} → {signal.get('color')} ({signal.get('chance')}%)")
+        self.broadcaster.publish("signal", {"type": "signal", "data": signal})
+        self.on_signal(signal)
+        if self.martingale:
+            self.pending_bets.append(self._pending_bet(signal))
+
+    def _pending_bet(self, signal: Dict) -> Dict:
+        """Aposta pendente do sinal: alvo de `suggestedBet` quando houver"""
+        bet = signal.get("suggestedBet") or {}
+        if bet:
+            color, numbers, protect_white = bet.get("color"), bet.get("numbers", []), bet.get("protect_white", False)
+        else:
+            color, numbers, protect_white = signal.get("color"), signal.get("targets", []), signal.get("protect_white", False)
+        return {
+            "id": signal.get("id"),
+            "patternKey": signal.get("patternKey"),
+            "color": color,
+            "numbers": numbers,
+            "chance": signal.get("chance", 0),
+            "createdAt": int(time.time() * 1000),
+            "createdRound": self.round_index,
+            "attemptsLeft": self.attempts_for(signal),
+            "attemptsUsed": 0,
+            "protect_white": protect_white,
+            "confLabel": signal.get("confLabel", "media"),
+        }
+
+    def _mark_dirty(self):
+        if self.persister is not None:
+            self.persister.mark_dirty()
+
+    def _sync_derived(self):
+        """Reposicionar o estado derivado (cursor do autômato) após substituir o histórico"""
+        if self.stream is not None:
+            self.stream.reset(self.history.tokens())
+
+    # --- Ganchos por plataforma ---
+
+    def is_duplicate(self, result: Dict) -> bool:
+        return bool(self.history) and self.history.last_round_id() == result.get("round_id")
+
+    def on_result(self, result: Dict):
+        """Resultado novo já no histórico, antes de resolver pendentes"""
+
+    def find_signal(self) -> Optional[Dict]:
+        if self.engine is None:
+            return None
+        return self.engine.gerar_sinal_stream(self.stream)
+
+    def allow_signal(self, signal: Dict) -> bool:
+        return True
+
+    def decorate_signal(self, signal: Dict):
+        """Descrição com o número que disparou o sinal"""
+        last = self.history[-1]
+        last_num, last_color = last.get("number", "?"), last.get("color", "")
+        signal["description"] = f"Após o {last_num} {_color_name(last_color)} → Aposte no {_color_name(signal.get('color'))}!"
+        signal["lastNumber"] = last_num
+        signal["lastColor"] = last_color
+
+    def on_signal(self, signal: Dict):
+        """Sinal publicado (antes de virar pendente)"""
+
+    def attempts_for(self, signal: Dict) -> int:
+        """Tentativas da aposta pendente: gales do detector + a entrada, senão `maxAttempts` do sinal"""
+        if signal.get("gales_permitidos") is not None:
+            return signal["gales_permitidos"] + 1
+        return signal.get("maxAttempts", self.max_attempts)
+
+    def on_outcome(self, pb: Dict, hit: bool):
+        """Aposta resolvida, depois das estatísticas da mesa"""
+
+    # --- Histórico e persistência ---
+
+    def load_history(self, results: List[Dict]):
+        self.history.extend(results)
+        self._sync_derived()
+
+    def to_doc(self) -> Dict:
+        """Documento da coleção `stats` (mesmo formato de global_stats/verabet_stats)"""
+        return {
+            "signal_stats": self.signal_stats,
+            "last_win_ts": self.last_win_ts,
+            "last_loss_ts": self.last_loss_ts,
+            "current_win_streak": self.current_win_streak,
+            "max_win_streak": self.max_win_streak,
+            "win_streak_history": self.win_streak_history[-100:],
+            "signal_outcome_history": self.outcome_history[-self.OUTCOME_HISTORY:],
+            "results_history": self.history[-50:],
+            "updated_at": int(time.time() * 1000),
+        }
+
+    def load_doc(self, doc: Dict):
+        self.signal_stats.update(doc.get("signal_stats", {}))
+        self.last_win_ts = doc.get("last_win_ts")
+        self.last_loss_ts = doc.get("last_loss_ts")
+        self.current_win_streak = doc.get("current_win_streak", 0)
+        self.max_win_streak = doc.get("max_win_streak", 0)
+        self.win_streak_history = list(doc.get("win_streak_history", []))
+        self.outcome_history = list(doc.get("signal_outcome_history", []))
+        results = doc.get("results_history", [])
+        if results:
+            self.history.clear()
+            self.load_history(results)
+        # Total de wins não pode ser menor que a sequência atual
+        geral = self.signal_stats["geral"]
+        if self.current_win_streak > geral.get("acertos", 0):
+            print(f"⚠️ [{self.name}] Streak ({self.current_win_streak}) > Total Wins ({geral.get('acertos', 0)}). Corrigindo.")
+            geral["acertos"] = self.current_win_streak
+            geral["total"] = max(geral.get("total", 0), self.current_win_streak)
+
+    def reset(self):
+        """Zerar histórico, pendentes e estatísticas (reset do admin)"""
+        self.history.clear()
+        self._sync_derived()
+        self.pending_bets.clear()
+        self.round_index = 0
+        self.signal_stats = _new_signal_stats()
+        self.current_win_streak = 0
+        self.max_win_streak = 0
+        self.win_streak_history = []
+        self.outcome_history = []
+        self.last_win_ts = None
+        self.last_loss_ts = None
+
+    # --- Consulta ---
+
+    def consecutive_losses(self) -> Tuple[int, Optional[int]]:
+        """Quantas sequências de 2+ losses seguidos e o início da última"""
+        count = 0
+        last_ts = None
+        streak = 0
+        start_ts = None
+        for entry in self.outcome_history:
+            if entry.get("outcome") == "loss":
+                if streak == 0:
+                    start_ts = entry.get("ts")
+                streak += 1
+                if streak == 2:
+                    count += 1
+                    last_ts = start_ts
+            else:
+                streak = 0
+        return count, last_ts
+
+    def state_snapshot(self) -> Dict:
+        """Estado compacto empurrado no evento SSE `state`"""
+        geral = self.signal_stats.get("geral", {})
+        total, acertos = int(geral.get("total", 0)), int(geral.get("acertos", 0))
+        loss_sequences, last_sequence_ts = self.consecutive_losses()
+        history = self.win_streak_history
+        return {
+            "connected": self.connected,
+            "lossCooldownUntil": self.loss_cooldown_until,
+            "cooldownMinutes": self.loss_cooldown_ms // 60000,
+            "wins": acertos,
+            "losses": max(0, total - acertos),
+            "lastWinTime": self.last_win_ts,
+            "lastLossTime": self.last_loss_ts,
+            "currentStreak": self.current_win_streak,
+            "maxStreak": self.max_win_streak,
+            "consecutiveLossesCount": loss_sequences,
+            "lastConsecutiveLossTime": last_sequence_ts,
+            "averageWinsBetweenLosses": round(sum(history) / len(history), 2) if history else 0.0,
+            "streakHistory": history[-10:],
+            "totalStreaks": len(history),
+        }
+
+    def status(self) -> Dict:
+        geral = self.signal_stats["geral"]
+        return {
+            "name": self.name,
+            "connected": self.connected,
+            "results_count": len(self.history),
+            "pending": len(self.pending_bets),
+            "cooldownUntil": self.loss_cooldown_until or None,
+            "wins": geral["acertos"],
+            "losses": geral["total"] - geral["acertos"],
+            "currentStreak": self.current_win_streak,
+            "maxStreak": self.max_win_streak,
+            "metrics": self.metrics.snapshot(),
+            "sse": self.broadcaster.stats(),
+            "statsWrites": self.persister.stats() if self.persister is not None else None,
+        }
+
+
+class TableRegistry:
+    """Mesas do processo, cada uma com suas próprias tasks"""
+
+    def __init__(self):
+        self.tables: Dict[str, TablePipeline] = {}
+        # Mesas iniciadas por start_all (as duas legadas têm startup próprio no app)
+        self._autostart: List[str] = []
+
+    def add(self, table: TablePipeline, autostart: bool = True) -> TablePipeline:
+        if table.name in self.tables:
+            raise ValueError(f"mesa duplicada: {table.name}")
+        self.tables[table.name] = table
+        if autostart:
+            self._autostart.append(table.name)
+        return table
+
+    def get(self, name: str) -> Optional[TablePipeline]:
+        return self.tables.get(name)
+
+    def managed(self) -> List[TablePipeline]:
+        return [self.tables[name] for name in self._autostart]
+
+    async def start_all(self):
+        for table in self.managed():
+            try:
+                await table.start()
+            except Exception as e:
+                print(f"[{table.name}] Falha ao iniciar mesa: {e}")
+
+    async def stop_all(self):
+        await asyncio.gather(*(t.stop() for t in self.managed()), return_exceptions=True)
+
+    def stats(self) -> Dict:
+        return {name: t.status() for name, t in self.tables.items()}
@@ -0,0 +1,69 @@
+"""
+Cache de usuários autenticados (TTL + LRU) por email
+
+`get_current_user` roda em toda requisição protegida; com o cache, páginas
+autenticadas não precisam de um `users.find_one` a cada carga. As rotas que
+alteram o usuário chamam `invalidate(email)`, repassada aos outros workers
+pelo `listener` (o app liga ao anel compartilhado); o TTL cobre alterações
+feitas fora do app (scripts).
+"""
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+
+class UserCache:
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        # Incrementado a cada invalidação: leituras do banco iniciadas antes
+        # dela não repovoam o cache com dados antigos
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # listener(email) é chamado a cada invalidação local (replicação entre workers)
+        self.listener: Optional[Callable[[Optional[str]], None]] = None
+
+    def get(self, email: str) -> Optional[Dict]:
+        item = self._entries.get(email)
+        if item is not None:
+            expires_at, user = item
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(email)
+                self.hits += 1
+                return dict(user)
+            del self._entries[email]
+        self.misses += 1
+        return None
+
+    def put(self, email: str, user: Dict, generation: Optional[int] = None):
+        if generation is not None and generation != self.generation:
+            return
+        self._entries[email] = (time.monotonic() + self.ttl_seconds, dict(user))
+        self._entries.move_to_end(email)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, email: Optional[str] = None, propagate: bool = True):
+        """Remover um usuário (ou todos, sem email); `propagate=False` ao aplicar a de outro worker"""
+        self.generation += 1
+        if email is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(email, None)
+        if propagate and self.listener is not None:
+            self.listener(email)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0,
+            "evictions": self.evictions,
+        }
@@ -1,11 +1,30 @@
 """
 Cliente de polling para VeraBet Double API
 Equivalente ao WSClient mas usando HTTP polling
+
+Cada poll devolve a janela das últimas rodadas (mais recente primeiro). O
+cliente compara a janela com um conjunto limitado de ids já vistos e entrega
+todas as rodadas novas em ordem cronológica, então rodadas que caem entre dois
+polls (ou durante um poll lento) não são perdidas. Se nenhuma rodada da janela
+já tiver sido vista, houve mais rodadas do que a janela cobre: conta-se um gap.
+
+O intervalo entre polls vem de `CadenceScheduler`: o período da rodada é
+aprendido pelos deltas de `created_at`, e o cliente faz polls esparsos no meio
+da rodada e densos perto do horário previsto do próximo resultado, com backoff
+exponencial (com jitter) em erros. Após `ERROR_STATUS_THRESHOLD` falhas
+seguidas o cliente avisa `connected: False` (status) e volta a avisar
+`connected: True` no primeiro poll bem-sucedido. Rodadas com `created_at`
+ilegível não alimentam o aprendizado do período. Todos os polls e `fetch_initial_history`
+usam uma única sessão HTTP keep-alive (`get_session` / `close_session`).
 """
 import asyncio
 import aiohttp
 import json
+import random
+import statistics
 import time
+from collections import OrderedDict, deque
+from datetime import datetime
 from typing import Callable, Optional, Dict, Any, List
 import logging
 
@@ -13,6 +32,143 @@ logger = logging.getLogger(__name__)
 
 VERABET_API_URL = "https://prod-double-o-br1.banana.games/rounds-info"
 POLL_INTERVAL = 2  # segundos (reduzido para resultados mais rápidos)
+SEEN_IDS_SIZE = 512  # ids de rodadas lembrados para o diff entre polls
+
+# Agendamento por cadência (segundos)
+POLL_DENSE_INTERVAL = 0.5  # perto do resultado previsto
+POLL_SPARSE_INTERVAL = 6.0  # teto no meio da rodada
+POLL_GUARD = 2.0  # começa a janela densa este tempo antes do previsto
+ERROR_BACKOFF_MAX = 30.0
+ERROR_STATUS_THRESHOLD = 3  # falhas seguidas até avisar desconexão
+
+HEADERS = {
+    "Accept": "application/json",
+    "Content-Type": "application/json",
+    "Origin": "https://vera.bet.br",
+    "Referer": "https://vera.bet.br/",
+}
+
+_session: Optional[aiohttp.ClientSession] = None
+
+
+def get_session() -> aiohttp.ClientSession:
+    """Sessão HTTP compartilhada (keep-alive), criada no event loop atual"""
+    global _session
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or getattr(_session, "_loop", loop) is not loop:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=8, keepalive_timeout=60, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=10, connect=5),
+            headers=HEADERS,
+        )
+    return _session
+
+
+async def close_session():
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+class CadenceScheduler:
+    """
+    Intervalo até o próximo poll a partir da cadência das rodadas.
+
+    O período é a mediana dos últimos deltas de `created_at`; o instante do
+    próximo resultado é previsto a partir do momento (local) em que a última
+    rodada foi detectada. Sem período aprendido, usa `fallback`.
+    """
+
+    def __init__(self, fallback: float = POLL_INTERVAL, dense: float = POLL_DENSE_INTERVAL,
+                 sparse: float = POLL_SPARSE_INTERVAL, guard: float = POLL_GUARD,
+                 backoff_max: float = ERROR_BACKOFF_MAX, window: int = 20):
+        self.fallback = fallback
+        self.dense = dense
+        self.sparse = sparse
+        self.guard = guard
+        self.backoff_max = backoff_max
+        self._deltas = deque(maxlen=window)
+        self._last_created_ms: Optional[int] = None
+        self._anchor: Optional[float] = None
+        self._errors = 0
+        self.polls = 0
+        self.rounds = 0
+        # Atraso de detecção: (relógio local - created_at), relativo ao menor
+        # valor visto (desconta o offset de fuso/relógio do servidor)
+        self._raw_lags = deque(maxlen=200)
+
+    @property
+    def period(self) -> Optional[float]:
+        return statistics.median(self._deltas) if self._deltas else None
+
+    def on_poll(self):
+        self.polls += 1
+
+    def on_round(self, created_ms: Optional[int], now: Optional[float] = None, wall_ms: Optional[int] = None):
+        """Nova rodada detectada (chamada em ordem cronológica)"""
+        self.rounds += 1
+        self._anchor = time.monotonic() if now is None else now
+        if not created_ms:
+            return
+        if self._last_created_ms is not None:
+            delta = (created_ms - self._last_created_ms) / 1000
+            # Ignorar deltas de rodadas perdidas/repetidas
+            if 5 <= delta <= 180:
+                self._deltas.append(delta)
+        self._last_created_ms = created_ms
+        wall_ms = int(time.time() * 1000) if wall_ms is None else wall_ms
+        self._raw_lags.append(wall_ms - created_ms)
+
+    def on_success(self):
+        self._errors = 0
+
+    @property
+    def errors(self) -> int:
+        """Falhas seguidas desde o último poll bem-sucedido"""
+        return self._errors
+
+    def on_error(self) -> float:
+        """Backoff exponencial com jitter; devolve o atraso até a nova tentativa"""
+        self._errors += 1
+        base = min(self.backoff_max, self.fallback * (2 ** (self._errors - 1)))
+        return random.uniform(base / 2, base)
+
+    def next_delay(self, now: Optional[float] = None) -> float:
+        period = self.period
+        if period is None or self._anchor is None:
+            return self.fallback
+        now = time.monotonic() if now is None else now
+        until_expected = self._anchor + period - now
+        if until_expected < -period:
+            # Perdemos a cadência (pausa da mesa, rodada atrasada): volta ao intervalo fixo
+            return self.fallback
+        if until_expected > self.guard:
+            return min(self.sparse, until_expected - self.guard)
+        return self.dense
+
+    def stats(self) -> Dict:
+        lags = self._raw_lags
+        detect = None
+        if lags:
+            floor = min(lags)
+            detect = round(statistics.median(lag - floor for lag in lags))
+        return {
+            "period_s": round(self.period, 2) if self.period is not None else None,
+            "polls": self.polls,
+            "rounds": self.rounds,
+            "polls_per_round": round(self.polls / self.rounds, 2) if self.rounds else None,
+            "detect_lag_ms_p50": detect,
+            "errors": self._errors,
+        }
+
+
+def parse_created_at(created_at) -> Optional[int]:
+    """`created_at` da API ("%Y-%m-%d %H:%M:%S") em ms; None se ilegível"""
+    try:
+        return int(datetime.strptime(created_at, "%Y-%m-%d %H:%M:%S").timestamp() * 1000)
+    except (TypeError, ValueError):
+        return None
 
 
 def parse_verabet_result(item: Dict) -> Optional[Dict]:
@@ -33,13 +189,10 @@ def parse_verabet_result(item: Dict) -> Optional[Dict]:
         else:
             color = "black"
         
-        # Parse timestamp
+        # Parse timestamp (hora local se ilegível)
         created_at = item.get("created_at", "")
-        try:
-            from datetime import datetime
-            dt = datetime.strptime(created_at, "%Y-%m-%d %H:%M:%S")
-            ts = int(dt.timestamp() * 1000)
-        except:
+        ts = parse_created_at(created_at)
+        if ts is None:
             ts = int(time.time() * 1000)
         
         return {
@@ -57,77 +210,132 @@ def parse_verabet_result(item: Dict) -> Optional[Dict]:
 
 
 class VeraBetClient:
-    def __init__(self, on_message: Callable, poll_interval: int = POLL_INTERVAL):
+    def __init__(self, on_message: Callable, poll_interval: int = POLL_INTERVAL, url: str = VERABET_API_URL):
         self.on_message = on_message
+        self.url = url
         self.poll_interval = poll_interval
         self.running = True
         self.task = None
+        self.connected = False  # último status avisado
         self.last_round_id: Optional[str] = None
-        self.session: Optional[aiohttp.ClientSession] = None
+        self.scheduler = CadenceScheduler(fallback=poll_interval)
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self.polls = 0
+        self.rounds_emitted = 0
+        self.max_rounds_per_poll = 0
+        self.gaps = 0
+    
+    def _remember(self, round_id: str):
+        self._seen[round_id] = None
+        while len(self._seen) > SEEN_IDS_SIZE:
+            self._seen.popitem(last=False)
     
-    async def fetch_results(self) -> List[Dict]:
-        """Buscar resultados da API VeraBet"""
+    def new_rounds(self, results: List[Dict]) -> List[Dict]:
+        """
+        Rodadas da janela ainda não vistas, em ordem cronológica.
+        No primeiro poll só a mais recente é entregue (o histórico inicial
+        vem de `fetch_initial_history`); as demais são marcadas como vistas.
+        """
+        fresh = []
+        overlap = False
+        for item in results:
+            round_id = str(item.get("id"))
+            if round_id in self._seen:
+                overlap = True
+                break
+            fresh.append(item)
+        if not fresh:
+            return []
+        first_poll = not self._seen
+        for item in reversed(fresh):
+            self._remember(str(item.get("id")))
+        if first_poll:
+            return fresh[:1]
+        if not overlap:
+            # Nenhuma rodada conhecida na janela: as anteriores a ela se perderam
+            self.gaps += 1
+            logger.warning(f"[VeraBet] Gap no polling: janela de {len(results)} rodadas sem sobreposição")
+        return list(reversed(fresh))
+    
+    async def fetch_results(self) -> Optional[List[Dict]]:
+        """Buscar resultados da API VeraBet (None em erro)"""
         try:
-            headers = {
-                "Accept": "application/json",
-                "Content-Type": "application/json",
-                "Origin": "https://vera.bet.br",
-                "Referer": "https://vera.bet.br/",
-            }
-            
-            async with self.session.post(VERABET_API_URL, headers=headers, json={}) as resp:
+            async with get_session().post(self.url, json={}) as resp:
                 if resp.status == 200:
                     data = await resp.json()
                     return data.get("data", [])
                 else:
                     logger.warning(f"[VeraBet] Status HTTP: {resp.status}")
-                    return []
+                    return None
         except Exception as e:
             logger.error(f"[VeraBet] Erro ao buscar resultados: {e}")
-            return []
+            return None
     
+    def _set_connected(self, connected: bool, **extra):
+        self.connected = connected
+        self.on_message({"type": "status", "connected": connected, **extra})
+
     async def poll_loop(self):
         """Loop de polling"""
-        self.session = aiohttp.ClientSession()
-        
         try:
             # Notificar conexão inicial
-            self.on_message({"type": "status", "connected": True})
+            self._set_connected(True)
             logger.info("[VeraBet] Cliente iniciado")
             
             while self.running:
+                delay = None
                 try:
                     results = await self.fetch_results()
+                    self.polls += 1
+                    self.scheduler.on_poll()
+                    if results is None:
+                        delay = self.scheduler.on_error()
+                        results = []
+                        if self.connected and self.scheduler.errors >= ERROR_STATUS_THRESHOLD:
+                            logger.warning(f"[VeraBet] {self.scheduler.errors} polls seguidos com erro")
+                            self._set_connected(False)
+                    else:
+                        self.scheduler.on_success()
+                        if not self.connected:
+                            self._set_connected(True)
                     
-                    if results:
-                        # Processar apenas o resultado mais recente
-                        latest = results[0]
-                        current_id = str(latest.get("id"))
-                        
-                        # Verificar se é um novo resultado
-                        if current_id != self.last_round_id:
-                            self.last_round_id = current_id
-                            parsed = parse_verabet_result(latest)
-                            
-                            if parsed:
-                                logger.info(f"[VeraBet] Novo resultado: #{parsed['number']} ({parsed['color']})")
-                                self.on_message(parsed)
+                    rounds = self.new_rounds(results) if results else []
+                    if len(rounds) > self.max_rounds_per_poll:
+                        self.max_rounds_per_poll = len(rounds)
+                    for item in rounds:
+                        self.last_round_id = str(item.get("id"))
+                        parsed = parse_verabet_result(item)
+                        if parsed:
+                            self.rounds_emitted += 1
+                            # Só o created_at da API ensina o período (não o fallback de relógio local)
+                            self.scheduler.on_round(parse_created_at(parsed.get("created_at")))
+                            logger.info(f"[VeraBet] Novo resultado: #{parsed['number']} ({parsed['color']})")
+                            self.on_message(parsed)
                     
                 except Exception as e:
                     logger.error(f"[VeraBet] Erro no loop: {e}")
-                    self.on_message({"type": "status", "connected": False, "error": str(e)})
+                    self._set_connected(False, error=str(e))
+                    delay = self.scheduler.on_error()
                 
                 # Aguardar próximo poll
-                await asyncio.sleep(self.poll_interval)
+                await asyncio.sleep(delay if delay is not None else self.scheduler.next_delay())
                 
         except asyncio.CancelledError:
             pass
         finally:
-            if self.session:
-                await self.session.close()
-            self.on_message({"type": "status", "connected": False})
+            self._set_connected(False)
             logger.info("[VeraBet] Cliente finalizado")
     
+    def stats(self) -> Dict:
+        return {
+            "polls": self.polls,
+            "rounds": self.rounds_emitted,
+            "max_rounds_per_poll": self.max_rounds_per_poll,
+            "gaps": self.gaps,
+            "last_round_id": self.last_round_id,
+            "cadence": self.scheduler.stats(),
+        }
+    
     async def start(self):
         """Iniciar cliente"""
         self.running = True
@@ -150,29 +358,21 @@ async def fetch_initial_history(limit: int = 20) -> List[Dict]:
     Retorna os últimos `limit` resultados já parseados
     """
     try:
-        headers = {
-            "Accept": "application/json",
-            "Content-Type": "application/json",
-            "Origin": "https://vera.bet.br",
-            "Referer": "https://vera.bet.br/",
-        }
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.post(VERABET_API_URL, headers=headers, json={}) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    raw_results = data.get("data", [])[:limit]
-                    
-                    parsed = []
-                    for item in raw_results:
-                        p = parse_verabet_result(item)
-                        if p:
-                            parsed.append(p)
-                    
-                    # Reverter para ordem cronológica (mais antigo primeiro)
-                    return list(reversed(parsed))
-                else:
-                    return []
+        async with get_session().post(VERABET_API_URL, json={}) as resp:
+            if resp.status == 200:
+                data = await resp.json()
+                raw_results = data.get("data", [])[:limit]
+                
+                parsed = []
+                for item in raw_results:
+                    p = parse_verabet_result(item)
+                    if p:
+                        parsed.append(p)
+                
+                # Reverter para ordem cronológica (mais antigo primeiro)
+                return list(reversed(parsed))
+            else:
+                return []
     except Exception as e:
         logger.error(f"[VeraBet] Erro ao buscar histórico: {e}")
         return []
@@ -5,9 +5,11 @@ Baseado no motor de padrões da PlayNaBet, otimizado para VeraBet
 Representação: "V" = Vermelho (1-7), "P" = Preto (8-14), "B" = Branco (0)
 """
 
-from typing import List, Optional, Dict, Tuple
+from typing import Callable, List, Optional, Dict, Tuple
 import time
 
+from services.pattern_automaton import PatternAutomaton, PatternStream
+
 
 def last_n(historico: List[str], n: int) -> List[str]:
     """Retorna os últimos N elementos do histórico"""
@@ -54,6 +56,9 @@ class VeraBetPatternEngine:
     7. Sequência de 6+ pretos → apostar no vermelho (alto)
     8. Padrão espelho (A BB A) → apostar no B (médio)
     """
+
+    # Autômato compilado dos detectores, compartilhado entre instâncias (ver automaton())
+    _automaton: Optional[PatternAutomaton] = None
     
     def __init__(self):
         self.last_signal_time = 0
@@ -201,10 +206,35 @@ class VeraBetPatternEngine:
         return False, None, "", 0
     
     # --- Avaliação principal ---
+
+    def padroes(self) -> List[Tuple[int, Callable, int]]:
+        """Lista de detectores com prioridades"""
+        return [
+            (7, self.detectar_padrao7, 105),  # Maior prioridade
+            (1, self.detectar_padrao1, 100),
+            (6, self.detectar_padrao6, 90),
+            (2, self.detectar_padrao2, 80),
+            (4, self.detectar_padrao4, 70),
+            (8, self.detectar_padrao8, 60),
+            (3, self.detectar_padrao3, 50),
+            (5, self.detectar_padrao5, 40),
+        ]
+
+    @classmethod
+    def automaton(cls) -> PatternAutomaton:
+        """Autômato dos 8 padrões, compilado uma vez e compartilhado por todas as mesas"""
+        if cls.__dict__.get("_automaton") is None:
+            cls._automaton = PatternAutomaton(cls().padroes())
+        return cls._automaton
+
+    def novo_stream(self) -> PatternStream:
+        """Cursor por mesa para `avaliar_stream` / `gerar_sinal_stream`"""
+        return PatternStream(self.automaton())
     
     def avaliar_historico(self, historico: List[str]) -> Dict:
         """
         Avalia o histórico e retorna o melhor sinal detectado
+        (implementação de referência: executa os 8 detectores)
         
         Returns:
             Dict com:
@@ -219,20 +249,8 @@ class VeraBetPatternEngine:
         if len(historico) < 3:
             return {"signal": False, "reason": "historico_insuficiente"}
         
-        # Lista de detectores com prioridades
-        detectores = [
-            (7, self.detectar_padrao7, 105),  # Maior prioridade
-            (1, self.detectar_padrao1, 100),
-            (6, self.detectar_padrao6, 90),
-            (2, self.detectar_padrao2, 80),
-            (4, self.detectar_padrao4, 70),
-            (8, self.detectar_padrao8, 60),
-            (3, self.detectar_padrao3, 50),
-            (5, self.detectar_padrao5, 40),
-        ]
-        
         matches = []
-        for pid, detector, priority in detectores:
+        for pid, detector, priority in self.padroes():
             detected, suggestion, conf, chance = detector(historico)
             if detected and suggestion:
                 matches.append({
@@ -242,7 +260,22 @@ class VeraBetPatternEngine:
                     "confidence": conf,
                     "chance": chance,
                 })
-        
+        return self._decidir(matches)
+
+    def avaliar_stream(self, stream: PatternStream) -> Dict:
+        """Mesmo resultado de `avaliar_historico`, lendo os padrões do autômato em O(1)"""
+        if stream.length < 3:
+            return {"signal": False, "reason": "historico_insuficiente"}
+
+        matches = [
+            {"pattern_id": pid, "priority": priority, "suggestion": suggestion, "confidence": conf, "chance": chance}
+            for pid, priority, suggestion, conf, chance in stream.matches
+            if suggestion
+        ]
+        return self._decidir(matches)
+
+    def _decidir(self, matches: List[Dict]) -> Dict:
+        """Votação ponderada, cooldown e montagem do resultado"""
         if not matches:
             return {"signal": False, "reason": "nenhum_padrao"}
         
@@ -299,8 +332,13 @@ class VeraBetPatternEngine:
         Gera um sinal completo para envio ao frontend
         Retorna None se não houver sinal válido
         """
-        result = self.avaliar_historico(historico)
-        
+        return self._montar_sinal(self.avaliar_historico(historico))
+
+    def gerar_sinal_stream(self, stream: PatternStream) -> Optional[Dict]:
+        """Como `gerar_sinal`, usando o cursor do autômato da mesa"""
+        return self._montar_sinal(self.avaliar_stream(stream))
+
+    def _montar_sinal(self, result: Dict) -> Optional[Dict]:
         if not result.get("signal"):
             return None
         
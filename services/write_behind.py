@@ -0,0 +1,123 @@
+"""
+Persistência write-behind com coalescência
+
+`mark_dirty()` só marca o documento como sujo; uma única task espera a janela
+de coalescência e chama `write()`, que monta o snapshot no momento da escrita
+(portanto já com todas as alterações acumuladas). Há no máximo uma escrita em
+andamento por documento; alterações durante a escrita geram uma nova rodada
+após a janela. `flush()` antecipa a escrita pendente (shutdown).
+
+Se `write()` falha, o documento volta a ficar sujo e a escrita é repetida com
+backoff exponencial, até `max_retries` falhas seguidas; depois disso fica sujo
+até a próxima alteração ou `flush()`, sem perder o estado.
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+
+class WriteBehind:
+    def __init__(self, name: str, write: Callable[[], Awaitable[None]], window_seconds: float = 2.0,
+                 max_retries: int = 5, retry_seconds: float = 1.0, max_retry_seconds: float = 30.0):
+        self.name = name
+        self.write = write
+        self.window_seconds = window_seconds
+        self.max_retries = max_retries
+        self.retry_seconds = retry_seconds
+        self.max_retry_seconds = max_retry_seconds
+        self._dirty = False
+        self._failed = 0  # falhas seguidas
+        self._flushing = False
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self.requests = 0
+        self.writes = 0
+        self.failures = 0
+        self.last_write_ms: Optional[float] = None
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+    def mark_dirty(self):
+        """Registrar alteração; agenda a escrita se ainda não houver uma pendente"""
+        self.requests += 1
+        self._dirty = True
+        if self._task is not None and not self._task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # fora do event loop: fica sujo até o próximo flush
+        self._wake = asyncio.Event()
+        self._task = loop.create_task(self._run())
+
+    def _backoff(self) -> float:
+        return min(self.max_retry_seconds, self.retry_seconds * 2 ** max(0, self._failed - 1))
+
+    async def _run(self):
+        while self._dirty:
+            delay = self._backoff() if self._failed else self.window_seconds
+            try:
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            if await self._write_once():
+                continue
+            if self._flushing:
+                return  # flush() segue com as próprias tentativas
+            if self._failed > self.max_retries:
+                print(f"[{self.name}] {self._failed} falhas seguidas; nova tentativa na próxima alteração ou flush")
+                return
+
+    async def _write_once(self) -> bool:
+        """Escrever se sujo; em caso de falha o documento volta a ficar sujo"""
+        if not self._dirty:
+            return True
+        self._dirty = False
+        t0 = time.perf_counter()
+        try:
+            await self.write()
+        except Exception as e:
+            self._dirty = True
+            self._failed += 1
+            self.failures += 1
+            print(f"[{self.name}] Erro na escrita write-behind (tentativa {self._failed}): {e}")
+            return False
+        finally:
+            self.last_write_ms = round((time.perf_counter() - t0) * 1000, 2)
+        self._failed = 0
+        self.writes += 1
+        return True
+
+    async def flush(self, retries: int = 2):
+        """Escrever agora o que estiver pendente e aguardar a escrita em andamento"""
+        self._flushing = True
+        try:
+            task = self._task
+            if task is not None and not task.done():
+                self._wake.set()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+            for attempt in range(retries + 1):
+                if await self._write_once():
+                    return
+                if attempt < retries:
+                    await asyncio.sleep(self._backoff())
+            print(f"[{self.name}] Flush falhou; estado continua pendente")
+        finally:
+            self._flushing = False
+
+    def stats(self) -> Dict:
+        return {
+            "dirty": self._dirty,
+            "requests": self.requests,
+            "writes": self.writes,
+            "failures": self.failures,
+            "retrying": self._failed,
+            "coalesced": self.requests - self.writes if self.requests > self.writes else 0,
+            "window_seconds": self.window_seconds,
+            "last_write_ms": self.last_write_ms,
+        }
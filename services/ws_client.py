@@ -5,21 +5,62 @@ Equivalente ao wsClient.js
 import asyncio
 import websockets
 import json
+import time
 from typing import Callable, Optional, Dict, Any
 import logging
 
 logger = logging.getLogger(__name__)
 
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "block")
+
+
 class WSClient:
-    def __init__(self, url: str, on_message: Callable):
+    """
+    Pipeline em estágios:
+    - recepção: lê frames do socket e só enfileira (nunca executa o callback)
+    - fila limitada com política de overflow explícita
+    - processamento: task única que decodifica e chama `on_message` em ordem
+
+    O processamento cede o event loop após cada item, então uma detecção lenta
+    ou uma rajada de frames não trava a leitura do socket nem provoca timeout
+    de ping no servidor.
+
+    O padrão é "block": descartar um frame pode perder uma rodada e
+    dessincronizar apostas pendentes e o estado dos padrões. Com as políticas
+    de descarte, cada frame perdido é registrado em log.
+    """
+
+    def __init__(self, url: str, on_message: Callable, queue_size: int = 256,
+                 overflow: str = "block", drain_timeout: float = 5.0):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow deve ser um de {OVERFLOW_POLICIES}")
         self.url = url
         self.on_message = on_message
         self.ws = None
         self.running = True
         self.task = None
-    
+        self.worker = None
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.drain_timeout = drain_timeout
+        self.queue: Optional[asyncio.Queue] = None
+        self.metrics = {
+            "received": 0,
+            "processed": 0,
+            "dropped": 0,
+            "errors": 0,
+            "max_depth": 0,
+            "recv_ms_max": 0.0,
+            "wait_ms_total": 0.0,
+            "wait_ms_max": 0.0,
+            "handle_ms_total": 0.0,
+            "handle_ms_max": 0.0,
+        }
+
+    # --- Estágio de recepção ---
+
     async def connect(self):
-        """Conectar ao WebSocket"""
+        """Conectar ao WebSocket e enfileirar frames recebidos"""
         while self.running:
             try:
                 logger.info(f"[WS] Conectando a {self.url}")
@@ -27,44 +68,135 @@ class WSClient:
                     self.ws = ws
                     
                     # Notificar conexão
-                    self.on_message({"type": "status", "connected": True})
+                    await self._enqueue({"type": "status", "connected": True})
                     
                     # Escutar mensagens
                     async for message in ws:
                         if not self.running:
                             break
-                        try:
-                            if isinstance(message, str):
-                                data = json.loads(message)
-                            else:
-                                data = json.loads(message.decode('utf-8'))
-                            self.on_message(data)
-                        except json.JSONDecodeError:
-                            # Tentar extrair JSON de string
-                            try:
-                                msg_str = message if isinstance(message, str) else message.decode('utf-8')
-                                start = msg_str.find("{")
-                                end = msg_str.rfind("}") + 1
-                                if start != -1 and end > start:
-                                    data = json.loads(msg_str[start:end])
-                                    self.on_message(data)
-                            except:
-                                pass
-                        except Exception as e:
-                            logger.warning(f"[WS] Erro ao processar mensagem: {e}")
+                        started = time.perf_counter()
+                        await self._enqueue(message)
+                        self.metrics["received"] += 1
+                        elapsed = (time.perf_counter() - started) * 1000
+                        if elapsed > self.metrics["recv_ms_max"]:
+                            self.metrics["recv_ms_max"] = elapsed
                 
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 logger.error(f"[WS] Erro na conexão: {e}")
-                self.on_message({"type": "status", "connected": False, "error": str(e)})
+                await self._enqueue({"type": "status", "connected": False, "error": str(e)})
                 if self.running:
                     await asyncio.sleep(2)  # Tentar reconectar após 2 segundos
+
+    async def _enqueue(self, item):
+        """Colocar item na fila aplicando a política de overflow"""
+        queue = self.queue
+        entry = (time.perf_counter(), item)
+        if queue.full():
+            if self.overflow == "block":
+                await queue.put(entry)
+            elif self.overflow == "drop_oldest":
+                try:
+                    _, dropped = queue.get_nowait()
+                    queue.task_done()
+                except asyncio.QueueEmpty:
+                    dropped = None
+                queue.put_nowait(entry)
+                self._dropped(dropped)
+            else:
+                self._dropped(item)
+                return
+        else:
+            queue.put_nowait(entry)
+        depth = queue.qsize()
+        if depth > self.metrics["max_depth"]:
+            self.metrics["max_depth"] = depth
+
+    def _dropped(self, item):
+        self.metrics["dropped"] += 1
+        logger.warning(
+            f"[WS] Fila cheia ({self.overflow}): frame descartado, possível rodada perdida "
+            f"(total {self.metrics['dropped']}): {str(item)[:120]}"
+        )
+
+    # --- Estágio de processamento ---
+
+    async def _process(self):
+        """Consumir a fila e despachar para o callback, em ordem"""
+        queue = self.queue
+        metrics = self.metrics
+        while True:
+            enqueued_at, item = await queue.get()
+            try:
+                started = time.perf_counter()
+                wait = (started - enqueued_at) * 1000
+                metrics["wait_ms_total"] += wait
+                if wait > metrics["wait_ms_max"]:
+                    metrics["wait_ms_max"] = wait
+                data = item if isinstance(item, dict) else self._decode(item)
+                if data is not None:
+                    self.on_message(data)
+                elapsed = (time.perf_counter() - started) * 1000
+                metrics["handle_ms_total"] += elapsed
+                if elapsed > metrics["handle_ms_max"]:
+                    metrics["handle_ms_max"] = elapsed
+                metrics["processed"] += 1
+            except Exception as e:
+                metrics["errors"] += 1
+                logger.warning(f"[WS] Erro ao processar mensagem: {e}")
+            finally:
+                queue.task_done()
+            # `get()` não cede o loop quando há itens: sem isto uma rajada seria
+            # drenada de uma vez, sem a recepção nem o ping/pong do socket rodarem
+            await asyncio.sleep(0)
+
+    @staticmethod
+    def _decode(message) -> Optional[Dict[str, Any]]:
+        """Decodificar frame (str ou bytes) em dict"""
+        msg_str = message if isinstance(message, str) else message.decode('utf-8')
+        try:
+            return json.loads(msg_str)
+        except json.JSONDecodeError:
+            # Tentar extrair JSON de string
+            start = msg_str.find("{")
+            end = msg_str.rfind("}") + 1
+            if start != -1 and end > start:
+                try:
+                    return json.loads(msg_str[start:end])
+                except json.JSONDecodeError:
+                    pass
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Métricas do pipeline por estágio"""
+        m = self.metrics
+        processed = m["processed"] or 1
+        return {
+            "queue_size": self.queue_size,
+            "overflow": self.overflow,
+            "depth": self.queue.qsize() if self.queue else 0,
+            "received": m["received"],
+            "processed": m["processed"],
+            "dropped": m["dropped"],
+            "errors": m["errors"],
+            "max_depth": m["max_depth"],
+            "recv_ms_max": round(m["recv_ms_max"], 3),
+            "wait_ms_avg": round(m["wait_ms_total"] / processed, 3),
+            "wait_ms_max": round(m["wait_ms_max"], 3),
+            "handle_ms_avg": round(m["handle_ms_total"] / processed, 3),
+            "handle_ms_max": round(m["handle_ms_max"], 3),
+        }
     
     async def start(self):
         """Iniciar cliente"""
+        self.running = True
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self.worker = asyncio.create_task(self._process())
         self.task = asyncio.create_task(self.connect())
     
     async def stop(self):
-        """Parar cliente"""
+        """Parar cliente: encerra a recepção e drena a fila antes de parar o processamento"""
         self.running = False
         if self.ws:
             try:
@@ -77,4 +209,13 @@ class WSClient:
                 await self.task
             except asyncio.CancelledError:
                 pass
-
+        if self.worker:
+            try:
+                await asyncio.wait_for(self.queue.join(), timeout=self.drain_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"[WS] Fila não drenada no stop ({self.queue.qsize()} pendentes)")
+            self.worker.cancel()
+            try:
+                await self.worker
+            except asyncio.CancelledError:
+                pass
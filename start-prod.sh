@@ -2,4 +2,9 @@
 # Start production server using uvicorn and environment PORT
 set -e
 PORT=${PORT:-3001}
-exec uvicorn app:app --host 0.0.0.0 --port ${PORT} --workers 1
+WORKERS=${WEB_CONCURRENCY:-1}
+# Com mais de um worker, um único processo (eleito por trava de arquivo) faz a ingestão
+if [ "$WORKERS" -gt 1 ]; then
+  export WORKER_ROLE=${WORKER_ROLE:-auto}
+fi
+exec uvicorn app:app --host 0.0.0.0 --port ${PORT} --workers ${WORKERS}
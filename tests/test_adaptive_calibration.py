@@ -0,0 +1,66 @@
+import asyncio
+import json
+
+from services.adaptive_calibration import CalibrationStore
+
+
+def test_atualizacoes_em_memoria_sem_perda(tmp_path):
+    store = CalibrationStore(str(tmp_path / "platt.json"), str(tmp_path / "stats.json"))
+    for _ in range(3):
+        store.update_stat("color_streak", True)
+    store.update_stat("color_streak", False)
+    store.update_stat("triple_repeat", True)
+    assert not (tmp_path / "stats.json").exists()
+    store.flush()
+    saved = json.loads((tmp_path / "stats.json").read_text())
+    assert saved["color_streak"]["wins"] == 3 and saved["color_streak"]["losses"] == 1
+    assert saved["triple_repeat"]["wins"] == 1
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_flush_async_e_recarga(tmp_path):
+    platt, stats = str(tmp_path / "platt.json"), str(tmp_path / "stats.json")
+
+    async def run():
+        store = CalibrationStore(platt, stats)
+        store.start(interval=0.01)
+        store.set_platt({"A": 0.5, "B": -1.0, "updatedAt": 1})
+        store.update_stat("k", True)
+        await asyncio.sleep(0.05)
+        assert not store.dirty
+        store.update_stat("k", True)
+        await store.close()
+
+    asyncio.run(run())
+    reloaded = CalibrationStore(platt, stats)
+    assert reloaded.platt()["A"] == 0.5
+    assert reloaded.stats()["k"]["wins"] == 2
+
+
+def test_reset_apaga_estado_e_flush_nao_regrava(tmp_path):
+    platt, stats = str(tmp_path / "platt.json"), str(tmp_path / "stats.json")
+    store = CalibrationStore(platt, stats)
+    store.set_platt({"A": 0.5, "B": -1.0, "updatedAt": 1})
+    store.update_stat("color_streak", True)
+    store.flush()
+
+    store.reset()
+    store.flush()
+    assert store.stats() == {} and store.platt() is None
+    assert json.loads((tmp_path / "stats.json").read_text()) == {}
+    assert not (tmp_path / "platt.json").exists()
+
+    reloaded = CalibrationStore(platt, stats)
+    assert reloaded.platt() is None
+    assert "color_streak" not in reloaded.stats()
+
+
+def test_falha_na_gravacao_mantem_sujo_e_repete(tmp_path):
+    stats = tmp_path / "sub" / "stats.json"  # diretório ainda não existe: a gravação falha
+    store = CalibrationStore(None, str(stats))
+    store.update_stat("k", True)
+    assert store.flush() is False and store.dirty
+
+    stats.parent.mkdir()
+    assert asyncio.run(store.flush_async()) is True and not store.dirty
+    assert json.loads(stats.read_text())["k"]["wins"] == 1
@@ -0,0 +1,63 @@
+import random
+
+import pytest
+
+from services import backtest
+from services.pattern_signals import SignalEngine
+
+
+def make_numbers(n, seed):
+    rng = random.Random(seed)
+    return [rng.randint(0, 14) for _ in range(n)]
+
+
+def test_resolucao_igual_a_varredura():
+    nums = make_numbers(500, 1)
+    codes = backtest.color_codes(nums)
+    tables = backtest.HitTables(codes)
+    colors = [backtest.color_of(x) for x in nums]
+    for r in range(len(nums) - 4):
+        for target in ("red", "black"):
+            expected = None
+            for k in range(1, 4):
+                c = colors[r + k]
+                if c == target or c == "white":
+                    expected = (True, k, r + k)
+                    break
+            expected = expected or (False, 3, r + 3)
+            assert tables.resolve(r, backtest.CODE_BY_COLOR[target], 3, True) == expected
+
+
+def test_estados_do_automato_em_lote():
+    nums = make_numbers(300, 2)
+    codes = backtest.color_codes(nums)
+    automaton = SignalEngine.automaton()
+    states = backtest.pattern_states(automaton, codes)
+    tokens = [backtest.TOKENS[int(c)] for c in codes]
+    for i in range(len(tokens)):
+        assert int(states[i]) == automaton.state_for(tokens[:i + 1])
+
+
+def test_relatorio_independe_do_numpy(monkeypatch):
+    pytest.importorskip("numpy")
+    nums = make_numbers(3000, 3)
+    for engine in ("pattern", "verabet"):
+        a = backtest.run_backtest(nums, engine)
+        monkeypatch.setattr(backtest, "np", None)
+        b = backtest.run_backtest(nums, engine)
+        monkeypatch.undo()
+        assert a["vectorized"] is True and b["vectorized"] is False
+        for k in ("elapsedMs", "vectorized"):
+            a.pop(k), b.pop(k)
+        assert a == b
+        assert a["total"] == a["wins"] + a["losses"] > 0
+        assert sum(p["total"] for p in a["byPattern"].values()) == a["total"]
+
+
+def test_relatorio_consistente():
+    nums = make_numbers(3000, 3)
+    for engine in ("pattern", "verabet"):
+        a = backtest.run_backtest(nums, engine)
+        assert a["vectorized"] is (backtest.np is not None)
+        assert a["total"] == a["wins"] + a["losses"] > 0
+        assert sum(p["total"] for p in a["byPattern"].values()) == a["total"]
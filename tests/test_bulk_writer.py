@@ -0,0 +1,121 @@
+import asyncio
+
+from services.bulk_writer import BufferedInserter
+from services import stats_rollups
+
+
+class _Result:
+    def __init__(self, ids):
+        self.inserted_ids = ids
+
+
+class _Collection:
+    def __init__(self):
+        self.calls = []
+
+    async def insert_many(self, docs, ordered=True):
+        assert ordered is False
+        self.calls.append(list(docs))
+        return _Result(list(range(len(docs))))
+
+
+def test_agrupa_por_tamanho_e_tempo_e_flush_final():
+    async def run():
+        coll = _Collection()
+        flushed = []
+
+        async def on_flush(docs):
+            flushed.extend(docs)
+
+        w = BufferedInserter("t", lambda: coll, max_batch=3, max_delay_seconds=0.05, on_flush=on_flush)
+        w.add({"i": 0})
+        await asyncio.sleep(0.01)
+        assert coll.calls == []  # abaixo do lote: espera o prazo
+        await asyncio.sleep(0.08)
+        assert [len(c) for c in coll.calls] == [1]
+        for i in range(1, 8):
+            w.add({"i": i})
+        await asyncio.sleep(0.01)
+        assert [len(c) for c in coll.calls] == [1, 3, 3, 1]  # lote cheio dispara sem esperar o prazo
+        await w.close()
+        assert sum(len(c) for c in coll.calls) == 8 and len(flushed) == 8
+        assert w.stats()["inserted"] == 8 and w.stats()["buffered"] == 0
+
+    asyncio.run(run())
+
+
+def test_buffer_limitado_sem_banco():
+    w = BufferedInserter("t", lambda: None, max_buffer=2)
+    for i in range(5):
+        w.add({"i": i})  # fora do event loop: só acumula
+    assert len(w) == 2 and w.stats()["dropped"] == 3
+    asyncio.run(w.flush())
+    assert len(w) == 0
+
+
+class _FlakyCollection(_Collection):
+    def __init__(self, failures=1):
+        super().__init__()
+        self.failures = failures
+
+    async def insert_many(self, docs, ordered=True):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("primário indisponível")
+        return await super().insert_many(docs, ordered)
+
+
+def test_falha_transitoria_devolve_lote_e_repete_com_backoff():
+    async def run():
+        coll = _FlakyCollection(failures=1)
+        w = BufferedInserter("t", lambda: coll, max_batch=2, max_delay_seconds=0.01,
+                             max_buffer=3, retry_seconds=0.05)
+        w.add({"i": 0})
+        w.add({"i": 1})
+        await asyncio.sleep(0.01)
+        # Lote devolvido ao início do buffer, nada perdido
+        assert coll.calls == [] and len(w) == 2 and w.stats()["retrying"]
+        w.add({"i": 2})
+        w.add({"i": 3})  # buffer cheio: o mais antigo é descartado
+        assert w.stats()["dropped"] == 1
+        await asyncio.sleep(0.02)
+        assert coll.calls == []  # ainda no backoff
+        await asyncio.sleep(0.08)
+        assert [d["i"] for c in coll.calls for d in c] == [1, 2, 3]
+        stats = w.stats()
+        assert stats["inserted"] == 3 and stats["errors"] == 1 and not stats["retrying"]
+        await w.close()
+
+    asyncio.run(run())
+
+
+def test_shutdown_conta_o_que_nao_gravou():
+    async def run():
+        coll = _FlakyCollection(failures=10)
+        w = BufferedInserter("t", lambda: coll, retry_seconds=0.01)
+        w.add({"i": 0})
+        await w.close(retries=1)
+        assert len(w) == 0 and w.stats()["dropped"] == 1 and w.stats()["inserted"] == 0
+
+    asyncio.run(run())
+
+
+def test_rollups_do_lote_somados_por_bucket():
+    base = {"platform": "verabet", "date": "2026-01-02", "hour": 9, "patternKey": "p", "confLabel": "alta"}
+    merged = stats_rollups.merge_updates([
+        {**base, "result": "win", "attemptsUsed": 1},
+        {**base, "result": "win", "attemptsUsed": 1},
+        {**base, "result": "loss", "attemptsUsed": 3},
+    ])
+    (flt, update), = merged.values()
+    assert update["$inc"] == {"total": 3, "wins": 2, "winsByAttempt.1": 2}
+
+
+def test_tentativas_zero_nao_vira_um():
+    base = {"platform": "verabet", "date": "2026-01-02", "hour": 9, "patternKey": "p", "confLabel": "alta",
+            "result": "win"}
+    assert stats_rollups.rollup_update({**base, "attemptsUsed": 0})[1]["$inc"]["winsByAttempt.0"] == 1
+    assert stats_rollups.rollup_update(base)[1]["$inc"]["winsByAttempt.1"] == 1  # ausente: 1, como o $ifNull
+    rows = [{"_id": {**base, "attemptsUsed": 0}, "count": 2}]
+    (doc,) = stats_rollups.fold_rebuild_rows(rows).values()
+    assert doc["winsByAttempt"] == {"0": 2}
@@ -0,0 +1,40 @@
+import db
+
+
+def test_plan_stages_detecta_collscan_aninhado():
+    plan = {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}}
+    assert db._plan_stages(plan) == ["SORT", "COLLSCAN"]
+    sbe = {"queryPlan": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}}
+    assert "COLLSCAN" not in db._plan_stages(sbe)
+
+
+def test_consultas_do_explain_tem_indices_registrados():
+    for coll, flt, sort in db.EXPLAIN_QUERIES:
+        assert coll in db.INDEXES
+        first_fields = {spec["keys"][0][0] for spec in db.INDEXES[coll]}
+        assert first_fields & set(flt) or (sort and sort[0][0] in first_fields)
+
+
+def test_init_db_dentro_do_loop_nao_agenda_indices(monkeypatch):
+    import asyncio
+    import warnings
+
+    chamadas = []
+
+    async def fake_ensure(database=None):
+        chamadas.append(database)
+
+    monkeypatch.setattr(db, "ensure_indexes_and_check", fake_ensure)
+    # init_db troca os globais do módulo; o monkeypatch restaura no fim
+    monkeypatch.setattr(db, "client", db.client)
+    monkeypatch.setattr(db, "db", db.db)
+
+    async def run():
+        db.init_db(uri="mongodb://localhost:1/teste")
+        db.init_db(uri="mongodb://localhost:1/teste", create_indexes=False)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", RuntimeWarning)
+        asyncio.run(run())
+    assert chamadas == []
+    db.client.close()
@@ -0,0 +1,93 @@
+import random
+
+from services.double import detect_double_patterns, compute_double_signal_chance
+from services.double_features import DoubleFeatureState, color_to_token
+
+
+def make_result(number):
+    color = "white" if number == 0 else ("red" if number <= 7 else "black")
+    return {"number": number, "color": color}
+
+
+def test_contagens_por_janela_batem_com_fatiamento():
+    rng = random.Random(7)
+    state = DoubleFeatureState()
+    results = []
+    for _ in range(200):
+        r = make_result(rng.randint(0, 14))
+        results.append(r)
+        state.push_result(r)
+        for w in (3, 10, 12, 20, 50):
+            tokens = [color_to_token(x["color"]) for x in results[-w:]]
+            for t in ("V", "P", "B"):
+                assert state.count(w, t) == tokens.count(t)
+
+
+def test_streaks_e_branco():
+    state = DoubleFeatureState.from_results([make_result(n) for n in (8, 1, 1, 1, 0, 0, 2)])
+    assert state.run_token == "V" and state.run_len == 1
+    assert state.nw_run_token == "V" and state.nw_run_len == 4
+    assert state.streak_before_white == ("V", 3)
+    assert state.whites_since_streak == 2
+
+
+def test_estado_incremental_igual_ao_reconstruido():
+    rng = random.Random(11)
+    state = DoubleFeatureState()
+    results = []
+    for _ in range(150):
+        r = make_result(rng.randint(0, 14))
+        results.append(r)
+        state.push_result(r)
+        patterns = detect_double_patterns(results, state)
+        assert patterns == detect_double_patterns(results)
+        for p in patterns:
+            advice = {"type": "color", "color": p["targets"]["color"], "key": p["key"]}
+            assert compute_double_signal_chance(advice, results, state) == compute_double_signal_chance(advice, results)
+
+
+# Saídas do detector original (fatiamento de `results`, antes do estado incremental)
+# para sequências fixas: padrões (key, cor, chance) em algumas rodadas e, na
+# sequência toda, quantos padrões saíram e a soma das chances.
+REFERENCIA = {
+    3: {
+        "total": (722, 44920),
+        12: [("red_black_balance", "black", 68), ("alternation_break", "black", 68),
+             ("after_white_previous_color", "black", 70)],
+        60: [("triple_repeat", "red", 43), ("red_black_balance", "black", 79), ("hot_zone_last10", "black", 73),
+             ("momentum_bias", "black", 78), ("last_single_continuity", "black", 73), ("short_streak_3", "black", 74),
+             ("light_imbalance_10", "black", 75), ("two_of_three", "black", 73)],
+        149: [("two_in_a_row_trend", "black", 67), ("last_single_continuity", "black", 64),
+              ("light_imbalance_10", "black", 66), ("two_of_three", "black", 64)],
+    },
+    29: {
+        "total": (725, 44017),
+        12: [("triple_repeat", "black", 52), ("last_single_continuity", "red", 62), ("short_streak_3", "red", 63),
+             ("two_of_three", "red", 62)],
+        60: [("red_black_balance", "black", 57), ("alternation_break", "black", 57),
+             ("last_single_continuity", "black", 56), ("two_of_three", "black", 56)],
+        149: [("last_single_continuity", "black", 62), ("light_imbalance_10", "red", 50)],
+    },
+}
+
+
+def test_saidas_iguais_as_do_detector_original():
+    for seed, esperado in REFERENCIA.items():
+        rng = random.Random(seed)
+        sequencia = [make_result(rng.randint(0, 14)) for _ in range(150)]
+        for state in (DoubleFeatureState(), None):  # com e sem o estado incremental
+            results = []
+            total = soma = 0
+            for step, r in enumerate(sequencia):
+                results.append(r)
+                if state is not None:
+                    state.push_result(r)
+                saida = []
+                for p in detect_double_patterns(results, state):
+                    advice = {"type": "color", "color": p["targets"]["color"], "key": p["key"]}
+                    saida.append((p["key"], p["targets"]["color"], compute_double_signal_chance(advice, results, state)))
+                total += len(saida)
+                soma += sum(c for _, _, c in saida)
+                if step in esperado:
+                    assert saida == esperado[step], (seed, step)
+            assert (total, soma) == esperado["total"], seed
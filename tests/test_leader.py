@@ -0,0 +1,32 @@
+import asyncio
+
+from services.leader import LeaderElection
+
+
+def test_um_lider_por_vez_e_failover_ao_liberar(tmp_path):
+    async def run():
+        path = str(tmp_path / "leader.lock")
+        a = LeaderElection(path, retry_seconds=0.01)
+        b = LeaderElection(path, retry_seconds=0.01)
+        assert a.try_acquire() and not b.try_acquire()
+        assert a.stats()["leader_pid"] == a.stats()["pid"]
+
+        elected = asyncio.Event()
+        ticks = []
+
+        async def on_elected():
+            elected.set()
+
+        async def on_tick():
+            ticks.append(1)
+
+        b.start(on_elected, on_tick)
+        await asyncio.sleep(0.05)
+        assert not b.is_leader and ticks
+
+        await a.stop()  # shutdown do líder libera a trava
+        await asyncio.wait_for(elected.wait(), 1)
+        assert b.is_leader and not a.is_leader
+        await b.stop()
+
+    asyncio.run(run())
@@ -0,0 +1,41 @@
+import random
+
+from services.pattern_signals import SignalEngine
+from services.verabet_patterns import VeraBetPatternEngine
+
+
+def historicos(n=400, seed=3):
+    rng = random.Random(seed)
+    for _ in range(n):
+        size = rng.randint(0, 15)
+        yield [rng.choice("VVVPPPB") for _ in range(size)]
+
+
+def test_signal_engine_stream_igual_referencia():
+    engine = SignalEngine()
+    for hist in historicos():
+        stream = engine.novo_stream()
+        stream.extend(hist)
+        ref = engine.avaliar_historico(hist, rodada_atual=len(hist))
+        assert engine.avaliar_stream(stream, rodada_atual=len(hist)) == ref
+
+
+def test_verabet_stream_igual_referencia():
+    engine = VeraBetPatternEngine()
+    engine.cooldown_seconds = 0
+    for hist in historicos(seed=5):
+        stream = engine.novo_stream()
+        stream.extend(hist)
+        assert engine.avaliar_stream(stream) == engine.avaliar_historico(hist)
+
+
+def test_automato_compartilhado_entre_mesas():
+    engine_a = SignalEngine()
+    engine_b = SignalEngine()
+    assert engine_a.automaton() is engine_b.automaton()
+    mesa1 = engine_a.novo_stream()
+    mesa2 = engine_b.novo_stream()
+    mesa1.extend(["V", "V", "V", "V", "V"])
+    mesa2.extend(["P", "P", "P"])
+    assert mesa1.matches[0][0] == 1
+    assert [m[0] for m in mesa2.matches] == [2]
@@ -0,0 +1,92 @@
+import asyncio
+
+from starlette.requests import Request
+
+from services.response_cache import ResponseCache
+
+
+def _request(path="/api/stats/overview", etag=None):
+    headers = [(b"if-none-match", etag.encode())] if etag else []
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": b"", "headers": headers})
+
+
+def test_hit_miss_etag_e_invalidacao_por_plataforma():
+    async def run():
+        cache = ResponseCache(max_entries=8, ttl_seconds=60)
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            return {"ok": True, "n": len(calls)}
+
+        r1 = await cache.respond(_request(), "verabet", {"days": 30}, compute)
+        r2 = await cache.respond(_request(), "verabet", {"days": 30}, compute)
+        assert len(calls) == 1 and r1.body == r2.body
+        etag = r1.headers["etag"]
+
+        r3 = await cache.respond(_request(etag=etag), "verabet", {"days": 30}, compute)
+        assert r3.status_code == 304
+
+        # Sinal de outra plataforma não invalida; da mesma (ou "all") sim
+        cache.bump("playnabet")
+        await cache.respond(_request(), "verabet", {"days": 30}, compute)
+        assert len(calls) == 1
+        await cache.respond(_request(), "all", {"days": 30}, compute)
+        cache.bump("verabet")
+        await cache.respond(_request(), "all", {"days": 30}, compute)
+        r4 = await cache.respond(_request(etag=etag), "verabet", {"days": 30}, compute)
+        assert len(calls) == 4 and r4.status_code == 200
+        assert cache.stats()["hits"] == 3 and cache.stats()["misses"] == 4
+
+    asyncio.run(run())
+
+
+def test_lru_e_erros_nao_cacheados():
+    async def run():
+        cache = ResponseCache(max_entries=2, ttl_seconds=60)
+
+        async def ok():
+            return {"ok": True}
+
+        async def fail():
+            return {"ok": False, "error": "Database not connected"}
+
+        for days in (1, 2, 3):
+            await cache.respond(_request(), "all", {"days": days}, ok)
+        assert cache.stats()["entries"] == 2 and cache.stats()["evictions"] == 1
+
+        r = await cache.respond(_request("/api/stats/by-day"), "all", {}, fail)
+        assert "etag" not in r.headers and cache.stats()["entries"] == 2
+
+    asyncio.run(run())
+
+
+def test_versoes_so_para_plataformas_conhecidas():
+    async def run():
+        cache = ResponseCache(max_entries=8, ttl_seconds=60)
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            return {"ok": True}
+
+        for i in range(50):
+            cache.bump(f"x{i}")  # plataforma qualquer: não cresce o mapa de versões
+        assert set(cache.stats()["versions"]) == {"playnabet", "verabet", "all"}
+
+        # Plataforma desconhecida segue a versão de "all"
+        await cache.respond(_request(), "xyz", {}, compute)
+        await cache.respond(_request(), "xyz", {}, compute)
+        cache.bump("playnabet")
+        await cache.respond(_request(), "xyz", {}, compute)
+        assert len(calls) == 2
+
+        cache.add_platform("mesa2")
+        await cache.respond(_request(), "mesa2", {}, compute)
+        cache.bump("verabet")
+        await cache.respond(_request(), "mesa2", {}, compute)
+        cache.bump("mesa2")
+        await cache.respond(_request(), "mesa2", {}, compute)
+        assert len(calls) == 4 and cache.version("mesa2") == 1
+
+    asyncio.run(run())
@@ -0,0 +1,52 @@
+from services.result_ring import ResultRing
+
+
+def make_result(number, i):
+    color = "white" if number == 0 else ("red" if number <= 7 else "black")
+    return {"number": number, "color": color, "round_id": f"r{i}", "timestamp": 1000 + i}
+
+
+def test_anel_descarta_mais_antigo():
+    ring = ResultRing(capacity=4, source="teste")
+    for i, n in enumerate([1, 8, 0, 9, 2, 3]):
+        ring.append(make_result(n, i))
+    assert len(ring) == 4
+    assert [r["number"] for r in ring] == [0, 9, 2, 3]
+    assert ring[-1]["round_id"] == "r5"
+    assert ring[0]["color"] == "white"
+    assert ring.last_round_id() == "r5"
+    assert ring.last_timestamp() == 1005
+
+
+def test_visoes_de_tokens_sem_copia():
+    ring = ResultRing(capacity=3)
+    for i, n in enumerate([1, 8, 0, 9, 2]):
+        ring.append(make_result(n, i))
+    view = ring.colors(2)
+    assert isinstance(view, memoryview)
+    assert view.tobytes() == b"PV"
+    assert ring.tokens() == "BPV"
+    assert list(ring.numbers()) == [0, 9, 2]
+
+
+def test_fatias_como_lista_de_dicts():
+    ring = ResultRing(capacity=10, source="verabet")
+    ring.extend(make_result(n, i) for i, n in enumerate([5, 12, 0]))
+    assert ring[:2] == [
+        {"number": 5, "color": "red", "round_id": "r0", "timestamp": 1000, "source": "verabet"},
+        {"number": 12, "color": "black", "round_id": "r1", "timestamp": 1001, "source": "verabet"},
+    ]
+    assert [r["number"] for r in ring.to_dicts(2)] == [12, 0]
+    ring.clear()
+    assert not ring and ring.tokens() == ""
+
+
+def test_timestamp_nao_numerico_e_source_por_resultado():
+    ring = ResultRing(capacity=4, source="playnabets")
+    ring.append({"number": 1, "color": "red", "round_id": "a", "timestamp": "2026-01-02T03:04:05Z"})
+    ring.append({"number": 8, "color": "black", "round_id": "b", "timestamp": "1700", "source": "verabet"})
+    ring.append({"number": 2, "color": "red", "round_id": "c", "timestamp": "ontem", "raw": {"x": 1}})
+    a, b, c = ring
+    assert a["timestamp"] == 1767323045000 and a["source"] == "playnabets"
+    assert b["timestamp"] == 1700 and b["source"] == "verabet"
+    assert c["timestamp"] > 1767323045000 and "raw" not in c  # hora do recebimento; raw não é guardado
@@ -0,0 +1,23 @@
+import json
+
+from services import serialization
+from services.serialization import dumps, sse_frame
+
+
+def test_frame_sse_em_bytes_e_decodificavel():
+    payload = {"type": "signal", "data": {"color": "red", "reasons": ["Sequência"], "n": [1, 2]}}
+    frame = sse_frame("signal", payload)
+    assert isinstance(frame, bytes)
+    head, data, tail = frame.split(b"\n", 2)
+    assert head == b"event: signal"
+    assert json.loads(data[len(b"data: "):].decode("utf-8")) == payload
+    assert tail == b"\n"
+
+
+def test_fallback_stdlib_equivalente():
+    payload = {"a": 1, "b": [True, None, 1.5], "c": "ç"}
+    assert json.loads(serialization._dumps_stdlib(payload)) == json.loads(dumps(payload))
+
+
+def test_inteiro_grande_cai_para_stdlib():
+    assert json.loads(dumps({"n": 2 ** 70})) == {"n": 2 ** 70}
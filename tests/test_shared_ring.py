@@ -0,0 +1,98 @@
+import asyncio
+import os
+import uuid
+
+from services.result_ring import ResultRing
+from services.shared_ring import SharedFeed, SharedRing
+from services.sse_broadcaster import SSEBroadcaster
+
+
+def test_anel_conta_registros_sobrescritos_como_perdidos():
+    name = f"t{uuid.uuid4().hex[:10]}"
+    ring = SharedRing(name, slots=4, slot_size=64, create=True)
+    try:
+        for i in range(6):
+            ring.write(0, 1, f"r{i}".encode())
+        assert ring.write(0, 1, b"x" * 100) is None and ring.oversize == 1
+
+        reader = SharedRing(name)
+        records, nxt, lost = reader.read_from(0)
+        assert [p for _, _, p in records] == [b"r2", b"r3", b"r4", b"r5"]
+        assert (nxt, lost) == (6, 2)
+        reader.close()
+    finally:
+        ring.unlink()
+        ring.close()
+
+
+def test_consumidor_replica_historico_e_frames_do_produtor():
+    async def run():
+        name = f"t{uuid.uuid4().hex[:10]}"
+        prod_b, prod_h = SSEBroadcaster("p"), ResultRing(10)
+        cons_b, cons_h = SSEBroadcaster("p"), ResultRing(10)
+        producer = SharedFeed(name, event_slots=16, slot_size=1024, result_slots=16)
+        producer.add_channel("playnabet", prod_b, prod_h)
+        consumer = SharedFeed(name, event_slots=16, slot_size=1024, result_slots=16, poll_seconds=0.05)
+        consumer.add_channel("playnabet", cons_b, cons_h)
+        try:
+            producer.start_producer()
+            prod_h.append({"number": 3, "color": "red", "round_id": "r1", "timestamp": 1})
+            prod_b.publish("status", {"type": "status", "connected": True})
+
+            await consumer.start_consumer(attach_timeout=1)
+            assert cons_h.last_round_id() == "r1"  # histórico anterior reaplicado
+            assert consumer.last_frame("playnabet", "status").startswith(b"event: status")
+
+            sub = cons_b.subscribe()
+            prod_h.append({"number": 9, "color": "black", "round_id": "r2", "timestamp": 2})
+            frame = prod_b.publish("double_result", {"type": "double_result", "data": {"round_id": "r2"}})
+            batch = await asyncio.wait_for(sub.next_batch(), 1)
+            assert batch == frame and cons_h.last_round_id() == "r2"
+        finally:
+            await consumer.stop()
+            await producer.stop()
+            for ring in (SharedRing(f"{name}_events"), SharedRing(f"{name}_results")):
+                ring.unlink()
+                ring.close()
+            await prod_b.stop()
+            await cons_b.stop()
+
+    asyncio.run(run())
+
+
+def test_controle_do_consumidor_passa_pelo_produtor_e_estado_replicado():
+    async def run():
+        name = f"t{uuid.uuid4().hex[:10]}"
+        prod_b, cons_b = SSEBroadcaster("p"), SSEBroadcaster("p")
+        producer = SharedFeed(name, event_slots=16, slot_size=1024, result_slots=16)
+        producer.add_channel("playnabet", prod_b, ResultRing(10))
+        consumer = SharedFeed(name, event_slots=16, slot_size=1024, result_slots=16, poll_seconds=0.05)
+        consumer.add_channel("playnabet", cons_b, ResultRing(10))
+        seen = {"producer": [], "consumer": []}
+        producer.on_control = seen["producer"].append
+        consumer.on_control = seen["consumer"].append
+        try:
+            assert not producer.publish_control({"op": "x"})  # sem anel: nada a replicar
+            producer.start_producer()
+            await consumer.start_consumer(attach_timeout=1)
+
+            assert consumer.publish_control({"op": "user_invalidate", "email": "a@b.c"})
+            prod_b.publish("state", {"type": "state", "data": {"connected": True, "wins": 3}})
+            for _ in range(40):
+                if seen["consumer"] and consumer.last_payload("playnabet", "state"):
+                    break
+                await asyncio.sleep(0.05)
+            assert seen["producer"] == [{"op": "user_invalidate", "email": "a@b.c"}]
+            assert seen["consumer"] == seen["producer"]
+            assert consumer.last_payload("playnabet", "state")["data"]["wins"] == 3
+            assert producer.last_payload("playnabet", "state") is None
+        finally:
+            await consumer.stop()
+            await producer.stop()
+            for ring in (SharedRing(f"{name}_events"), SharedRing(f"{name}_results")):
+                ring.unlink()
+                ring.close()
+            await prod_b.stop()
+            await cons_b.stop()
+
+    asyncio.run(run())
@@ -0,0 +1,116 @@
+import asyncio
+
+from services.sse_broadcaster import SSEBroadcaster, format_sse
+
+
+def test_publish_codifica_uma_vez_e_entrega_a_todos():
+    async def run():
+        b = SSEBroadcaster("t", heartbeat_seconds=60)
+        subs = [b.subscribe() for _ in range(50)]
+        frame = b.publish("signal", {"type": "signal", "n": 1})
+        assert frame == format_sse("signal", {"type": "signal", "n": 1}, f"{b.epoch}.1")
+        assert all(list(s.frames) == [frame] for s in subs)
+        # mesmo objeto string em todos os assinantes (sem recodificar)
+        assert all(s.frames[0] is frame for s in subs)
+        await b.stop()
+        assert not b.subscribers
+
+    asyncio.run(run())
+
+
+def test_stream_acorda_com_eventos_e_agrupa_pendentes():
+    async def run():
+        b = SSEBroadcaster("t", heartbeat_seconds=60)
+        sub = b.subscribe()
+        gen = b.stream(sub, initial=b"init")
+        assert await gen.__anext__() == b"init"
+        nxt = asyncio.ensure_future(gen.__anext__())
+        await asyncio.sleep(0)
+        assert not nxt.done()
+        b.publish("a", 1)
+        b.publish("b", 2)
+        assert await nxt == format_sse("a", 1) + format_sse("b", 2)
+        await gen.aclose()
+        assert sub not in b.subscribers
+        await b.stop()
+
+    asyncio.run(run())
+
+
+def test_heartbeat_compartilhado():
+    async def run():
+        b = SSEBroadcaster("t", heartbeat_seconds=0.01)
+        s1, s2 = b.subscribe(), b.subscribe()
+        await asyncio.sleep(0.05)
+        # ping é coalescido: fica só o último por assinante
+        assert s1.latest[b"ping"].startswith(b"event: ping")
+        assert s1.depth == s2.depth == 1
+        await b.stop()
+
+    asyncio.run(run())
+
+
+def test_reconexao_com_last_event_id_reenvia_so_o_que_faltou():
+    async def run():
+        b = SSEBroadcaster("t", heartbeat_seconds=60, replay_size=3)
+        b.publish("status", {"connected": True})  # sem id: fora do replay
+        b.publish("double_result", {"n": 1})
+        f2 = b.publish("signal", {"n": 2})
+        f3 = b.publish("bet_result", {"n": 3})
+        assert b.resume(None) == b""
+        assert b.resume(f"{b.epoch}.1") == f2 + f3
+        assert b.resume(f"{b.epoch}.3") == b""
+
+        b.publish("double_result", {"n": 4})  # id 1 sai do anel
+        assert b.resume(f"{b.epoch}.1").startswith(b"event: resync")
+        assert b.resume("outraepoca.3").startswith(b"event: resync")
+
+        # Frames replicados de outro worker entram no replay pelo id do frame
+        other = SSEBroadcaster("t", heartbeat_seconds=60)
+        other.publish_frame(f3)
+        assert other.resume(f"{b.epoch}.3") == b""
+        assert b.stats()["replay"]["resyncs"] == 2
+        await b.stop()
+
+    asyncio.run(run())
+
+
+def test_fila_limitada_coalesce_estado_e_desconecta_cliente_lento():
+    async def run():
+        b = SSEBroadcaster("t", heartbeat_seconds=60, max_queue=3, max_lag_seconds=60)
+        lento = b.subscribe()
+        for i in range(5):
+            b.publish("status", {"connected": i % 2 == 0})
+            b.publish("ping", {"ts": i})
+        # status/ping: só o último de cada tipo fica pendente
+        assert lento.depth == 2
+        assert lento.latest[b"status"] == format_sse("status", {"connected": True})
+
+        for i in range(3):
+            b.publish("double_result", {"n": i})
+        assert lento in b.subscribers and b.stats()["queues"]["pending_max"] == 5
+        b.publish("double_result", {"n": 3})
+        assert lento not in b.subscribers
+        assert lento.evicted and lento.depth == 0
+        assert await lento.next_batch() is None
+        assert b.stats()["queues"]["evicted"] == 1
+
+        # Reconexão recupera pelo replay o que foi descartado
+        ids = [event_id for event_id, _ in b._replay]
+        assert b.resume(ids[0]).count(b"event: double_result") == 3
+        await b.stop()
+
+    asyncio.run(run())
+
+
+def test_desconecta_cliente_com_frames_parados_alem_do_atraso():
+    async def run():
+        b = SSEBroadcaster("t", heartbeat_seconds=60, max_queue=100, max_lag_seconds=0.01)
+        lento = b.subscribe()
+        b.publish("signal", {"n": 1})
+        await asyncio.sleep(0.02)
+        b.publish("signal", {"n": 2})
+        assert lento.evicted and not b.subscribers
+        await b.stop()
+
+    asyncio.run(run())
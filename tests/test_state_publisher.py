@@ -0,0 +1,51 @@
+import asyncio
+import json
+import time
+
+from services.sse_broadcaster import SSEBroadcaster
+from services.state_publisher import StatePublisher
+
+
+def test_publica_estado_apenas_quando_muda():
+    async def run():
+        b = SSEBroadcaster("t", heartbeat_seconds=60)
+        sub = b.subscribe()
+        state = {"wins": 1, "losses": 0}
+        pub = StatePublisher(b, lambda: dict(state))
+
+        pub.refresh()
+        pub.refresh()
+        assert b.published == 1
+        state["wins"] = 2
+        pub.refresh()
+        assert b.published == 2
+        assert pub.stats() == {"refreshes": 3, "published": 2}
+
+        # `state` é coalescido: o assinante só guarda o mais recente
+        assert sub.depth == 1
+        frame = sub.latest[b"state"]
+        assert frame.startswith(b"event: state\n")
+        payload = json.loads(frame.split(b"data: ", 1)[1])
+        assert payload["data"] == {"wins": 2, "losses": 0}
+        assert payload["serverTs"] > 0
+
+        assert pub.bootstrap().startswith(b"event: state\n")
+        await b.stop()
+
+    asyncio.run(run())
+
+
+def test_tempo_restante_calculado_no_envio():
+    async def run():
+        b = SSEBroadcaster("t", heartbeat_seconds=60)
+        now = int(time.time() * 1000)
+        pub = StatePublisher(b, lambda: {"lossCooldownUntil": now + 60000})
+        payload = json.loads(pub.bootstrap().split(b"data: ", 1)[1])
+        assert 59000 <= payload["cooldownRemainingMs"] <= 60000
+
+        # Estado replicado de minutos atrás: o restante sai do instante de agora
+        stale = json.loads(pub.bootstrap({"lossCooldownUntil": now - 1}).split(b"data: ", 1)[1])
+        assert stale["cooldownRemainingMs"] == 0
+        await b.stop()
+
+    asyncio.run(run())
@@ -0,0 +1,47 @@
+import gzip
+import os
+import time
+
+from starlette.requests import Request
+
+from services.static_assets import StaticAssets, IMMUTABLE
+
+
+def _request(qs=b"", **headers):
+    return Request({"type": "http", "method": "GET", "path": "/", "query_string": qs,
+                    "headers": [(k.replace("_", "-").encode(), v.encode()) for k, v in headers.items()]})
+
+
+def _assets(tmp_path, dev_reload=False):
+    (tmp_path / "app.js").write_text("console.log('x');\n" * 100)
+    (tmp_path / "index.html").write_text('<script src="app.js?v=2"></script>')
+    assets = StaticAssets(str(tmp_path), dev_reload=dev_reload)
+    assets.register("app.js", "app.js", "application/javascript")
+    assets.register("index.html", "index.html", "text/html; charset=utf-8")
+    return assets
+
+
+def test_gzip_etag_304_e_url_com_hash(tmp_path):
+    assets = _assets(tmp_path)
+    html = assets.response(_request(), "index.html").body.decode()
+    assert html == f'<script src="{assets.url("app.js")}"></script>'
+
+    r = assets.response(_request(accept_encoding="gzip"), "app.js")
+    assert r.headers["content-encoding"] == "gzip" and r.headers["cache-control"] == "no-cache"
+    assert gzip.decompress(r.body) == (tmp_path / "app.js").read_bytes()
+
+    qs = assets.url("app.js").split("?")[1].encode()
+    r2 = assets.response(_request(qs, accept_encoding="gzip", if_none_match=r.headers["etag"]), "app.js")
+    assert r2.status_code == 304 and r2.headers["cache-control"] == IMMUTABLE
+    assert assets.response(_request(), "missing.js") is None
+
+
+def test_dev_reload_reescreve_paginas(tmp_path):
+    assets = _assets(tmp_path, dev_reload=True)
+    old_url = assets.url("app.js") if assets.get("app.js") else None
+    path = tmp_path / "app.js"
+    path.write_text("console.log('y');\n")
+    os.utime(path, (time.time() + 5, time.time() + 5))
+    html = assets.response(_request(), "index.html").body.decode()
+    assert old_url not in html and assets.url("app.js") in html
+    assert assets.stats()["reloads"] == 1
@@ -0,0 +1,60 @@
+import asyncio
+
+from services import stats_queries, stats_rollups
+
+
+class _Cursor:
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def to_list(self, length=None):
+        return self.rows
+
+
+class _Collection:
+    """Coleção falsa: registra o pipeline e devolve linhas já agregadas"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.pipelines = []
+
+    def aggregate(self, pipeline):
+        self.pipelines.append(pipeline)
+        return _Cursor(self.rows)
+
+
+def test_pipeline_projeta_e_ajusta_max_attempts():
+    source = stats_queries.HistorySource(None)
+    p = stats_queries.grouped_pipeline(source, {"platform": "verabet"}, "$hour", 2)
+    assert [list(stage)[0] for stage in p] == ["$match", "$project", "$group"]
+    win = p[2]["$group"]["wins"]["$sum"]["$cond"][0]["$and"]
+    assert {"$lte": [{"$ifNull": ["$attemptsUsed", 1]}, 2]} in win
+
+
+def test_by_hour_preenche_24_horas():
+    coll = _Collection([{"_id": 3, "total": 4, "wins": 1}])
+    rows = asyncio.run(stats_queries.by_hour(stats_queries.HistorySource(coll), "all", 30, 3))
+    assert len(rows) == 24
+    assert rows[3] == {"hour": 3, "total": 4, "wins": 1, "rate": 25.0}
+    assert rows[0]["total"] == 0
+    assert "platform" not in coll.pipelines[0][0]["$match"]
+
+
+def test_overview_sem_dados():
+    out = asyncio.run(stats_queries.overview(stats_queries.HistorySource(_Collection([])), "playnabet", 7, 3))
+    assert out == {"total": 0, "wins": 0, "losses": 0, "rate": 0, "roi": 0}
+
+
+def test_rollup_update_e_rebuild_geram_o_mesmo_bucket():
+    doc = {"platform": "verabet", "date": "2026-01-02", "hour": 14, "patternKey": "p1",
+           "confLabel": "alta", "result": "win", "attemptsUsed": 2}
+    flt, update = stats_rollups.rollup_update(doc)
+    assert update["$inc"] == {"total": 1, "wins": 1, "winsByAttempt.2": 1}
+
+    key = {k: doc[k] for k in ("platform", "date", "hour", "patternKey", "confLabel")}
+    rows = [{"_id": {**key, "result": "win", "attemptsUsed": 2}, "count": 3},
+            {"_id": {**key, "result": "loss", "attemptsUsed": 3}, "count": 2}]
+    docs = stats_rollups.fold_rebuild_rows(rows)
+    assert list(docs) == [flt["_id"]]
+    assert docs[flt["_id"]]["total"] == 5
+    assert docs[flt["_id"]]["winsByAttempt"] == {"2": 3}
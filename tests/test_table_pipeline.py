@@ -0,0 +1,145 @@
+import asyncio
+
+from services.playnabet_pipeline import AlertGovernor, PlayNaBetPipeline
+from services.table_pipeline import TablePipeline, TableRegistry
+
+
+class FakeStream:
+    def __init__(self):
+        self.tokens = []
+
+    def push(self, token):
+        self.tokens.append(token)
+
+
+class FakeEngine:
+    """Sinal fixo em vermelho sempre que chamado"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def novo_stream(self):
+        return FakeStream()
+
+    def gerar_sinal_stream(self, stream):
+        self.calls += 1
+        return {"id": str(self.calls), "color": "red", "maxAttempts": 2, "confLabel": "alta"}
+
+
+def _result(i, color):
+    return {"round_id": f"r{i}", "number": 1 if color == "red" else 8, "color": color, "timestamp": i * 1000}
+
+
+def test_mesas_independentes_sinal_resolucao_e_cooldown():
+    async def run():
+        resolved = []
+        a = TablePipeline("a", lambda h: None, FakeEngine(), on_resolved=lambda b, r: resolved.append((b["id"], r)))
+        b = TablePipeline("b", lambda h: None, FakeEngine())
+        registry = TableRegistry()
+        registry.add(a)
+        registry.add(b)
+
+        for i, color in enumerate(["black", "black", "black"]):
+            a.on_message(_result(i, color))
+        assert len(a.pending_bets) == 1 and a.pending_bets[0]["id"] == "1"
+        assert len(b.history) == 0 and not b.pending_bets  # estado isolado por mesa
+
+        a.on_message(_result(2, "black"))  # duplicata ignorada
+        assert len(a.history) == 3
+
+        a.on_message(_result(3, "black"))
+        a.on_message(_result(4, "black"))  # segunda tentativa perdida -> loss + cooldown
+        assert resolved == [("1", "loss")]
+        assert a.loss_cooldown_until > 0 and not a.pending_bets
+        a.on_message(_result(5, "red"))
+        assert not a.pending_bets  # em cooldown: sem novo sinal
+
+        st = registry.stats()
+        assert st["a"]["losses"] == 1 and st["a"]["metrics"]["results"] == 6
+        assert st["a"]["metrics"]["messages"] == 7 and st["b"]["metrics"]["messages"] == 0
+        await registry.stop_all()
+
+    asyncio.run(run())
+
+
+def test_playnabet_governador_dedupe_e_estado():
+    sinal = {"id": "x", "color": "#90ee90", "chance": 70, "patternKey": "p", "gales_permitidos": 1,
+             "suggestedBet": {"color": "red", "numbers": [1, 2], "protect_white": True}}
+    t = PlayNaBetPipeline("pb", lambda h: None, None, calibrate=False, block_while_pending=False)
+    t.find_signal = lambda: dict(sinal)
+
+    for i in range(5):
+        t.on_message({"number": 8 + i, "timestamp": i * 3000, "round_id": f"r{i}"})
+    t.on_message({"number": 12, "timestamp": 12500, "round_id": "r4b"})  # mesmo número em <2s
+    assert len(t.history) == 5 and t.round_index == 5
+
+    pb = t.pending_bets[0]
+    assert pb["id"].startswith("pb_") and pb["color"] == "red" and pb["attemptsLeft"] == 2
+    assert pb["protect_white"] and t.governor.cooldown_contador == 4  # cooldown básico bloqueia o próximo
+
+    t.on_message({"number": 1, "timestamp": 20000, "round_id": "r5"})  # vermelho -> win
+    assert not t.pending_bets and t.signal_stats["geral"]["acertos"] == 1
+    assert t.last_win_ts is not None and t.state_snapshot()["currentStreak"] == 1
+
+    # Duas perdas seguidas ativam o modo stop; o estado empurrado reflete isso
+    for _ in range(2):
+        t.pending_bets.append({"id": "l", "color": "red", "attemptsLeft": 1, "createdRound": -1})
+        t.on_message({"number": 9, "timestamp": t.history.last_timestamp() + 3000, "round_id": f"l{t.round_index}"})
+    snap = t.state_snapshot()
+    assert snap["losses"] == 2 and snap["modoStop"] and snap["consecutiveLossesCount"] == 1
+    assert snap["lastLossTime"] == t.last_loss_ts and t.last_loss_ts >= t.last_win_ts
+
+    doc = t.to_doc()
+    t.reset()
+    assert not t.history and t.signal_stats["geral"]["total"] == 0 and not t.governor.modo_stop
+    t.load_doc(doc)
+    assert t.signal_stats["geral"]["total"] == 3 and len(t.history) == 8
+
+
+def test_duplicata_nao_conta_rodada_nem_consome_cooldown():
+    t = PlayNaBetPipeline("pb", lambda h: None, None, calibrate=False)
+    t.find_signal = lambda: None
+    for i in range(3):
+        t.on_message({"number": 8 + i, "timestamp": i * 3000, "round_id": f"r{i}"})
+    t.governor.activate("basico")
+    t.pending_bets.append({"id": "p", "color": "red", "attemptsLeft": 2, "createdRound": t.round_index + 1})
+
+    t.on_message({"number": 10, "timestamp": 6000, "round_id": "r2"})  # mesmo round_id
+    t.on_message({"number": 10, "timestamp": 7000, "round_id": "r2b"})  # mesmo número em <2s
+    assert t.round_index == 3 and len(t.history) == 3
+    assert t.governor.cooldown_contador == t.governor.COOLDOWN_BASIC
+    assert t.pending_bets[0]["attemptsLeft"] == 2 and t.metrics.messages == 5
+
+    # A primeira rodada nova é a do pendente: ainda não avalia
+    t.on_message({"number": 9, "timestamp": 12000, "round_id": "r3"})
+    assert t.round_index == 4 and t.pending_bets[0].get("attemptsUsed") is None
+    assert t.governor.cooldown_contador == t.governor.COOLDOWN_BASIC - 1
+
+
+def test_compensacao_do_modo_stop():
+    g = AlertGovernor()
+    g.activate("stop")
+    assert not g.allow({"chance": 80}, 1)  # sem compensação acumulada
+    for _ in range(g.STOP_DURATION_ROUNDS):
+        g.tick()
+    assert not g.modo_stop and g.compensation_remaining == 1
+
+    # Novo stop: o sinal perdido da pausa anterior libera um sinal forte
+    g.activate("stop")
+    assert not g.allow({"chance": 60}, 20)  # fraco: continua suprimido
+    assert g.allow({"chance": 70}, 21) and g.compensation_remaining == 0
+    assert not g.allow({"chance": 90}, 22)  # compensação esgotada
+    assert g.sinais_perdidos_por_pausa == 3
+
+
+def test_tentativas_do_pendente():
+    casos = [
+        ({"gales_permitidos": 0, "maxAttempts": 3}, 1),  # gales têm prioridade
+        ({"gales_permitidos": 2}, 3),
+        ({"maxAttempts": 2}, 2),
+        ({}, 4),  # padrão da mesa
+    ]
+    for cls in (TablePipeline, PlayNaBetPipeline):
+        t = cls("t", lambda h: None, None, max_attempts=4)
+        for extra, esperado in casos:
+            assert t._pending_bet({"id": "s", "color": "red", **extra})["attemptsLeft"] == esperado
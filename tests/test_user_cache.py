@@ -0,0 +1,26 @@
+import time
+
+from services.user_cache import UserCache
+
+
+def test_hit_ttl_e_lru():
+    cache = UserCache(max_entries=2, ttl_seconds=0.05)
+    assert cache.get("a@x") is None
+    cache.put("a@x", {"email": "a@x", "bankroll": 10})
+    assert cache.get("a@x")["bankroll"] == 10
+    cache.put("b@x", {"email": "b@x"})
+    cache.get("a@x")
+    cache.put("c@x", {"email": "c@x"})  # "b" é o menos recente
+    assert cache.get("b@x") is None and cache.get("a@x") is not None
+    time.sleep(0.06)
+    assert cache.get("a@x") is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_invalidacao_descarta_leitura_antiga_em_andamento():
+    cache = UserCache()
+    cache.put("a@x", {"bankroll": 10})
+    generation = cache.generation  # leitura do banco começa aqui (miss)
+    cache.invalidate("a@x")  # set_bankroll concorrente
+    cache.put("a@x", {"bankroll": 10}, generation)
+    assert cache.get("a@x") is None
@@ -0,0 +1,72 @@
+import asyncio
+
+from services.verabet_client import CadenceScheduler, VeraBetClient, parse_created_at
+
+
+def _window(ids):
+    """Janela da API: mais recente primeiro"""
+    return [{"id": i, "number": i % 15, "created_at": ""} for i in sorted(ids, reverse=True)]
+
+
+def test_entrega_todas_as_rodadas_novas_em_ordem_e_conta_gaps():
+    client = VeraBetClient(lambda data: None)
+
+    # Primeiro poll: só a mais recente (histórico inicial vem de fetch_initial_history)
+    assert [r["id"] for r in client.new_rounds(_window(range(1, 11)))] == [10]
+    assert client.new_rounds(_window(range(1, 11))) == []
+
+    # Três rodadas entre dois polls: todas, da mais antiga para a mais nova
+    assert [r["id"] for r in client.new_rounds(_window(range(4, 14)))] == [11, 12, 13]
+    assert client.gaps == 0
+
+    # Poll travado por mais rodadas do que a janela cobre
+    assert [r["id"] for r in client.new_rounds(_window(range(30, 40)))] == list(range(30, 40))
+    assert client.gaps == 1
+
+
+def test_agendador_aprende_periodo_e_adensa_perto_do_resultado():
+    sched = CadenceScheduler(fallback=2.0, dense=0.5, sparse=6.0, guard=2.0)
+    assert sched.next_delay(now=0) == 2.0  # sem cadência aprendida
+
+    for i in range(4):
+        sched.on_round(created_ms=i * 30_000, now=i * 30.0, wall_ms=i * 30_000 + 400)
+    assert sched.period == 30.0
+
+    anchor = 90.0
+    assert sched.next_delay(now=anchor + 1) == 6.0  # meio da rodada: esparso
+    assert sched.next_delay(now=anchor + 25) == 3.0  # até o início da janela densa
+    assert sched.next_delay(now=anchor + 29) == 0.5  # perto do previsto: denso
+    assert sched.next_delay(now=anchor + 70) == 2.0  # cadência perdida
+
+    delays = [sched.on_error() for _ in range(6)]
+    assert all(0 < d <= 30.0 for d in delays) and delays[-1] >= 15.0
+    assert sched.stats()["detect_lag_ms_p50"] == 0
+
+
+def test_status_desconectado_apos_falhas_e_created_at_ilegivel():
+    polls = [None, None, None, None, _window([1]),
+             [{"id": 2, "number": 3, "created_at": "ontem"}] + _window([1]),
+             [{"id": 3, "number": 9, "created_at": "2026-01-02 03:04:05"}, {"id": 2, "number": 3, "created_at": "ontem"}]]
+    messages, rounds = [], []
+
+    async def run():
+        client = VeraBetClient(messages.append)
+        client.scheduler = CadenceScheduler(fallback=0.001, dense=0.001, sparse=0.001, guard=0, backoff_max=0.001)
+        client.scheduler.on_round = lambda created_ms, **kw: rounds.append(created_ms)
+
+        async def fetch_results():
+            if not polls:
+                client.running = False
+                return []
+            return polls.pop(0)
+
+        client.fetch_results = fetch_results
+        await client.poll_loop()
+
+    asyncio.run(run())
+    status = [m["connected"] for m in messages if m.get("type") == "status"]
+    assert status == [True, False, True, False]  # início, 3 falhas, volta, fim
+    parsed = [m for m in messages if m.get("type") != "status"]
+    assert [m["number"] for m in parsed] == [1, 3, 9]
+    # created_at vazio/ilegível: não ensina o período
+    assert rounds == [None, None, parse_created_at("2026-01-02 03:04:05")] and rounds[-1] is not None
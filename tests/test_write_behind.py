@@ -0,0 +1,95 @@
+import asyncio
+
+from services.write_behind import WriteBehind
+
+
+def test_coalesce_alteracoes_na_janela_e_flush():
+    async def run():
+        state = {"n": 0}
+        written = []
+
+        async def write():
+            written.append(state["n"])
+            await asyncio.sleep(0.01)
+
+        wb = WriteBehind("t", write, window_seconds=0.05)
+        for i in range(1, 11):
+            state["n"] = i
+            wb.mark_dirty()
+        await asyncio.sleep(0.1)
+        assert written == [10]  # uma escrita com o estado final
+
+        state["n"] = 11
+        wb.mark_dirty()
+        await wb.flush()  # sem esperar a janela
+        assert written == [10, 11]
+        assert not wb.dirty and wb.stats()["writes"] == 2 and wb.stats()["requests"] == 11
+
+    asyncio.run(run())
+
+
+def test_alteracao_durante_escrita_gera_nova_rodada():
+    async def run():
+        inflight = []
+        written = []
+
+        async def write():
+            inflight.append(1)
+            assert len(inflight) == 1  # no máximo uma escrita em andamento
+            await asyncio.sleep(0.03)
+            written.append(1)
+            inflight.pop()
+
+        wb = WriteBehind("t", write, window_seconds=0.01)
+        wb.mark_dirty()
+        while not inflight:
+            await asyncio.sleep(0.005)
+        wb.mark_dirty()  # escrita em andamento
+        for _ in range(100):
+            if len(written) == 2:
+                break
+            await asyncio.sleep(0.01)
+        assert len(written) == 2
+
+    asyncio.run(run())
+
+
+def test_falha_na_escrita_volta_a_sujar_e_repete_com_backoff():
+    async def run():
+        attempts = []
+
+        async def write():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise RuntimeError("mongo fora do ar")
+
+        wb = WriteBehind("t", write, window_seconds=0.01, retry_seconds=0.1)
+        wb.mark_dirty()
+        await asyncio.sleep(0.05)
+        assert len(attempts) == 1 and wb.dirty  # falhou: estado não foi descartado
+        await asyncio.sleep(0.15)
+        assert len(attempts) == 2 and not wb.dirty
+        stats = wb.stats()
+        assert stats["writes"] == 1 and stats["failures"] == 1 and stats["retrying"] == 0
+
+        # flush do shutdown também repete a escrita que falhou
+        attempts.clear()
+        wb.mark_dirty()
+        await wb.flush()
+        assert len(attempts) == 2 and not wb.dirty
+
+    asyncio.run(run())
+
+
+def test_desiste_apos_max_retries_sem_perder_estado():
+    async def run():
+        async def write():
+            raise RuntimeError("falha")
+
+        wb = WriteBehind("t", write, window_seconds=0.001, max_retries=2, retry_seconds=0.001)
+        wb.mark_dirty()
+        await asyncio.sleep(0.05)
+        assert wb._task.done() and wb.dirty
+        assert wb.stats()["failures"] == 3 and wb.stats()["writes"] == 0
+
+    asyncio.run(run())
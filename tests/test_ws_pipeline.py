@@ -0,0 +1,122 @@
+import asyncio
+
+from services.ws_client import WSClient
+
+
+def make_client(received, **kw):
+    client = WSClient("ws://invalid", received.append, **kw)
+    client.queue = asyncio.Queue(maxsize=client.queue_size)
+    return client
+
+
+def test_drop_oldest_mantem_frames_mais_recentes():
+    async def run():
+        received = []
+        client = make_client(received, queue_size=3, overflow="drop_oldest")
+        for i in range(5):
+            await client._enqueue(f'{{"n": {i}}}')
+        assert client.metrics["dropped"] == 2
+        client.worker = asyncio.ensure_future(client._process())
+        await client.stop()
+        assert [d["n"] for d in received] == [2, 3, 4]
+
+    asyncio.run(run())
+
+
+def test_drop_newest_descarta_excedente():
+    async def run():
+        received = []
+        client = make_client(received, queue_size=2, overflow="drop_newest")
+        for i in range(4):
+            await client._enqueue({"n": i})
+        client.worker = asyncio.ensure_future(client._process())
+        await client.stop()
+        assert [d["n"] for d in received] == [0, 1]
+        assert client.stats()["dropped"] == 2
+
+    asyncio.run(run())
+
+
+def test_callback_lento_nao_bloqueia_recepcao_e_stop_drena():
+    async def run():
+        received = []
+
+        def slow(data):
+            import time
+            time.sleep(0.002)
+            received.append(data)
+
+        client = WSClient("ws://invalid", slow, queue_size=100)
+        client.queue = asyncio.Queue(maxsize=100)
+        client.worker = asyncio.ensure_future(client._process())
+        for i in range(50):
+            await client._enqueue(b'lixo {"n": %d} fim' % i)
+        await client.stop()
+        assert [d["n"] for d in received] == list(range(50))
+        stats = client.stats()
+        assert stats["processed"] == 50 and stats["depth"] == 0
+
+    asyncio.run(run())
+
+
+def test_padrao_block_nao_descarta_e_descarte_e_registrado(caplog):
+    async def run():
+        received = []
+        client = make_client(received, queue_size=2)
+        assert client.overflow == "block"
+        client.worker = asyncio.ensure_future(client._process())
+        for i in range(10):
+            await client._enqueue({"n": i})
+        await client.stop()
+        assert [d["n"] for d in received] == list(range(10))
+        assert client.stats()["dropped"] == 0
+
+        lossy = make_client([], queue_size=1, overflow="drop_newest")
+        await lossy._enqueue({"n": 0})
+        await lossy._enqueue({"n": 1})
+
+    with caplog.at_level("WARNING", logger="services.ws_client"):
+        asyncio.run(run())
+    assert any("frame descartado" in r.getMessage() for r in caplog.records)
+
+
+def test_backlog_lento_nao_trava_recepcao_nem_ping():
+    import time
+    import websockets
+
+    async def run():
+        received = []
+        probe = {}
+        done = asyncio.Event()
+
+        async def server(ws):
+            for i in range(60):
+                await ws.send(f'{{"n": {i}}}')
+            await asyncio.sleep(0.05)
+            started = time.perf_counter()
+            pong = await ws.ping()
+            await asyncio.wait_for(pong, 2)
+            probe["pong_s"] = time.perf_counter() - started
+            probe["processed"] = len(received)
+            probe["received"] = client.metrics["received"]
+            await done.wait()
+
+        def slow(data):
+            time.sleep(0.01)  # ~0,6s de backlog
+            received.append(data)
+
+        async with websockets.serve(server, "127.0.0.1", 0) as srv:
+            port = srv.sockets[0].getsockname()[1]
+            client = WSClient(f"ws://127.0.0.1:{port}", slow, queue_size=100)
+            await client.start()
+            while "pong_s" not in probe:
+                await asyncio.sleep(0.01)
+            done.set()
+            await client.stop()
+
+        # Pong respondido e todos os frames já recebidos enquanto o backlog ainda era processado
+        assert probe["processed"] < 60 and probe["received"] == 60
+        assert probe["pong_s"] < 0.2
+        assert [d["n"] for d in received if "n" in d] == list(range(60))
+
+    asyncio.run(run())
@@ -9,6 +9,7 @@ const API_BASE_URL =
     : "";
 
 let eventSource = null;
+let lastEventId = null; // id do último evento SSE recebido (replay na reconexão)
 let results = [];
 let stats = {
   total: 0,
@@ -98,8 +99,7 @@ function registrar_resultado(acertou) {
       ativar_cooldown("stop");
     }
   }
-  // Buscar dados atualizados do backend (inclui contagem correta de sequências)
-  fetchUpdatedStats();
+  // Contagem correta de sequências chega no evento SSE `state`
 }
 
 function updateWinStreakUI(streakHistory = []) {
@@ -184,8 +184,8 @@ document.addEventListener("DOMContentLoaded", async () => {
   await initializeApp();
 });
 
-async function initializeApp() {
-  // Buscar histórico inicial
+// Histórico recente (carga inicial ou quando o replay SSE não cobre o intervalo perdido)
+async function loadResultsSnapshot() {
   try {
     const resp = await fetch(`${API_BASE_URL}/verabet/api/results?limit=50`);
     const data = await resp.json();
@@ -195,49 +195,24 @@ async function initializeApp() {
   } catch (e) {
     console.error("Erro ao buscar histórico:", e);
   }
-  
-  // Buscar stats
-  try {
-    const sresp = await fetch(`${API_BASE_URL}/verabet/api/signal_stats`);
-    const sdata = await sresp.json();
-    if (sdata && sdata.ok) {
-      winCount = parseInt(sdata.wins || 0);
-      lossCount = parseInt(sdata.losses || 0);
-      lastWinTimestamp = sdata.lastWinTime || null;
-      lastLossTimestamp = sdata.lastLossTime || null;
-      if (lastWinTimestamp) setLastTimeDom("win", lastWinTimestamp);
-      if (lastLossTimestamp) setLastTimeDom("loss", lastLossTimestamp);
-    }
-  } catch (e) {}
-  
-  // Buscar win streaks
-  try {
-    const wresp = await fetch(`${API_BASE_URL}/verabet/api/win_streaks`);
-    const wdata = await wresp.json();
-    if (wdata && wdata.ok) {
-      currentWinStreak = wdata.currentStreak || 0;
-      maxWinStreak = wdata.maxStreak || 0;
-      consecutiveLossesCount = wdata.consecutiveLossesCount || 0;
-      lastConsecutiveLossTime = wdata.lastConsecutiveLossTime || null;
-      const streakHistory = wdata.streakHistory || [];
-      updateWinStreakUI(streakHistory);
-      
-      const avgEl = document.getElementById("avgWinsBetweenLosses");
-      if (avgEl) avgEl.textContent = (wdata.averageWinsBetweenLosses || 0).toFixed(2);
-    }
-  } catch (e) {}
+}
+
+async function resyncFromSnapshot() {
+  await loadResultsSnapshot();
+  updateStats();
+  renderResults();
+}
+
+async function initializeApp() {
+  // Buscar histórico inicial
+  await loadResultsSnapshot();
   
   // Buscar dicas de padrões (melhor e pior)
   try {
     await loadPatternTips();
   } catch (e) {}
   
-  // Iniciar verificação de cooldown
-  try {
-    checkCooldownStatus();
-    setInterval(checkCooldownStatus, 5000); // Verificar a cada 5 segundos
-  } catch (e) {}
-  
+  // Cooldown, placar e sequências: snapshot inicial e mudanças via SSE (`state`)
   connectSSE();
   updateStats();
   renderResults();
@@ -459,22 +434,18 @@ async function logout() {
   window.location.href = "/auth";
 }
 
-// Verificar status do cooldown e atualizar banner
-async function checkCooldownStatus() {
+// Atualizar banner de cooldown a partir dos segundos restantes (0 = inativo)
+function renderCooldown(remainingSecs) {
   try {
-    const resp = await fetch(`${API_BASE_URL}/api/cooldown_status?platform=verabet`);
-    const data = await resp.json();
-    
     const banner = document.getElementById("cooldownBanner");
     const timer = document.getElementById("cooldownTimer");
     
     if (!banner || !timer) return;
     
-    if (data.ok && data.active) {
+    if (remainingSecs > 0) {
       // Cooldown ativo - mostrar banner
       banner.style.display = "block";
       
-      const remainingSecs = data.remaining_secs;
       const mins = Math.floor(remainingSecs / 60);
       const secs = remainingSecs % 60;
       timer.textContent = `${mins}:${secs.toString().padStart(2, '0')}`;
@@ -514,7 +485,7 @@ async function checkCooldownStatus() {
       }
     }
   } catch (e) {
-    console.error("Erro ao verificar cooldown:", e);
+    console.error("Erro ao atualizar cooldown:", e);
   }
 }
 
@@ -524,7 +495,9 @@ function connectSSE() {
     eventSource.close();
   }
   
-  eventSource = new EventSource(`${API_BASE_URL}/verabet/events`);
+  // Reconexão manual: o servidor reenvia os eventos perdidos desde lastEventId
+  const query = lastEventId ? `?lastEventId=${encodeURIComponent(lastEventId)}` : "";
+  eventSource = new EventSource(`${API_BASE_URL}/verabet/events${query}`);
   
   eventSource.addEventListener("status", (event) => {
     const data = JSON.parse(event.data);
@@ -532,6 +505,7 @@ function connectSSE() {
   });
   
   eventSource.addEventListener("double_result", (event) => {
+    if (event.lastEventId) lastEventId = event.lastEventId;
     const payload = JSON.parse(event.data);
     if (payload.type === "double_result" && payload.data) {
       handleNewResult(payload.data);
@@ -539,6 +513,7 @@ function connectSSE() {
   });
   
   eventSource.addEventListener("signal", (event) => {
+    if (event.lastEventId) lastEventId = event.lastEventId;
     const payload = JSON.parse(event.data);
     if (payload.type === "signal" && payload.data) {
       handleBackendSignal(payload.data);
@@ -546,12 +521,25 @@ function connectSSE() {
   });
   
   eventSource.addEventListener("bet_result", (event) => {
+    if (event.lastEventId) lastEventId = event.lastEventId;
     const payload = JSON.parse(event.data);
     if (payload.type === "bet_result" && payload.data) {
       handleBetResult(payload.data);
     }
   });
   
+  eventSource.addEventListener("state", (event) => {
+    const payload = JSON.parse(event.data);
+    if (payload.type === "state" && payload.data) {
+      applyServerState(payload);
+    }
+  });
+  
+  // Eventos perdidos já saíram do buffer do servidor: recarregar o snapshot
+  eventSource.addEventListener("resync", () => {
+    resyncFromSnapshot();
+  });
+  
   eventSource.addEventListener("ping", () => {
     console.log("Ping recebido");
   });
@@ -611,57 +599,44 @@ function evaluatePendingSignals(newResult) {
 
 function updateHistoryWithOutcome(signalUiId, outcome, attemptsUsed, resolvedAt, color) {
   console.log(`Signal ${signalUiId} resolved as ${outcome.toUpperCase()} after ${attemptsUsed} attempt(s)`);
-  // Não incrementar localmente - buscar valores atualizados do backend
-  fetchUpdatedStats();
+  // Não incrementar localmente - o backend publica o placar no evento SSE `state`
 }
 
-async function fetchUpdatedStats() {
-  // Buscar stats atualizados do backend para evitar dupla contagem
-  try {
-    const sresp = await fetch(`${API_BASE_URL}/verabet/api/signal_stats`);
-    const sdata = await sresp.json();
-    if (sdata && sdata.ok) {
-      winCount = parseInt(sdata.wins || 0);
-      lossCount = parseInt(sdata.losses || 0);
-      lastWinTimestamp = sdata.lastWinTime || null;
-      lastLossTimestamp = sdata.lastLossTime || null;
-      if (lastWinTimestamp) setLastTimeDom("win", lastWinTimestamp);
-      if (lastLossTimestamp) setLastTimeDom("loss", lastLossTimestamp);
-      
-      // Atualizar DOM
-      const winsEl = document.getElementById("statWins");
-      const lossesEl = document.getElementById("statLosses");
-      const winsPctEl = document.getElementById("statWinsPct");
-      if (winsEl) winsEl.textContent = String(winCount);
-      if (lossesEl) lossesEl.textContent = String(lossCount);
-      if (winsPctEl) {
-        const total = (winCount || 0) + (lossCount || 0);
-        const pct = total > 0 ? Math.round((winCount / total) * 100) : 0;
-        winsPctEl.textContent = `${pct}%`;
-      }
-    }
-  } catch (e) {
-    console.error("Erro ao buscar stats atualizados:", e);
-  }
+// Aplicar o estado empurrado pelo servidor (evento SSE `state`)
+function applyServerState(payload) {
+  const st = payload.data;
+  // Tempo restante calculado pelo servidor no envio; a contagem segue localmente
+  const remainingMs = Math.max(0, payload.cooldownRemainingMs || 0);
+  renderCooldown(Math.floor(remainingMs / 1000));
   
-  // Buscar win streaks atualizados
-  try {
-    const wresp = await fetch(`${API_BASE_URL}/verabet/api/win_streaks`);
-    const wdata = await wresp.json();
-    if (wdata && wdata.ok) {
-      currentWinStreak = wdata.currentStreak || 0;
-      maxWinStreak = wdata.maxStreak || 0;
-      consecutiveLossesCount = wdata.consecutiveLossesCount || 0;
-      lastConsecutiveLossTime = wdata.lastConsecutiveLossTime || null;
-      const streakHistory = wdata.streakHistory || [];
-      updateWinStreakUI(streakHistory);
-      
-      const avgEl = document.getElementById("avgWinsBetweenLosses");
-      if (avgEl) avgEl.textContent = (wdata.averageWinsBetweenLosses || 0).toFixed(2);
-    }
-  } catch (e) {
-    console.error("Erro ao buscar win streaks atualizados:", e);
+  updateConnectionStatus(!!st.connected);
+  
+  winCount = parseInt(st.wins || 0);
+  lossCount = parseInt(st.losses || 0);
+  lastWinTimestamp = st.lastWinTime || null;
+  lastLossTimestamp = st.lastLossTime || null;
+  if (lastWinTimestamp) setLastTimeDom("win", lastWinTimestamp);
+  if (lastLossTimestamp) setLastTimeDom("loss", lastLossTimestamp);
+  
+  const winsEl = document.getElementById("statWins");
+  const lossesEl = document.getElementById("statLosses");
+  const winsPctEl = document.getElementById("statWinsPct");
+  if (winsEl) winsEl.textContent = String(winCount);
+  if (lossesEl) lossesEl.textContent = String(lossCount);
+  if (winsPctEl) {
+    const total = (winCount || 0) + (lossCount || 0);
+    const pct = total > 0 ? Math.round((winCount / total) * 100) : 0;
+    winsPctEl.textContent = `${pct}%`;
   }
+  
+  currentWinStreak = st.currentStreak || 0;
+  maxWinStreak = st.maxStreak || 0;
+  consecutiveLossesCount = st.consecutiveLossesCount || 0;
+  lastConsecutiveLossTime = st.lastConsecutiveLossTime || null;
+  updateWinStreakUI(st.streakHistory || []);
+  
+  const avgEl = document.getElementById("avgWinsBetweenLosses");
+  if (avgEl) avgEl.textContent = (st.averageWinsBetweenLosses || 0).toFixed(2);
 }
 
 function updatePendingStatusUI() {